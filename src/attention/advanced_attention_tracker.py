@@ -17,24 +17,29 @@ from imutils import face_utils
 from imutils.video import VideoStream
 
 from yolo11_phone_detector import YOLOv11PhoneDetector
+from attention_metrics import AttentionMetrics
+from frame_source import FrameSource
+from pipeline import Pipeline, Stage
+from attention_stages import (
+    FACE_DEFAULTS, FACE_OUTPUTS, PREVIEW_STAGE, create_face_mesh, hand_proximity_stage, head_pose_stage,
+    mediapipe_face_analysis, mediapipe_stages, phone_stages, posture_stage, preview_stage,
+    update_eye_closure, weighted_score
+)
+from frame_timing import FPSCounter
+from quality_controller import QualityController
+from overlay_renderer import OverlayPanel, OverlayRenderer, status_text_color
 
-class FPSCounter:
-    """Optimized FPS counter"""
-    def __init__(self):
-        self.frame_count = 0
-        self.start_time = time.time()
-        self.fps_history = []
-        
-    def get_fps(self):
-        self.frame_count += 1
-        elapsed = time.time() - self.start_time
-        if elapsed > 0:
-            fps = self.frame_count / elapsed
-            self.fps_history.append(fps)
-            if len(self.fps_history) > 10:
-                self.fps_history.pop(0)
-            return np.mean(self.fps_history)
-        return 0.0
+# (status message key, panel label, text when the message is missing)
+STATUS_ITEMS = (
+    ("face", "FACE", "No face detected"),
+    ("orientation", "ORIENTATION", "Looking forward"),
+    ("eye", "EYE", "Eyes open"),
+    ("mouth", "MOUTH", "Normal"),
+    ("phone", "PHONE", "No phone detected"),    # Separate phone detection
+    ("hand", "HAND", "No hand near face"),      # Separate hand detection
+    ("posture", "POSTURE", "Good posture"),
+    ("overall", "OVERALL", "Focused"),
+)
 
 class AdvancedAttentionTracker:
     """
@@ -43,15 +48,21 @@ class AdvancedAttentionTracker:
     """
     
     def __init__(self, camera_index: int = 0, frame_width: int = 640, 
-                 frame_height: int = 480):
+                 frame_height: int = 480, source: Optional[FrameSource] = None,
+                 headless: bool = True, target_fps: Optional[float] = None,
+                 cpu_budget: Optional[float] = None):
         self.camera_index = camera_index
-        self.frame_width = frame_width
+        self.source = source  # Replaces the webcam when given (video file, images, synthetic)
+        self.frame_width = frame_width  # Capture size (reported to clients)
         self.frame_height = frame_height
+        # Size of the frame being processed (smaller when the quality controller downscales)
+        self.process_width = frame_width
+        self.process_height = frame_height
         self.frame_count = 0
         
         # Initialize camera
         if not self.initialize_camera():
-            raise IOError("Cannot open webcam")
+            raise IOError("Cannot open webcam" if source is None else f"Cannot open frame source: {source}")
         
         # Initialize dlib face detector and predictor
         self.detector = None
@@ -73,13 +84,7 @@ class AdvancedAttentionTracker:
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        self.face_mesh = create_face_mesh(self)
         
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
@@ -100,11 +105,6 @@ class AdvancedAttentionTracker:
         # Performance optimization
         self.fps_counter = FPSCounter()
         self.detection_frame_skip = 5  # Check phone less frequently to reduce false positives
-        self.last_phone_results = []
-        
-        # Threading for detection
-        self.detection_thread = None
-        self.detection_results_lock = threading.Lock()
         
         # Advanced thresholds
         self.eye_ar_threshold = 0.20
@@ -125,12 +125,37 @@ class AdvancedAttentionTracker:
         # Eye closure counter
         self.eye_closure_counter = 0
         
+        # Preview-only state (untouched in headless mode)
+        self.headless = True
+        self.preview_frame: Optional[np.ndarray] = None
+        self.overlay = OverlayRenderer(self._overlay_layout)
+        
+        # Per-frame stage graph (phone detection runs in the background every detection_frame_skip frames)
+        self.pipeline = self.build_pipeline()
+        if not headless:
+            self.attach_preview()
+        
+        # Optional closed-loop quality ladder that holds target_fps on slow machines
+        self.quality = QualityController(self, target_fps, cpu_budget) if target_fps else None
+        
         print(f"✅ Advanced Attention Tracker initialized: {self.frame_width}x{self.frame_height}")
         print("📱 YOLOv11 Phone Detection + dlib 68-point landmarks")
         print("🎯 Advanced Gaze, Eye, and Mouth Analysis")
 
     def initialize_camera(self) -> bool:
-        """Initialize camera capture"""
+        """Initialize camera capture (or the configured frame source)"""
+        if self.source is not None:
+            self.cap = self.source
+            if not self.cap.isOpened():
+                print(f"❌ Failed to open frame source {self.source}")
+                return False
+            
+            # Recorded sources dictate the frame size
+            width, height = self.source.frame_size
+            if width and height:
+                self.frame_width, self.frame_height = width, height
+            return True
+        
         try:
             self.cap = cv2.VideoCapture(self.camera_index)
             if not self.cap.isOpened():
@@ -172,12 +197,12 @@ class AdvancedAttentionTracker:
         for idx in left_eye_indices:
             if idx < len(face_landmarks.landmark):
                 lm = face_landmarks.landmark[idx]
-                left_eye.append([lm.x * self.frame_width, lm.y * self.frame_height])
+                left_eye.append([lm.x * self.process_width, lm.y * self.process_height])
         
         for idx in right_eye_indices:
             if idx < len(face_landmarks.landmark):
                 lm = face_landmarks.landmark[idx]
-                right_eye.append([lm.x * self.frame_width, lm.y * self.frame_height])
+                right_eye.append([lm.x * self.process_width, lm.y * self.process_height])
         
         return np.array(left_eye), np.array(right_eye)
 
@@ -190,7 +215,7 @@ class AdvancedAttentionTracker:
         for idx in mouth_indices:
             if idx < len(face_landmarks.landmark):
                 lm = face_landmarks.landmark[idx]
-                mouth.append([lm.x * self.frame_width, lm.y * self.frame_height])
+                mouth.append([lm.x * self.process_width, lm.y * self.process_height])
         
         return np.array(mouth)
 
@@ -203,7 +228,7 @@ class AdvancedAttentionTracker:
         for idx in key_indices:
             if idx < len(face_landmarks.landmark):
                 lm = face_landmarks.landmark[idx]
-                image_points.append([lm.x * self.frame_width, lm.y * self.frame_height])
+                image_points.append([lm.x * self.process_width, lm.y * self.process_height])
         
         if len(image_points) != 6:
             return 0.0, 0.0, 0.0
@@ -257,17 +282,6 @@ class AdvancedAttentionTracker:
 
         return np.array([x_angle, y_angle, z_angle])
 
-    def run_phone_detection_async(self, frame, face_bbox):
-        """Run YOLOv11 phone detection in background thread"""
-        try:
-            detections = self.phone_detector.detect_phones_near_face(frame, face_bbox)
-            with self.detection_results_lock:
-                self.last_phone_results = detections
-                if detections:
-                    print(f"DEBUG: Found {len(detections)} phone objects using YOLOv11!")
-        except Exception as e:
-            print(f"YOLOv11 phone detection error: {e}")
-
     def is_hand_near_face(self, face_bbox, hands, margin=0.2):
         """Check if hand landmarks are near face area"""
         if not face_bbox or not hands:
@@ -286,16 +300,16 @@ class AdvancedAttentionTracker:
             for lm_idx in key_landmarks:
                 if lm_idx < len(hand.landmark):
                     lm = hand.landmark[lm_idx]
-                    x = lm.x * self.frame_width
-                    y = lm.y * self.frame_height
+                    x = lm.x * self.process_width
+                    y = lm.y * self.process_height
                     
                     distance = np.sqrt((x - face_center_x)**2 + (y - face_center_y)**2)
                     if distance < dynamic_margin:
                         return True
             
             for lm in hand.landmark:
-                x = lm.x * self.frame_width
-                y = lm.y * self.frame_height
+                x = lm.x * self.process_width
+                y = lm.y * self.process_height
                 
                 if (fx1 - 50 < x < fx2 + 50 and fy1 - 50 < y < fy2 + 50):
                     return True
@@ -325,118 +339,88 @@ class AdvancedAttentionTracker:
         
         return False, 0.0
 
-    def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
-        """Process a single frame with advanced facial analysis"""
-        self.frame_count += 1
-        
-        # Convert to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Process with MediaPipe
-        face_results = self.face_mesh.process(rgb_frame)
-        hands_results = self.hands.process(rgb_frame)
-        pose_results = self.pose.process(rgb_frame)
-        
-        # Initialize results
-        face_visible = False
-        face_bbox = None
-        eye_closed = False
-        yawning = False
-        head_tilt = 0.0
-        yaw = 0.0
-        pitch = 0.0
-        roll = 0.0
-        orientation_good = True
-        
-        # Try dlib first (more accurate)
+    def build_pipeline(self) -> Pipeline:
+        """This tracker's stage graph (see attention_stages for the shared stages)"""
+        return Pipeline([
+            *mediapipe_stages(self),
+            Stage('landmark_math', self.analyze_face, inputs=('frame', 'face_results'),
+                  outputs=FACE_OUTPUTS, defaults=FACE_DEFAULTS),
+            # Orientation analysis - very lenient thresholds
+            head_pose_stage(self, lambda yaw, pitch, head_tilt: (
+                abs(yaw) < 45.0 and abs(pitch) < 40.0 and head_tilt < 60.0)),
+            hand_proximity_stage(self),
+            *phone_stages(self, every=self.detection_frame_skip),
+            posture_stage(),
+            Stage('scoring', self.score,
+                  inputs=('face_visible', 'orientation_good', 'eye_closed', 'yawning',
+                          'phone_near_face', 'hand_near_face', 'posture_stable'),
+                  outputs=('focus_score', 'focused')),
+            Stage('status_messages', lambda *flags: self.generate_status_messages(*flags),
+                  inputs=('face_visible', 'orientation_good', 'phone_near_face', 'hand_near_face',
+                          'phone_confidence', 'posture_stable', 'eye_closed', 'yawning',
+                          'yaw', 'pitch', 'head_tilt', 'ear', 'mar'),
+                  outputs=('status_messages',)),
+        ], inputs=('frame', 'frame_index'), name='advanced')
+
+    def attach_preview(self):
+        """Leave headless mode: render overlays into self.preview_frame every frame"""
+        if self.headless:
+            self.pipeline.attach(preview_stage(
+                self, ('focused', 'focus_score', 'status_messages', 'phone_objects')))
+            self.headless = False
+
+    def detach_preview(self):
+        """Back to headless mode: no frame copies or drawing on the frame path"""
+        if not self.headless:
+            self.pipeline.detach(PREVIEW_STAGE)
+            self.headless = True
+            self.preview_frame = None
+
+    def render_preview(self, frame, focused, focus_score, status_messages, phone_objects):
+        """Draw the status panel, phone boxes and focus ring on a frame copy (preview sink only)"""
+        metrics = {
+            "status_messages": status_messages,
+            "focus_score": focus_score,
+            "fps": self.fps_counter.windowed_fps()
+        }
+        frame = self.draw_advanced_status_overlay(frame, metrics)
+        frame = self.draw_phone_detections(frame, phone_objects)
+
+        # Draw focus ring
+        if focused:
+            cv2.rectangle(frame, (10, 10), (self.process_width - 10, self.process_height - 10), 
+                         (0, 255, 0), 4)
+        else:
+            cv2.rectangle(frame, (10, 10), (self.process_width - 10, self.process_height - 10), 
+                         (0, 0, 255), 4)
+        return frame
+
+    def analyze_face(self, frame, face_results):
+        """dlib 68-point EAR when the predictor is available, MediaPipe otherwise"""
+        face_landmarks, face_visible, face_bbox, ear, mar, _, yawning = \
+            mediapipe_face_analysis(self, face_results, track_eye_closure=False)
+
+        # Try dlib first (more accurate); mouth and head pose still come from the face mesh
         if self.predictor is not None and self.detector is not None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             rects = self.detector(gray, 0)
-            
             if len(rects) > 0:
                 face_visible = True
                 rect = rects[0]
-                
-                # Get facial landmarks
-                shape = self.predictor(gray, rect)
-                shape = face_utils.shape_to_np(shape)
-                
-                # Calculate face bounding box
+                shape = face_utils.shape_to_np(self.predictor(gray, rect))
                 (bX, bY, bW, bH) = face_utils.rect_to_bb(rect)
                 face_bbox = (bX, bY, bX + bW, bY + bH)
-                
-                # Eye aspect ratio analysis
+
                 (lStart, lEnd) = face_utils.FACIAL_LANDMARKS_IDXS["left_eye"]
                 (rStart, rEnd) = face_utils.FACIAL_LANDMARKS_IDXS["right_eye"]
-                (mStart, mEnd) = (49, 68)
-                
-                left_eye = shape[lStart:lEnd]
-                right_eye = shape[rStart:rEnd]
-                left_ear = self.eye_aspect_ratio(left_eye)
-                right_ear = self.eye_aspect_ratio(right_eye)
-                ear = (left_ear + right_ear) / 2.0
-                
-                # Check for eye closure
-                if ear < self.eye_ar_threshold:
-                    self.eye_closure_counter += 1
-                    if self.eye_closure_counter >= self.eye_ar_consec_frames:
-                        eye_closed = True
-                else:
-                    self.eye_closure_counter = 0
-            
-            # Extract mouth landmarks and calculate MAR
-            mouth = self.get_mediapipe_mouth_landmarks(face_landmarks)
-            if len(mouth) >= 12:
-                mar = self.mouth_aspect_ratio(mouth)
-                
-                if mar > self.mouth_ar_threshold:
-                    yawning = True
-            
-            # Calculate head pose
-            yaw, pitch, roll = self.get_head_pose_from_mediapipe(frame, face_landmarks)
-            head_tilt = abs(roll)
-            
-            # Orientation analysis - very lenient thresholds
-            orientation_good = (abs(yaw) < 45.0 and abs(pitch) < 40.0 and head_tilt < 60.0)
-        
-        # Hand detection
-        hand_landmarks = []
-        hand_near_face = False
-        
-        if hands_results.multi_hand_landmarks:
-            hand_landmarks = hands_results.multi_hand_landmarks
-            if face_bbox:
-                hand_near_face = self.is_hand_near_face(face_bbox, hand_landmarks)
-        
-        # Phone detection
-        phone_near_face = False
-        phone_confidence = 0.0
-        phone_objects = []
-        
-        if self.frame_count % self.detection_frame_skip == 0:
-            if self.detection_thread is None or not self.detection_thread.is_alive():
-                self.detection_thread = threading.Thread(target=self.run_phone_detection_async, args=(frame, face_bbox))
-                self.detection_thread.start()
-        
-        with self.detection_results_lock:
-            phone_objects = self.last_phone_results.copy()
-        
-        if face_bbox and phone_objects:
-            phone_near_face, phone_confidence = self.is_phone_near_face(face_bbox, phone_objects)
-        
-        # Separate phone detection and hand detection
-        # Don't combine them - they are separate entities
-        
-        # Posture analysis
-        posture_stable = True
-        if pose_results.pose_landmarks:
-            try:
-                shoulders = pose_results.pose_landmarks.landmark[11]
-                hips = pose_results.pose_landmarks.landmark[23]
-                posture_stable = (hips.y - shoulders.y) > 0.3
-            except (IndexError, AttributeError):
-                posture_stable = True
-        
-        # Calculate focus score - separate phone and hand detection
+                ear = (self.eye_aspect_ratio(shape[lStart:lEnd]) + self.eye_aspect_ratio(shape[rStart:rEnd])) / 2.0
+
+        eye_closed = update_eye_closure(self, ear) if face_visible else False
+        return face_landmarks, face_visible, face_bbox, ear, mar, eye_closed, yawning
+
+    def score(self, face_visible, orientation_good, eye_closed, yawning,
+              phone_near_face, hand_near_face, posture_stable):
+        """Calculate focus score - separate phone and hand detection"""
         focus_components = {
             "face_visibility": 1.0 if face_visible else 0.0,
             "orientation": 1.0 if orientation_good else 0.0,
@@ -458,42 +442,45 @@ class AdvancedAttentionTracker:
             "posture": 0.1
         }
         
-        focus_score = sum(weights[component] * score for component, score in focus_components.items())
+        focus_score = weighted_score(focus_components, weights)
         
         # Overall focus determination - very lenient criteria
         # User is focused if: face visible, not using phone, and eyes are open
         focused = (face_visible and not phone_near_face and not eye_closed)
-        
-        # Generate status messages - separate phone and hand detection
-        status_messages = self.generate_status_messages(
-            face_visible, orientation_good, phone_near_face, hand_near_face,
-            phone_confidence, posture_stable, eye_closed, yawning, yaw, pitch, head_tilt, ear, mar
+        return focus_score, focused
+
+    def process_frame(self, frame: np.ndarray) -> AttentionMetrics:
+        """Process a single frame with advanced facial analysis"""
+        self.frame_count += 1
+        start = time.perf_counter()
+        if self.quality is not None:
+            frame = self.quality.prepare(frame)
+        self.process_height, self.process_width = frame.shape[:2]
+        result = self.pipeline.run(frame=frame, frame_index=self.frame_count)
+        if self.quality is not None:
+            self.quality.observe(time.perf_counter() - start)
+        
+        return AttentionMetrics(
+            focused=result['focused'],
+            focus_score=result['focus_score'],
+            face_visible=result['face_visible'],
+            orientation_good=result['orientation_good'],
+            yaw=result['yaw'],
+            pitch=result['pitch'],
+            roll=result['roll'],
+            head_tilt=result['head_tilt'],
+            eye_closed=result['eye_closed'],
+            yawning=result['yawning'],
+            ear=result['ear'],
+            mar=result['mar'],
+            phone_near_face=result['phone_near_face'],
+            hand_near_face=result['hand_near_face'],
+            phone_confidence=result['phone_confidence'],
+            posture_stable=result['posture_stable'],
+            status_messages=result['status_messages'],
+            phone_objects=list(result['phone_objects']),
+            fps=self.fps_counter.get_fps()
         )
-        
-        # Add FPS
-        fps = self.fps_counter.get_fps()
-        
-        return {
-            "focused": focused,
-            "focus_score": focus_score,
-            "face_visible": face_visible,
-            "orientation_good": orientation_good,
-            "yaw": yaw,
-            "pitch": pitch,
-            "roll": roll,
-            "head_tilt": head_tilt,
-            "eye_closed": eye_closed,
-            "yawning": yawning,
-            "ear": ear,
-            "mar": mar,
-            "phone_near_face": phone_near_face,
-            "hand_near_face": hand_near_face,
-            "phone_confidence": phone_confidence,
-            "posture_stable": posture_stable,
-            "status_messages": status_messages,
-            "phone_objects": phone_objects,
-            "fps": fps
-        }
 
     def generate_status_messages(self, face_visible: bool, orientation_good: bool,
                                 phone_near_face: bool, hand_near_face: bool,
@@ -602,81 +589,35 @@ class AdvancedAttentionTracker:
             "overall": {"text": overall_status, "color": overall_color}
         }
 
+    def _overlay_layout(self, width: int, height: int) -> Dict[str, OverlayPanel]:
+        """Static chrome of the status and metrics panels for one frame size"""
+        # Main status panel
+        status = OverlayPanel(width - 350 - 20, 20, 350, 280, border_thickness=2)
+        status.add_text("ADVANCED ATTENTION TRACKER", (10, 25), 0.6, (255, 255, 255), 2)
+        for i, (_, label, _) in enumerate(STATUS_ITEMS):
+            status.add_text(label, (10, 50 + i * 30), 0.4, (180, 180, 180))
+
+        # Metrics panel
+        metrics = OverlayPanel(width - 200 - 20, height - 100 - 20, 200, 100)
+        metrics.add_text("METRICS", (10, 20), 0.5, (180, 180, 180))
+        return {"status": status, "metrics": metrics}
+
     def draw_advanced_status_overlay(self, frame, metrics):
-        """Draw advanced status overlay with detailed analysis"""
+        """Draw advanced status overlay with detailed analysis (cached chrome, text redrawn on change)"""
         status_messages = metrics.get("status_messages", {})
+        panels = self.overlay.panels(frame)
         
-        # Main status panel
-        panel_width = 350
-        panel_height = 280
-        panel_x = self.frame_width - panel_width - 20
-        panel_y = 20
-        
-        # Background
-        cv2.rectangle(frame, (panel_x, panel_y), 
-                     (panel_x + panel_width, panel_y + panel_height), 
-                     (20, 20, 20), -1)
-        cv2.rectangle(frame, (panel_x, panel_y), 
-                     (panel_x + panel_width, panel_y + panel_height), 
-                     (60, 60, 60), 2)
-        
-        # Title
-        cv2.putText(frame, "ADVANCED ATTENTION TRACKER", (panel_x + 10, panel_y + 25),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        
-        # Status items
-        y_start = panel_y + 50
-        status_items = [
-            ("FACE", status_messages.get("face", {}).get("text", "No face detected")),
-            ("ORIENTATION", status_messages.get("orientation", {}).get("text", "Looking forward")),
-            ("EYE", status_messages.get("eye", {}).get("text", "Eyes open")),
-            ("MOUTH", status_messages.get("mouth", {}).get("text", "Normal")),
-            ("PHONE", status_messages.get("phone", {}).get("text", "No phone detected")),      # Separate phone detection
-            ("HAND", status_messages.get("hand", {}).get("text", "No hand near face")),          # Separate hand detection
-            ("POSTURE", status_messages.get("posture", {}).get("text", "Good posture")),
-            ("OVERALL", status_messages.get("overall", {}).get("text", "Focused"))
-        ]
-        
-        for i, (label, text) in enumerate(status_items):
-            y_pos = y_start + (i * 30)
-            
-            # Label
-            cv2.putText(frame, label, (panel_x + 10, y_pos),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (180, 180, 180), 1)
-            
-            # Status text with color
-            color = (0, 255, 0) if "✓" in text or "✅" in text else (0, 0, 255) if "✗" in text or "❌" in text else (0, 165, 255)
-            cv2.putText(frame, text, (panel_x + 10, y_pos + 20),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-        
-        # Metrics panel
-        metrics_width = 200
-        metrics_height = 100
-        metrics_x = self.frame_width - metrics_width - 20
-        metrics_y = self.frame_height - metrics_height - 20
-        
-        # Metrics background
-        cv2.rectangle(frame, (metrics_x, metrics_y), 
-                     (metrics_x + metrics_width, metrics_y + metrics_height), 
-                     (20, 20, 20), -1)
-        cv2.rectangle(frame, (metrics_x, metrics_y), 
-                     (metrics_x + metrics_width, metrics_y + metrics_height), 
-                     (60, 60, 60), 1)
-        
-        # Metrics title
-        cv2.putText(frame, "METRICS", (metrics_x + 10, metrics_y + 20),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (180, 180, 180), 1)
+        for i, (key, label, default) in enumerate(STATUS_ITEMS):
+            text = status_messages.get(key, {}).get("text", default)
+            panels["status"].set_text(label, text, (10, 50 + i * 30 + 20), 0.5, status_text_color(text))
         
         # Score and FPS
-        score_text = f"Score: {metrics.get('focus_score', 0.0):.2f}"
-        fps_text = f"FPS: {metrics.get('fps', 0.0):.1f}"
-        
-        cv2.putText(frame, score_text, (metrics_x + 10, metrics_y + 40),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        cv2.putText(frame, fps_text, (metrics_x + 10, metrics_y + 60),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        panels["metrics"].set_text("score", f"Score: {metrics.get('focus_score', 0.0):.2f}",
+                                   (10, 40), 0.5, (255, 255, 255))
+        panels["metrics"].set_text("fps", f"FPS: {metrics.get('fps', 0.0):.1f}",
+                                   (10, 60), 0.5, (255, 255, 255))
         
-        return frame
+        return self.overlay.draw(frame)
 
     def draw_phone_detections(self, frame, phone_objects):
         """Draw phone detection boxes"""
@@ -700,6 +641,7 @@ class AdvancedAttentionTracker:
         print("📱 YOLOv11 Phone Detection + dlib 68-point landmarks")
         print("🎯 Advanced Gaze, Eye, and Mouth Analysis")
         print("Press 'q' to quit, 's' to save screenshot")
+        self.attach_preview()
         
         while True:
             ret, frame = self.cap.read()
@@ -707,20 +649,9 @@ class AdvancedAttentionTracker:
                 print("Failed to grab frame")
                 break
             
-            # Process frame
+            # Process frame (the preview sink renders the overlays)
             metrics = self.process_frame(frame)
-            
-            # Draw overlays
-            frame = self.draw_advanced_status_overlay(frame, metrics)
-            frame = self.draw_phone_detections(frame, metrics.get("phone_objects", []))
-            
-            # Draw focus ring
-            if metrics.get("focused", False):
-                cv2.rectangle(frame, (10, 10), (self.frame_width - 10, self.frame_height - 10), 
-                             (0, 255, 0), 4)
-            else:
-                cv2.rectangle(frame, (10, 10), (self.frame_width - 10, self.frame_height - 10), 
-                             (0, 0, 255), 4)
+            frame = self.preview_frame
             
             # Display frame
             cv2.imshow('Advanced Attention Tracker', frame)
@@ -18,6 +18,7 @@ import time
 import threading
 from typing import Optional, Tuple, Dict, Any
 import json
+from collections import OrderedDict
 
 try:
     from transformers import LlavaNextProcessor, LlavaNextForConditionalGeneration
@@ -50,7 +51,8 @@ class AIHelperVLM:
                  model_name: str = "llava",
                  backend: str = "ollama",  # "ollama" or "huggingface"
                  throttle_seconds: float = 1.0,
-                 confidence_threshold: float = 0.5):
+                 confidence_threshold: float = 0.5,
+                 cache_size: int = 10):
         """
         Initialize AI Helper VLM
         
@@ -59,6 +61,7 @@ class AIHelperVLM:
             backend: "ollama" or "huggingface"
             throttle_seconds: Minimum time between inferences
             confidence_threshold: Minimum confidence for positive detection
+            cache_size: Maximum cached results (least recently used are dropped)
         """
         self.model_name = model_name
         self.backend = backend
@@ -68,7 +71,8 @@ class AIHelperVLM:
         # Performance tracking
         self.last_inference_time = 0
         self.inference_count = 0
-        self.cache = {}  # Frame hash -> result cache
+        self.cache_size = max(1, cache_size)
+        self.cache = OrderedDict()  # Frame hash -> result, LRU order
         
         # Thread safety
         self.lock = threading.Lock()
@@ -129,8 +133,10 @@ class AIHelperVLM:
         
         # Cache check - hash the frame
         frame_hash = hashlib.md5(frame_crop.tobytes()).hexdigest()
-        if frame_hash in self.cache:
-            return False
+        with self.lock:
+            if frame_hash in self.cache:
+                self.cache.move_to_end(frame_hash)
+                return False
         
         return True
     
@@ -372,10 +378,9 @@ class AIHelperVLM:
                 frame_hash = hashlib.md5(frame_crop.tobytes()).hexdigest()
                 self.cache[frame_hash] = result
                 
-                # Clean old cache entries
-                if len(self.cache) > 10:
-                    oldest_key = next(iter(self.cache))
-                    del self.cache[oldest_key]
+                # Drop least recently used entries
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
             
         except Exception as e:
             result["ai_reason"] = f"inference_error_{str(e)}"
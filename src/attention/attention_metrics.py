@@ -0,0 +1,146 @@
+"""
+Typed per-frame attention metrics and cached per-frame serialization.
+"""
+
+import json
+from typing import Dict, Any, List, Optional
+
+_FIELDS = (
+    'focused', 'focus_score', 'face_visible', 'orientation_good',
+    'yaw', 'pitch', 'roll', 'head_tilt', 'eye_closed', 'yawning', 'ear', 'mar',
+    'phone_near_face', 'hand_near_face', 'phone_confidence', 'posture_stable',
+    'status_messages', 'phone_objects', 'fps',
+    'ai_detected_phone', 'ai_confidence', 'ai_triggered',
+)
+_FIELD_SET = frozenset(_FIELDS)
+
+
+class AttentionMetrics:
+    """
+    Result of process_frame with native Python scalars.
+    Supports the dict-style access (metrics.get / metrics[key]) existing callers use.
+    """
+
+    __slots__ = _FIELDS
+
+    def __init__(self, focused=False, focus_score=0.0, face_visible=False,
+                 orientation_good=True, yaw=0.0, pitch=0.0, roll=0.0, head_tilt=0.0,
+                 eye_closed=False, yawning=False, ear=0.0, mar=0.0,
+                 phone_near_face=False, hand_near_face=False, phone_confidence=0.0,
+                 posture_stable=True, status_messages=None, phone_objects=None, fps=0.0,
+                 ai_detected_phone=False, ai_confidence=0.0, ai_triggered=False):
+        # Coerce once here so NumPy scalars never reach the serializers
+        self.focused = bool(focused)
+        self.focus_score = float(focus_score)
+        self.face_visible = bool(face_visible)
+        self.orientation_good = bool(orientation_good)
+        self.yaw = float(yaw)
+        self.pitch = float(pitch)
+        self.roll = float(roll)
+        self.head_tilt = float(head_tilt)
+        self.eye_closed = bool(eye_closed)
+        self.yawning = bool(yawning)
+        self.ear = float(ear)
+        self.mar = float(mar)
+        self.phone_near_face = bool(phone_near_face)
+        self.hand_near_face = bool(hand_near_face)
+        self.phone_confidence = float(phone_confidence)
+        self.posture_stable = bool(posture_stable)
+        self.status_messages: Dict[str, Dict[str, str]] = status_messages if status_messages is not None else {}
+        self.phone_objects: List[Dict[str, Any]] = phone_objects if phone_objects is not None else []
+        self.fps = float(fps)
+        self.ai_detected_phone = bool(ai_detected_phone)
+        self.ai_confidence = float(ai_confidence)
+        self.ai_triggered = bool(ai_triggered)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style lookup"""
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELD_SET
+
+    def keys(self):
+        return _FIELDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict copy of all fields"""
+        return {name: getattr(self, name) for name in _FIELDS}
+
+    def to_api_data(self, frame_width: int, frame_height: int,
+                    session_active: bool, timestamp: float) -> Dict[str, Any]:
+        """Convert to the /api/attention_data format"""
+        return {
+            'attention_score': self.focus_score,
+            'eye_ar': self.ear,
+            'mouth_ar': self.mar,
+            'head_tilt': self.head_tilt,
+            'phone_detected': self.phone_near_face,
+            'fps': self.fps,
+            'timestamp': timestamp,
+            'focus_status': 'focused' if self.focused else 'distracted',
+            'session_active': bool(session_active),
+            'camera_active': True,
+            'frame_width': int(frame_width),
+            'frame_height': int(frame_height),
+            'face_visible': self.face_visible,
+            'orientation_good': self.orientation_good,
+            'yaw': self.yaw,
+            'pitch': self.pitch,
+            'roll': self.roll,
+            'eye_closed': self.eye_closed,
+            'yawning': self.yawning,
+            'hand_near_face': self.hand_near_face,
+            'phone_confidence': self.phone_confidence,
+            'posture_stable': self.posture_stable,
+            'status_messages': self.status_messages
+        }
+
+    def __repr__(self):
+        return f"AttentionMetrics(focused={self.focused}, focus_score={self.focus_score:.3f}, fps={self.fps:.1f})"
+
+
+class FrameSnapshot:
+    """
+    Immutable API data for one frame sequence.
+    The JSON encoding is computed on first use and shared by every reader.
+    """
+
+    __slots__ = ('sequence', 'data', '_json_text', '_json_bytes')
+
+    def __init__(self, sequence: int, data: Dict[str, Any]):
+        self.sequence = sequence
+        self.data = data
+        self._json_text: Optional[str] = None
+        self._json_bytes: Optional[bytes] = None
+
+    @property
+    def json_text(self) -> str:
+        """JSON encoding of the data (cached)"""
+        if self._json_text is None:
+            self._json_text = json.dumps(self.data, separators=(',', ':'))
+        return self._json_text
+
+    @property
+    def json_bytes(self) -> bytes:
+        """UTF-8 JSON encoding of the data (cached)"""
+        if self._json_bytes is None:
+            self._json_bytes = self.json_text.encode('utf-8')
+        return self._json_bytes
+
+    def envelope_bytes(self, timestamp: float) -> bytes:
+        """{"success": true, "data": ..., "timestamp": ...} without re-encoding the data"""
+        return b''.join((b'{"success":true,"data":', self.json_bytes,
+                         b',"timestamp":', repr(float(timestamp)).encode('ascii'), b'}'))
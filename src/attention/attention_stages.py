@@ -0,0 +1,254 @@
+"""
+Stage library shared by the attention tracker pipelines.
+Each builder returns pipeline stages bound to a tracker instance; tracker
+attributes (face_mesh, phone_detector, ai_helper, ...) are looked up on every
+call so they can be swapped or instrumented after the pipeline is built.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+import cv2
+
+from pipeline import Stage
+
+
+def mediapipe_stages(tracker, concurrent: bool = False) -> List[Stage]:
+    """Colour conversion plus the face mesh, hands and pose models"""
+    return [
+        Stage('color_convert', lambda frame: cv2.cvtColor(frame, cv2.COLOR_BGR2RGB),
+              inputs=('frame',), outputs=('rgb_frame',)),
+        Stage('face_mesh', lambda rgb: tracker.face_mesh.process(rgb),
+              inputs=('rgb_frame',), outputs=('face_results',), concurrent=concurrent),
+        Stage('hands', lambda rgb: tracker.hands.process(rgb),
+              inputs=('rgb_frame',), outputs=('hands_results',), concurrent=concurrent),
+        Stage('pose', lambda rgb: tracker.pose.process(rgb),
+              inputs=('rgb_frame',), outputs=('pose_results',), concurrent=concurrent),
+    ]
+
+
+def create_face_mesh(tracker, refine_landmarks: bool = True):
+    """The trackers' face mesh model (no metric uses the refined iris landmarks)"""
+    return tracker.mp_face_mesh.FaceMesh(
+        static_image_mode=False,
+        max_num_faces=1,
+        refine_landmarks=refine_landmarks,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+FACE_OUTPUTS = ('face_landmarks', 'face_visible', 'face_bbox', 'ear', 'mar', 'eye_closed', 'yawning')
+FACE_DEFAULTS = {'face_visible': False, 'ear': 0.0, 'mar': 0.0, 'eye_closed': False, 'yawning': False}
+
+
+def mediapipe_face_analysis(tracker, face_results, track_eye_closure: bool = True):
+    """Face bounding box, EAR/MAR and (optionally) eye-closure tracking from the face mesh"""
+    if not face_results.multi_face_landmarks:
+        return None, False, None, 0.0, 0.0, False, False
+
+    face_landmarks = face_results.multi_face_landmarks[0]
+    all_x = [landmark.x for landmark in face_landmarks.landmark]
+    all_y = [landmark.y for landmark in face_landmarks.landmark]
+    face_bbox = (
+        int(min(all_x) * tracker.process_width),
+        int(min(all_y) * tracker.process_height),
+        int(max(all_x) * tracker.process_width),
+        int(max(all_y) * tracker.process_height)
+    )
+
+    ear = 0.0
+    eye_closed = False
+    left_eye, right_eye = tracker.get_mediapipe_eye_landmarks(face_landmarks)
+    if len(left_eye) >= 6 and len(right_eye) >= 6:
+        ear = (tracker.eye_aspect_ratio(left_eye) + tracker.eye_aspect_ratio(right_eye)) / 2.0
+        if track_eye_closure:
+            eye_closed = update_eye_closure(tracker, ear)
+
+    mar = 0.0
+    yawning = False
+    mouth = tracker.get_mediapipe_mouth_landmarks(face_landmarks)
+    if len(mouth) >= 12:
+        mar = tracker.mouth_aspect_ratio(mouth)
+        yawning = mar > tracker.mouth_ar_threshold
+
+    return face_landmarks, True, face_bbox, ear, mar, eye_closed, yawning
+
+
+def update_eye_closure(tracker, ear: float) -> bool:
+    """Eyes count as closed after `eye_ar_consec_frames` frames below the EAR threshold"""
+    if ear < tracker.eye_ar_threshold:
+        tracker.eye_closure_counter += 1
+        return tracker.eye_closure_counter >= tracker.eye_ar_consec_frames
+    tracker.eye_closure_counter = 0
+    return False
+
+
+def head_pose_stage(tracker, orientation_ok) -> Stage:
+    """Yaw/pitch/roll from the face mesh; `orientation_ok(yaw, pitch, head_tilt)` applies the tracker's thresholds"""
+    def head_pose(frame, face_landmarks):
+        yaw, pitch, roll = tracker.get_head_pose_from_mediapipe(frame, face_landmarks)
+        head_tilt = abs(roll)
+        return yaw, pitch, roll, head_tilt, orientation_ok(yaw, pitch, head_tilt)
+
+    return Stage('head_pose', head_pose,
+                 inputs=('frame', 'face_landmarks'),
+                 outputs=('yaw', 'pitch', 'roll', 'head_tilt', 'orientation_good'),
+                 when=lambda context: context['face_landmarks'] is not None,
+                 defaults={'yaw': 0.0, 'pitch': 0.0, 'roll': 0.0, 'head_tilt': 0.0,
+                           'orientation_good': True})
+
+
+def hand_proximity_stage(tracker) -> Stage:
+    def hand_proximity(face_bbox, hands_results):
+        hand_landmarks = hands_results.multi_hand_landmarks or []
+        hand_near_face = bool(face_bbox and hand_landmarks and tracker.is_hand_near_face(face_bbox, hand_landmarks))
+        return hand_landmarks, hand_near_face
+
+    return Stage('hand_proximity', hand_proximity,
+                 inputs=('face_bbox', 'hands_results'),
+                 outputs=('hand_landmarks', 'hand_near_face'))
+
+
+def face_box_stage(tracker) -> Stage:
+    """Face landmarks and pixel bounding box (at the tracker's frame size) for trackers without EAR/MAR"""
+    def face_box(face_results):
+        if not face_results.multi_face_landmarks:
+            return None, None, False
+        face_landmarks = face_results.multi_face_landmarks[0]
+        all_x = [landmark.x for landmark in face_landmarks.landmark]
+        all_y = [landmark.y for landmark in face_landmarks.landmark]
+        face_bbox = (
+            int(min(all_x) * tracker.frame_width),
+            int(min(all_y) * tracker.frame_height),
+            int(max(all_x) * tracker.frame_width),
+            int(max(all_y) * tracker.frame_height)
+        )
+        return face_landmarks, face_bbox, True
+
+    return Stage('face_box', face_box, inputs=('face_results',),
+                 outputs=('face_landmarks', 'face_bbox', 'face_visible'))
+
+
+def face_orientation_stage(tracker) -> Stage:
+    """Landmark yaw/pitch from `tracker.calculate_face_orientation`, checked against its yaw/pitch thresholds"""
+    def orientation(face_landmarks):
+        yaw, pitch = tracker.calculate_face_orientation(face_landmarks)
+        return yaw, pitch, abs(yaw) < tracker.yaw_threshold and abs(pitch) < tracker.pitch_threshold
+
+    return Stage('head_pose', orientation,
+                 inputs=('face_landmarks',), outputs=('yaw', 'pitch', 'orientation_good'),
+                 when=lambda context: context['face_landmarks'] is not None,
+                 defaults={'yaw': 0.0, 'pitch': 0.0, 'orientation_good': True})
+
+
+def phone_stages(tracker, every: int, detect: Optional[Callable] = None,
+                 hand_confirms: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Stage]:
+    """
+    Phone detection in the background every `every` frames; each frame uses
+    the newest finished detections to check for a phone over the face.
+
+    Args:
+        detect: `detect(frame, face_bbox)` returning phone objects; defaults to tracker.phone_detector
+        hand_confirms: When given, a hand near the face plus a detection this
+            predicate accepts also counts as a phone near the face
+    """
+    if detect is None:
+        def detect(frame, face_bbox):
+            return tracker.phone_detector.detect_phones_near_face(frame, face_bbox)
+
+    def proximity(face_bbox, phone_objects, hand_near_face=False):
+        phone_near_face, phone_confidence = False, 0.0
+        if face_bbox and phone_objects:
+            phone_near_face, phone_confidence = tracker.is_phone_near_face(face_bbox, phone_objects)
+        if hand_near_face:
+            confirmed = [obj.get('confidence', 0.0) for obj in phone_objects if hand_confirms(obj)]
+            if confirmed:
+                phone_near_face, phone_confidence = True, max(phone_confidence, *confirmed)
+        return phone_near_face, phone_confidence
+
+    proximity_inputs = ('face_bbox', 'phone_objects') + (('hand_near_face',) if hand_confirms else ())
+    return [
+        Stage('phone_detection', detect, inputs=('frame', 'face_bbox'), outputs=('phone_objects',),
+              every=every, background=True, defaults={'phone_objects': []}),
+        Stage('phone_proximity', proximity, inputs=proximity_inputs,
+              outputs=('phone_near_face', 'phone_confidence')),
+    ]
+
+
+def vlm_stage(tracker, every: int = 25) -> Stage:
+    """
+    VLM second opinion, every `every` frames (tracker.vlm_every when set) or
+    whenever the phone confidence is ambiguous. Skipped entirely when the
+    tracker has no AI helper.
+    """
+    def should_run(context) -> bool:
+        return tracker.ai_helper is not None and (
+            context['frame_index'] % getattr(tracker, 'vlm_every', every) == 0
+            or 0.3 <= context['phone_confidence'] <= 0.6)
+
+    def vlm_check(frame, face_bbox, hand_landmarks, phone_objects, phone_confidence):
+        try:
+            hand_bboxes = []
+            for hand in hand_landmarks:
+                hand_x = [lm.x for lm in hand.landmark]
+                hand_y = [lm.y for lm in hand.landmark]
+                if hand_x and hand_y:
+                    hand_bboxes.append((
+                        int(min(hand_x) * tracker.process_width), int(min(hand_y) * tracker.process_height),
+                        int(max(hand_x) * tracker.process_width), int(max(hand_y) * tracker.process_height)
+                    ))
+            phone_bboxes = [phone_obj['bbox'] for phone_obj in phone_objects if 'bbox' in phone_obj]
+
+            ai_result = tracker.ai_helper.check_phone_with_vlm(
+                frame=frame,
+                face_bbox=face_bbox,
+                hand_bboxes=hand_bboxes,
+                phone_bboxes=phone_bboxes,
+                phone_confidence=phone_confidence
+            )
+        except Exception as e:
+            print(f"AI Helper error: {e}")
+            return False, 0.0, False
+
+        return (ai_result.get("ai_detected_phone", False), ai_result.get("ai_confidence", 0.0),
+                ai_result.get("ai_triggered", False))
+
+    return Stage('vlm_check', vlm_check,
+                 inputs=('frame', 'face_bbox', 'hand_landmarks', 'phone_objects', 'phone_confidence'),
+                 outputs=('ai_detected_phone', 'ai_confidence', 'ai_triggered'),
+                 when=should_run,
+                 defaults={'ai_detected_phone': False, 'ai_confidence': 0.0, 'ai_triggered': False})
+
+
+def posture_stage(tracker=None) -> Stage:
+    """Upright when the hips sit below the shoulders by more than tracker.posture_threshold (default 0.3)"""
+    def posture(pose_results):
+        if pose_results.pose_landmarks:
+            try:
+                shoulders = pose_results.pose_landmarks.landmark[11]
+                hips = pose_results.pose_landmarks.landmark[23]
+                return (hips.y - shoulders.y) > getattr(tracker, 'posture_threshold', 0.3)
+            except (IndexError, AttributeError):
+                pass
+        return True
+
+    return Stage('posture', posture, inputs=('pose_results',), outputs=('posture_stable',))
+
+
+def weighted_score(components, weights) -> float:
+    return sum(weights[component] * score for component, score in components.items())
+
+
+PREVIEW_STAGE = 'preview'
+
+
+def preview_stage(tracker, inputs) -> Stage:
+    """
+    Optional sink that draws the tracker's overlays on a copy of the frame and
+    leaves it in tracker.preview_frame. Only attached when a preview is
+    wanted; headless pipelines never copy or draw on the frame.
+    """
+    def render(frame, *values):
+        tracker.preview_frame = tracker.render_preview(frame.copy(), *values)
+
+    return Stage(PREVIEW_STAGE, render, inputs=('frame', *inputs))
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the full process_frame pipeline.
+
+Replays recorded clips (video files, image directories or synthetic frames)
+through the attention trackers as fast as possible and reports per-stage
+latency percentiles, throughput, peak RSS and allocations. Results are saved
+as JSON baselines, and compare mode flags regressions beyond a tolerance.
+Peak RSS is process-wide, so benchmark one tracker per run when comparing memory.
+Work done on background threads (phone detection) is not part of process_frame latency.
+
+Batch mode measures cross-session micro-batching of YOLO phone detection:
+N session threads call detect_phones concurrently, first one call per frame,
+then batched through the shared scheduler.
+
+Usage:
+    python benchmark.py run clips/desk.mp4 clips/phone.mp4 --trackers precise advanced -o baseline.json
+    python benchmark.py run synthetic:300 --compare baseline.json
+    python benchmark.py compare baseline.json current.json --tolerance 0.1
+    python benchmark.py batch synthetic --sessions 8 --max-batch 8 --max-delay-ms 10
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from frame_source import open_source
+from memory_telemetry import peak_rss_mb
+
+# Tracker name -> (module, class)
+TRACKERS = {
+    'precise': ('precise_attention_tracker', 'PreciseAttentionTracker'),
+    'advanced': ('advanced_attention_tracker', 'AdvancedAttentionTracker'),
+    'final_enhanced': ('final_enhanced_main', 'FinalEnhancedAttentionTracker'),
+}
+
+# Stage name -> (tracker attribute, method on that attribute or None for the attribute itself)
+# Attributes a tracker doesn't have are skipped.
+STAGES = {
+    'face_mesh': [('face_mesh', 'process')],
+    'hands': [('hands', 'process')],
+    'pose': [('pose', 'process')],
+    'dlib_landmarks': [('detector', None), ('predictor', None)],
+    'eye_mouth_ratios': [('eye_aspect_ratio', None), ('mouth_aspect_ratio', None)],
+    'head_pose': [('get_head_pose_from_mediapipe', None), ('calculate_face_orientation', None)],
+    'hand_near_face': [('is_hand_near_face', None), ('detect_hand_near_face', None)],
+    'phone_near_face': [('is_phone_near_face', None), ('detect_phone_near_face', None)],
+    'ai_helper': [('ai_helper', 'check_phone_with_vlm')],
+    'status_messages': [('generate_status_messages', None)],
+}
+
+# Latency percentiles checked in compare mode (higher is worse)
+_LATENCY_KEYS = ('p50', 'p95', 'p99')
+
+
+class StageTimer:
+    """Accumulates time spent in each stage during one frame"""
+
+    def __init__(self):
+        self.stages = set()
+        self._current: Dict[str, float] = defaultdict(float)
+        self._calls: Dict[str, int] = defaultdict(int)
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    def add(self, stage: str, seconds: float):
+        self._current[stage] += seconds
+        self._calls[stage] += 1
+
+    def end_frame(self, total_seconds: float):
+        """Record the frame's per-stage totals (stages not hit count as 0)"""
+        for stage in self.stages:
+            self.samples[stage].append(self._current.get(stage, 0.0))
+            self.calls[stage] += self._calls.get(stage, 0)
+        self.samples['total'].append(total_seconds)
+        self.discard_frame()
+
+    def discard_frame(self):
+        """Drop the current frame's timings (e.g. during warmup)"""
+        self._current.clear()
+        self._calls.clear()
+
+
+def _timed(function, stage: str, timer: StageTimer):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timer.add(stage, time.perf_counter() - start)
+    return wrapper
+
+
+class _TimedProxy:
+    """Delegates to the wrapped object, timing one of its methods"""
+
+    def __init__(self, target, method: str, stage: str, timer: StageTimer):
+        self._target = target
+        self._timed_method = _timed(getattr(target, method), stage, timer)
+        self._method = method
+
+    def __getattr__(self, name):
+        if name == self._method:
+            return self._timed_method
+        return getattr(self._target, name)
+
+
+def instrument(tracker, timer: StageTimer) -> List[str]:
+    """Install timing proxies on a tracker instance; returns the stages found"""
+    found = []
+    for stage, targets in STAGES.items():
+        for attribute, method in targets:
+            target = getattr(tracker, attribute, None)
+            if target is None:
+                continue
+            if method is None:
+                if callable(target):
+                    setattr(tracker, attribute, _timed(target, stage, timer))
+                    found.append(stage)
+            elif hasattr(target, method):
+                setattr(tracker, attribute, _TimedProxy(target, method, stage, timer))
+                found.append(stage)
+    timer.stages.update(found)
+    return sorted(set(found))
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1000.0
+    if not len(values):
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'mean': 0.0, 'max': 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+            'mean': float(values.mean()), 'max': float(values.max())}
+
+
+def benchmark_tracker(name: str, clips: List[str], frame_width: int, frame_height: int,
+                      warmup: int = 10, max_frames: Optional[int] = None,
+                      trace_allocations: bool = False, ai_helper: bool = False) -> Dict[str, Any]:
+    """Replay every clip through one tracker and summarize the measurements"""
+    module_name, class_name = TRACKERS[name]
+    tracker_class = getattr(importlib.import_module(module_name), class_name)
+
+    timer = StageTimer()
+    frames = 0
+    processing_seconds = 0.0
+    block_deltas = []
+    stages = []
+    per_clip = {}
+
+    if trace_allocations:
+        tracemalloc.start()
+
+    for clip in clips:
+        source = open_source(clip, frame_width, frame_height, realtime=False)
+        tracker = tracker_class(frame_width=frame_width, frame_height=frame_height, source=source)
+        if not ai_helper and hasattr(tracker, 'ai_helper'):
+            # The VLM round-trip would dominate and is not repeatable
+            tracker.ai_helper = None
+        stages = sorted(set(stages) | set(instrument(tracker, timer)))
+
+        clip_frames = 0
+        clip_start = time.perf_counter()
+        try:
+            while max_frames is None or clip_frames < max_frames + warmup:
+                ret, frame = source.read()
+                if not ret:
+                    break
+
+                blocks_before = sys.getallocatedblocks()
+                start = time.perf_counter()
+                tracker.process_frame(frame)
+                elapsed = time.perf_counter() - start
+                blocks_after = sys.getallocatedblocks()
+
+                clip_frames += 1
+                if clip_frames <= warmup:
+                    timer.discard_frame()
+                    continue
+
+                timer.end_frame(elapsed)
+                processing_seconds += elapsed
+                block_deltas.append(blocks_after - blocks_before)
+                frames += 1
+        finally:
+            source.release()
+
+        per_clip[clip] = {
+            'frames': max(0, clip_frames - warmup),
+            'wall_seconds': time.perf_counter() - clip_start
+        }
+        print(f"  {name}: {clip} - {per_clip[clip]['frames']} frames")
+
+    result = {
+        'frames': frames,
+        'processing_seconds': processing_seconds,
+        'throughput_fps': frames / processing_seconds if processing_seconds > 0 else 0.0,
+        'stages': stages,
+        'latency_ms': {stage: _percentiles(samples) for stage, samples in timer.samples.items()},
+        'stage_calls': dict(timer.calls),
+        'peak_rss_mb': peak_rss_mb(),
+        'alloc_blocks_per_frame': float(np.mean(block_deltas)) if block_deltas else 0.0,
+        'clips': per_clip
+    }
+
+    if trace_allocations:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['traced_current_mb'] = current / (1024 * 1024)
+        result['traced_peak_mb'] = peak / (1024 * 1024)
+
+    return result
+
+
+def run(args) -> Dict[str, Any]:
+    """Benchmark every requested tracker and optionally save/compare"""
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'clips': args.clips,
+            'frame_size': [args.width, args.height],
+            'warmup': args.warmup,
+            'max_frames': args.max_frames
+        },
+        'results': {}
+    }
+
+    for name in args.trackers:
+        print(f"⏱️  Benchmarking {name}...")
+        try:
+            report['results'][name] = benchmark_tracker(
+                name, args.clips, args.width, args.height, warmup=args.warmup,
+                max_frames=args.max_frames, trace_allocations=args.tracemalloc,
+                ai_helper=args.ai_helper)
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+            report['results'][name] = {'error': str(e)}
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved baseline to {args.output}")
+
+    return report
+
+
+def _run_sessions(detectors: List[Any], frames: List[np.ndarray], calls: int) -> Dict[str, Any]:
+    """One thread per session, each calling detect_phones `calls` times"""
+    latencies: List[float] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(detectors) + 1)
+
+    def session(index: int, detector):
+        local = []
+        barrier.wait()
+        for i in range(calls):
+            start = time.perf_counter()
+            detector.detect_phones(frames[(index + i) % len(frames)])
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session, args=(i, detector)) for i, detector in enumerate(detectors)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return {
+        'calls': len(latencies),
+        'wall_seconds': wall,
+        'throughput_fps': len(latencies) / wall if wall > 0 else 0.0,
+        'latency_ms': _percentiles(latencies)
+    }
+
+
+def benchmark_batching(args) -> Dict[str, Any]:
+    """Per-session vs micro-batched YOLO phone detection with concurrent sessions"""
+    import yolo11_phone_detector as yolo
+
+    if not yolo.YOLO_AVAILABLE:
+        raise RuntimeError("ultralytics is not installed")
+
+    source = open_source(args.source, args.width, args.height, realtime=False, loop=True)
+    frames = [source.read()[1] for _ in range(30)]
+    source.release()
+
+    detectors = [yolo.YOLOv11PhoneDetector(model_path=args.model) for _ in range(args.sessions)]
+    for detector in detectors:
+        detector.detect_phones(frames[0])  # Warm up
+
+    report = {'sessions': args.sessions, 'max_batch': args.max_batch,
+              'max_delay_ms': args.max_delay_ms, 'model': args.model}
+    for label, max_batch in (('per_session', 1), ('batched', args.max_batch)):
+        yolo.configure_batching(max_batch, args.max_delay_ms)
+        print(f"⏱️  {label}: {args.sessions} sessions x {args.calls} frames")
+        report[label] = _run_sessions(detectors, frames, args.calls)
+    report['batching'] = yolo.batching_stats()
+    yolo.configure_batching(1)
+
+    single = report['per_session']['throughput_fps']
+    report['speedup'] = report['batched']['throughput_fps'] / single if single > 0 else 0.0
+    return report
+
+
+def print_batch_report(report: Dict[str, Any]):
+    print("")
+    for label in ('per_session', 'batched'):
+        result = report[label]
+        latency = result['latency_ms']
+        print(f"{label:<12} {result['throughput_fps']:7.1f} frames/s   "
+              f"latency p50 {latency['p50']:.1f} ms  p95 {latency['p95']:.1f} ms")
+    for stats in report['batching']:
+        print(f"  mean batch {stats['mean_batch_size']:.1f}, queue wait {stats['mean_queue_wait_ms']:.1f} ms")
+    print(f"⚡ Speedup: {report['speedup']:.2f}x")
+
+
+def print_report(report: Dict[str, Any]):
+    for name, result in report['results'].items():
+        print("")
+        if 'error' in result:
+            print(f"{name}: ERROR {result['error']}")
+            continue
+        print(f"{name}: {result['frames']} frames, {result['throughput_fps']:.1f} FPS, "
+              f"peak RSS {result['peak_rss_mb']:.0f} MB, "
+              f"{result['alloc_blocks_per_frame']:+.0f} blocks/frame")
+        print(f"  {'stage':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+        for stage, latency in sorted(result['latency_ms'].items(), key=lambda item: -item[1]['mean']):
+            print(f"  {stage:<18}{latency['p50']:>10.2f}{latency['p95']:>10.2f}"
+                  f"{latency['p99']:>10.2f}{latency['mean']:>10.2f}")
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            tolerance: float = 0.10, min_delta_ms: float = 0.5) -> List[Tuple[str, str, float, float]]:
+    """
+    Find metrics that got worse by more than `tolerance` (relative).
+    Latency changes smaller than min_delta_ms are ignored as noise.
+
+    Returns:
+        (tracker, metric, baseline, current) for every regression
+    """
+    regressions = []
+    for name, base in baseline.get('results', {}).items():
+        cur = current.get('results', {}).get(name)
+        if not cur or 'error' in base or 'error' in cur:
+            continue
+
+        if cur['throughput_fps'] < base['throughput_fps'] * (1 - tolerance):
+            regressions.append((name, 'throughput_fps', base['throughput_fps'], cur['throughput_fps']))
+
+        if cur['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append((name, 'peak_rss_mb', base['peak_rss_mb'], cur['peak_rss_mb']))
+
+        for stage, base_latency in base['latency_ms'].items():
+            cur_latency = cur['latency_ms'].get(stage)
+            if not cur_latency:
+                continue
+            for key in _LATENCY_KEYS:
+                before, after = base_latency[key], cur_latency[key]
+                if after > before * (1 + tolerance) and after - before >= min_delta_ms:
+                    regressions.append((name, f'latency_ms.{stage}.{key}', before, after))
+
+    return regressions
+
+
+def print_comparison(regressions: List[Tuple[str, str, float, float]], tolerance: float) -> int:
+    if not regressions:
+        print(f"✅ No regressions beyond {tolerance:.0%}")
+        return 0
+    print(f"❌ {len(regressions)} regression(s) beyond {tolerance:.0%}:")
+    for name, metric, before, after in regressions:
+        change = (after - before) / before if before else float('inf')
+        print(f"  {name} {metric}: {before:.2f} -> {after:.2f} ({change:+.0%})")
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='process_frame benchmark harness')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Benchmark trackers on recorded clips')
+    run_parser.add_argument('clips', nargs='+',
+                            help='Video files, image directories or synthetic[:frames]')
+    run_parser.add_argument('--trackers', nargs='+', choices=sorted(TRACKERS),
+                            default=['precise', 'advanced', 'final_enhanced'])
+    run_parser.add_argument('--width', type=int, default=640)
+    run_parser.add_argument('--height', type=int, default=480)
+    run_parser.add_argument('--warmup', type=int, default=10, help='Frames per clip excluded from stats')
+    run_parser.add_argument('--max-frames', type=int, default=None, help='Frames per clip after warmup')
+    run_parser.add_argument('--tracemalloc', action='store_true',
+                            help='Trace Python allocations (slows every stage down)')
+    run_parser.add_argument('--ai-helper', action='store_true', help='Keep the VLM helper enabled')
+    run_parser.add_argument('-o', '--output', help='Save results as a JSON baseline')
+    run_parser.add_argument('--compare', help='Baseline JSON to compare against')
+    run_parser.add_argument('--tolerance', type=float, default=0.10)
+
+    batch_parser = commands.add_parser('batch', help='Benchmark cross-session YOLO micro-batching')
+    batch_parser.add_argument('source', help='Video file, image directory or synthetic')
+    batch_parser.add_argument('--sessions', type=int, default=8)
+    batch_parser.add_argument('--calls', type=int, default=50, help='detect_phones calls per session')
+    batch_parser.add_argument('--max-batch', type=int, default=8)
+    batch_parser.add_argument('--max-delay-ms', type=float, default=10.0)
+    batch_parser.add_argument('--model', default='yolo11s.pt')
+    batch_parser.add_argument('--width', type=int, default=640)
+    batch_parser.add_argument('--height', type=int, default=480)
+    batch_parser.add_argument('-o', '--output', help='Save results as JSON')
+
+    compare_parser = commands.add_parser('compare', help='Compare two saved results')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--tolerance', type=float, default=0.10)
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        report = run(args)
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+            sys.exit(print_comparison(compare(baseline, report, args.tolerance), args.tolerance))
+    elif args.command == 'batch':
+        report = benchmark_batching(args)
+        print_batch_report(report)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Saved results to {args.output}")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        sys.exit(print_comparison(compare(baseline, current, args.tolerance), args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
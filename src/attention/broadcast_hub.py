@@ -0,0 +1,223 @@
+"""
+Event-loop-owned fan-out hub for WebSocket broadcasts.
+Each client gets a bounded queue (drop-oldest) and its own sender task,
+so one slow client never delays the others. Clients that stay above the
+high-water mark are downsampled, and evicted if they still cannot keep up.
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import websockets
+
+
+class ClientChannel:
+    """Bounded send queue, backpressure state and lag metrics for one connected client"""
+
+    def __init__(self, websocket, max_queue: int):
+        self.websocket = websocket
+        self.queue: "asyncio.Queue[Tuple[int, float, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self.task: Optional[asyncio.Task] = None
+        self.connected_at = time.time()
+
+        # Backpressure state
+        self.degraded = False
+        self.over_hwm_since: Optional[float] = None
+        self.last_offered_at = 0.0
+
+        # Lag metrics
+        self.sent = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.downgrades = 0
+        self.last_sent_seq = 0
+        self.last_send_ms = 0.0
+        self.avg_send_ms = 0.0
+        self.last_delivery_lag_ms = 0.0
+
+    def offer(self, item: Tuple[int, float, Any]):
+        """Enqueue a message, dropping the oldest one if the queue is full"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(item)
+
+    def stats(self, latest_seq: int) -> Dict[str, Any]:
+        """Per-client lag metrics"""
+        return {
+            'remote_address': str(getattr(self.websocket, 'remote_address', '')),
+            'connected_seconds': time.time() - self.connected_at,
+            'queued': self.queue.qsize(),
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'skipped': self.skipped,
+            'degraded': self.degraded,
+            'downgrades': self.downgrades,
+            'sequence_lag': max(0, latest_seq - self.last_sent_seq),
+            'last_send_ms': self.last_send_ms,
+            'avg_send_ms': self.avg_send_ms,
+            'delivery_lag_ms': self.last_delivery_lag_ms
+        }
+
+
+class BroadcastHub:
+    """
+    Fan-out hub owned by one event loop.
+    Worker threads hand messages over with publish_threadsafe().
+
+    A message may be a callable taking the websocket; it is resolved in the
+    sender task, so per-client payloads (e.g. wire deltas) are built at send time.
+    """
+
+    def __init__(self, max_queue: int = 8, high_water_mark: Optional[int] = None,
+                 degraded_rate_hz: float = 2.0, evict_after_seconds: float = 10.0):
+        """
+        Args:
+            max_queue: Messages buffered per client before the oldest is dropped
+            high_water_mark: Queue depth at which a client is downsampled (default: max_queue // 2)
+            degraded_rate_hz: Message rate for downsampled clients
+            evict_after_seconds: Disconnect clients that stay above the high-water mark this long
+                                 (0 disables eviction)
+        """
+        self.max_queue = max_queue
+        self.high_water_mark = high_water_mark if high_water_mark is not None else max(1, max_queue // 2)
+        self.degraded_interval = 1.0 / degraded_rate_hz if degraded_rate_hz > 0 else 0.0
+        self.evict_after_seconds = evict_after_seconds
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.channels: Dict[Any, ClientChannel] = {}
+        self.sequence = 0
+        self.evictions = 0
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        """Bind the hub to the event loop that owns the client connections"""
+        self.loop = loop
+
+    def register(self, websocket) -> ClientChannel:
+        """Add a client and start its sender task (call on the hub's loop)"""
+        channel = ClientChannel(websocket, self.max_queue)
+        channel.task = asyncio.ensure_future(self._sender(channel))
+        self.channels[websocket] = channel
+        return channel
+
+    async def unregister(self, websocket):
+        """Remove a client and stop its sender task"""
+        channel = self.channels.pop(websocket, None)
+        if channel and channel.task and channel.task is not asyncio.current_task():
+            channel.task.cancel()
+            try:
+                await channel.task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def has_clients(self) -> bool:
+        return bool(self.channels)
+
+    def publish(self, message: Any):
+        """Queue a message for every client (must run on the hub's loop)"""
+        self.sequence += 1
+        now = time.perf_counter()
+        item = (self.sequence, now, message)
+
+        for channel in list(self.channels.values()):
+            self._update_backpressure(channel, now)
+            if channel.websocket not in self.channels:
+                continue  # Evicted
+
+            # Downsampled clients only receive a message every degraded_interval
+            if channel.degraded and now - channel.last_offered_at < self.degraded_interval:
+                channel.skipped += 1
+                continue
+
+            channel.last_offered_at = now
+            channel.offer(item)
+
+    def publish_threadsafe(self, message: Any):
+        """Hand a message over from a worker thread"""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.publish, message)
+
+    def _update_backpressure(self, channel: ClientChannel, now: float):
+        """Downsample clients above the high-water mark, restore or evict them"""
+        depth = channel.queue.qsize()
+
+        if depth >= self.high_water_mark:
+            if channel.over_hwm_since is None:
+                channel.over_hwm_since = now
+            if not channel.degraded:
+                channel.degraded = True
+                channel.downgrades += 1
+            elif self.evict_after_seconds and now - channel.over_hwm_since > self.evict_after_seconds:
+                self._evict(channel)
+        else:
+            channel.over_hwm_since = None
+            if channel.degraded and depth == 0:
+                channel.degraded = False
+
+    def _evict(self, channel: ClientChannel):
+        """Disconnect a persistently slow client"""
+        self.evictions += 1
+        self.channels.pop(channel.websocket, None)
+        if channel.task:
+            channel.task.cancel()
+        print(f"Evicting slow client {getattr(channel.websocket, 'remote_address', '?')} "
+              f"(queued: {channel.queue.qsize()}, dropped: {channel.dropped})")
+        asyncio.ensure_future(self._close_quietly(channel.websocket))
+
+    async def _close_quietly(self, websocket):
+        try:
+            await websocket.close(code=1013, reason="Client too slow")
+        except Exception:
+            pass
+
+    async def _sender(self, channel: ClientChannel):
+        """Drain one client's queue - runs concurrently with every other client"""
+        try:
+            while True:
+                seq, enqueued_at, message = await channel.queue.get()
+                if callable(message):
+                    message = message(channel.websocket)
+                    if not message:
+                        continue
+
+                start = time.perf_counter()
+                await channel.websocket.send(message)
+                end = time.perf_counter()
+
+                channel.sent += 1
+                channel.last_sent_seq = seq
+                channel.last_send_ms = (end - start) * 1000.0
+                channel.avg_send_ms += 0.1 * (channel.last_send_ms - channel.avg_send_ms)
+                channel.last_delivery_lag_ms = (end - enqueued_at) * 1000.0
+        except asyncio.CancelledError:
+            raise
+        except websockets.exceptions.ConnectionClosed:
+            self.channels.pop(channel.websocket, None)
+        except Exception as e:
+            print(f"Error sending to client {getattr(channel.websocket, 'remote_address', '?')}: {e}")
+            self.channels.pop(channel.websocket, None)
+
+    def client_stats(self) -> List[Dict[str, Any]]:
+        """Lag metrics for every connected client"""
+        return [channel.stats(self.sequence) for channel in self.channels.values()]
+
+    def status(self) -> Dict[str, Any]:
+        """Hub-wide backpressure summary"""
+        return {
+            'clients': self.client_stats(),
+            'degraded_clients': sum(1 for channel in self.channels.values() if channel.degraded),
+            'evictions': self.evictions,
+            'max_queue': self.max_queue,
+            'high_water_mark': self.high_water_mark
+        }
+
+    async def close(self):
+        """Stop all sender tasks"""
+        for websocket in list(self.channels):
+            await self.unregister(websocket)
@@ -3,7 +3,7 @@
 HTTP server using YOUR COMPLETE PreciseAttentionTracker algorithm
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, make_response
 from flask_cors import CORS
 import cv2
 import time
@@ -13,6 +13,10 @@ import numpy as np
 
 # Import YOUR Precise Attention Tracker class
 from precise_attention_tracker import PreciseAttentionTracker
+from frame_sync import FrameSequence, etag_for, etag_matches, parse_etag
+from attention_metrics import FrameSnapshot
+from loop_profiler import LoopProfiler
+from memory_telemetry import memory_telemetry
 
 app = Flask(__name__)
 CORS(app)
@@ -21,7 +25,7 @@ CORS(app)
 tracking_active = False
 tracker = None
 tracker_thread = None
-current_data = {
+initial_data = {
     'attention_score': 0.85,
     'eye_ar': 0.25,
     'mouth_ar': 0.12,
@@ -32,52 +36,43 @@ current_data = {
     'focus_status': 'focused',
     'session_active': False
 }
+frame_sequence = FrameSequence()
+
+# On-demand profiler for the tracker thread
+profiler = LoopProfiler('complete_tracker')
+
+# Latest frame - replaced (never mutated) once per frame, serialized at most once
+current_snapshot = FrameSnapshot(0, initial_data)
 
 def run_your_complete_algorithm():
     """Background thread using YOUR COMPLETE PreciseAttentionTracker algorithm"""
-    global current_data, tracking_active, tracker
+    global current_snapshot, tracking_active, tracker
     
     while tracking_active and tracker:
+        profiler.checkpoint()
         try:
             # Use YOUR COMPLETE algorithm - capture frame
             ret, frame = tracker.cap.read()
             if not ret:
                 print("❌ Failed to read frame from camera")
                 continue
+            capture_time = time.perf_counter()
             
             # Flip frame horizontally for mirror effect (YOUR EXACT CODE)
             frame = cv2.flip(frame, 1)
             
             # Use YOUR COMPLETE process_frame algorithm
             metrics = tracker.process_frame(frame)
+            tracker.fps_counter.record_latency(capture_time)
             
-            # Convert YOUR algorithm results to API format (ensure JSON serializable)
-            current_data.update({
-                'attention_score': float(metrics.get('focus_score', 0.0)),
-                'eye_ar': float(metrics.get('ear', 0.0)),
-                'mouth_ar': float(metrics.get('mar', 0.0)),
-                'head_tilt': float(metrics.get('head_tilt', 0.0)),
-                'phone_detected': bool(metrics.get('phone_near_face', False)),
-                'fps': float(metrics.get('fps', 30)),
-                'timestamp': time.time(),
-                'focus_status': 'focused' if bool(metrics.get('focused', False)) else 'distracted',
-                'session_active': bool(tracking_active),
-                'camera_active': True,
-                'frame_width': int(tracker.frame_width),
-                'frame_height': int(tracker.frame_height),
-                # YOUR COMPLETE algorithm data
-                'face_visible': bool(metrics.get('face_visible', False)),
-                'orientation_good': bool(metrics.get('orientation_good', False)),
-                'yaw': float(metrics.get('yaw', 0.0)),
-                'pitch': float(metrics.get('pitch', 0.0)),
-                'roll': float(metrics.get('roll', 0.0)),
-                'eye_closed': bool(metrics.get('eye_closed', False)),
-                'yawning': bool(metrics.get('yawning', False)),
-                'hand_near_face': bool(metrics.get('hand_near_face', False)),
-                'phone_confidence': float(metrics.get('phone_confidence', 0.0)),
-                'posture_stable': bool(metrics.get('posture_stable', False)),
-                'status_messages': metrics.get('status_messages', {})
-            })
+            # YOUR algorithm returns native-typed AttentionMetrics - convert to API format
+            data = metrics.to_api_data(
+                tracker.frame_width, tracker.frame_height, tracking_active, time.time()
+            )
+
+            # Swap in the new frame, then signal pollers waiting on it
+            current_snapshot = FrameSnapshot(frame_sequence.value + 1, data)
+            frame_sequence.advance()
             
             # Small delay to prevent overwhelming
             time.sleep(0.033)  # ~30 FPS
@@ -93,6 +88,28 @@ def get_status():
         'status': 'running',
         'tracking_active': tracking_active,
         'camera_active': tracker is not None and tracker.cap is not None and tracker.cap.isOpened(),
+        'frame_timing': tracker.fps_counter.stats() if tracker is not None else None,
+        'memory': memory_telemetry.status(),
+        'timestamp': time.time()
+    })
+
+@app.route('/api/memory', methods=['GET'])
+def get_memory():
+    """RSS trend, cache sizes and (when tracing) allocations per subsystem"""
+    return jsonify({
+        'success': True,
+        'memory': memory_telemetry.status(detailed=True),
+        'timestamp': time.time()
+    })
+
+@app.route('/api/memory/tracemalloc', methods=['POST'])
+def set_memory_tracing():
+    """Enable or disable tracemalloc allocation tracking at runtime"""
+    memory_telemetry.set_tracing(request.args.get('enabled', 'true').lower() in ('1', 'true', 'yes'))
+    memory_telemetry.sample()
+    return jsonify({
+        'success': True,
+        'memory': memory_telemetry.status(detailed=True),
         'timestamp': time.time()
     })
 
@@ -171,12 +188,53 @@ def stop_tracking():
 
 @app.route('/api/attention_data', methods=['GET'])
 def get_attention_data():
-    """Get data from YOUR COMPLETE algorithm"""
-    return jsonify({
-        'success': True,
-        'data': current_data,
-        'timestamp': time.time()
-    })
+    """Get data from YOUR COMPLETE algorithm (supports If-None-Match and long-poll)"""
+    if_none_match = request.headers.get('If-None-Match')
+
+    # Long-poll: Flask already serves each request on its own thread, so wait on it
+    if request.args.get('wait', '').lower() in ('1', 'true'):
+        since = request.args.get('since', type=int)
+        if since is None:
+            since = parse_etag(if_none_match)
+        if since is None:
+            since = frame_sequence.value
+        frame_sequence.wait_newer(since, request.args.get('timeout', 25.0, type=float))
+
+    snapshot = current_snapshot
+    etag = etag_for(snapshot.sequence)
+    if etag_matches(if_none_match, snapshot.sequence):
+        response = make_response('', 304)
+    else:
+        # The frame's JSON is encoded once and shared by every request for that sequence
+        response = Response(snapshot.envelope_bytes(time.time()), mimetype='application/json')
+        response.headers['Cache-Control'] = 'no-cache'
+    response.headers['ETag'] = etag
+    response.headers['X-Frame-Sequence'] = str(snapshot.sequence)
+    return response
+
+@app.route('/api/profile/start', methods=['POST'])
+def start_profile():
+    """Profile the tracker thread for `duration` seconds (sampling or cprofile)"""
+    try:
+        status = profiler.start(
+            request.args.get('mode', 'sampling'),
+            float(request.args.get('duration', 10.0)),
+            float(request.args.get('interval_ms', 5.0)),
+            int(request.args.get('top', 25))
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, 'profile': status, 'timestamp': time.time()})
+
+@app.route('/api/profile/stop', methods=['POST'])
+def stop_profile():
+    """End the running profile capture early"""
+    return jsonify({'success': True, 'profile': profiler.stop(), 'timestamp': time.time()})
+
+@app.route('/api/profile', methods=['GET'])
+def get_profile():
+    """Profiler state and the last capture's top-N summary"""
+    return jsonify({'success': True, 'profile': profiler.status(), 'timestamp': time.time()})
 
 @app.route('/api/ping', methods=['GET'])
 def ping():
@@ -205,7 +263,15 @@ if __name__ == '__main__':
     print("  POST /api/start_tracking - Start YOUR complete algorithm")
     print("  POST /api/stop_tracking - Stop YOUR algorithm")
     print("  GET  /api/attention_data - Get algorithm data")
+    print("  GET  /api/memory - Memory telemetry")
+    print("  POST /api/profile/start - Profile the tracker thread")
+    print("  GET  /api/profile - Profiler status and last summary")
     print("  GET  /api/ping - Ping endpoint")
     print("\nPress Ctrl+C to stop")
     
+    memory_telemetry.register_probe(
+        'ai_helper_cache',
+        lambda: len(getattr(getattr(tracker, 'ai_helper', None), 'cache', ()))
+    )
+    memory_telemetry.start()
     app.run(host='localhost', port=8765, debug=False)
@@ -3,12 +3,12 @@
 FastAPI HTTP server using YOUR ADVANCED ATTENTION TRACKER (MediaPipe-based)
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import cv2
+import os
 import time
-import threading
 import json
 import numpy as np
 import asyncio
@@ -17,23 +17,17 @@ from pydantic import BaseModel
 
 # Import YOUR ADVANCED Attention Tracker class
 from advanced_attention_tracker import AdvancedAttentionTracker
-
-def convert_numpy_types(obj):
-    """Convert NumPy types to native Python types for JSON serialization"""
-    if isinstance(obj, np.bool_):
-        return bool(obj)
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_types(item) for item in obj]
-    else:
-        return obj
+from wire_format import CONTENT_TYPES
+from frame_sync import etag_for, etag_matches, parse_etag
+from stream_manager import StreamManager, TrackerStream
+from frame_ingest import FrameBufferPool, PushFrameSource, clamp_frame_size, decode_frame_message
+from frame_source import client_source, parse_url_allowlist
+from preview_stream import BOUNDARY, mjpeg_part, viewer_class_for
+from yolo11_phone_detector import configure_batching, batching_stats
+from study_session_backend import StudySessionBackend
+from stage_metrics import stage_timers
+from loop_profiler import LoopProfiler
+from memory_telemetry import memory_telemetry
 
 # Pydantic models for request/response validation
 class TrackingResponse(BaseModel):
@@ -48,6 +42,9 @@ class StatusResponse(BaseModel):
     tracking_active: bool
     camera_active: bool
     timestamp: float
+    frame_timing: Optional[dict] = None
+    memory: Optional[dict] = None
+    streams: Optional[dict] = None
 
 class AttentionDataResponse(BaseModel):
     success: bool
@@ -72,125 +69,173 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global state
-tracking_active = False
-tracker: Optional[AdvancedAttentionTracker] = None
-tracker_thread: Optional[threading.Thread] = None
-current_data = {
-    'attention_score': 0.85,
-    'eye_ar': 0.25,
-    'mouth_ar': 0.12,
-    'head_tilt': 5.2,
-    'phone_detected': False,
-    'fps': 30,
-    'timestamp': time.time(),
-    'focus_status': 'focused',
-    'session_active': False
-}
-
-def run_your_advanced_algorithm():
-    """Background thread using YOUR ADVANCED MediaPipe-based algorithm"""
-    global current_data, tracking_active, tracker
-
-    while tracking_active and tracker:
-        try:
-            # Use YOUR ADVANCED algorithm - capture frame
-            ret, frame = tracker.cap.read()
-            if not ret:
-                print("❌ Failed to read frame from camera")
-                continue
+# Streams: each camera/video stream has its own tracker thread and result slot.
+# The legacy single-camera endpoints drive the "default" stream.
+# STREAM_WORKERS=process runs every stream's tracker in its own worker process.
+DEFAULT_STREAM = 'default'
+# TARGET_FPS (and optionally CPU_BUDGET, a 0-1 share of all cores) turns on adaptive quality.
+TARGET_FPS = float(os.environ['TARGET_FPS']) if os.environ.get('TARGET_FPS') else None
+CPU_BUDGET = float(os.environ['CPU_BUDGET']) if os.environ.get('CPU_BUDGET') else None
+# Video files and image directories clients may stream from (none when unset)
+STREAM_MEDIA_DIR = os.environ.get('STREAM_MEDIA_DIR')
+# Stream hosts or URL prefixes clients may open (none when unset, so the server never
+# fetches arbitrary URLs on a client's behalf)
+STREAM_URL_ALLOWLIST = parse_url_allowlist(os.environ.get('STREAM_URL_ALLOWLIST'))
+stream_manager = StreamManager(
+    lambda source, frame_width, frame_height: AdvancedAttentionTracker(
+        frame_width=frame_width, frame_height=frame_height, source=source,
+        target_fps=TARGET_FPS, cpu_budget=CPU_BUDGET),
+    process_tracker=('advanced_attention_tracker:AdvancedAttentionTracker'
+                     if os.environ.get('STREAM_WORKERS') == 'process' else None),
+    process_tracker_kwargs={'target_fps': TARGET_FPS, 'cpu_budget': CPU_BUDGET}
+)
+
+# Study session history and per-frame metrics logs (under STUDY_DATA_DIR; the
+# database is opened on first use, not at import)
+session_backend = StudySessionBackend()
+
+# On-demand profiler for the default stream's tracker thread (captures go under the data dir)
+profiler = LoopProfiler('fastapi_tracker', os.path.join(session_backend.data_dir, 'profiles'))
+default_stream = stream_manager.stream(DEFAULT_STREAM, profiler=profiler)
+
+# Decode buffers shared by all remote ingestion connections
+frame_pool = FrameBufferPool(max_per_shape=32)
+
+# Cross-stream micro-batching of YOLO phone detection (thread mode; off by default)
+configure_batching(int(os.environ.get('PHONE_BATCH_SIZE', '1')),
+                   float(os.environ.get('PHONE_BATCH_DELAY_MS', '10')))
+
+ALGORITHM_FEATURES = [
+    'MediaPipe Face Mesh (478 landmarks)',
+    'MediaPipe Hands Detection',
+    'MediaPipe Pose Detection',
+    'Advanced Eye Aspect Ratio (EAR)',
+    'Mouth Aspect Ratio (MAR) for Yawning',
+    'Head Pose Estimation (Yaw/Pitch/Roll)',
+    'YOLOv11 Phone Detection',
+    'Hand Near Face Detection',
+    'Posture Analysis',
+    'Enhanced Focus Scoring'
+]
+
+def get_stream_or_404(stream_id: str) -> TrackerStream:
+    stream = stream_manager.get(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail=f"Unknown stream: {stream_id}")
+    return stream
+
+async def attention_data_response(stream: TrackerStream, request: Request, wait: bool,
+                                  since: Optional[int], timeout: float) -> Response:
+    """Latest frame of a stream as JSON (supports If-None-Match and long-poll)"""
+    if_none_match = request.headers.get('if-none-match')
+
+    # Long-poll: wait on the event loop until a newer frame exists or timeout
+    if wait:
+        if since is None:
+            since = parse_etag(if_none_match)
+        if since is None:
+            since = stream.sequence.value
+        await stream.sequence.wait_newer_async(since, timeout)
+
+    snapshot = stream.snapshot
+    etag = etag_for(snapshot.sequence)
+    headers = {'ETag': etag, 'X-Frame-Sequence': str(snapshot.sequence)}
+    if etag_matches(if_none_match, snapshot.sequence):
+        return Response(status_code=304, headers=headers)
+
+    # The frame's JSON is encoded once and shared by every request for that sequence
+    headers['Cache-Control'] = 'no-cache'
+    return Response(
+        content=snapshot.envelope_bytes(time.time()),
+        media_type='application/json',
+        headers=headers
+    )
 
-            # Flip frame for mirror effect
-            frame = cv2.flip(frame, 1)
-
-            # Use YOUR COMPLETE process_frame algorithm
-            metrics = tracker.process_frame(frame)
-
-            # Convert NumPy types to native Python types
-            metrics = convert_numpy_types(metrics)
-
-            # Convert YOUR algorithm results to API format
-            current_data.update({
-                'attention_score': metrics.get('focus_score', 0.0),
-                'eye_ar': metrics.get('ear', 0.0),
-                'mouth_ar': metrics.get('mar', 0.0),
-                'head_tilt': metrics.get('head_tilt', 0.0),
-                'phone_detected': metrics.get('phone_near_face', False),
-                'fps': metrics.get('fps', 30),
-                'timestamp': time.time(),
-                'focus_status': 'focused' if metrics.get('focused', False) else 'distracted',
-                'session_active': tracking_active,
-                'camera_active': True,
-                'frame_width': tracker.frame_width,
-                'frame_height': tracker.frame_height,
-                # YOUR ADVANCED algorithm data
-                'face_visible': metrics.get('face_visible', False),
-                'orientation_good': metrics.get('orientation_good', False),
-                'yaw': metrics.get('yaw', 0.0),
-                'pitch': metrics.get('pitch', 0.0),
-                'roll': metrics.get('roll', 0.0),
-                'eye_closed': metrics.get('eye_closed', False),
-                'yawning': metrics.get('yawning', False),
-                'hand_near_face': metrics.get('hand_near_face', False),
-                'phone_confidence': metrics.get('phone_confidence', 0.0),
-                'posture_stable': metrics.get('posture_stable', False),
-                'status_messages': metrics.get('status_messages', {})
-            })
-
-            # Small delay to prevent overwhelming
-            time.sleep(0.033)  # ~30 FPS
+def wire_response(stream: TrackerStream, since: Optional[int], format: str) -> Response:
+    """Compact keyframe, or a delta against the client's last acknowledged sequence"""
+    try:
+        seq, payload = stream.wire_encoder.encode(since, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        except Exception as e:
-            print(f"Error in YOUR ADVANCED algorithm: {e}")
-            import traceback
-            traceback.print_exc()
-            time.sleep(0.1)
+    if not payload:
+        return Response(status_code=204, headers={'X-Frame-Sequence': str(seq)})
+
+    return Response(
+        content=payload,
+        media_type=CONTENT_TYPES[format],
+        headers={'X-Frame-Sequence': str(seq)}
+    )
+
+def preview_response(stream: TrackerStream, request: Request, profile: Optional[str]) -> StreamingResponse:
+    """MJPEG preview of a stream; each frame is encoded once per viewer class and shared"""
+    if not stream.supports_preview:
+        raise HTTPException(status_code=501, detail="Preview isn't available for worker-process streams")
+    if not stream.active:
+        raise HTTPException(status_code=409, detail=f"Stream {stream.stream_id} is not running")
+    profile = profile or viewer_class_for(request.headers.get('user-agent'))
+    if profile not in stream.preview.classes:
+        raise HTTPException(status_code=400, detail=f"Unknown preview profile: {profile}")
+
+    async def frames():
+        preview = stream.preview
+        viewer_class = preview.add_viewer(profile)
+        interval = 1.0 / viewer_class.max_fps
+        seq = preview.sequence.value
+        next_send = time.perf_counter()
+        try:
+            while stream.active:
+                await preview.sequence.wait_newer_async(seq, 5.0)
+                if preview.sequence.value <= seq:
+                    continue
+                # Cap the class frame rate; the newest frame is taken after the wait
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_send = max(next_send + interval, time.perf_counter())
+                # Another viewer of this class may already have encoded the newest frame
+                if viewer_class.encoded[0] == preview.sequence.value:
+                    seq, jpeg = viewer_class.encoded
+                else:
+                    seq, jpeg = await asyncio.to_thread(preview.encoded, viewer_class)
+                if jpeg:
+                    yield mjpeg_part(jpeg)
+        finally:
+            preview.remove_viewer(profile)
+
+    return StreamingResponse(frames(), media_type=f'multipart/x-mixed-replace; boundary={BOUNDARY}',
+                             headers={'Cache-Control': 'no-cache, no-store'})
 
 @app.get("/api/status", response_model=StatusResponse)
 async def get_status():
     """Get server status"""
     return StatusResponse(
         status='running',
-        tracking_active=tracking_active,
-        camera_active=tracker is not None and tracker.cap is not None and tracker.cap.isOpened(),
-        timestamp=time.time()
+        tracking_active=default_stream.active,
+        camera_active=default_stream.camera_active,
+        timestamp=time.time(),
+        frame_timing=default_stream.frame_timing(),
+        memory=memory_telemetry.status(),
+        streams=stream_manager.status()
     )
 
 @app.post("/api/start_tracking", response_model=TrackingResponse)
 async def start_tracking():
     """Start tracking using YOUR ADVANCED MediaPipe-based algorithm"""
-    global tracking_active, tracker_thread, tracker
-
-    if not tracking_active:
+    if not default_stream.active:
         try:
-            # Use YOUR ADVANCED Attention Tracker class
-            tracker = AdvancedAttentionTracker(camera_index=0, frame_width=640, frame_height=480)
+            # Use YOUR ADVANCED Attention Tracker class on the default camera
+            stream_manager.start_stream(DEFAULT_STREAM, '0', 640, 480)
             print("✅ YOUR ADVANCED Attention Tracker algorithm initialized")
 
-            tracking_active = True
-            tracker_thread = threading.Thread(target=run_your_advanced_algorithm)
-            tracker_thread.daemon = True
-            tracker_thread.start()
-
             return TrackingResponse(
                 success=True,
                 message='YOUR ADVANCED MediaPipe-based algorithm started',
                 timestamp=time.time(),
-                algorithm_features=[
-                    'MediaPipe Face Mesh (478 landmarks)',
-                    'MediaPipe Hands Detection',
-                    'MediaPipe Pose Detection',
-                    'Advanced Eye Aspect Ratio (EAR)',
-                    'Mouth Aspect Ratio (MAR) for Yawning',
-                    'Head Pose Estimation (Yaw/Pitch/Roll)',
-                    'YOLOv11 Phone Detection',
-                    'Hand Near Face Detection',
-                    'Posture Analysis',
-                    'Enhanced Focus Scoring'
-                ],
+                algorithm_features=ALGORITHM_FEATURES,
                 camera_params={
-                    'width': tracker.frame_width,
-                    'height': tracker.frame_height,
+                    'width': default_stream.frame_width,
+                    'height': default_stream.frame_height,
                     'fps': 30
                 }
             )
@@ -213,18 +258,8 @@ async def start_tracking():
 @app.post("/api/stop_tracking", response_model=TrackingResponse)
 async def stop_tracking():
     """Stop tracking using YOUR algorithm cleanup"""
-    global tracking_active, tracker
-
-    tracking_active = False
-
-    # Use YOUR algorithm cleanup
-    if tracker:
-        try:
-            tracker.cap.release()
-            tracker = None
-            print("✅ YOUR ADVANCED Attention Tracker stopped")
-        except Exception as e:
-            print(f"Error stopping YOUR algorithm: {e}")
+    if stream_manager.stop_stream(DEFAULT_STREAM):
+        print("✅ YOUR ADVANCED Attention Tracker stopped")
 
     return TrackingResponse(
         success=True,
@@ -233,21 +268,264 @@ async def stop_tracking():
     )
 
 @app.get("/api/attention_data", response_model=AttentionDataResponse)
-async def get_attention_data():
-    """Get data from YOUR ADVANCED algorithm"""
-    return AttentionDataResponse(
-        success=True,
-        data=convert_numpy_types(current_data),
-        timestamp=time.time()
+async def get_attention_data(request: Request, wait: bool = False,
+                             since: Optional[int] = None, timeout: float = 25.0):
+    """Get data from YOUR ADVANCED algorithm (supports If-None-Match and long-poll)"""
+    return await attention_data_response(default_stream, request, wait, since, timeout)
+
+@app.get("/api/preview")
+async def get_preview(request: Request, profile: Optional[str] = None):
+    """Annotated MJPEG preview of the camera (profile: thumbnail, mobile or desktop)"""
+    return preview_response(default_stream, request, profile)
+
+@app.get("/api/attention_data/wire")
+async def get_attention_data_wire(since: Optional[int] = None, format: str = 'struct'):
+    """Get a compact keyframe, or a delta against the client's last acknowledged sequence"""
+    return wire_response(default_stream, since, format)
+
+@app.get("/api/streams")
+async def list_streams():
+    """All streams with their state and the scheduler's CPU shares"""
+    data = stream_manager.status()
+    data['phone_batching'] = batching_stats()
+    return JSONResponse({'success': True, 'data': data, 'timestamp': time.time()})
+
+@app.post("/api/streams/batching")
+async def set_phone_batching(max_batch: int, max_delay_ms: float = 10.0):
+    """Tune cross-stream YOLO micro-batching (max_batch <= 1 disables it)"""
+    configure_batching(max_batch, max_delay_ms)
+    return JSONResponse({'success': True, 'phone_batching': batching_stats(), 'timestamp': time.time()})
+
+@app.post("/api/streams/{stream_id}/start")
+async def start_stream(stream_id: str, source: str = '0', width: int = 640, height: int = 480,
+                       fps: float = 30.0, weight: float = 1.0):
+    """Start tracking a camera index, synthetic source, allowlisted stream URL, or a file under STREAM_MEDIA_DIR"""
+    width, height = clamp_frame_size(width, height)
+    try:
+        source = client_source(source, STREAM_MEDIA_DIR, STREAM_URL_ALLOWLIST)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        stream = await asyncio.to_thread(
+            stream_manager.start_stream, stream_id, source, width, height, fps, weight)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        print(f"❌ Failed to start stream {stream_id}: {e}")
+        raise HTTPException(status_code=500, detail=f'Failed to start stream: {str(e)}')
+    print(f"✅ Stream {stream_id} started on {source}")
+    return JSONResponse({'success': True, 'data': stream.status(), 'timestamp': time.time()})
+
+@app.post("/api/streams/{stream_id}/stop")
+async def stop_stream(stream_id: str):
+    """Stop a stream's tracker thread and release its source"""
+    stream = get_stream_or_404(stream_id)
+    await asyncio.to_thread(stream_manager.stop_stream, stream_id)
+    return JSONResponse({'success': True, 'data': stream.status(), 'timestamp': time.time()})
+
+@app.delete("/api/streams/{stream_id}")
+async def remove_stream(stream_id: str):
+    """Stop and forget a stream"""
+    if stream_id == DEFAULT_STREAM:
+        raise HTTPException(status_code=400, detail="The default stream can't be removed")
+    get_stream_or_404(stream_id)
+    await asyncio.to_thread(stream_manager.remove_stream, stream_id)
+    return JSONResponse({'success': True, 'timestamp': time.time()})
+
+@app.get("/api/streams/{stream_id}/status")
+async def get_stream_status(stream_id: str):
+    """State and frame timing of one stream"""
+    stream = get_stream_or_404(stream_id)
+    return JSONResponse({'success': True, 'data': stream.status(), 'timestamp': time.time()})
+
+@app.get("/api/streams/{stream_id}/attention_data")
+async def get_stream_attention_data(stream_id: str, request: Request, wait: bool = False,
+                                    since: Optional[int] = None, timeout: float = 25.0):
+    """Latest data of one stream (supports If-None-Match and long-poll)"""
+    return await attention_data_response(get_stream_or_404(stream_id), request, wait, since, timeout)
+
+@app.get("/api/streams/{stream_id}/attention_data/wire")
+async def get_stream_attention_data_wire(stream_id: str, since: Optional[int] = None,
+                                         format: str = 'struct'):
+    """Compact keyframe/delta data of one stream"""
+    return wire_response(get_stream_or_404(stream_id), since, format)
+
+@app.get("/api/streams/{stream_id}/preview")
+async def get_stream_preview(stream_id: str, request: Request, profile: Optional[str] = None):
+    """Annotated MJPEG preview of one stream (profile: thumbnail, mobile or desktop)"""
+    return preview_response(get_stream_or_404(stream_id), request, profile)
+
+async def send_ingest_results(websocket: WebSocket, stream: TrackerStream, format: str):
+    """Send each new result of a remote stream back on its socket (latest only if the client lags)"""
+    sent = 0
+    while stream.active:
+        await stream.sequence.wait_newer_async(sent, 5.0)
+        if stream.sequence.value <= sent:
+            continue
+        if format == 'json':
+            snapshot = stream.snapshot
+            sent = snapshot.sequence
+            await websocket.send_text(snapshot.json_text)
+        else:
+            sent, payload = stream.wire_encoder.encode(sent or None, format)
+            if payload:
+                await websocket.send_bytes(payload)
+
+@app.websocket("/ws/ingest/{stream_id}")
+async def ingest_frames(websocket: WebSocket, stream_id: str, width: int = 640, height: int = 480,
+                        fps: float = 30.0, weight: float = 1.0, mirror: bool = False,
+                        format: str = 'json'):
+    """Track frames sent by a remote client (JPEG or raw) and return its metrics on the same socket"""
+    await websocket.accept()
+    if format not in CONTENT_TYPES:
+        await websocket.close(code=1003, reason=f"Unknown format: {format}")
+        return
+    if stream_id == DEFAULT_STREAM:
+        # The default stream backs the legacy endpoints and must outlive any client
+        await websocket.close(code=1008, reason="The default stream can't be used for ingestion")
+        return
+    width, height = clamp_frame_size(width, height)
+
+    source = PushFrameSource(width, height, pool=frame_pool)
+    # Only a stream this socket created is removed when it disconnects
+    created = False
+    stream = None
+    sender = None
+    bad_frames = 0
+    try:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            payload = message.get('bytes')
+            if not payload:
+                continue
+            try:
+                frame, client_time = await asyncio.to_thread(
+                    decode_frame_message, payload, width, height, frame_pool)
+            except ValueError as e:
+                bad_frames += 1
+                if bad_frames == 1:
+                    print(f"⚠️ Stream {stream_id}: dropping bad frame ({e})")
+                continue
+            source.push(frame, client_time)
+            if stream is not None and not stream.active:
+                await websocket.close(code=1011, reason=stream.error or 'Stream stopped')
+                break
+
+            # The tracker starts once the first frame is in (worker mode sizes its ring from it)
+            if stream is None:
+                created = stream_manager.get(stream_id) is None
+                try:
+                    stream = await asyncio.to_thread(stream_manager.start_stream, stream_id, source,
+                                                     width, height, fps, weight, mirror=mirror)
+                except Exception as e:
+                    await websocket.close(code=1011, reason=f"Failed to start stream: {e}"[:120])
+                    return
+                print(f"✅ Remote stream {stream_id} connected ({width}x{height})")
+                sender = asyncio.create_task(send_ingest_results(websocket, stream, format))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        source.close()
+        if sender is not None:
+            sender.cancel()
+        if created:
+            await asyncio.to_thread(stream_manager.remove_stream, stream_id)
+        elif stream is not None:
+            await asyncio.to_thread(stream_manager.stop_stream, stream_id)
+        if stream is not None:
+            print(f"✅ Remote stream {stream_id} closed: {source.stats()}, {bad_frames} bad frames")
+
+@app.get("/api/sessions")
+async def get_sessions(days: int = 7, limit: int = 50):
+    """Get past study sessions and per-day totals"""
+    history = await asyncio.to_thread(session_backend.get_session_history, days, limit)
+    return JSONResponse({'success': True, 'data': history, 'timestamp': time.time()})
+
+@app.get("/api/sessions/{session_id}/timeline")
+async def get_session_timeline(session_id: str, points: int = 500, method: str = 'lttb',
+                               field: str = 'focus_score'):
+    """Get a session's focus timeline downsampled to a fixed number of points (lttb or minmax)"""
+    points = max(3, min(points, 5000))
+    try:
+        timeline = await asyncio.to_thread(session_backend.get_timeline, session_id, points, method, field)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if timeline is None:
+        raise HTTPException(status_code=404, detail=f"No metrics recorded for session {session_id}")
+
+    # Completed sessions never change, so clients may cache them
+    headers = {'Cache-Control': 'public, max-age=86400' if timeline['complete'] else 'no-cache'}
+    return JSONResponse({'success': True, 'data': timeline, 'timestamp': time.time()}, headers=headers)
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Per-stage process_frame timings in Prometheus text format"""
+    return Response(
+        content=stage_timers.prometheus_text(),
+        media_type='text/plain; version=0.0.4'
     )
 
+@app.post("/api/metrics/timing")
+async def set_stage_timing(enabled: bool):
+    """Enable or disable per-stage timing at runtime"""
+    stage_timers.set_enabled(enabled)
+    return JSONResponse({
+        'success': True,
+        'enabled': stage_timers.enabled,
+        'stages': stage_timers.summary(),
+        'timestamp': time.time()
+    })
+
+@app.get("/api/memory")
+async def get_memory():
+    """RSS trend, cache sizes and (when tracing) allocations per subsystem"""
+    return JSONResponse({
+        'success': True,
+        'memory': memory_telemetry.status(detailed=True),
+        'timestamp': time.time()
+    })
+
+@app.post("/api/memory/tracemalloc")
+async def set_memory_tracing(enabled: bool):
+    """Enable or disable tracemalloc allocation tracking at runtime"""
+    memory_telemetry.set_tracing(enabled)
+    await asyncio.to_thread(memory_telemetry.sample)
+    return JSONResponse({
+        'success': True,
+        'memory': memory_telemetry.status(detailed=True),
+        'timestamp': time.time()
+    })
+
+@app.post("/api/profile/start")
+async def start_profile(mode: str = 'sampling', duration: float = 10.0,
+                        interval_ms: float = 5.0, top: int = 25):
+    """Profile the tracker thread for `duration` seconds (sampling or cprofile)"""
+    try:
+        status = profiler.start(mode, duration, interval_ms, top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse({'success': True, 'profile': status, 'timestamp': time.time()})
+
+@app.post("/api/profile/stop")
+async def stop_profile():
+    """End the running profile capture early"""
+    return JSONResponse({'success': True, 'profile': profiler.stop(), 'timestamp': time.time()})
+
+@app.get("/api/profile")
+async def get_profile():
+    """Profiler state and the last capture's top-N summary"""
+    return JSONResponse({'success': True, 'profile': profiler.status(), 'timestamp': time.time()})
+
 @app.get("/api/ping")
 async def ping():
     """Ping endpoint"""
     return JSONResponse({
         'success': True,
         'message': 'pong',
-        'camera_active': tracker is not None and tracker.cap is not None and tracker.cap.isOpened(),
+        'camera_active': default_stream.camera_active,
         'timestamp': time.time()
     })
 
@@ -264,7 +542,28 @@ async def root():
             "GET /api/status": "Server status",
             "POST /api/start_tracking": "Start advanced algorithm",
             "POST /api/stop_tracking": "Stop algorithm",
-            "GET /api/attention_data": "Get algorithm data"
+            "GET /api/attention_data": "Get algorithm data",
+            "GET /api/attention_data/wire": "Get compact keyframe/delta algorithm data",
+            "GET /api/preview": "Annotated MJPEG camera preview (profile)",
+            "GET /api/streams": "List streams and scheduler shares",
+            "POST /api/streams/batching": "Tune cross-stream phone detection batching",
+            "POST /api/streams/{stream_id}/start": "Start a stream (source, width, height, fps, weight)",
+            "POST /api/streams/{stream_id}/stop": "Stop a stream",
+            "DELETE /api/streams/{stream_id}": "Remove a stream",
+            "GET /api/streams/{stream_id}/status": "Stream status",
+            "GET /api/streams/{stream_id}/attention_data": "Get one stream's data",
+            "GET /api/streams/{stream_id}/attention_data/wire": "Get one stream's compact data",
+            "GET /api/streams/{stream_id}/preview": "Annotated MJPEG preview of one stream",
+            "WS /ws/ingest/{stream_id}": "Send frames from a remote client, receive its metrics",
+            "GET /api/metrics": "Per-stage timings (Prometheus)",
+            "POST /api/metrics/timing": "Enable/disable per-stage timing",
+            "GET /api/memory": "Memory telemetry",
+            "POST /api/memory/tracemalloc": "Enable/disable allocation tracing",
+            "POST /api/profile/start": "Profile the tracker thread",
+            "POST /api/profile/stop": "Stop profiling early",
+            "GET /api/profile": "Profiler status and last summary",
+            "GET /api/sessions": "Get study session history",
+            "GET /api/sessions/{session_id}/timeline": "Get downsampled focus timeline"
         }
     }
 
@@ -272,6 +571,9 @@ async def root():
 @app.on_event("startup")
 async def startup_event():
     """Initialize on startup"""
+    stream_manager.attach_loop(asyncio.get_running_loop())
+    memory_telemetry.register_probe('timeline_cache', lambda: len(session_backend.timeline_cache))
+    memory_telemetry.start()
     print("=" * 70)
     print("🧠 STUDY SPARK AI ATTENTION TRACKING SERVER (FastAPI)")
     print("=" * 70)
@@ -295,6 +597,19 @@ async def startup_event():
     print("  POST /api/start_tracking    - Start YOUR ADVANCED algorithm")
     print("  POST /api/stop_tracking     - Stop YOUR algorithm")
     print("  GET  /api/attention_data    - Get algorithm data")
+    print("  GET  /api/attention_data/wire - Compact keyframe/delta data")
+    print("  GET  /api/preview           - Annotated MJPEG camera preview")
+    print("  GET  /api/streams           - List streams and scheduler shares")
+    print("  POST /api/streams/{id}/start - Start another camera/video stream")
+    print("  GET  /api/streams/{id}/attention_data - One stream's data")
+    print("  WS   /ws/ingest/{id}        - Remote frames in, metrics out")
+    print("  GET  /api/metrics           - Per-stage timings (Prometheus)")
+    print("  POST /api/metrics/timing    - Enable/disable per-stage timing")
+    print("  GET  /api/memory            - Memory telemetry")
+    print("  POST /api/profile/start     - Profile the tracker thread")
+    print("  GET  /api/profile           - Profiler status and last summary")
+    print("  GET  /api/sessions          - Study session history")
+    print("  GET  /api/sessions/{id}/timeline - Downsampled focus timeline")
     print("  GET  /docs                  - Swagger UI documentation")
     print("  GET  /redoc                 - ReDoc documentation")
     print("")
@@ -304,18 +619,19 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    global tracking_active, tracker
     print("🛑 Shutting down Study Spark AI Attention Tracking Server...")
-    
-    tracking_active = False
-    
-    if tracker:
-        try:
-            tracker.cap.release()
-            tracker = None
-            print("✅ Camera resources released")
-        except Exception as e:
-            print(f"Error during cleanup: {e}")
+
+    try:
+        stream_manager.stop_all()
+        print("✅ Camera resources released")
+    except Exception as e:
+        print(f"Error during cleanup: {e}")
+
+    try:
+        await asyncio.to_thread(session_backend.close)
+        print("✅ Session history flushed")
+    except Exception as e:
+        print(f"Error flushing session history: {e}")
     
     print("✅ Server shutdown complete")
 
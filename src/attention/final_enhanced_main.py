@@ -5,7 +5,11 @@ import numpy as np
 from typing import Dict, Any, Tuple, Optional, List
 import mediapipe as mp
 from concurrent.futures import ThreadPoolExecutor
-import threading
+
+from frame_source import FrameSource
+from frame_timing import FPSCounter
+from pipeline import Pipeline, Stage
+from attention_stages import mediapipe_stages
 
 # Try to import YOLO, fallback to MediaPipe only if not available
 try:
@@ -15,39 +19,22 @@ except ImportError:
     YOLO_AVAILABLE = False
     print("⚠️ YOLO not available, using MediaPipe only")
 
-class FPSCounter:
-    """Optimized FPS counter"""
-    def __init__(self):
-        self.frame_count = 0
-        self.start_time = time.time()
-        self.fps_history = []
-        
-    def get_fps(self):
-        self.frame_count += 1
-        elapsed = time.time() - self.start_time
-        if elapsed > 0:
-            fps = self.frame_count / elapsed
-            self.fps_history.append(fps)
-            if len(self.fps_history) > 10:
-                self.fps_history.pop(0)
-            return np.mean(self.fps_history)
-        return 0.0
-
 class FinalEnhancedAttentionTracker:
     """
     Final optimized attention tracker with YOLO + MediaPipe fusion
     """
     
     def __init__(self, camera_index: int = 0, frame_width: int = 640, 
-                 frame_height: int = 480):
+                 frame_height: int = 480, source: Optional[FrameSource] = None):
         self.camera_index = camera_index
+        self.source = source  # Replaces the webcam when given (video file, images, synthetic)
         self.frame_width = frame_width
         self.frame_height = frame_height
         self.frame_count = 0
         
         # Initialize camera
         if not self.initialize_camera():
-            raise IOError("Cannot open webcam")
+            raise IOError("Cannot open webcam" if source is None else f"Cannot open frame source: {source}")
         
         # Initialize MediaPipe
         self.mp_face_mesh = mp.solutions.face_mesh
@@ -90,17 +77,27 @@ class FinalEnhancedAttentionTracker:
         # Performance optimization
         self.fps_counter = FPSCounter()
         self.yolo_frame_skip = 8  # Run YOLO every 8th frame
-        self.last_yolo_results = []
         
-        # Threading for YOLO
-        self.yolo_thread = None
-        self.yolo_results_lock = threading.Lock()
+        # Per-frame stage graph (YOLO runs in the background every yolo_frame_skip frames)
+        self.pipeline = self.build_pipeline()
         
         print(f"✅ Final Enhanced Attention Tracker initialized: {self.frame_width}x{self.frame_height}")
         print(f"📱 YOLO Available: {YOLO_AVAILABLE and self.yolo_model is not None}")
 
     def initialize_camera(self) -> bool:
-        """Initialize camera capture"""
+        """Initialize camera capture (or the configured frame source)"""
+        if self.source is not None:
+            self.cap = self.source
+            if not self.cap.isOpened():
+                print(f"❌ Failed to open frame source {self.source}")
+                return False
+            
+            # Recorded sources dictate the frame size
+            width, height = self.source.frame_size
+            if width and height:
+                self.frame_width, self.frame_height = width, height
+            return True
+        
         try:
             self.cap = cv2.VideoCapture(self.camera_index)
             if not self.cap.isOpened():
@@ -197,135 +194,114 @@ class FinalEnhancedAttentionTracker:
         return {"yaw": yaw, "pitch": pitch}
 
     def run_yolo_detection(self, frame):
-        """Run YOLO detection in background thread"""
-        if not self.yolo_model:
-            return
-        
-        try:
-            # Resize for faster processing
-            small_frame = cv2.resize(frame, (320, 240))
-            results = self.yolo_model(small_frame, verbose=False)
-            
-            phone_boxes = []
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # Check if it's a cell phone (class 67 in COCO)
-                        if int(box.cls) == 67:  # Cell phone class
-                            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                            # Scale back to original frame size
-                            x1 = int(x1 * self.frame_width / 320)
-                            y1 = int(y1 * self.frame_height / 240)
-                            x2 = int(x2 * self.frame_width / 320)
-                            y2 = int(y2 * self.frame_height / 240)
-                            phone_boxes.append((x1, y1, x2, y2))
-            
-            with self.yolo_results_lock:
-                self.last_yolo_results = phone_boxes
-        except Exception as e:
-            print(f"YOLO detection error: {e}")
+        """Run YOLO on a downscaled frame (phone_detection stage, off the frame path)"""
+        # Resize for faster processing
+        small_frame = cv2.resize(frame, (320, 240))
+        results = self.yolo_model(small_frame, verbose=False)
+        
+        phone_boxes = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is not None:
+                for box in boxes:
+                    # Check if it's a cell phone (class 67 in COCO)
+                    if int(box.cls) == 67:  # Cell phone class
+                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+                        # Scale back to original frame size
+                        x1 = int(x1 * self.frame_width / 320)
+                        y1 = int(y1 * self.frame_height / 240)
+                        x2 = int(x2 * self.frame_width / 320)
+                        y2 = int(y2 * self.frame_height / 240)
+                        phone_boxes.append((x1, y1, x2, y2))
+        return phone_boxes
 
-    def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
-        """Process a single frame with optimized detection"""
-        self.frame_count += 1
-        
-        # Convert BGR to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Process with MediaPipe
-        face_results = self.face_mesh.process(rgb_frame)
-        hands_results = self.hands.process(rgb_frame)
-        pose_results = self.pose.process(rgb_frame)
-        
-        # Initialize results
-        results = {
-            "face_detected": False,
-            "face_landmarks": None,
-            "hands_detected": 0,
-            "hands_landmarks": [],
-            "pose_landmarks": None,
-            "yaw": 0.0,
-            "pitch": 0.0,
-            "orientation": "Unknown",
-            "posture": "Unknown",
-            "hand_near_face": False,
-            "phone_near_face": False,
-            "phone_boxes": [],
-            "focused": True,
-            "focus_score": 1.0,
-            "fps": 0.0
-        }
-        
-        # Face detection and orientation
-        if face_results.multi_face_landmarks:
-            face_landmarks = face_results.multi_face_landmarks[0]
-            results["face_detected"] = True
-            results["face_landmarks"] = face_landmarks
-            
-            # Calculate orientation
-            orientation = self.calculate_face_orientation(face_landmarks)
-            results["yaw"] = orientation["yaw"]
-            results["pitch"] = orientation["pitch"]
-            results["orientation"] = self.get_orientation_text(orientation["yaw"], orientation["pitch"])
-        
-        # Hand detection
-        if hands_results.multi_hand_landmarks:
-            results["hands_detected"] = len(hands_results.multi_hand_landmarks)
-            results["hands_landmarks"] = hands_results.multi_hand_landmarks
-            
-            # Check if hands are near face
-            if results["face_detected"]:
-                results["hand_near_face"] = self.detect_hand_near_face(
-                    hands_results.multi_hand_landmarks, 
-                    results["face_landmarks"]
-                )
-        
-        # Pose detection
-        if pose_results.pose_landmarks:
-            results["pose_landmarks"] = pose_results.pose_landmarks
-            results["posture"] = self.get_posture_text(pose_results.pose_landmarks)
-        
-        # YOLO phone detection (every nth frame)
-        if self.frame_count % self.yolo_frame_skip == 0:
-            if self.yolo_model:
-                # Run YOLO in background thread
-                if self.yolo_thread is None or not self.yolo_thread.is_alive():
-                    self.yolo_thread = threading.Thread(target=self.run_yolo_detection, args=(frame,))
-                    self.yolo_thread.start()
-        
-        # Get latest YOLO results
-        with self.yolo_results_lock:
-            phone_boxes = self.last_yolo_results.copy()
-        
-        results["phone_boxes"] = phone_boxes
-        
-        # Check if phone is near face
-        if phone_boxes and results["face_detected"]:
-            results["phone_near_face"] = self.detect_phone_near_face(
-                frame, results["face_landmarks"], phone_boxes
-            )
-        
-        # Calculate focus score
+    def build_pipeline(self) -> Pipeline:
+        """This tracker's stage graph (the MediaPipe stages come from attention_stages)"""
+        def face(face_results):
+            if face_results.multi_face_landmarks:
+                return True, face_results.multi_face_landmarks[0]
+            return False, None
+
+        def orientation(face_landmarks):
+            angles = self.calculate_face_orientation(face_landmarks)
+            return angles["yaw"], angles["pitch"], self.get_orientation_text(angles["yaw"], angles["pitch"])
+
+        def hands(hands_results, face_landmarks):
+            hands_landmarks = hands_results.multi_hand_landmarks or []
+            hand_near_face = bool(hands_landmarks and face_landmarks is not None
+                                  and self.detect_hand_near_face(hands_landmarks, face_landmarks))
+            return len(hands_landmarks), hands_landmarks, hand_near_face
+
+        def posture(pose_results):
+            if pose_results.pose_landmarks:
+                return pose_results.pose_landmarks, self.get_posture_text(pose_results.pose_landmarks)
+            return None, "Unknown"
+
+        def phone_proximity(frame, face_landmarks, phone_boxes):
+            if phone_boxes and face_landmarks is not None:
+                return self.detect_phone_near_face(frame, face_landmarks, phone_boxes)
+            return False
+
+        return Pipeline([
+            *mediapipe_stages(self),
+            Stage('face', face, inputs=('face_results',), outputs=('face_detected', 'face_landmarks')),
+            Stage('head_pose', orientation, inputs=('face_landmarks',),
+                  outputs=('yaw', 'pitch', 'orientation'),
+                  when=lambda context: context['face_landmarks'] is not None,
+                  defaults={'yaw': 0.0, 'pitch': 0.0, 'orientation': "Unknown"}),
+            Stage('hand_proximity', hands, inputs=('hands_results', 'face_landmarks'),
+                  outputs=('hands_detected', 'hands_landmarks', 'hand_near_face')),
+            Stage('posture', posture, inputs=('pose_results',), outputs=('pose_landmarks', 'posture')),
+            # Skipped entirely when no YOLO model loaded
+            Stage('phone_detection', lambda frame: self.run_yolo_detection(frame),
+                  inputs=('frame',), outputs=('phone_boxes',),
+                  every=self.yolo_frame_skip, background=True,
+                  when=lambda context: self.yolo_model is not None, defaults={'phone_boxes': []}),
+            Stage('phone_proximity', phone_proximity, inputs=('frame', 'face_landmarks', 'phone_boxes'),
+                  outputs=('phone_near_face',)),
+            Stage('scoring', self.score,
+                  inputs=('face_detected', 'yaw', 'pitch', 'phone_near_face', 'hand_near_face', 'posture'),
+                  outputs=('focus_score', 'focused')),
+        ], inputs=('frame', 'frame_index'), name='final_enhanced')
+
+    def score(self, face_detected, yaw, pitch, phone_near_face, hand_near_face, posture):
+        """Penalty-based focus score"""
         focus_score = 1.0
-        if not results["face_detected"]:
+        if not face_detected:
             focus_score -= 0.3
-        if abs(results["yaw"]) > 0.1 or abs(results["pitch"]) > 0.1:
+        if abs(yaw) > 0.1 or abs(pitch) > 0.1:
             focus_score -= 0.2
-        if results["phone_near_face"]:
+        if phone_near_face:
             focus_score -= 0.4
-        elif results["hand_near_face"]:
+        elif hand_near_face:
             focus_score -= 0.2
-        if results["posture"] == "Slouched":
+        if posture == "Slouched":
             focus_score -= 0.1
         
-        results["focus_score"] = max(0.0, focus_score)
-        results["focused"] = focus_score > 0.7
-        
-        # Add FPS
-        results["fps"] = self.fps_counter.get_fps()
-        
-        return results
+        return max(0.0, focus_score), focus_score > 0.7
+
+    def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
+        """Process a single frame with optimized detection"""
+        self.frame_count += 1
+        result = self.pipeline.run(frame=frame, frame_index=self.frame_count)
+        
+        return {
+            "face_detected": result["face_detected"],
+            "face_landmarks": result["face_landmarks"],
+            "hands_detected": result["hands_detected"],
+            "hands_landmarks": result["hands_landmarks"],
+            "pose_landmarks": result["pose_landmarks"],
+            "yaw": result["yaw"],
+            "pitch": result["pitch"],
+            "orientation": result["orientation"],
+            "posture": result["posture"],
+            "hand_near_face": result["hand_near_face"],
+            "phone_near_face": result["phone_near_face"],
+            "phone_boxes": list(result["phone_boxes"]),
+            "focused": result["focused"],
+            "focus_score": result["focus_score"],
+            "fps": self.fps_counter.get_fps()
+        }
 
     def draw_enhanced_status_overlay(self, frame, metrics, fps):
         """Draw enhanced status overlay with readable text"""
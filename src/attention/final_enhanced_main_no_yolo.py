@@ -4,24 +4,7 @@ import json
 import numpy as np
 from typing import Dict, Any, Tuple, Optional, List
 import mediapipe as mp
-
-class FPSCounter:
-    """Optimized FPS counter"""
-    def __init__(self):
-        self.frame_count = 0
-        self.start_time = time.time()
-        self.fps_history = []
-        
-    def get_fps(self):
-        self.frame_count += 1
-        elapsed = time.time() - self.start_time
-        if elapsed > 0:
-            fps = self.frame_count / elapsed
-            self.fps_history.append(fps)
-            if len(self.fps_history) > 10:
-                self.fps_history.pop(0)
-            return np.mean(self.fps_history)
-        return 0.0
+from frame_timing import FPSCounter
 
 class FinalEnhancedAttentionTracker:
     """
@@ -9,27 +9,14 @@ import json
 import numpy as np
 from typing import Dict, Any, Tuple, Optional, List
 import mediapipe as mp
-import threading
 
 from flexible_phone_detector import FlexiblePhoneDetector
-
-class FPSCounter:
-    """Optimized FPS counter"""
-    def __init__(self):
-        self.frame_count = 0
-        self.start_time = time.time()
-        self.fps_history = []
-        
-    def get_fps(self):
-        self.frame_count += 1
-        elapsed = time.time() - self.start_time
-        if elapsed > 0:
-            fps = self.frame_count / elapsed
-            self.fps_history.append(fps)
-            if len(self.fps_history) > 10:
-                self.fps_history.pop(0)
-            return np.mean(self.fps_history)
-        return 0.0
+from frame_timing import FPSCounter
+from pipeline import Pipeline, Stage
+from attention_stages import (
+    face_box_stage, face_orientation_stage, hand_proximity_stage, mediapipe_stages, phone_stages,
+    posture_stage, weighted_score
+)
 
 class FinalFlexibleTracker:
     """
@@ -82,17 +69,15 @@ class FinalFlexibleTracker:
         # Performance optimization
         self.fps_counter = FPSCounter()
         self.detection_frame_skip = 2  # Run detection every 2nd frame for better performance
-        self.last_phone_results = []
-        
-        # Threading for detection
-        self.detection_thread = None
-        self.detection_results_lock = threading.Lock()
         
         # Focus thresholds
         self.yaw_threshold = 0.25
         self.pitch_threshold = 0.35
         self.posture_threshold = 0.3
         
+        # Per-frame stage graph (phone detection runs in the background every detection_frame_skip frames)
+        self.pipeline = self.build_pipeline()
+        
         print(f"✅ Final Flexible Phone Tracker initialized: {self.frame_width}x{self.frame_height}")
         print("📱 Flexible Phone Detection + MediaPipe + Skeleton")
         print("🎯 Should Actually Detect Your Phone!")
@@ -112,19 +97,6 @@ class FinalFlexibleTracker:
             print(f"❌ Camera initialization failed: {e}")
             return False
 
-    def run_phone_detection_async(self, frame, face_bbox):
-        """Run phone detection in background thread"""
-        try:
-            # Detect phones near face
-            detections = self.phone_detector.detect_phones_near_face(frame, face_bbox)
-            
-            with self.detection_results_lock:
-                self.last_phone_results = detections
-                if detections:
-                    print(f"DEBUG: Found {len(detections)} phone objects!")
-        except Exception as e:
-            print(f"Phone detection error: {e}")
-
     def calculate_face_orientation(self, face_landmarks):
         """Calculate yaw and pitch from face landmarks"""
         try:
@@ -208,95 +180,29 @@ class FinalFlexibleTracker:
         
         return False
 
-    def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
-        """Process a single frame with flexible phone detection + MediaPipe integration"""
-        self.frame_count += 1
-        
-        # Convert BGR to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Process with MediaPipe
-        face_results = self.face_mesh.process(rgb_frame)
-        hands_results = self.hands.process(rgb_frame)
-        pose_results = self.pose.process(rgb_frame)
-        
-        # Initialize detection results
-        face_bbox = None
-        face_landmarks = None
-        hand_landmarks = []
-        phone_objects = []
-        
-        # Extract face bounding box and landmarks
-        if face_results.multi_face_landmarks:
-            face_landmarks = face_results.multi_face_landmarks[0]
-            
-            # Calculate face bounding box
-            all_x, all_y = [], []
-            for landmark in face_landmarks.landmark:
-                all_x.append(landmark.x)
-                all_y.append(landmark.y)
-            
-            x_min = int(min(all_x) * self.frame_width)
-            x_max = int(max(all_x) * self.frame_width)
-            y_min = int(min(all_y) * self.frame_height)
-            y_max = int(max(all_y) * self.frame_height)
-            face_bbox = (x_min, y_min, x_max, y_max)
-        
-        # Extract hand landmarks
-        if hands_results.multi_hand_landmarks:
-            hand_landmarks = hands_results.multi_hand_landmarks
-        
-        # Phone detection (every nth frame)
-        if self.frame_count % self.detection_frame_skip == 0:
-            # Run phone detection in background thread
-            if self.detection_thread is None or not self.detection_thread.is_alive():
-                self.detection_thread = threading.Thread(target=self.run_phone_detection_async, args=(frame, face_bbox))
-                self.detection_thread.start()
-        
-        # Get latest phone detection results
-        with self.detection_results_lock:
-            phone_objects = self.last_phone_results.copy()
-        
-        # Face visibility
-        face_visible = face_bbox is not None
-        
-        # Hand detection using MediaPipe landmarks
-        hand_near_face = False
-        if face_bbox and hand_landmarks:
-            hand_near_face = self.is_hand_near_face(face_bbox, hand_landmarks)
-            print(f"DEBUG: {len(hand_landmarks)} hands detected, hand_near_face: {hand_near_face}")
-        
-        # Phone detection using flexible detector
-        phone_near_face = False
-        phone_confidence = 0.0
-        if face_bbox and phone_objects:
-            phone_near_face, phone_confidence = self.is_phone_near_face(face_bbox, phone_objects)
-            print(f"DEBUG: Flexible detector found {len(phone_objects)} objects, phone_near_face: {phone_near_face}")
-        
-        # Enhanced phone detection: If hand is near face AND phone detected, it's likely a phone
-        if hand_near_face and phone_objects:
-            phone_near_face = True
-            phone_confidence = max(phone_confidence, max(obj.get('confidence', 0.0) for obj in phone_objects))
-            print(f"DEBUG: Phone detected via flexible detector + hand proximity: {phone_confidence:.2f}")
-        
-        # Orientation analysis from face landmarks
-        yaw, pitch = 0.0, 0.0
-        orientation_good = True
-        if face_visible and face_landmarks:
-            yaw, pitch = self.calculate_face_orientation(face_landmarks)
-            orientation_good = abs(yaw) < self.yaw_threshold and abs(pitch) < self.pitch_threshold
-        
-        # Posture analysis from pose landmarks
-        posture_stable = True
-        if pose_results.pose_landmarks:
-            try:
-                shoulders = pose_results.pose_landmarks.landmark[11]
-                hips = pose_results.pose_landmarks.landmark[23]
-                posture_stable = (hips.y - shoulders.y) > self.posture_threshold
-            except (IndexError, AttributeError):
-                posture_stable = True
-        
-        # Calculate focus score
+    def build_pipeline(self) -> Pipeline:
+        """This tracker's stage graph (see attention_stages for the shared stages)"""
+        return Pipeline([
+            *mediapipe_stages(self),
+            face_box_stage(self),
+            face_orientation_stage(self),
+            hand_proximity_stage(self),
+            # A hand near the face while the detector sees a phone is phone use, even without face overlap
+            *phone_stages(self, every=self.detection_frame_skip,
+                          hand_confirms=lambda obj: True),
+            posture_stage(self),
+            Stage('scoring', self.score,
+                  inputs=('face_visible', 'orientation_good', 'phone_near_face', 'hand_near_face',
+                          'posture_stable'),
+                  outputs=('focus_score', 'focused')),
+            Stage('status_messages', lambda *flags: self.generate_status_messages(*flags),
+                  inputs=('face_visible', 'orientation_good', 'phone_near_face', 'hand_near_face',
+                          'phone_confidence', 'posture_stable', 'yaw', 'pitch'),
+                  outputs=('status_messages',)),
+        ], inputs=('frame', 'frame_index'), name='final_flexible')
+
+    def score(self, face_visible, orientation_good, phone_near_face, hand_near_face, posture_stable):
+        """Weighted focus score and overall focus decision"""
         focus_components = {
             "face_visibility": 1.0 if face_visible else 0.0,
             "orientation": 1.0 if orientation_good else 0.0,
@@ -314,38 +220,35 @@ class FinalFlexibleTracker:
             "posture": 0.1
         }
         
-        focus_score = sum(weights[component] * score for component, score in focus_components.items())
+        focus_score = weighted_score(focus_components, weights)
         
         # Overall focus determination
         focused = (focus_score > 0.7 and not phone_near_face and face_visible and orientation_good)
-        
-        # Generate status messages
-        status_messages = self.generate_status_messages(
-            face_visible, orientation_good, phone_near_face, hand_near_face,
-            phone_confidence, posture_stable, yaw, pitch
-        )
-        
-        # Add FPS
-        fps = self.fps_counter.get_fps()
+        return focus_score, focused
+
+    def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
+        """Process a single frame with flexible phone detection + MediaPipe integration"""
+        self.frame_count += 1
+        result = self.pipeline.run(frame=frame, frame_index=self.frame_count)
         
         return {
-            "focused": focused,
-            "focus_score": focus_score,
-            "face_visible": face_visible,
-            "orientation_good": orientation_good,
-            "yaw": yaw,
-            "pitch": pitch,
-            "phone_near_face": phone_near_face,
-            "hand_near_face": hand_near_face,
-            "phone_confidence": phone_confidence,
-            "posture_stable": posture_stable,
-            "status_messages": status_messages,
-            "phone_objects": phone_objects,
-            "fps": fps,
+            "focused": result['focused'],
+            "focus_score": result['focus_score'],
+            "face_visible": result['face_visible'],
+            "orientation_good": result['orientation_good'],
+            "yaw": result['yaw'],
+            "pitch": result['pitch'],
+            "phone_near_face": result['phone_near_face'],
+            "hand_near_face": result['hand_near_face'],
+            "phone_confidence": result['phone_confidence'],
+            "posture_stable": result['posture_stable'],
+            "status_messages": result['status_messages'],
+            "phone_objects": list(result['phone_objects']),
+            "fps": self.fps_counter.get_fps(),
             # Add MediaPipe results for skeleton drawing
-            "face_landmarks": face_landmarks,
-            "hand_landmarks": hand_landmarks,
-            "pose_landmarks": pose_results.pose_landmarks
+            "face_landmarks": result['face_landmarks'],
+            "hand_landmarks": result['hand_landmarks'],
+            "pose_landmarks": result['pose_results'].pose_landmarks
         }
 
     def generate_status_messages(self, face_visible: bool, orientation_good: bool,
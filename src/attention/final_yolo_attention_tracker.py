@@ -9,29 +9,12 @@ import json
 import numpy as np
 from typing import Dict, Any, Tuple, Optional, List
 import mediapipe as mp
-import threading
-from concurrent.futures import ThreadPoolExecutor
 
 from yolo_opencv_detector import YOLOOpenCVDetector
 from optimized_enhanced_focus_logic import OptimizedEnhancedFocusEvaluator
-
-class FPSCounter:
-    """Optimized FPS counter"""
-    def __init__(self):
-        self.frame_count = 0
-        self.start_time = time.time()
-        self.fps_history = []
-        
-    def get_fps(self):
-        self.frame_count += 1
-        elapsed = time.time() - self.start_time
-        if elapsed > 0:
-            fps = self.frame_count / elapsed
-            self.fps_history.append(fps)
-            if len(self.fps_history) > 10:
-                self.fps_history.pop(0)
-            return np.mean(self.fps_history)
-        return 0.0
+from frame_timing import FPSCounter
+from pipeline import Pipeline, Stage
+from attention_stages import face_box_stage, mediapipe_stages, phone_stages
 
 class FinalYOLOAttentionTracker:
     """
@@ -88,12 +71,9 @@ class FinalYOLOAttentionTracker:
         # Performance optimization
         self.fps_counter = FPSCounter()
         self.yolo_frame_skip = 4  # Run YOLO every 4th frame for better performance
-        self.last_yolo_results = []
         
-        # Threading for YOLO
-        self.yolo_thread = None
-        self.yolo_results_lock = threading.Lock()
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        # Per-frame stage graph (YOLO runs in the background every yolo_frame_skip frames)
+        self.pipeline = self.build_pipeline()
         
         print(f"✅ Final YOLO Attention Tracker initialized: {self.frame_width}x{self.frame_height}")
         print("📱 OpenCV YOLO + MediaPipe + Enhanced Focus Logic")
@@ -114,91 +94,57 @@ class FinalYOLOAttentionTracker:
             print(f"❌ Camera initialization failed: {e}")
             return False
 
-    def run_yolo_detection_async(self, frame):
-        """Run YOLO detection in background thread"""
-        try:
-            # Resize for faster processing
-            small_frame = cv2.resize(frame, (320, 240))
-            detections = self.yolo_detector.detect_phones(small_frame)
+    def run_yolo_detection(self, frame):
+        """Run YOLO on a downscaled frame (phone_detection stage, off the frame path)"""
+        # Resize for faster processing
+        small_frame = cv2.resize(frame, (320, 240))
+        detections = self.yolo_detector.detect_phones(small_frame)
+        
+        # Scale back to original frame size
+        scaled_detections = []
+        for detection in detections:
+            x1, y1, x2, y2 = detection['bbox']
+            # Scale coordinates back to original size
+            x1 = int(x1 * self.frame_width / 320)
+            y1 = int(y1 * self.frame_height / 240)
+            x2 = int(x2 * self.frame_width / 320)
+            y2 = int(y2 * self.frame_height / 240)
             
-            # Scale back to original frame size
-            scaled_detections = []
-            for detection in detections:
-                x1, y1, x2, y2 = detection['bbox']
-                # Scale coordinates back to original size
-                x1 = int(x1 * self.frame_width / 320)
-                y1 = int(y1 * self.frame_height / 240)
-                x2 = int(x2 * self.frame_width / 320)
-                y2 = int(y2 * self.frame_height / 240)
-                
-                scaled_detection = detection.copy()
-                scaled_detection['bbox'] = (x1, y1, x2, y2)
-                scaled_detections.append(scaled_detection)
-            
-            with self.yolo_results_lock:
-                self.last_yolo_results = scaled_detections
-        except Exception as e:
-            print(f"YOLO detection error: {e}")
+            scaled_detection = detection.copy()
+            scaled_detection['bbox'] = (x1, y1, x2, y2)
+            scaled_detections.append(scaled_detection)
+        return scaled_detections
+
+    def build_pipeline(self) -> Pipeline:
+        """This tracker's stage graph; scoring is left to the focus evaluator"""
+        def focus_evaluation(face_bbox, face_landmarks, hands_results, phone_objects, pose_results):
+            detection_results = {
+                "face_bbox": face_bbox,
+                "face_landmarks": face_landmarks,
+                "hand_landmarks": hands_results.multi_hand_landmarks or [],
+                "yolo_objects": list(phone_objects)
+            }
+            pose_data = {
+                "pose_landmarks": pose_results.pose_landmarks
+            }
+            return self.focus_evaluator.evaluate_focus(detection_results, pose_data)
+
+        # Only the detection half of phone_stages: the evaluator does its own overlap check
+        phone_detection, _ = phone_stages(self, every=self.yolo_frame_skip,
+                                          detect=lambda frame, face_bbox: self.run_yolo_detection(frame))
+        return Pipeline([
+            *mediapipe_stages(self),
+            face_box_stage(self),
+            phone_detection,
+            Stage('focus_evaluation', focus_evaluation,
+                  inputs=('face_bbox', 'face_landmarks', 'hands_results', 'phone_objects', 'pose_results'),
+                  outputs=('focus_metrics',)),
+        ], inputs=('frame', 'frame_index'), name='final_yolo')
 
     def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
         """Process a single frame with YOLO + MediaPipe integration"""
         self.frame_count += 1
-        
-        # Convert BGR to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Process with MediaPipe
-        face_results = self.face_mesh.process(rgb_frame)
-        hands_results = self.hands.process(rgb_frame)
-        pose_results = self.pose.process(rgb_frame)
-        
-        # Initialize detection results
-        detection_results = {
-            "face_bbox": None,
-            "face_landmarks": None,
-            "hand_landmarks": [],
-            "yolo_objects": []
-        }
-        
-        # Extract face bounding box and landmarks
-        if face_results.multi_face_landmarks:
-            face_landmarks = face_results.multi_face_landmarks[0]
-            detection_results["face_landmarks"] = face_landmarks
-            
-            # Calculate face bounding box
-            all_x, all_y = [], []
-            for landmark in face_landmarks.landmark:
-                all_x.append(landmark.x)
-                all_y.append(landmark.y)
-            
-            x_min = int(min(all_x) * self.frame_width)
-            x_max = int(max(all_x) * self.frame_width)
-            y_min = int(min(all_y) * self.frame_height)
-            y_max = int(max(all_y) * self.frame_height)
-            detection_results["face_bbox"] = (x_min, y_min, x_max, y_max)
-        
-        # Extract hand landmarks
-        if hands_results.multi_hand_landmarks:
-            detection_results["hand_landmarks"] = hands_results.multi_hand_landmarks
-        
-        # YOLO phone detection (every nth frame)
-        if self.frame_count % self.yolo_frame_skip == 0:
-            # Run YOLO in background thread
-            if self.yolo_thread is None or not self.yolo_thread.is_alive():
-                self.yolo_thread = threading.Thread(target=self.run_yolo_detection_async, args=(frame,))
-                self.yolo_thread.start()
-        
-        # Get latest YOLO results
-        with self.yolo_results_lock:
-            detection_results["yolo_objects"] = self.last_yolo_results.copy()
-        
-        # Prepare pose data for focus evaluator
-        pose_data = {
-            "pose_landmarks": pose_results.pose_landmarks
-        }
-        
-        # Evaluate focus using optimized evaluator
-        focus_metrics = self.focus_evaluator.evaluate_focus(detection_results, pose_data)
+        focus_metrics = self.pipeline.run(frame=frame, frame_index=self.frame_count)['focus_metrics']
         
         # Add FPS
         focus_metrics["fps"] = self.fps_counter.get_fps()
@@ -377,7 +323,7 @@ class FinalYOLOAttentionTracker:
         
         self.cap.release()
         cv2.destroyAllWindows()
-        self.executor.shutdown(wait=True)
+        self.pipeline.close()
         print("✅ Final YOLO Attention Tracker stopped")
 
 def main():
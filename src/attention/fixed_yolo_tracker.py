@@ -9,28 +9,15 @@ import json
 import numpy as np
 from typing import Dict, Any, Tuple, Optional, List
 import mediapipe as mp
-import threading
 from concurrent.futures import ThreadPoolExecutor
 
 from yolo_opencv_detector import YOLOOpenCVDetector
-
-class FPSCounter:
-    """Optimized FPS counter"""
-    def __init__(self):
-        self.frame_count = 0
-        self.start_time = time.time()
-        self.fps_history = []
-        
-    def get_fps(self):
-        self.frame_count += 1
-        elapsed = time.time() - self.start_time
-        if elapsed > 0:
-            fps = self.frame_count / elapsed
-            self.fps_history.append(fps)
-            if len(self.fps_history) > 10:
-                self.fps_history.pop(0)
-            return np.mean(self.fps_history)
-        return 0.0
+from frame_timing import FPSCounter
+from pipeline import Pipeline, Stage
+from attention_stages import (
+    face_box_stage, face_orientation_stage, hand_proximity_stage, mediapipe_stages, phone_stages,
+    posture_stage, weighted_score
+)
 
 class FixedYOLOAttentionTracker:
     """
@@ -84,17 +71,15 @@ class FixedYOLOAttentionTracker:
         # Performance optimization
         self.fps_counter = FPSCounter()
         self.yolo_frame_skip = 6  # Run YOLO every 6th frame for better performance
-        self.last_yolo_results = []
-        
-        # Threading for YOLO
-        self.yolo_thread = None
-        self.yolo_results_lock = threading.Lock()
         
         # Focus thresholds
         self.yaw_threshold = 0.25
         self.pitch_threshold = 0.35
         self.posture_threshold = 0.3
         
+        # Per-frame stage graph (YOLO runs in the background every yolo_frame_skip frames)
+        self.pipeline = self.build_pipeline()
+        
         print(f"✅ Fixed YOLO Attention Tracker initialized: {self.frame_width}x{self.frame_height}")
         print("📱 OpenCV YOLO + MediaPipe + Fixed Status Messages")
         print("🎯 Optimized Phone vs Hand Detection with YOLO")
@@ -114,31 +99,26 @@ class FixedYOLOAttentionTracker:
             print(f"❌ Camera initialization failed: {e}")
             return False
 
-    def run_yolo_detection_async(self, frame):
-        """Run YOLO detection in background thread"""
-        try:
-            # Resize for faster processing
-            small_frame = cv2.resize(frame, (320, 240))
-            detections = self.yolo_detector.detect_phones(small_frame)
+    def run_yolo_detection(self, frame):
+        """Run YOLO on a downscaled frame (phone_detection stage, off the frame path)"""
+        # Resize for faster processing
+        small_frame = cv2.resize(frame, (320, 240))
+        detections = self.yolo_detector.detect_phones(small_frame)
+        
+        # Scale back to original frame size
+        scaled_detections = []
+        for detection in detections:
+            x1, y1, x2, y2 = detection['bbox']
+            # Scale coordinates back to original size
+            x1 = int(x1 * self.frame_width / 320)
+            y1 = int(y1 * self.frame_height / 240)
+            x2 = int(x2 * self.frame_width / 320)
+            y2 = int(y2 * self.frame_height / 240)
             
-            # Scale back to original frame size
-            scaled_detections = []
-            for detection in detections:
-                x1, y1, x2, y2 = detection['bbox']
-                # Scale coordinates back to original size
-                x1 = int(x1 * self.frame_width / 320)
-                y1 = int(y1 * self.frame_height / 240)
-                x2 = int(x2 * self.frame_width / 320)
-                y2 = int(y2 * self.frame_height / 240)
-                
-                scaled_detection = detection.copy()
-                scaled_detection['bbox'] = (x1, y1, x2, y2)
-                scaled_detections.append(scaled_detection)
-            
-            with self.yolo_results_lock:
-                self.last_yolo_results = scaled_detections
-        except Exception as e:
-            print(f"YOLO detection error: {e}")
+            scaled_detection = detection.copy()
+            scaled_detection['bbox'] = (x1, y1, x2, y2)
+            scaled_detections.append(scaled_detection)
+        return scaled_detections
 
     def calculate_face_orientation(self, face_landmarks):
         """Calculate yaw and pitch from face landmarks"""
@@ -205,87 +185,28 @@ class FixedYOLOAttentionTracker:
         
         return False
 
-    def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
-        """Process a single frame with YOLO + MediaPipe integration"""
-        self.frame_count += 1
-        
-        # Convert BGR to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Process with MediaPipe
-        face_results = self.face_mesh.process(rgb_frame)
-        hands_results = self.hands.process(rgb_frame)
-        pose_results = self.pose.process(rgb_frame)
-        
-        # Initialize detection results
-        face_bbox = None
-        face_landmarks = None
-        hand_landmarks = []
-        yolo_objects = []
-        
-        # Extract face bounding box and landmarks
-        if face_results.multi_face_landmarks:
-            face_landmarks = face_results.multi_face_landmarks[0]
-            
-            # Calculate face bounding box
-            all_x, all_y = [], []
-            for landmark in face_landmarks.landmark:
-                all_x.append(landmark.x)
-                all_y.append(landmark.y)
-            
-            x_min = int(min(all_x) * self.frame_width)
-            x_max = int(max(all_x) * self.frame_width)
-            y_min = int(min(all_y) * self.frame_height)
-            y_max = int(max(all_y) * self.frame_height)
-            face_bbox = (x_min, y_min, x_max, y_max)
-        
-        # Extract hand landmarks
-        if hands_results.multi_hand_landmarks:
-            hand_landmarks = hands_results.multi_hand_landmarks
-        
-        # YOLO phone detection (every nth frame)
-        if self.frame_count % self.yolo_frame_skip == 0:
-            # Run YOLO in background thread
-            if self.yolo_thread is None or not self.yolo_thread.is_alive():
-                self.yolo_thread = threading.Thread(target=self.run_yolo_detection_async, args=(frame,))
-                self.yolo_thread.start()
-        
-        # Get latest YOLO results
-        with self.yolo_results_lock:
-            yolo_objects = self.last_yolo_results.copy()
-        
-        # Face visibility
-        face_visible = face_bbox is not None
-        
-        # Phone detection using YOLO + face overlap
-        phone_near_face = False
-        phone_confidence = 0.0
-        if face_bbox and yolo_objects:
-            phone_near_face, phone_confidence = self.is_phone_near_face(face_bbox, yolo_objects)
-        
-        # Hand detection using MediaPipe landmarks
-        hand_near_face = False
-        if face_bbox and hand_landmarks:
-            hand_near_face = self.is_hand_near_face(face_bbox, hand_landmarks)
-        
-        # Orientation analysis from face landmarks
-        yaw, pitch = 0.0, 0.0
-        orientation_good = True
-        if face_visible and face_landmarks:
-            yaw, pitch = self.calculate_face_orientation(face_landmarks)
-            orientation_good = abs(yaw) < self.yaw_threshold and abs(pitch) < self.pitch_threshold
-        
-        # Posture analysis from pose landmarks
-        posture_stable = True
-        if pose_results.pose_landmarks:
-            try:
-                shoulders = pose_results.pose_landmarks.landmark[11]
-                hips = pose_results.pose_landmarks.landmark[23]
-                posture_stable = (hips.y - shoulders.y) > self.posture_threshold
-            except (IndexError, AttributeError):
-                posture_stable = True
-        
-        # Calculate focus score
+    def build_pipeline(self) -> Pipeline:
+        """This tracker's stage graph (see attention_stages for the shared stages)"""
+        return Pipeline([
+            *mediapipe_stages(self),
+            face_box_stage(self),
+            face_orientation_stage(self),
+            hand_proximity_stage(self),
+            *phone_stages(self, every=self.yolo_frame_skip,
+                          detect=lambda frame, face_bbox: self.run_yolo_detection(frame)),
+            posture_stage(self),
+            Stage('scoring', self.score,
+                  inputs=('face_visible', 'orientation_good', 'phone_near_face', 'hand_near_face',
+                          'posture_stable'),
+                  outputs=('focus_score', 'focused')),
+            Stage('status_messages', lambda *flags: self.generate_status_messages(*flags),
+                  inputs=('face_visible', 'orientation_good', 'phone_near_face', 'hand_near_face',
+                          'phone_confidence', 'posture_stable', 'yaw', 'pitch'),
+                  outputs=('status_messages',)),
+        ], inputs=('frame', 'frame_index'), name='fixed_yolo')
+
+    def score(self, face_visible, orientation_good, phone_near_face, hand_near_face, posture_stable):
+        """Weighted focus score and overall focus decision"""
         focus_components = {
             "face_visibility": 1.0 if face_visible else 0.0,
             "orientation": 1.0 if orientation_good else 0.0,
@@ -303,34 +224,31 @@ class FixedYOLOAttentionTracker:
             "posture": 0.1
         }
         
-        focus_score = sum(weights[component] * score for component, score in focus_components.items())
+        focus_score = weighted_score(focus_components, weights)
         
         # Overall focus determination
         focused = (focus_score > 0.7 and not phone_near_face and face_visible and orientation_good)
-        
-        # Generate status messages
-        status_messages = self.generate_status_messages(
-            face_visible, orientation_good, phone_near_face, hand_near_face,
-            phone_confidence, posture_stable, yaw, pitch
-        )
-        
-        # Add FPS
-        fps = self.fps_counter.get_fps()
+        return focus_score, focused
+
+    def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
+        """Process a single frame with YOLO + MediaPipe integration"""
+        self.frame_count += 1
+        result = self.pipeline.run(frame=frame, frame_index=self.frame_count)
         
         return {
-            "focused": focused,
-            "focus_score": focus_score,
-            "face_visible": face_visible,
-            "orientation_good": orientation_good,
-            "yaw": yaw,
-            "pitch": pitch,
-            "phone_near_face": phone_near_face,
-            "hand_near_face": hand_near_face,
-            "phone_confidence": phone_confidence,
-            "posture_stable": posture_stable,
-            "status_messages": status_messages,
-            "yolo_objects": yolo_objects,
-            "fps": fps
+            "focused": result['focused'],
+            "focus_score": result['focus_score'],
+            "face_visible": result['face_visible'],
+            "orientation_good": result['orientation_good'],
+            "yaw": result['yaw'],
+            "pitch": result['pitch'],
+            "phone_near_face": result['phone_near_face'],
+            "hand_near_face": result['hand_near_face'],
+            "phone_confidence": result['phone_confidence'],
+            "posture_stable": result['posture_stable'],
+            "status_messages": result['status_messages'],
+            "yolo_objects": list(result['phone_objects']),
+            "fps": self.fps_counter.get_fps()
         }
 
     def generate_status_messages(self, face_visible: bool, orientation_good: bool,
@@ -42,6 +42,9 @@ class FlexiblePhoneDetector:
         )
         self.hand_landmarks = None
         
+        # Pixels searched around the face (lowered by the quality controller)
+        self.search_margin = 150
+        
     def detect_phone_objects(self, frame: np.ndarray) -> List[Dict[str, Any]]:
         """
         Detect phone-like objects with flexible criteria
@@ -188,13 +191,15 @@ class FlexiblePhoneDetector:
                     index_tip = (int(hand_landmarks.landmark[8].x * w), int(hand_landmarks.landmark[8].y * h))
                     middle_tip = (int(hand_landmarks.landmark[12].x * w), int(hand_landmarks.landmark[12].y * h))
                     
+                    # Keep pixel coordinates only - holding the MediaPipe protobufs
+                    # would keep each frame's result graph alive
                     self.hand_landmarks.append({
                         'bbox': (x_min, y_min, x_max, y_max),
                         'thumb': thumb_tip,
                         'index': index_tip,
                         'middle': middle_tip,
                         'center': ((x_min + x_max) // 2, (y_min + y_max) // 2),
-                        'landmarks': hand_landmarks
+                        'landmarks': [(int(x), int(y)) for x, y in zip(x_coords, y_coords)]
                     })
         except Exception as e:
             print(f"Hand detection error: {e}")
@@ -242,7 +247,7 @@ class FlexiblePhoneDetector:
         fx1, fy1, fx2, fy2 = face_bbox
         
         # Expand face area for detection
-        margin = 150  # Larger margin
+        margin = self.search_margin  # Larger margin
         search_x1 = max(0, fx1 - margin)
         search_y1 = max(0, fy1 - margin)
         search_x2 = min(frame.shape[1], fx2 + margin)
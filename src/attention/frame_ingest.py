@@ -0,0 +1,309 @@
+"""
+Remote frame ingestion for serving remote users from one inference host.
+
+Clients (browsers, kiosks) send frames over a binary WebSocket instead of the
+server opening a local camera. Each message is either a bare JPEG or a
+16-byte header followed by a JPEG or raw (BGR / RGBA) frame:
+
+    magic 'AF' | version u8 | kind u8 | width u16 | height u16 | client time f64
+
+Frames are decoded into buffers from a reusable pool, scaled to the tracker
+size, and pushed into a PushFrameSource. Tracker sizes are clamped to
+MAX_FRAME_WIDTH x MAX_FRAME_HEIGHT, and incoming frames larger than
+MAX_SOURCE_WIDTH x MAX_SOURCE_HEIGHT (raw header or JPEG frame header) are
+rejected before anything is allocated. The source keeps only the newest
+frame, so a tracker that falls behind skips stale frames instead of queueing
+them.
+"""
+
+import struct
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from frame_source import FrameSource
+
+HEADER = struct.Struct('<2sBBHHd')
+MAGIC = b'AF'
+VERSION = 1
+KIND_JPEG = 1
+KIND_BGR = 2
+KIND_RGBA = 3
+KIND_NAMES = {KIND_JPEG: 'jpeg', KIND_BGR: 'bgr', KIND_RGBA: 'rgba'}
+_JPEG_SOI = b'\xff\xd8'
+
+# Largest tracker size a client may ask for
+MAX_FRAME_WIDTH = 1920
+MAX_FRAME_HEIGHT = 1080
+# Largest frame a client may send (scaled down to the tracker size on decode)
+MAX_SOURCE_WIDTH = 3840
+MAX_SOURCE_HEIGHT = 2160
+MIN_FRAME_SIZE = 16
+
+
+def clamp_frame_size(width: int, height: int) -> Tuple[int, int]:
+    """Limit a client-requested tracker size to what the server will allocate"""
+    return (max(MIN_FRAME_SIZE, min(width, MAX_FRAME_WIDTH)),
+            max(MIN_FRAME_SIZE, min(height, MAX_FRAME_HEIGHT)))
+
+
+def encode_frame_message(frame: np.ndarray, kind: int = KIND_JPEG, quality: int = 80,
+                         client_time: Optional[float] = None) -> bytes:
+    """Build an ingestion message from a BGR frame (used by clients and the load generator)"""
+    height, width = frame.shape[:2]
+    if kind == KIND_JPEG:
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        payload = encoded.tobytes()
+    elif kind == KIND_BGR:
+        payload = np.ascontiguousarray(frame).tobytes()
+    elif kind == KIND_RGBA:
+        payload = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA).tobytes()
+    else:
+        raise ValueError(f"Unknown frame kind: {kind}")
+    header = HEADER.pack(MAGIC, VERSION, kind, width, height,
+                         time.time() if client_time is None else client_time)
+    return header + payload
+
+
+class FrameBufferPool:
+    """
+    Reusable frame buffers keyed by shape.
+
+    Buffers are handed out oldest-returned first, so a recycled buffer is the
+    one that has been idle longest (a background stage still reading a recent
+    frame is unlikely to see it overwritten).
+
+    Args:
+        max_per_shape: Idle buffers kept per shape; extra returns are dropped
+    """
+
+    def __init__(self, max_per_shape: int = 8):
+        self.max_per_shape = max_per_shape
+        self._free: Dict[Tuple[int, ...], deque] = {}
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, shape: Tuple[int, ...]) -> np.ndarray:
+        with self._lock:
+            free = self._free.get(shape)
+            if free:
+                self.reused += 1
+                return free.popleft()
+            self.allocated += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, buffer: np.ndarray):
+        if buffer.dtype != np.uint8 or not buffer.flags.writeable or buffer.base is not None:
+            return
+        with self._lock:
+            free = self._free.setdefault(buffer.shape, deque())
+            if len(free) < self.max_per_shape:
+                free.append(buffer)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'allocated': self.allocated,
+                'reused': self.reused,
+                'idle': sum(len(free) for free in self._free.values())
+            }
+
+
+def jpeg_size(data) -> Optional[Tuple[int, int]]:
+    """(width, height) from a JPEG's frame header, or None if there isn't one before the scan"""
+    end = len(data)
+    i = 2
+    while i + 4 <= end:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1  # Fill byte
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2  # Markers without a length
+            continue
+        if marker in (0xD9, 0xDA):
+            return None  # End of image or start of scan before any frame header
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if i + 9 > end:
+                return None
+            height, width = struct.unpack_from('>HH', data, i + 5)
+            return width, height
+        i += 2 + struct.unpack_from('>H', data, i + 2)[0]
+    return None
+
+
+def _check_source_size(width: int, height: int):
+    """Reject frames that are empty or larger than MAX_SOURCE_WIDTH x MAX_SOURCE_HEIGHT"""
+    if not width or not height:
+        raise ValueError(f"Invalid frame size {width}x{height}")
+    if width > MAX_SOURCE_WIDTH or height > MAX_SOURCE_HEIGHT:
+        raise ValueError(f"Frame too large: {width}x{height} "
+                         f"(max {MAX_SOURCE_WIDTH}x{MAX_SOURCE_HEIGHT})")
+
+
+def _jpeg_flags(src_width: int, src_height: int, width: int, height: int) -> int:
+    """Let libjpeg downscale while decoding when the frame is much larger than needed"""
+    if not src_width or not src_height:
+        return cv2.IMREAD_COLOR
+    scale = min(src_width / width, src_height / height)
+    if scale >= 4:
+        return cv2.IMREAD_REDUCED_COLOR_4
+    if scale >= 2:
+        return cv2.IMREAD_REDUCED_COLOR_2
+    return cv2.IMREAD_COLOR
+
+
+def _fit(image: np.ndarray, width: int, height: int, pool: FrameBufferPool) -> np.ndarray:
+    """Scale a BGR image to the tracker size, into a pooled buffer"""
+    if image.shape[1] == width and image.shape[0] == height:
+        return image
+    out = pool.acquire((height, width, 3))
+    cv2.resize(image, (width, height), dst=out, interpolation=cv2.INTER_AREA)
+    return out
+
+
+def decode_frame_message(payload: bytes, width: int, height: int,
+                         pool: FrameBufferPool) -> Tuple[np.ndarray, Optional[float]]:
+    """
+    Decode one ingestion message into a (height, width, 3) BGR frame.
+    Returns (frame, client time or None); raises ValueError on malformed input.
+    """
+    if payload[:2] == _JPEG_SOI:
+        kind, src_width, src_height, client_time, data = KIND_JPEG, 0, 0, None, payload
+    else:
+        if len(payload) < HEADER.size:
+            raise ValueError("Frame message too short")
+        magic, version, kind, src_width, src_height, client_time = HEADER.unpack_from(payload)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a frame message")
+        data = memoryview(payload)[HEADER.size:]
+
+    if kind == KIND_JPEG:
+        # Size the decode from the JPEG itself; the message header is only a hint
+        size = jpeg_size(data) if bytes(data[:2]) == _JPEG_SOI else None
+        if size is None:
+            raise ValueError("Invalid JPEG")
+        src_width, src_height = size
+        _check_source_size(src_width, src_height)
+        decoded = cv2.imdecode(np.frombuffer(data, dtype=np.uint8),
+                               _jpeg_flags(src_width, src_height, width, height))
+        if decoded is None:
+            raise ValueError("Invalid JPEG")
+        return _fit(decoded, width, height, pool), client_time
+
+    channels = 3 if kind == KIND_BGR else 4 if kind == KIND_RGBA else 0
+    if not channels:
+        raise ValueError(f"Unknown frame kind: {kind}")
+    _check_source_size(src_width, src_height)
+    if len(data) != src_width * src_height * channels:
+        raise ValueError(f"Expected {src_width}x{src_height}x{channels} bytes, got {len(data)}")
+    # Zero-copy view of the message; the pooled buffer is the only copy
+    view = np.frombuffer(data, dtype=np.uint8).reshape(src_height, src_width, channels)
+
+    if kind == KIND_RGBA:
+        bgr = pool.acquire((src_height, src_width, 3))
+        cv2.cvtColor(view, cv2.COLOR_RGBA2BGR, dst=bgr)
+        frame = _fit(bgr, width, height, pool)
+        if frame is not bgr:
+            pool.release(bgr)
+        return frame, client_time
+
+    if src_width == width and src_height == height:
+        frame = pool.acquire((height, width, 3))
+        np.copyto(frame, view)
+        return frame, client_time
+    return _fit(view, width, height, pool), client_time
+
+
+class PushFrameSource(FrameSource):
+    """
+    Frame source fed by push() from a network connection.
+
+    Only the newest frame is kept: a frame that wasn't read before the next
+    push is dropped and its buffer returned to the pool. read() blocks until a
+    frame arrives; the frame stays valid until the next read().
+
+    Args:
+        frame_width: Width of pushed frames
+        frame_height: Height of pushed frames
+        pool: Buffer pool the frames came from
+        timeout: Seconds read() waits for a frame before failing
+    """
+
+    def __init__(self, frame_width: int, frame_height: int,
+                 pool: Optional[FrameBufferPool] = None, timeout: float = 1.0):
+        super().__init__(realtime=False)
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.pool = pool or FrameBufferPool()
+        self.timeout = timeout
+        self.capture_time = 0.0
+        self.received = 0
+        self.dropped = 0
+        self._pending: Optional[np.ndarray] = None
+        self._pending_time = 0.0
+        self._current: Optional[np.ndarray] = None
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def push(self, frame: np.ndarray, capture_time: Optional[float] = None):
+        """Offer a new frame, replacing one that hasn't been read yet"""
+        with self._cond:
+            stale = self._pending
+            self._pending = frame
+            self._pending_time = time.time() if capture_time is None else capture_time
+            self.received += 1
+            if stale is not None:
+                self.dropped += 1
+            self._cond.notify()
+        if stale is not None:
+            self.pool.release(stale)
+
+    def _read_frame(self):
+        if self._current is not None:
+            self.pool.release(self._current)
+            self._current = None
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is not None or self._closed, self.timeout)
+            frame, self._pending = self._pending, None
+            self.capture_time = self._pending_time
+        if frame is None:
+            return False, None
+        self._current = frame
+        return True, frame
+
+    def close(self):
+        """End of stream (the client disconnected)"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def isOpened(self) -> bool:
+        return not self._closed
+
+    def release(self):
+        self.close()
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_height)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return -1.0
+        return super().get(prop)
+
+    def stats(self) -> Dict[str, int]:
+        return {'received': self.received, 'processed': self.frames_read, 'dropped': self.dropped}
+
+    def __str__(self):
+        return f"remote:{self.frame_width}x{self.frame_height}"
@@ -0,0 +1,352 @@
+"""
+Pluggable frame sources for the attention trackers.
+Every source exposes the cv2.VideoCapture interface the trackers already use
+(read / isOpened / release / get / set), so a webcam, a recorded video, an
+image directory or a synthetic generator can be swapped in without changes
+to process_frame.
+"""
+
+import glob
+import os
+import time
+from typing import Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class FrameSource:
+    """
+    Base class for frame sources.
+
+    Args:
+        fps: Nominal frame rate
+        realtime: Pace reads at `fps` (False = as fast as possible)
+        loop: Restart from the first frame when the source is exhausted
+    """
+
+    def __init__(self, fps: float = 30.0, realtime: bool = False, loop: bool = False):
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self.frames_read = 0
+        self._next_deadline: Optional[float] = None
+
+    def _pace(self):
+        """Sleep until the next frame is due (realtime mode only)"""
+        if not self.realtime or self.fps <= 0:
+            return
+        now = time.perf_counter()
+        if self._next_deadline is None:
+            self._next_deadline = now
+        delay = self._next_deadline - now
+        if delay > 0:
+            time.sleep(delay)
+        # Don't accumulate debt if the consumer fell behind
+        self._next_deadline = max(self._next_deadline, now - 1.0 / self.fps) + 1.0 / self.fps
+
+    def _read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def _rewind(self) -> bool:
+        return False
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Read the next frame (cv2.VideoCapture.read compatible)"""
+        self._pace()
+        ret, frame = self._read_frame()
+        if not ret and self.loop and self._rewind():
+            ret, frame = self._read_frame()
+        if ret:
+            self.frames_read += 1
+        return ret, frame
+
+    def isOpened(self) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+    @property
+    def frame_size(self) -> Tuple[int, int]:
+        """(width, height) of the frames"""
+        return int(self.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    @property
+    def frame_count(self) -> int:
+        """Total frames, or -1 for unbounded sources"""
+        return int(self.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frames_read)
+        return 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop == cv2.CAP_PROP_FPS and value > 0:
+            self.fps = value
+            return True
+        return False
+
+
+class WebcamSource(FrameSource):
+    """Live camera (always realtime - the camera paces itself)"""
+
+    def __init__(self, camera_index: int = 0, frame_width: int = 640,
+                 frame_height: int = 480, fps: float = 30.0):
+        super().__init__(fps=fps, realtime=False)
+        self.camera_index = camera_index
+        self.cap = cv2.VideoCapture(camera_index)
+        if self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+
+    def _read_frame(self):
+        return self.cap.read()
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def get(self, prop: int) -> float:
+        return self.cap.get(prop)
+
+    def set(self, prop: int, value: float) -> bool:
+        return self.cap.set(prop, value)
+
+    def __repr__(self):
+        return f"WebcamSource({self.camera_index})"
+
+
+class VideoFileSource(FrameSource):
+    """Recorded video file, paced at its own frame rate in realtime mode"""
+
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0.0
+        super().__init__(fps=fps or 30.0, realtime=realtime, loop=loop)
+
+    def _read_frame(self):
+        return self.cap.read()
+
+    def _rewind(self) -> bool:
+        return self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return self.cap.get(prop)
+
+    def set(self, prop: int, value: float) -> bool:
+        # Resolution is fixed by the recording
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            return False
+        return super().set(prop, value) if prop == cv2.CAP_PROP_FPS else self.cap.set(prop, value)
+
+    def __repr__(self):
+        return f"VideoFileSource({self.path!r})"
+
+
+class ImageDirectorySource(FrameSource):
+    """Sorted still images from a directory, one per frame"""
+
+    def __init__(self, directory: str, fps: float = 30.0, realtime: bool = False,
+                 loop: bool = False):
+        super().__init__(fps=fps, realtime=realtime, loop=loop)
+        self.directory = directory
+        self.paths = sorted(
+            path for path in glob.glob(os.path.join(directory, '*'))
+            if path.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.index = 0
+        self._size = (0, 0)
+        if self.paths:
+            first = cv2.imread(self.paths[0])
+            if first is not None:
+                self._size = (first.shape[1], first.shape[0])
+
+    def _read_frame(self):
+        while self.index < len(self.paths):
+            frame = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if frame is not None:
+                return True, frame
+            print(f"Skipping unreadable image: {self.paths[self.index - 1]}")
+        return False, None
+
+    def _rewind(self) -> bool:
+        self.index = 0
+        return bool(self.paths)
+
+    def isOpened(self) -> bool:
+        return bool(self.paths)
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self._size[0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self._size[1])
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.paths))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.index)
+        return super().get(prop)
+
+    def __repr__(self):
+        return f"ImageDirectorySource({self.directory!r})"
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated frames for headless throughput tests.
+
+    Args:
+        frame_width, frame_height: Frame size
+        frames: Number of frames to produce (None = unbounded)
+        pattern: 'noise' (random, changes every frame) or 'gradient' (moving bars)
+        seed: Random seed so runs are repeatable
+    """
+
+    def __init__(self, frame_width: int = 640, frame_height: int = 480, fps: float = 30.0,
+                 frames: Optional[int] = None, pattern: str = 'gradient',
+                 realtime: bool = False, loop: bool = False, seed: int = 0):
+        super().__init__(fps=fps, realtime=realtime, loop=loop)
+        if pattern not in ('noise', 'gradient'):
+            raise ValueError(f"Unknown synthetic pattern: {pattern}")
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.frames = frames
+        self.pattern = pattern
+        self.seed = seed
+        self.index = 0
+        self._rng = np.random.default_rng(seed)
+        self._ramp = np.tile(np.arange(frame_width, dtype=np.uint16), (frame_height, 1))
+
+    def _read_frame(self):
+        if self.frames is not None and self.index >= self.frames:
+            return False, None
+        if self.pattern == 'noise':
+            frame = self._rng.integers(0, 256, (self.frame_height, self.frame_width, 3), dtype=np.uint8)
+        else:
+            shifted = ((self._ramp + self.index * 4) % 256).astype(np.uint8)
+            frame = np.dstack((shifted, shifted[:, ::-1], np.full_like(shifted, self.index % 256)))
+        self.index += 1
+        return True, frame
+
+    def _rewind(self) -> bool:
+        self.index = 0
+        self._rng = np.random.default_rng(self.seed)
+        return True
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_height)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frames) if self.frames is not None else -1.0
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.index)
+        return super().get(prop)
+
+    def __repr__(self):
+        return f"SyntheticSource({self.frame_width}x{self.frame_height}, {self.pattern})"
+
+
+STREAM_URL_SCHEMES = ('rtsp', 'rtsps', 'rtmp', 'http', 'https')
+
+
+def parse_url_allowlist(value: Optional[str]) -> Tuple[str, ...]:
+    """Split a comma-separated allowlist of stream hosts or URL prefixes"""
+    return tuple(entry.strip() for entry in (value or '').split(',') if entry.strip())
+
+
+def _url_allowed(url: str, allowlist: Sequence[str]) -> bool:
+    """
+    Whether a stream URL matches an allowlist entry: a bare host ("camera.local")
+    allows any path on that host, a URL prefix ("rtsp://camera.local:554/live/")
+    needs the same scheme and host:port and a path under the prefix.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    netloc = parts.netloc.rpartition('@')[2].lower()  # Ignore credentials
+    for entry in allowlist:
+        if '://' not in entry:
+            if host == entry.lower():
+                return True
+            continue
+        prefix = urlsplit(entry)
+        if (parts.scheme.lower() == prefix.scheme.lower() and netloc == prefix.netloc.lower()
+                and parts.path.startswith(prefix.path)):
+            return True
+    return False
+
+
+def client_source(spec: str, media_dir: Optional[str] = None,
+                  url_allowlist: Sequence[str] = ()) -> str:
+    """
+    Validate a source spec from an API client (ValueError if not allowed).
+    Camera indices and "synthetic[:frames]" are accepted as-is; stream URLs only
+    when they match `url_allowlist`; files and image directories only inside
+    `media_dir`, returned as an absolute path.
+    """
+    spec = spec.strip()
+    if spec.isdigit():
+        return spec
+    name, _, count = spec.partition(':')
+    if name == 'synthetic' and (not count or count.isdigit()):
+        return spec
+    scheme, sep, _ = spec.partition('://')
+    if sep:
+        if scheme.lower() not in STREAM_URL_SCHEMES:
+            raise ValueError(f"Unsupported source URL scheme: {scheme}")
+        if not url_allowlist:
+            raise ValueError("URL sources are disabled (no stream URL allowlist configured)")
+        if not _url_allowed(spec, url_allowlist):
+            raise ValueError(f"Source URL is not on the allowlist: {spec}")
+        return spec
+
+    if not media_dir:
+        raise ValueError("File sources are disabled (no media directory configured)")
+    root = os.path.realpath(media_dir)
+    path = os.path.realpath(os.path.join(root, spec))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Source is outside the media directory: {spec}")
+    if not os.path.exists(path):
+        raise ValueError(f"No such media file: {spec}")
+    return path
+
+
+def open_source(spec: Union[int, str, FrameSource], frame_width: int = 640,
+                frame_height: int = 480, realtime: bool = False,
+                loop: bool = False) -> FrameSource:
+    """
+    Build a frame source from a command-line style spec:
+    a camera index ("0"), a directory of images, "synthetic[:frames]" or a video file path.
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return WebcamSource(int(spec), frame_width, frame_height)
+    if spec.startswith('synthetic'):
+        _, _, count = spec.partition(':')
+        return SyntheticSource(frame_width, frame_height, frames=int(count) if count else None,
+                               realtime=realtime, loop=loop)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop)
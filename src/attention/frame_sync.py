@@ -0,0 +1,107 @@
+"""
+Frame sequence tracking shared between the tracker thread and API handlers.
+Supports ETag generation and long-poll waits (async or blocking).
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+# Distinguishes ETags across server restarts
+_EPOCH = format(int(time.time()), 'x')
+
+MAX_LONG_POLL_SECONDS = 30.0
+
+
+class FrameSequence:
+    """
+    Monotonic frame counter advanced by the tracker thread.
+    Async waiters are woken through the event loop, blocking waiters through a condition.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self._cond = threading.Condition()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._async_waiters = 0
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        """Bind async waiters to the server's event loop (call from that loop)"""
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def advance(self) -> int:
+        """Advance to the next frame and wake any waiters (thread-safe)"""
+        with self._cond:
+            self.value += 1
+            seq = self.value
+            self._cond.notify_all()
+
+        loop = self._loop
+        if self._async_waiters and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake_async)
+        return seq
+
+    def _wake_async(self):
+        """Release current async waiters (runs on the event loop)"""
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    def wait_newer(self, since: int, timeout: float) -> int:
+        """Block until the sequence passes `since` or the timeout expires"""
+        timeout = min(max(timeout, 0.0), MAX_LONG_POLL_SECONDS)
+        with self._cond:
+            self._cond.wait_for(lambda: self.value > since, timeout)
+            return self.value
+
+    async def wait_newer_async(self, since: int, timeout: float) -> int:
+        """Await until the sequence passes `since` or the timeout expires"""
+        if self._event is None:
+            self.attach_loop(asyncio.get_running_loop())
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(max(timeout, 0.0), MAX_LONG_POLL_SECONDS)
+        self._async_waiters += 1
+        try:
+            while self.value <= since:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            self._async_waiters -= 1
+        return self.value
+
+
+def etag_for(seq: int) -> str:
+    """Strong ETag for a frame sequence"""
+    return f'"{_EPOCH}-{seq}"'
+
+
+def parse_etag(header: Optional[str]) -> Optional[int]:
+    """Extract the frame sequence from an If-None-Match header issued by this process"""
+    if not header:
+        return None
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        epoch, _, seq = tag.partition('-')
+        if epoch == _EPOCH and seq.isdigit():
+            return int(seq)
+    return None
+
+
+def etag_matches(header: Optional[str], seq: int) -> bool:
+    """Whether an If-None-Match header already covers this sequence"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return parse_etag(header) == seq
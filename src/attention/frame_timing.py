@@ -0,0 +1,127 @@
+"""
+Shared frame-rate and latency tracking for the trackers and servers.
+Fixed-size circular buffers with running sums keep every update O(1).
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+
+class RollingWindow:
+    """Last `size` values with O(1) mean and standard deviation"""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.values = [0.0] * self.size
+        self.index = 0
+        self.count = 0
+        self.last = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def add(self, value: float):
+        if self.count == self.size:
+            old = self.values[self.index]
+            self._sum -= old
+            self._sum_sq -= old * old
+        else:
+            self.count += 1
+        self.values[self.index] = value
+        self._sum += value
+        self._sum_sq += value * value
+        self.last = value
+
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+            # Re-sum once per lap so floating-point drift can't accumulate
+            self._sum = sum(self.values[:self.count])
+            self._sum_sq = sum(v * v for v in self.values[:self.count])
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.count if self.count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        if self.count < 2:
+            return 0.0
+        mean = self._sum / self.count
+        return math.sqrt(max(0.0, self._sum_sq / self.count - mean * mean))
+
+
+class FPSCounter:
+    """
+    Sliding-window FPS counter.
+
+    get_fps() marks one frame and returns the frame rate over the last
+    `window_size` frames, so it tracks the current speed instead of the
+    average since start.
+
+    Args:
+        window_size: Frames in the sliding window
+    """
+
+    def __init__(self, window_size: int = 30):
+        self.window_size = max(2, window_size)
+        self.frame_count = 0
+        self.start_time = time.perf_counter()
+        # Circular buffer of frame timestamps (window_size intervals)
+        self._timestamps = [0.0] * (self.window_size + 1)
+        self._index = 0
+        self._filled = 0
+        self.frame_times = RollingWindow(self.window_size)
+        self.latencies = RollingWindow(self.window_size)
+
+    def tick(self, now: Optional[float] = None):
+        """Mark a completed frame"""
+        if now is None:
+            now = time.perf_counter()
+        if self._filled:
+            previous = self._timestamps[self._index - 1]
+            self.frame_times.add(now - previous)
+        self._timestamps[self._index] = now
+        self._index = (self._index + 1) % len(self._timestamps)
+        if self._filled < len(self._timestamps):
+            self._filled += 1
+        self.frame_count += 1
+
+    def get_fps(self) -> float:
+        """Mark a frame and return the windowed FPS"""
+        self.tick()
+        return self.windowed_fps()
+
+    def windowed_fps(self) -> float:
+        """Frames per second over the sliding window"""
+        if self._filled < 2:
+            return 0.0
+        newest = self._timestamps[self._index - 1]
+        # Once the buffer is full, the next slot to overwrite holds the oldest timestamp
+        full = self._filled == len(self._timestamps)
+        oldest = self._timestamps[self._index] if full else self._timestamps[0]
+        elapsed = newest - oldest
+        return (self._filled - 1) / elapsed if elapsed > 0 else 0.0
+
+    def instant_fps(self) -> float:
+        """Frames per second from the last frame interval"""
+        last = self.frame_times.last
+        return 1.0 / last if last > 0 else 0.0
+
+    def record_latency(self, capture_time: float, result_time: Optional[float] = None):
+        """Record capture-to-result latency (perf_counter timestamps)"""
+        if result_time is None:
+            result_time = time.perf_counter()
+        self.latencies.add(result_time - capture_time)
+
+    def stats(self) -> Dict[str, float]:
+        """Frame rate, frame time jitter and latency summary"""
+        return {
+            'fps': self.windowed_fps(),
+            'instant_fps': self.instant_fps(),
+            'frame_time_ms': self.frame_times.mean * 1000.0,
+            'jitter_ms': self.frame_times.stddev * 1000.0,
+            'latency_ms': self.latencies.mean * 1000.0,
+            'latency_jitter_ms': self.latencies.stddev * 1000.0,
+            'frames': self.frame_count
+        }
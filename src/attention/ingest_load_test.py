@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Load generator for the remote frame ingestion WebSocket.
+
+Opens N concurrent client connections to /ws/ingest/{id}, each sending frames
+at the given rate, and measures end-to-end latency (frame sent -> metrics
+received on the same socket), processed throughput and stale-frame drops.
+Latency uses the client timestamp echoed back as `capture_time`, so run it on
+the inference host (same clock).
+
+Usage:
+    python ingest_load_test.py --clients 8 --fps 15 --seconds 30
+    python ingest_load_test.py --url ws://gpu-box:8765/ws/ingest --encoding rgba --width 320 --height 240 -o load.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, Any, List
+
+import numpy as np
+import websockets
+
+from frame_ingest import encode_frame_message, KIND_JPEG, KIND_BGR, KIND_RGBA
+from frame_source import SyntheticSource
+
+ENCODINGS = {'jpeg': KIND_JPEG, 'bgr': KIND_BGR, 'rgba': KIND_RGBA}
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1000.0
+    if not len(values):
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'mean': 0.0, 'max': 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+            'mean': float(values.mean()), 'max': float(values.max())}
+
+
+def make_frames(count: int, width: int, height: int) -> List[np.ndarray]:
+    """Synthetic frames, generated up front so the generator's own CPU use stays low"""
+    source = SyntheticSource(width, height, loop=True)
+    return [source.read()[1] for _ in range(count)]
+
+
+async def run_client(index: int, url: str, frames: List[np.ndarray], kind: int, quality: int,
+                     fps: float, seconds: float, stats: Dict[str, Any]):
+    latencies = stats['latencies']
+    async with websockets.connect(url, max_size=None) as websocket:
+        async def receive():
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    stats['received'] += 1
+                    continue
+                data = json.loads(message)
+                stats['received'] += 1
+                if data.get('capture_time'):
+                    latencies.append(time.time() - data['capture_time'])
+
+        receiver = asyncio.create_task(receive())
+        interval = 1.0 / fps
+        # Stagger clients so their frames don't all arrive at once
+        next_send = time.perf_counter() + interval * index / max(1, stats['clients'])
+        end = time.perf_counter() + seconds
+        sent = 0
+        while time.perf_counter() < end:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            payload = encode_frame_message(frames[sent % len(frames)], kind, quality)
+            await websocket.send(payload)
+            stats['bytes_sent'] += len(payload)
+            sent += 1
+            next_send += interval
+        stats['sent'] = sent
+
+        # Let the last results arrive
+        await asyncio.sleep(1.0)
+        receiver.cancel()
+
+
+async def run(args) -> Dict[str, Any]:
+    frames = make_frames(30, args.width, args.height)
+    query = f"width={args.width}&height={args.height}&fps={args.fps}"
+    clients = [
+        {'clients': args.clients, 'sent': 0, 'received': 0, 'bytes_sent': 0, 'latencies': []}
+        for _ in range(args.clients)
+    ]
+    print(f"🚀 {args.clients} clients x {args.fps:.0f} fps of {args.width}x{args.height} "
+          f"{args.encoding} for {args.seconds:.0f}s -> {args.url}")
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        run_client(i, f"{args.url}/{args.prefix}-{i}?{query}", frames, ENCODINGS[args.encoding],
+                   args.quality, args.fps, args.seconds, clients[i])
+        for i in range(args.clients)
+    ], return_exceptions=True)
+    wall = time.perf_counter() - start
+
+    errors = [str(result) for result in results if isinstance(result, Exception)]
+    latencies = [latency for client in clients for latency in client['latencies']]
+    sent = sum(client['sent'] for client in clients)
+    received = sum(client['received'] for client in clients)
+    return {
+        'clients': args.clients,
+        'fps_per_client': args.fps,
+        'encoding': args.encoding,
+        'frame_size': [args.width, args.height],
+        'seconds': wall,
+        'sent': sent,
+        'processed': received,
+        'dropped_ratio': 1.0 - received / sent if sent else 0.0,
+        'throughput_fps': received / args.seconds,
+        'upload_mbps': sum(client['bytes_sent'] for client in clients) * 8 / args.seconds / 1e6,
+        'latency_ms': _percentiles(latencies),
+        'per_client_fps': [client['received'] / args.seconds for client in clients],
+        'errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for the frame ingestion WebSocket')
+    parser.add_argument('--url', default='ws://localhost:8765/ws/ingest')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--fps', type=float, default=15.0, help='Frames per second per client')
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--width', type=int, default=320)
+    parser.add_argument('--height', type=int, default=240)
+    parser.add_argument('--encoding', choices=sorted(ENCODINGS), default='jpeg')
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality')
+    parser.add_argument('--prefix', default='load', help='Stream ID prefix')
+    parser.add_argument('-o', '--output', help='Save the report as JSON')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    latency = report['latency_ms']
+    print(f"\n📊 Processed {report['processed']}/{report['sent']} frames "
+          f"({report['dropped_ratio']:.1%} dropped as stale), {report['throughput_fps']:.1f} fps total, "
+          f"{report['upload_mbps']:.1f} Mbit/s up")
+    print(f"   Latency p50 {latency['p50']:.1f} ms  p95 {latency['p95']:.1f} ms  "
+          f"p99 {latency['p99']:.1f} ms  max {latency['max']:.1f} ms")
+    per_client = report['per_client_fps']
+    if per_client:
+        print(f"   Per client: {min(per_client):.1f} - {max(per_client):.1f} fps")
+    for error in report['errors']:
+        print(f"❌ {error}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved report to {args.output}")
+    sys.exit(1 if report['errors'] else 0)
+
+
+if __name__ == "__main__":
+    main()
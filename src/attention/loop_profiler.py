@@ -0,0 +1,238 @@
+"""
+On-demand profiler for the tracker thread.
+Started and stopped at runtime (no restart) in one of two modes:
+
+- sampling: a side thread samples the tracker thread's stack every few
+  milliseconds and writes a collapsed-stack file (flamegraph.pl / speedscope)
+- cprofile: cProfile is enabled inside the tracker thread itself and the
+  stats are dumped to a .prof file
+
+Both modes also write a top-N text summary.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+MODES = ('sampling', 'cprofile')
+MAX_DURATION_SECONDS = 300.0
+
+# Same data directory as the study session backend (STUDY_DATA_DIR), never the working directory
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "study_data")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class LoopProfiler:
+    """
+    Profiler attached to one processing loop.
+    The loop calls checkpoint() once per iteration; everything else is
+    driven from API handlers on other threads.
+    """
+
+    def __init__(self, name: str, output_dir: Optional[str] = None):
+        """
+        Args:
+            name: Prefix for output files
+            output_dir: Directory for collapsed stacks, .prof files and summaries
+                        (default: <$STUDY_DATA_DIR or study_data/ next to this module>/profiles)
+        """
+        self.name = name
+        self.output_dir = os.path.abspath(output_dir or os.path.join(
+            os.environ.get("STUDY_DATA_DIR") or DEFAULT_DATA_DIR, "profiles"))
+        self.thread_id: Optional[int] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+        self._lock = threading.Lock()
+        self._session: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._profile: Optional[cProfile.Profile] = None
+
+    # ---- Called from the tracker loop ----
+
+    def checkpoint(self):
+        """Per-iteration hook for the tracker loop (cheap when idle)"""
+        self.thread_id = threading.get_ident()
+        session = self._session
+        if session is None or session['mode'] != 'cprofile':
+            return
+
+        if self._profile is None and not self._stop.is_set():
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self._profile is not None and (self._stop.is_set() or time.time() >= session['deadline']):
+            self._profile.disable()
+            profile, self._profile = self._profile, None
+            self._finish_cprofile(session, profile)
+
+    # ---- Called from API handlers ----
+
+    def start(self, mode: str = 'sampling', duration: float = 10.0,
+              interval_ms: float = 5.0, top: int = 25) -> Dict[str, Any]:
+        """Start a capture; raises ValueError if one is running or arguments are invalid"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        if self.thread_id is None:
+            raise ValueError("Tracker loop is not running")
+
+        with self._lock:
+            now = time.time()
+            session = self._session
+            if session is not None and now < session['deadline'] + 10.0:
+                raise ValueError("A profiling capture is already running")
+            # Otherwise any session left over was abandoned (e.g. the loop stopped mid-capture)
+            duration = min(max(duration, 0.1), MAX_DURATION_SECONDS)
+            self._stop.clear()
+            self._session = {
+                'mode': mode,
+                'started_at': now,
+                'deadline': now + duration,
+                'duration': duration,
+                'interval_ms': max(interval_ms, 1.0),
+                'top': top
+            }
+
+        if mode == 'sampling':
+            threading.Thread(target=self._sample, args=(self._session, self.thread_id), daemon=True).start()
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        """End the running capture early (results are still written)"""
+        self._stop.set()
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        session = self._session
+        return {
+            'running': session is not None,
+            'mode': session['mode'] if session else None,
+            'started_at': session['started_at'] if session else None,
+            'remaining_seconds': max(0.0, session['deadline'] - time.time()) if session else 0.0,
+            'last_result': self.last_result
+        }
+
+    # ---- Capture implementations ----
+
+    def _sample(self, session: Dict[str, Any], thread_id: int):
+        """Sample the tracker thread's stack until the deadline or stop()"""
+        stacks: Counter = Counter()
+        samples = 0
+        interval = session['interval_ms'] / 1000.0
+
+        while time.time() < session['deadline'] and not self._stop.is_set():
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks[';'.join(reversed(stack))] += 1
+                samples += 1
+            del frame
+            time.sleep(interval)
+
+        try:
+            self._finish_sampling(session, stacks, samples)
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+            self._complete({'mode': 'sampling', 'error': str(e)})
+
+    def _finish_sampling(self, session: Dict[str, Any], stacks: Counter, samples: int):
+        base = self._output_base(session)
+        collapsed_path = base + '.collapsed'
+        with open(collapsed_path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        # Self time = leaf frame, inclusive = anywhere on the stack (once per sample)
+        self_counts: Counter = Counter()
+        inclusive_counts: Counter = Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                inclusive_counts[label] += count
+
+        top = session['top']
+        summary = {
+            'self': self._ranked(self_counts, samples, top),
+            'inclusive': self._ranked(inclusive_counts, samples, top)
+        }
+
+        summary_path = base + '.txt'
+        with open(summary_path, 'w') as f:
+            f.write(f"{self.name} sampling profile: {samples} samples every {session['interval_ms']}ms\n\n")
+            for kind in ('self', 'inclusive'):
+                f.write(f"Top {top} by {kind} samples:\n")
+                for entry in summary[kind]:
+                    f.write(f"  {entry['percent']:6.2f}%  {entry['samples']:6d}  {entry['function']}\n")
+                f.write("\n")
+
+        self._complete({
+            'mode': 'sampling',
+            'samples': samples,
+            'seconds': time.time() - session['started_at'],
+            'collapsed_file': collapsed_path,
+            'summary_file': summary_path,
+            'top_self': summary['self'],
+            'top_inclusive': summary['inclusive']
+        })
+
+    def _finish_cprofile(self, session: Dict[str, Any], profile: cProfile.Profile):
+        try:
+            base = self._output_base(session)
+            prof_path = base + '.prof'
+            profile.dump_stats(prof_path)
+
+            stream = io.StringIO()
+            stats = pstats.Stats(profile, stream=stream)
+            stats.sort_stats('cumulative').print_stats(session['top'])
+            summary_path = base + '.txt'
+            with open(summary_path, 'w') as f:
+                f.write(stream.getvalue())
+
+            top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:session['top']]
+            self._complete({
+                'mode': 'cprofile',
+                'seconds': time.time() - session['started_at'],
+                'prof_file': prof_path,
+                'summary_file': summary_path,
+                'top_cumulative': [
+                    {
+                        'function': f"{func} ({os.path.basename(filename)}:{line})",
+                        'calls': calls,
+                        'total_seconds': total_time,
+                        'cumulative_seconds': cumulative_time
+                    }
+                    for (filename, line, func), (_, calls, total_time, cumulative_time, _) in top
+                ]
+            })
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+            self._complete({'mode': 'cprofile', 'error': str(e)})
+
+    def _ranked(self, counts: Counter, samples: int, top: int) -> List[Dict[str, Any]]:
+        return [
+            {'function': label, 'samples': count, 'percent': 100.0 * count / samples if samples else 0.0}
+            for label, count in counts.most_common(top)
+        ]
+
+    def _output_base(self, session: Dict[str, Any]) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(session['started_at']))
+        return os.path.join(self.output_dir, f"{self.name}_{session['mode']}_{stamp}")
+
+    def _complete(self, result: Dict[str, Any]):
+        self.last_result = result
+        with self._lock:
+            self._session = None
+        print(f"📊 Profile written: {result.get('summary_file', result.get('error'))}")
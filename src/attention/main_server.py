@@ -4,7 +4,7 @@ Main HTTP Server for Study Spark AI Attention Tracking
 Uses the updated AdvancedAttentionTracker class
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, make_response
 from flask_cors import CORS
 import cv2
 import time
@@ -14,6 +14,8 @@ import numpy as np
 
 # Import the updated AdvancedAttentionTracker
 from advanced_attention_tracker import AdvancedAttentionTracker
+from frame_sync import FrameSequence, etag_for, etag_matches, parse_etag
+from attention_metrics import FrameSnapshot
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Next.js frontend
@@ -22,7 +24,7 @@ CORS(app)  # Enable CORS for Next.js frontend
 tracking_active = False
 tracker = None
 tracker_thread = None
-current_data = {
+initial_data = {
     'attention_score': 0.0,
     'eye_ar': 0.0,
     'mouth_ar': 0.0,
@@ -33,10 +35,14 @@ current_data = {
     'focus_status': 'idle',
     'session_active': False
 }
+frame_sequence = FrameSequence()
+
+# Latest frame - replaced (never mutated) once per frame, serialized at most once
+current_snapshot = FrameSnapshot(0, initial_data)
 
 def run_tracking_loop():
     """Background thread for continuous tracking using AdvancedAttentionTracker"""
-    global current_data, tracking_active, tracker
+    global current_snapshot, tracking_active, tracker
 
     print("🎥 Starting tracking loop...")
 
@@ -56,7 +62,7 @@ def run_tracking_loop():
             metrics = tracker.process_frame(frame)
 
             # Convert to API format (ensure all values are JSON serializable)
-            current_data.update({
+            data = {
                 'attention_score': float(metrics.get('focus_score', 0.0)),
                 'eye_ar': float(metrics.get('ear', 0.0)),
                 'mouth_ar': float(metrics.get('mar', 0.0)),
@@ -75,7 +81,11 @@ def run_tracking_loop():
                 'yaw': float(metrics.get('yaw', 0.0)),
                 'pitch': float(metrics.get('pitch', 0.0)),
                 'roll': float(metrics.get('roll', 0.0))
-            })
+            }
+
+            # Swap in the new frame, then signal pollers waiting on it
+            current_snapshot = FrameSnapshot(frame_sequence.value + 1, data)
+            frame_sequence.advance()
 
         except Exception as e:
             print(f"❌ Error in tracking loop: {e}")
@@ -169,12 +179,29 @@ def stop_tracking():
 
 @app.route('/api/attention_data', methods=['GET'])
 def get_attention_data():
-    """Get current attention data"""
-    return jsonify({
-        'success': True,
-        'data': current_data,
-        'timestamp': time.time()
-    })
+    """Get current attention data (supports If-None-Match and long-poll)"""
+    if_none_match = request.headers.get('If-None-Match')
+
+    # Long-poll: Flask already serves each request on its own thread, so wait on it
+    if request.args.get('wait', '').lower() in ('1', 'true'):
+        since = request.args.get('since', type=int)
+        if since is None:
+            since = parse_etag(if_none_match)
+        if since is None:
+            since = frame_sequence.value
+        frame_sequence.wait_newer(since, request.args.get('timeout', 25.0, type=float))
+
+    snapshot = current_snapshot
+    etag = etag_for(snapshot.sequence)
+    if etag_matches(if_none_match, snapshot.sequence):
+        response = make_response('', 304)
+    else:
+        # The frame's JSON is encoded once and shared by every request for that sequence
+        response = Response(snapshot.envelope_bytes(time.time()), mimetype='application/json')
+        response.headers['Cache-Control'] = 'no-cache'
+    response.headers['ETag'] = etag
+    response.headers['X-Frame-Sequence'] = str(snapshot.sequence)
+    return response
 
 @app.route('/api/ping', methods=['GET'])
 def ping():
@@ -0,0 +1,243 @@
+"""
+Memory telemetry for long-running tracking sessions.
+A background thread periodically samples process RSS and, when enabled,
+tracemalloc allocations grouped by subsystem (our own modules by name,
+third-party code by top-level package). Registered probes report the size
+of caches and buffers that could grow over a session.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, Dict, Any, List, Optional
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+# Shorter histories give meaningless MB/hour trends
+MIN_TREND_SECONDS = 300.0
+
+
+def current_rss_mb() -> float:
+    """Current resident set size of this process (falls back to peak RSS)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def subsystem_for(filename: str) -> str:
+    """Subsystem name for a source file"""
+    if filename.startswith('<'):
+        return 'other'
+    path = os.path.abspath(filename)
+    if os.path.dirname(path) == SOURCE_DIR:
+        return os.path.splitext(os.path.basename(path))[0]
+    for marker in ('site-packages', 'dist-packages'):
+        if marker in path:
+            tail = path.split(marker, 1)[1].lstrip(os.sep)
+            return tail.split(os.sep, 1)[0].split('.', 1)[0] or 'third_party'
+    return 'stdlib'
+
+
+def _growth_per_hour(samples) -> Optional[float]:
+    """Least-squares RSS slope in MB/hour (None until the history is long enough)"""
+    if len(samples) < 2 or samples[-1][0] - samples[0][0] < MIN_TREND_SECONDS:
+        return None
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_v = sum(v for _, v in samples) / n
+    var = sum((t - mean_t) ** 2 for t, _ in samples)
+    if var <= 0:
+        return 0.0
+    cov = sum((t - mean_t) * (v - mean_v) for t, v in samples)
+    return cov / var * 3600.0
+
+
+class MemoryTelemetry:
+    """
+    Periodic RSS / tracemalloc sampler.
+
+    Args:
+        interval: Seconds between samples in the background thread
+        history: Number of RSS samples kept for the growth trend
+        top: Allocation sites reported per sample
+        trace_frames: Stack depth recorded by tracemalloc; with more than one
+            frame, allocations are charged to the innermost frame in our own code
+    """
+
+    def __init__(self, interval: float = 60.0, history: int = 720, top: int = 10,
+                 trace_frames: int = 4):
+        self.interval = interval
+        self.top = top
+        self.trace_frames = trace_frames
+        self.samples = deque(maxlen=history)
+        self.baseline_rss_mb: Optional[float] = None
+        self.subsystems: Dict[str, Dict[str, float]] = {}
+        self.baseline_subsystems: Dict[str, float] = {}
+        self.top_allocations: List[Dict[str, Any]] = []
+        self.probes: Dict[str, Callable[[], int]] = {}
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---- Control ----
+
+    def start(self):
+        """Start the background sampler (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def set_tracing(self, enabled: bool):
+        """Turn tracemalloc on or off (tracing slows every allocation down)"""
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            with self._lock:
+                self.baseline_subsystems = {}
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            with self._lock:
+                self.subsystems = {}
+                self.top_allocations = []
+
+    def register_probe(self, name: str, probe: Callable[[], int]):
+        """Report the size of a cache or buffer (probe returns a count)"""
+        self.probes[name] = probe
+
+    def reset_baseline(self):
+        """Measure growth from the next sample onwards"""
+        with self._lock:
+            self.samples.clear()
+            self.baseline_rss_mb = None
+            self.baseline_subsystems = {}
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Memory telemetry error: {e}")
+            self._stop.wait(self.interval)
+
+    # ---- Sampling ----
+
+    def sample(self, now: Optional[float] = None) -> float:
+        """Take one sample and return the current RSS in MB (`now` lets replays use session time)"""
+        rss = current_rss_mb()
+        subsystems = None
+        top_allocations = None
+        if tracemalloc.is_tracing():
+            subsystems, top_allocations = self._snapshot()
+
+        with self._lock:
+            if self.baseline_rss_mb is None:
+                self.baseline_rss_mb = rss
+            self.samples.append((time.time() if now is None else now, rss))
+            if subsystems is not None:
+                if not self.baseline_subsystems:
+                    self.baseline_subsystems = {name: s['size_mb'] for name, s in subsystems.items()}
+                for name, stats in subsystems.items():
+                    stats['growth_mb'] = stats['size_mb'] - self.baseline_subsystems.get(name, 0.0)
+                self.subsystems = subsystems
+                self.top_allocations = top_allocations
+        return rss
+
+    def _snapshot(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+        subsystems: Dict[str, Dict[str, float]] = {}
+        for stat in snapshot.statistics('traceback'):
+            # Charge the allocation to the innermost frame in our own code, if any
+            frames = stat.traceback
+            owner = frames[-1]
+            for frame in reversed(frames):
+                if not frame.filename.startswith('<') and \
+                    os.path.dirname(os.path.abspath(frame.filename)) == SOURCE_DIR:
+                    owner = frame
+                    break
+            name = subsystem_for(owner.filename)
+            entry = subsystems.setdefault(name, {'size_mb': 0.0, 'blocks': 0})
+            entry['size_mb'] += stat.size / (1024 * 1024)
+            entry['blocks'] += stat.count
+
+        top_allocations = [
+            {
+                'location': f"{os.path.basename(stat.traceback[-1].filename)}:{stat.traceback[-1].lineno}",
+                'subsystem': subsystem_for(stat.traceback[-1].filename),
+                'size_kb': stat.size / 1024,
+                'blocks': stat.count
+            }
+            for stat in snapshot.statistics('lineno')[:self.top]
+        ]
+        return subsystems, top_allocations
+
+    # ---- Reporting ----
+
+    def status(self, detailed: bool = False) -> Dict[str, Any]:
+        """Summary for status endpoints (detailed adds per-subsystem and top allocations)"""
+        with self._lock:
+            samples = list(self.samples)
+            baseline = self.baseline_rss_mb
+            subsystems = dict(self.subsystems)
+            top_allocations = list(self.top_allocations)
+
+        rss = samples[-1][1] if samples else current_rss_mb()
+        probes = {}
+        for name, probe in list(self.probes.items()):
+            try:
+                probes[name] = probe()
+            except Exception:
+                probes[name] = None
+
+        status = {
+            'rss_mb': rss,
+            'peak_rss_mb': peak_rss_mb(),
+            'baseline_rss_mb': baseline,
+            'growth_mb': rss - baseline if baseline is not None else 0.0,
+            'growth_mb_per_hour': _growth_per_hour(samples),
+            'samples': len(samples),
+            'tracemalloc': tracemalloc.is_tracing(),
+            'probes': probes
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            status['traced_mb'] = current / (1024 * 1024)
+            status['traced_peak_mb'] = peak / (1024 * 1024)
+        if detailed:
+            status['subsystems'] = dict(sorted(subsystems.items(), key=lambda item: -item[1]['size_mb']))
+            status['top_allocations'] = top_allocations
+        return status
+
+
+# Process-wide telemetry used by the servers
+memory_telemetry = MemoryTelemetry()
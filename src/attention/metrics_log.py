@@ -0,0 +1,265 @@
+"""
+Append-only on-disk log of per-frame attention metrics.
+One fixed-width binary record per frame, written in batches by a background
+thread and read back through a memory map.
+"""
+
+import mmap
+import os
+import queue
+import struct
+import threading
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+MAGIC = b'SSML'
+LOG_VERSION = 1
+
+# File header: magic, version, record size, session start time
+FILE_HEADER = struct.Struct('<4sHHd')
+
+# Record: timestamp, focus_score, ear, mar, yaw, pitch, roll, flag bits
+RECORD = struct.Struct('<dffffffI')
+RECORD_FIELDS = ('timestamp', 'focus_score', 'ear', 'mar', 'yaw', 'pitch', 'roll', 'flags')
+
+# Flag bits (append only, never renumber)
+FLAG_FOCUSED = 1 << 0
+FLAG_FACE_VISIBLE = 1 << 1
+FLAG_ORIENTATION_GOOD = 1 << 2
+FLAG_EYE_CLOSED = 1 << 3
+FLAG_YAWNING = 1 << 4
+FLAG_PHONE_NEAR_FACE = 1 << 5
+FLAG_HAND_NEAR_FACE = 1 << 6
+FLAG_POSTURE_STABLE = 1 << 7
+FLAG_AI_DETECTED_PHONE = 1 << 8
+
+_FLAG_KEYS = (
+    ('focused', FLAG_FOCUSED),
+    ('face_visible', FLAG_FACE_VISIBLE),
+    ('orientation_good', FLAG_ORIENTATION_GOOD),
+    ('eye_closed', FLAG_EYE_CLOSED),
+    ('yawning', FLAG_YAWNING),
+    ('phone_near_face', FLAG_PHONE_NEAR_FACE),
+    ('hand_near_face', FLAG_HAND_NEAR_FACE),
+    ('posture_stable', FLAG_POSTURE_STABLE),
+    ('ai_detected_phone', FLAG_AI_DETECTED_PHONE),
+)
+
+if NUMPY_AVAILABLE:
+    RECORD_DTYPE = np.dtype([
+        ('timestamp', '<f8'), ('focus_score', '<f4'), ('ear', '<f4'), ('mar', '<f4'),
+        ('yaw', '<f4'), ('pitch', '<f4'), ('roll', '<f4'), ('flags', '<u4'),
+    ])
+
+
+def metrics_flags(metrics) -> int:
+    """Boolean process_frame metrics as flag bits"""
+    flags = 0
+    for key, bit in _FLAG_KEYS:
+        if metrics.get(key, False):
+            flags |= bit
+    return flags
+
+
+def pack_metrics(timestamp: float, metrics) -> bytes:
+    """Pack process_frame metrics (AttentionMetrics or dict) into one record"""
+    return RECORD.pack(
+        timestamp,
+        metrics.get('focus_score', 0.0),
+        metrics.get('ear', 0.0),
+        metrics.get('mar', 0.0),
+        metrics.get('yaw', 0.0),
+        metrics.get('pitch', 0.0),
+        metrics.get('roll', 0.0),
+        metrics_flags(metrics)
+    )
+
+
+def decode_flags(flags: int) -> Dict[str, bool]:
+    """Expand flag bits into named booleans"""
+    return {key: bool(flags & bit) for key, bit in _FLAG_KEYS}
+
+
+class MetricsLogWriter:
+    """
+    Appends records to a session log from a background thread.
+    append() only packs and enqueues, so the tracking loop never waits on disk.
+    """
+
+    def __init__(self, path: str, start_time: float, flush_interval: float = 1.0,
+                 batch_size: int = 512):
+        """
+        Args:
+            path: Log file path (created if missing, appended to otherwise)
+            start_time: Session start time stored in the file header
+            flush_interval: Maximum seconds a record waits before being written
+            batch_size: Records written per batch
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.records_written = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER.pack(MAGIC, LOG_VERSION, RECORD.size, start_time))
+            self._file.flush()
+        else:
+            _read_header(path)
+            # Drop a torn record left by a crash so appends stay aligned
+            size = os.path.getsize(path)
+            aligned = FILE_HEADER.size + (size - FILE_HEADER.size) // RECORD.size * RECORD.size
+            if aligned != size:
+                self._file.truncate(aligned)
+                self._file.seek(aligned)
+
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def append(self, timestamp: float, metrics):
+        """Queue one frame of metrics"""
+        if not self._closed:
+            self._queue.put(pack_metrics(timestamp, metrics))
+
+    def _run(self):
+        """Writer loop - batches queued records into single writes"""
+        running = True
+        while running:
+            try:
+                record = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if record is None:
+                break
+
+            batch = [record]
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    running = False
+                    break
+                batch.append(record)
+
+            try:
+                self._file.write(b''.join(batch))
+                self._file.flush()
+                self.records_written += len(batch)
+            except Exception as e:
+                print(f"Error writing metrics log {self.path}: {e}")
+
+    def close(self):
+        """Flush queued records and close the file"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+
+def _read_header(path: str) -> Tuple[int, float]:
+    """Validate the file header and return (record size, start time)"""
+    with open(path, 'rb') as f:
+        header = f.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size:
+        raise ValueError(f"Metrics log is truncated: {path}")
+    magic, version, record_size, start_time = FILE_HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"Not a metrics log: {path}")
+    if version != LOG_VERSION or record_size != RECORD.size:
+        raise ValueError(f"Unsupported metrics log version {version}: {path}")
+    return record_size, start_time
+
+
+class MetricsLogReader:
+    """
+    Memory-mapped read access to a session log.
+    Safe to open while the writer is still appending - it sees the records written so far.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        _, self.start_time = _read_header(path)
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self.count = (size - FILE_HEADER.size) // RECORD.size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _offset(self, index: int) -> int:
+        return FILE_HEADER.size + index * RECORD.size
+
+    def record(self, index: int) -> Tuple[Any, ...]:
+        """One raw record tuple"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return RECORD.unpack_from(self._mmap, self._offset(index))
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[Any, ...]]:
+        """Iterate raw record tuples in [start, stop)"""
+        stop = self.count if stop is None else min(stop, self.count)
+        if start >= stop:
+            return iter(())
+        view = memoryview(self._mmap)[self._offset(start):self._offset(stop)]
+        return RECORD.iter_unpack(view)
+
+    def array(self):
+        """Structured NumPy view over every record (zero-copy)"""
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy is required for array access")
+        if not self.count:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=self.count,
+                             offset=FILE_HEADER.size)
+
+    def column(self, name: str) -> List[float]:
+        """All values of one field"""
+        if NUMPY_AVAILABLE:
+            return self.array()[name]
+        index = RECORD_FIELDS.index(name)
+        return [record[index] for record in self.records()]
+
+    def time_range(self, start_ts: float, end_ts: float) -> Tuple[int, int]:
+        """Index range [start, stop) of records with start_ts <= timestamp < end_ts"""
+        return self._bisect(start_ts), self._bisect(end_ts)
+
+    def _bisect(self, ts: float) -> int:
+        """First index whose timestamp is >= ts (records are time-ordered)"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if struct.unpack_from('<d', self._mmap, self._offset(mid))[0] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
@@ -0,0 +1,178 @@
+"""
+Micro-batching for detector inference shared by many sessions.
+Threads submit single items (e.g. one user's frame); a dispatcher thread
+collects them for up to `max_delay_ms`, runs one batched call, and hands each
+caller its own result. A batch is dispatched early once it is full or every
+recently active caller has submitted, so a lone session never waits.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from frame_timing import RollingWindow
+
+# Callers that submitted within this window count as active
+ACTIVE_CALLER_SECONDS = 1.0
+
+
+class _Pending:
+    __slots__ = ('item', 'caller', 'submitted', 'done', 'result', 'error')
+
+    def __init__(self, item: Any, caller: Any):
+        self.item = item
+        self.caller = caller
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Collects single-item calls from many threads into batched calls.
+
+    Args:
+        batch_fn: Called with a list of items; returns the results in the same order
+        max_batch: Most items per batch
+        max_delay_ms: Longest the oldest item waits for the batch to fill
+        name: Name for logs and the dispatcher thread
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch: int = 8,
+                 max_delay_ms: float = 10.0, name: str = 'batcher'):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0.0, max_delay_ms) / 1000.0
+        self.name = name
+
+        self.batches = 0
+        self.items = 0
+        self.timeouts = 0
+        self.batch_sizes = RollingWindow(200)
+        self.queue_wait = RollingWindow(200)
+        self.batch_seconds = RollingWindow(200)
+
+        self._queue: deque = deque()
+        self._callers: Dict[Any, float] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def configure(self, max_batch: Optional[int] = None, max_delay_ms: Optional[float] = None):
+        """Retune at runtime"""
+        with self._cond:
+            if max_batch is not None:
+                self.max_batch = max(1, max_batch)
+            if max_delay_ms is not None:
+                self.max_delay = max(0.0, max_delay_ms) / 1000.0
+            self._cond.notify_all()
+
+    def submit(self, item: Any, caller: Optional[Any] = None, timeout: Optional[float] = None) -> Any:
+        """Queue one item and block until its result is ready (`caller` identifies the session; default: thread)"""
+        pending = _Pending(item, threading.get_ident() if caller is None else caller)
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-dispatch", daemon=True)
+                self._thread.start()
+            self._callers[pending.caller] = pending.submitted
+            self._queue.append(pending)
+            self._cond.notify_all()
+
+        if not pending.done.wait(timeout) and self._abandon(pending):
+            raise TimeoutError(f"{self.name}: no result within {timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _abandon(self, pending: _Pending) -> bool:
+        """Withdraw a timed-out item so it isn't run later; False if its result arrived meanwhile"""
+        with self._cond:
+            if pending.done.is_set():
+                return False
+            self.timeouts += 1
+            try:
+                self._queue.remove(pending)
+            except ValueError:
+                pass  # Already in a running batch; its result is dropped
+            # A stalled caller shouldn't hold batches open for everyone else
+            if self._callers.get(pending.caller) == pending.submitted:
+                del self._callers[pending.caller]
+            self._cond.notify_all()
+            return True
+
+    def _active_callers(self, now: float) -> int:
+        for caller, last in list(self._callers.items()):
+            if now - last > ACTIVE_CALLER_SECONDS:
+                del self._callers[caller]
+        return len(self._callers)
+
+    def _batch_ready(self, now: float) -> bool:
+        if not self._queue:
+            return False
+        if len(self._queue) >= self.max_batch:
+            return True
+        if now - self._queue[0].submitted >= self.max_delay:
+            return True
+        # Everyone who has been submitting is already waiting - no point holding the batch
+        return len({p.caller for p in self._queue}) >= self._active_callers(now)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    now = time.perf_counter()
+                    if self._batch_ready(now):
+                        break
+                    wait = self._queue[0].submitted + self.max_delay - now if self._queue else None
+                    self._cond.wait(wait)
+                if self._stopped:
+                    return
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+
+            start = time.perf_counter()
+            try:
+                results = self.batch_fn([pending.item for pending in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f"{self.name}: batch of {len(batch)} returned {len(results)} results")
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            elapsed = time.perf_counter() - start
+
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes.add(len(batch))
+            self.batch_seconds.add(elapsed)
+            for pending in batch:
+                self.queue_wait.add(start - pending.submitted)
+                pending.done.set()
+
+    def stop(self):
+        """Stop the dispatcher; queued callers get a RuntimeError"""
+        with self._cond:
+            self._stopped = True
+            abandoned = list(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+        for pending in abandoned:
+            pending.error = RuntimeError(f"{self.name} stopped")
+            pending.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'max_batch': self.max_batch,
+            'max_delay_ms': self.max_delay * 1000.0,
+            'batches': self.batches,
+            'items': self.items,
+            'timeouts': self.timeouts,
+            'mean_batch_size': self.batch_sizes.mean,
+            'mean_queue_wait_ms': self.queue_wait.mean * 1000.0,
+            'mean_batch_ms': self.batch_seconds.mean * 1000.0,
+            'queued': len(self._queue)
+        }
@@ -0,0 +1,243 @@
+"""
+Cached overlay rendering for the preview window.
+
+Static chrome (panel background, border, title, labels) is rasterized once
+per frame size into an RGBA layer. Text that changes is re-rasterized into
+the panel only when its value changes. Each frame blends just the panel's
+region of interest into the frame, using buffers allocated up front, so the
+preview costs a few ROI copies instead of dozens of draw calls per frame.
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+Color = Tuple[int, int, int]
+
+# Room around a panel for borders drawn across its edge
+_MARGIN = 2
+
+
+def status_text_color(text: str) -> Color:
+    """Green for ✓/✅ messages, red for ✗/❌, orange otherwise"""
+    if "✓" in text or "✅" in text:
+        return (0, 255, 0)
+    if "✗" in text or "❌" in text:
+        return (0, 0, 255)
+    return (0, 165, 255)
+
+
+class OverlayPanel:
+    """
+    Rectangular overlay with cached chrome and text slots.
+
+    Text is clipped to the panel; on a translucent panel it is blended at the
+    panel's opacity.
+
+    Args:
+        x: Left edge in the frame
+        y: Top edge in the frame
+        width: Panel width (drawn to x + width, like cv2.rectangle)
+        height: Panel height (drawn to y + height)
+        background: Fill color, or None for no fill
+        border: Border color, or None for no border
+        border_thickness: Border line width
+        opacity: Panel alpha over the frame (1.0 is opaque)
+    """
+
+    def __init__(self, x: int, y: int, width: int, height: int,
+                 background: Optional[Color] = (20, 20, 20), border: Optional[Color] = (60, 60, 60),
+                 border_thickness: int = 1, opacity: float = 1.0):
+        self.x = x - _MARGIN
+        self.y = y - _MARGIN
+        self.alpha = int(round(min(max(opacity, 0.0), 1.0) * 255))
+        shape = (height + 1 + 2 * _MARGIN, width + 1 + 2 * _MARGIN)
+
+        # Static chrome as an RGBA layer: BGR pixels plus an alpha plane drawn with the same shapes
+        self.chrome = np.zeros(shape + (3,), dtype=np.uint8)
+        self.coverage = np.zeros(shape, dtype=np.uint8)
+        corner = (_MARGIN, _MARGIN)
+        far = (_MARGIN + width, _MARGIN + height)
+        if background is not None:
+            cv2.rectangle(self.chrome, corner, far, background, -1)
+            cv2.rectangle(self.coverage, corner, far, self.alpha, -1)
+        if border is not None:
+            cv2.rectangle(self.chrome, corner, far, border, border_thickness)
+            cv2.rectangle(self.coverage, corner, far, self.alpha, border_thickness)
+
+        # Chrome plus the current text (BGR), and the blend state; built on first draw
+        self.image: Optional[np.ndarray] = None
+        self._mask: Optional[np.ndarray] = None
+        self._opaque = False
+        self._weights: Optional[np.ndarray] = None
+        self._inverse: Optional[np.ndarray] = None
+        self._buffer: Optional[np.ndarray] = None
+        self._box = (0, 0, 0, 0)
+
+        self._slots: Dict[str, tuple] = {}
+        self.rasterized = 0
+
+    def add_text(self, text: str, org: Tuple[int, int], scale: float, color: Color, thickness: int = 1):
+        """Static text, part of the chrome (`org` is relative to the panel's top-left corner)"""
+        org = (org[0] + _MARGIN, org[1] + _MARGIN)
+        cv2.putText(self.chrome, text, org, FONT, scale, color, thickness)
+        cv2.putText(self.coverage, text, org, FONT, scale, self.alpha, thickness)
+        self.image = None
+
+    def set_text(self, slot: str, text: str, org: Tuple[int, int], scale: float,
+                 color: Color, thickness: int = 1):
+        """Dynamic text; only re-rasterized when it differs from the slot's last value"""
+        entry = (text, (org[0] + _MARGIN, org[1] + _MARGIN), scale, tuple(color), thickness)
+        old = self._slots.get(slot)
+        if old == entry:
+            return
+        self._slots[slot] = entry
+        if self.image is None:
+            return
+
+        if old is not None:
+            x1, y1, x2, y2 = self._bounds(old)
+            self.image[y1:y2, x1:x2] = self.chrome[y1:y2, x1:x2]
+            # Repaint neighbours the restored area cut into
+            for other_slot, other in self._slots.items():
+                if other_slot != slot and self._overlaps(self._bounds(other), (x1, y1, x2, y2)):
+                    self._put(other)
+        self._put(entry)
+
+    def _bounds(self, entry: tuple) -> Tuple[int, int, int, int]:
+        text, (x, y), scale, _, thickness = entry
+        (width, height), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+        rows, cols = self.chrome.shape[:2]
+        pad = thickness + 1
+        return (max(x - pad, 0), max(y - height - pad, 0),
+                min(x + width + pad, cols), min(y + baseline + pad, rows))
+
+    @staticmethod
+    def _overlaps(a, b) -> bool:
+        return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+    def _put(self, entry: tuple):
+        text, org, scale, color, thickness = entry
+        cv2.putText(self.image, text, org, FONT, scale, color, thickness)
+        self.rasterized += 1
+
+    def _build(self):
+        alpha = self.coverage
+        # Only the drawn area is blended, so an opaque panel blends as a plain copy
+        rows, cols = np.nonzero(alpha)
+        self._box = (rows.min(), rows.max() + 1, cols.min(), cols.max() + 1) if len(rows) else (0, 0, 0, 0)
+        top, bottom, left, right = self._box
+
+        self.image = self.chrome.copy()
+        drawn = alpha[top:bottom, left:right]
+        if np.isin(drawn, (0, 255)).all():
+            self._mask = alpha
+            self._opaque = bool(drawn.all())
+        else:
+            self._mask = None
+            self._weights = alpha.astype(np.float32) / 255.0
+            self._inverse = 1.0 - self._weights
+            self._buffer = np.empty_like(self.image)
+        for entry in self._slots.values():
+            self._put(entry)
+
+    def draw(self, frame: np.ndarray) -> np.ndarray:
+        """Blend the panel into its region of the frame (in place)"""
+        if self.image is None:
+            self._build()
+        top, bottom, left, right = self._box
+        x1, y1 = max(self.x + left, 0), max(self.y + top, 0)
+        x2, y2 = min(self.x + right, frame.shape[1]), min(self.y + bottom, frame.shape[0])
+        if x1 >= x2 or y1 >= y2:
+            return frame
+
+        roi = frame[y1:y2, x1:x2]
+        window = (slice(y1 - self.y, y2 - self.y), slice(x1 - self.x, x2 - self.x))
+        if self._opaque:
+            np.copyto(roi, self.image[window])
+        elif self._mask is not None:
+            cv2.copyTo(self.image[window], self._mask[window], roi)
+        else:
+            buffer = self._buffer[window]
+            cv2.blendLinear(self.image[window], roi, self._weights[window], self._inverse[window], dst=buffer)
+            np.copyto(roi, buffer)
+        return frame
+
+
+class OverlayRenderer:
+    """
+    Overlay panels cached per frame size.
+
+    Args:
+        layout: Builds the panels ({name: OverlayPanel}) for a frame width and
+            height; called once per size
+    """
+
+    def __init__(self, layout: Callable[[int, int], Dict[str, OverlayPanel]]):
+        self.layout = layout
+        self._panels: Dict[Tuple[int, int], Dict[str, OverlayPanel]] = {}
+
+    def panels(self, frame: np.ndarray) -> Dict[str, OverlayPanel]:
+        height, width = frame.shape[:2]
+        panels = self._panels.get((width, height))
+        if panels is None:
+            panels = self._panels[(width, height)] = self.layout(width, height)
+        return panels
+
+    def draw(self, frame: np.ndarray) -> np.ndarray:
+        """Blend every panel for this frame size into the frame (in place)"""
+        for panel in self.panels(frame).values():
+            panel.draw(frame)
+        return frame
+
+
+class PopupBanner:
+    """
+    Text banner faded over the frame, blended only over its own rectangle.
+    The banner image is rendered once per message.
+
+    Args:
+        background: Banner fill color
+        text_color: Text color
+        scale: Font scale
+        thickness: Text thickness
+        padding: Space between the text and the banner edge
+    """
+
+    def __init__(self, background: Color = (0, 0, 255), text_color: Color = (255, 255, 255),
+                 scale: float = 0.7, thickness: int = 2, padding: int = 10):
+        self.background = background
+        self.text_color = text_color
+        self.scale = scale
+        self.thickness = thickness
+        self.padding = padding
+        self._banners: Dict[str, Tuple[np.ndarray, int, int]] = {}
+
+    def _banner(self, message: str) -> Tuple[np.ndarray, int, int]:
+        banner = self._banners.get(message)
+        if banner is None:
+            (width, height), baseline = cv2.getTextSize(message, FONT, self.scale, self.thickness)
+            image = np.empty((height + baseline + 2 * self.padding + 1, width + 2 * self.padding + 1, 3),
+                             dtype=np.uint8)
+            image[:] = self.background
+            cv2.putText(image, message, (self.padding, self.padding + height), FONT, self.scale,
+                        self.text_color, self.thickness)
+            banner = self._banners[message] = (image, width, height)
+        return banner
+
+    def draw(self, frame: np.ndarray, message: str, alpha: float, y: int = 40) -> np.ndarray:
+        """Blend the banner centered horizontally with its text baseline at `y` (in place)"""
+        image, width, height = self._banner(message)
+        left = (frame.shape[1] - width) // 2 - self.padding
+        top = y - height - self.padding
+        x1, y1 = max(left, 0), max(top, 0)
+        x2 = min(left + image.shape[1], frame.shape[1])
+        y2 = min(top + image.shape[0], frame.shape[0])
+        if x1 >= x2 or y1 >= y2:
+            return frame
+
+        roi = frame[y1:y2, x1:x2]
+        cv2.addWeighted(image[y1 - top:y2 - top, x1 - left:x2 - left], alpha, roi, 1.0 - alpha, 0, dst=roi)
+        return frame
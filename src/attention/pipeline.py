@@ -0,0 +1,307 @@
+"""
+Stage-graph pipeline engine for the attention trackers.
+
+A pipeline is a set of stages (capture, preprocess, face, hands, pose, phone
+detector, VLM, scorer, sinks) declared with explicit inputs and outputs.
+The engine orders them by their data dependencies and runs them once per
+frame, honouring per-stage cadence (every N frames), background execution
+(e.g. phone detection off the frame path) and concurrency between
+independent stages. Every stage run is recorded in the shared stage timers.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from stage_metrics import stage_timers, StageTimers
+
+
+class Stage:
+    """
+    One node of a pipeline.
+
+    Args:
+        name: Stage name (also its timing label)
+        fn: Called with the stage inputs in declaration order; returns the single
+            output, a tuple matching `outputs`, or nothing for sinks
+        inputs: Context keys the stage reads
+        outputs: Context keys the stage writes
+        every: Run on every Nth frame; in between the last outputs are held
+        when: Predicate on the frame context; when it is false the stage is
+            skipped and its outputs take their defaults for this frame
+        defaults: Output values before the first run and when skipped by `when`
+        background: Run in a worker thread off the frame path; each frame sees
+            the newest completed result. Array inputs are copied at launch
+        concurrent: May run at the same time as adjacent concurrent stages it
+            shares no data with
+        max_in_flight: Background runs allowed at once
+    """
+
+    def __init__(self, name: str, fn: Callable, inputs: Sequence[str] = (),
+                 outputs: Sequence[str] = (), every: int = 1,
+                 when: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 defaults: Optional[Dict[str, Any]] = None, background: bool = False,
+                 concurrent: bool = False, max_in_flight: int = 1):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.every = max(1, every)
+        self.when = when
+        self.defaults = {key: None for key in self.outputs}
+        self.defaults.update(defaults or {})
+        self.background = background
+        self.concurrent = concurrent and not background
+        self.max_in_flight = max(1, max_in_flight)
+
+        self.runs = 0
+        self.skips = 0
+        self.errors = 0
+        self.last: Optional[Dict[str, Any]] = None
+        self._in_flight = 0
+        # Bumped by Pipeline.reset(); background results from an older generation are dropped
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def unpack(self, result: Any) -> Dict[str, Any]:
+        """Map a stage's return value onto its outputs"""
+        if not self.outputs:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if len(result) != len(self.outputs):
+            raise ValueError(f"Stage {self.name} returned {len(result)} values for {len(self.outputs)} outputs")
+        return dict(zip(self.outputs, result))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'inputs': list(self.inputs),
+            'outputs': list(self.outputs),
+            'every': self.every,
+            'background': self.background,
+            'concurrent': self.concurrent,
+            'runs': self.runs,
+            'skips': self.skips,
+            'errors': self.errors
+        }
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, {list(self.inputs)} -> {list(self.outputs)})"
+
+
+class Pipeline:
+    """
+    Dependency-ordered set of stages run once per frame.
+
+    Args:
+        stages: Stage nodes (any order - they are sorted by their data dependencies)
+        inputs: Keys supplied to run() for every frame
+        name: Pipeline name for logs
+        timers: Stage timers that receive every stage run
+        workers: Threads for background and concurrent stages
+    """
+
+    def __init__(self, stages: Sequence[Stage], inputs: Sequence[str] = ('frame',),
+                 name: str = 'pipeline', timers: StageTimers = stage_timers, workers: int = 4):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.timers = timers
+        self.frame_index = 0
+        self._set_stages(list(stages))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._workers = workers
+
+    # ---- Graph construction ----
+
+    def _set_stages(self, stages: List[Stage]):
+        ordered = self._sort(stages)
+        groups = self._group(ordered)
+        self.stages = ordered
+        self._by_name = {stage.name: stage for stage in ordered}
+        # run() reads _groups once per frame, so a frame already running keeps its old graph
+        self._groups = groups
+
+    def attach(self, *stages: Stage):
+        """Add stages at runtime (e.g. an optional preview sink); takes effect from the next frame"""
+        self._set_stages(self.stages + list(stages))
+
+    def detach(self, *names: str):
+        """Remove stages by name; raises KeyError for unknown names"""
+        for name in names:
+            if name not in self._by_name:
+                raise KeyError(name)
+        self._set_stages([stage for stage in self.stages if stage.name not in names])
+
+    def _sort(self, stages: List[Stage]) -> List[Stage]:
+        """Stable topological sort; raises ValueError for missing or duplicate producers"""
+        producers: Dict[str, Stage] = {}
+        names = set()
+        for stage in stages:
+            if stage.name in names:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            names.add(stage.name)
+            for key in stage.outputs:
+                if key in producers or key in self.inputs:
+                    raise ValueError(f"{key!r} is produced by more than one stage")
+                producers[key] = stage
+
+        for stage in stages:
+            for key in stage.inputs:
+                if key not in producers and key not in self.inputs:
+                    raise ValueError(f"Stage {stage.name} needs {key!r}, which nothing produces")
+
+        ordered: List[Stage] = []
+        done = set()
+        visiting = set()
+
+        def visit(stage: Stage):
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Dependency cycle through stage {stage.name}")
+            visiting.add(stage.name)
+            for key in stage.inputs:
+                if key in producers:
+                    visit(producers[key])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+            ordered.append(stage)
+
+        for stage in stages:
+            visit(stage)
+        return ordered
+
+    @staticmethod
+    def _group(stages: List[Stage]) -> List[List[Stage]]:
+        """Batch adjacent concurrent stages that don't depend on each other"""
+        groups: List[List[Stage]] = []
+        for stage in stages:
+            group = groups[-1] if groups else None
+            if (group is not None and stage.concurrent and all(s.concurrent for s in group)
+                    and not any(set(stage.inputs) & set(s.outputs) for s in group)):
+                group.append(stage)
+            else:
+                groups.append([stage])
+        return groups
+
+    # ---- Execution ----
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers,
+                                                thread_name_prefix=f"{self.name}-stage")
+        return self._executor
+
+    def run(self, **inputs) -> Dict[str, Any]:
+        """Run one frame through the pipeline and return the frame context"""
+        self.frame_index += 1
+        context = dict(inputs)
+        frame_timing = self.timers.begin()
+
+        for group in self._groups:
+            if len(group) == 1:
+                context.update(self._run_stage(group[0], context))
+            else:
+                futures = [self._pool().submit(self._run_stage, stage, context) for stage in group]
+                for future in futures:
+                    context.update(future.result())
+
+        frame_timing.end()
+        return context
+
+    def _run_stage(self, stage: Stage, context: Dict[str, Any]) -> Dict[str, Any]:
+        if stage.when is not None and not stage.when(context):
+            stage.skips += 1
+            return dict(stage.defaults)
+
+        if stage.background:
+            return self._run_background(stage, context)
+
+        if stage.last is not None and self.frame_index % stage.every != 0:
+            stage.skips += 1
+            return stage.last
+
+        args = [context[key] for key in stage.inputs]
+        start = time.perf_counter()
+        outputs = stage.unpack(stage.fn(*args))
+        if self.timers.enabled:
+            self.timers.record(stage.name, time.perf_counter() - start)
+        stage.runs += 1
+        stage.last = outputs
+        return outputs
+
+    def _run_background(self, stage: Stage, context: Dict[str, Any]) -> Dict[str, Any]:
+        if self.frame_index % stage.every == 0:
+            with stage._lock:
+                launch = stage._in_flight < stage.max_in_flight
+                if launch:
+                    stage._in_flight += 1
+            if launch:
+                # A background run outlives its frame, whose buffer (a shared-memory ring slot,
+                # a pooled decode buffer) may be reused by the next read
+                args = [value.copy() if isinstance(value, np.ndarray) else value
+                        for value in (context[key] for key in stage.inputs)]
+                self._pool().submit(self._background_task, stage, args, stage._generation)
+            else:
+                stage.skips += 1
+
+        with stage._lock:
+            return stage.last if stage.last is not None else dict(stage.defaults)
+
+    def _background_task(self, stage: Stage, args: List[Any], generation: int):
+        start = time.perf_counter()
+        try:
+            outputs = stage.unpack(stage.fn(*args))
+            with stage._lock:
+                stage.runs += 1
+                if stage._generation == generation:
+                    stage.last = outputs
+        except Exception as e:
+            stage.errors += 1
+            print(f"Stage {stage.name} error: {e}")
+        finally:
+            with stage._lock:
+                stage._in_flight -= 1
+            if self.timers.enabled:
+                self.timers.record(stage.name, time.perf_counter() - start)
+
+    # ---- Introspection and control ----
+
+    def stage(self, name: str) -> Stage:
+        return self._by_name[name]
+
+    def configure(self, name: str, every: Optional[int] = None,
+                  concurrent: Optional[bool] = None) -> Stage:
+        """Change a stage's cadence or concurrency at runtime"""
+        stage = self._by_name[name]
+        if every is not None:
+            stage.every = max(1, every)
+        if concurrent is not None:
+            stage.concurrent = concurrent and not stage.background
+            self._groups = self._group(self.stages)
+        return stage
+
+    def reset(self, name: str) -> Stage:
+        """Drop a stage's held outputs (e.g. after a resolution change); in-flight background results are discarded"""
+        stage = self._by_name[name]
+        with stage._lock:
+            stage.last = None
+            stage._generation += 1
+        return stage
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'frames': self.frame_index,
+            'stages': [stage.describe() for stage in self.stages],
+            'parallel_groups': [[s.name for s in group] for group in self._groups if len(group) > 1]
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -16,24 +16,28 @@ from scipy.spatial import distance as dist
 from flexible_phone_detector import FlexiblePhoneDetector
 from ai_helper_vlm import AIHelperVLM
 from simulated_ai_helper import SimulatedAIHelper
+from attention_metrics import AttentionMetrics
+from frame_source import FrameSource, open_source
+from pipeline import Pipeline, Stage
+from attention_stages import (
+    FACE_DEFAULTS, FACE_OUTPUTS, PREVIEW_STAGE, create_face_mesh, hand_proximity_stage, head_pose_stage,
+    mediapipe_face_analysis, mediapipe_stages, phone_stages, posture_stage, preview_stage, vlm_stage,
+    weighted_score
+)
+from frame_timing import FPSCounter
+from quality_controller import QualityController
+from overlay_renderer import OverlayPanel, OverlayRenderer, PopupBanner, status_text_color
 
-class FPSCounter:
-    """Optimized FPS counter"""
-    def __init__(self):
-        self.frame_count = 0
-        self.start_time = time.time()
-        self.fps_history = []
-        
-    def get_fps(self):
-        self.frame_count += 1
-        elapsed = time.time() - self.start_time
-        if elapsed > 0:
-            fps = self.frame_count / elapsed
-            self.fps_history.append(fps)
-            if len(self.fps_history) > 10:
-                self.fps_history.pop(0)
-            return np.mean(self.fps_history)
-        return 0.0
+# (status message key, panel label, text when the message is missing)
+STATUS_ITEMS = (
+    ("face", "FACE", "No face detected"),
+    ("orientation", "ORIENTATION", "Looking forward"),
+    ("eye", "EYE", "Eyes open"),
+    ("mouth", "MOUTH", "Normal"),
+    ("interaction", "INTERACTION", "No interaction"),
+    ("posture", "POSTURE", "Good posture"),
+    ("overall", "OVERALL", "Focused"),
+)
 
 class PreciseAttentionTracker:
     """
@@ -41,15 +45,21 @@ class PreciseAttentionTracker:
     """
     
     def __init__(self, camera_index: int = 0, frame_width: int = 1280, 
-                 frame_height: int = 720):
+                 frame_height: int = 720, source: Optional[FrameSource] = None,
+                 headless: bool = True, target_fps: Optional[float] = None,
+                 cpu_budget: Optional[float] = None):
         self.camera_index = camera_index
-        self.frame_width = frame_width
+        self.source = source  # Replaces the webcam when given (video file, images, synthetic)
+        self.frame_width = frame_width  # Capture size (reported to clients)
         self.frame_height = frame_height
+        # Size of the frame being processed (smaller when the quality controller downscales)
+        self.process_width = frame_width
+        self.process_height = frame_height
         self.frame_count = 0
         
         # Initialize camera
         if not self.initialize_camera():
-            raise IOError("Cannot open webcam")
+            raise IOError("Cannot open webcam" if source is None else f"Cannot open frame source: {source}")
         
         # Initialize MediaPipe
         self.mp_face_mesh = mp.solutions.face_mesh
@@ -58,13 +68,7 @@ class PreciseAttentionTracker:
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        self.face_mesh = create_face_mesh(self)
         
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
@@ -97,23 +101,25 @@ class PreciseAttentionTracker:
             self.ai_helper = SimulatedAIHelper(detection_probability=0.3)
             print("Using Simulated AI Helper for testing")
         
-        # AI helper state
+        # Preview-only state (untouched in headless mode)
+        self.headless = True
+        self.preview_frame: Optional[np.ndarray] = None
         self.ai_popup_alpha = 0
         self.ai_popup_timer = 0
         self.ai_popup_message = ""
+        # Status panels are hidden by default (user request); 'o' toggles them in the window
+        self.show_status_overlay = False
+        self.overlay = OverlayRenderer(self._overlay_layout)
+        self.popup = PopupBanner()
         
         # Performance optimization
         self.fps_counter = FPSCounter()
         self.detection_frame_skip = 2
-        self.last_phone_results = []
+        self.vlm_every = 25  # Frames between routine VLM checks
         
         # Compact mode toggle
         self.compact_mode = True
         
-        # Threading for detection
-        self.detection_thread = None
-        self.detection_results_lock = threading.Lock()
-        
         # Precise thresholds from your code
         self.eye_ar_threshold = 0.20
         self.mouth_ar_threshold = 0.88
@@ -133,12 +139,32 @@ class PreciseAttentionTracker:
             (150.0, -150.0, -125.0)
         ])
         
+        # Per-frame stage graph (phone detection runs in the background every detection_frame_skip frames)
+        self.pipeline = self.build_pipeline()
+        if not headless:
+            self.attach_preview()
+        
+        # Optional closed-loop quality ladder that holds target_fps on slow machines
+        self.quality = QualityController(self, target_fps, cpu_budget) if target_fps else None
+        
         print(f"Precise Attention Tracker initialized: {self.frame_width}x{self.frame_height}")
         print("MediaPipe + Precise EAR/MAR Math + Phone Detection")
         print("Exact Eye Aspect Ratio and Mouth Aspect Ratio Calculations")
 
     def initialize_camera(self) -> bool:
-        """Initialize camera capture"""
+        """Initialize camera capture (or the configured frame source)"""
+        if self.source is not None:
+            self.cap = self.source
+            if not self.cap.isOpened():
+                print(f"❌ Failed to open frame source {self.source}")
+                return False
+            
+            # Recorded sources dictate the frame size
+            width, height = self.source.frame_size
+            if width and height:
+                self.frame_width, self.frame_height = width, height
+            return True
+        
         try:
             self.cap = cv2.VideoCapture(self.camera_index)
             if not self.cap.isOpened():
@@ -209,12 +235,12 @@ class PreciseAttentionTracker:
         for idx in left_eye_indices:
             if idx < len(face_landmarks.landmark):
                 lm = face_landmarks.landmark[idx]
-                left_eye.append([lm.x * self.frame_width, lm.y * self.frame_height])
+                left_eye.append([lm.x * self.process_width, lm.y * self.process_height])
         
         for idx in right_eye_indices:
             if idx < len(face_landmarks.landmark):
                 lm = face_landmarks.landmark[idx]
-                right_eye.append([lm.x * self.frame_width, lm.y * self.frame_height])
+                right_eye.append([lm.x * self.process_width, lm.y * self.process_height])
         
         return np.array(left_eye), np.array(right_eye)
 
@@ -227,7 +253,7 @@ class PreciseAttentionTracker:
         for idx in mouth_indices:
             if idx < len(face_landmarks.landmark):
                 lm = face_landmarks.landmark[idx]
-                mouth.append([lm.x * self.frame_width, lm.y * self.frame_height])
+                mouth.append([lm.x * self.process_width, lm.y * self.process_height])
         
         return np.array(mouth)
 
@@ -240,7 +266,7 @@ class PreciseAttentionTracker:
         for idx in key_indices:
             if idx < len(face_landmarks.landmark):
                 lm = face_landmarks.landmark[idx]
-                image_points.append([lm.x * self.frame_width, lm.y * self.frame_height])
+                image_points.append([lm.x * self.process_width, lm.y * self.process_height])
         
         if len(image_points) != 6:
             return 0.0, 0.0, 0.0
@@ -278,17 +304,6 @@ class PreciseAttentionTracker:
         else:
             return 0.0, 0.0, 0.0
 
-    def run_phone_detection_async(self, frame, face_bbox):
-        """Run phone detection in background thread"""
-        try:
-            detections = self.phone_detector.detect_phones_near_face(frame, face_bbox)
-            with self.detection_results_lock:
-                self.last_phone_results = detections
-                if detections:
-                    print(f"DEBUG: Found {len(detections)} phone objects!")
-        except Exception as e:
-            print(f"Phone detection error: {e}")
-
     def is_hand_near_face(self, face_bbox, hands, margin=0.2):
         """Check if hand landmarks are near face area"""
         if not face_bbox or not hands:
@@ -307,16 +322,16 @@ class PreciseAttentionTracker:
             for lm_idx in key_landmarks:
                 if lm_idx < len(hand.landmark):
                     lm = hand.landmark[lm_idx]
-                    x = lm.x * self.frame_width
-                    y = lm.y * self.frame_height
+                    x = lm.x * self.process_width
+                    y = lm.y * self.process_height
                     
                     distance = np.sqrt((x - face_center_x)**2 + (y - face_center_y)**2)
                     if distance < dynamic_margin:
                         return True
             
             for lm in hand.landmark:
-                x = lm.x * self.frame_width
-                y = lm.y * self.frame_height
+                x = lm.x * self.process_width
+                y = lm.y * self.process_height
                 
                 if (fx1 - 50 < x < fx2 + 50 and fy1 - 50 < y < fy2 + 50):
                     return True
@@ -346,168 +361,83 @@ class PreciseAttentionTracker:
         
         return False, 0.0
 
-    def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
-        """Process a single frame with precise EAR/MAR calculations"""
-        self.frame_count += 1
-        
-        # Convert to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Process with MediaPipe
-        face_results = self.face_mesh.process(rgb_frame)
-        hands_results = self.hands.process(rgb_frame)
-        pose_results = self.pose.process(rgb_frame)
-        
-        # Initialize results
-        face_visible = False
-        face_bbox = None
-        eye_closed = False
-        yawning = False
-        head_tilt = 0.0
-        yaw = 0.0
-        pitch = 0.0
-        roll = 0.0
-        orientation_good = True
-        ear = 0.0
-        mar = 0.0
-        
-        # Process face landmarks
-        if face_results.multi_face_landmarks:
-            face_visible = True
-            face_landmarks = face_results.multi_face_landmarks[0]
-            
-            # Calculate face bounding box
-            all_x, all_y = [], []
-            for landmark in face_landmarks.landmark:
-                all_x.append(landmark.x)
-                all_y.append(landmark.y)
-            
-            x_min = int(min(all_x) * self.frame_width)
-            x_max = int(max(all_x) * self.frame_width)
-            y_min = int(min(all_y) * self.frame_height)
-            y_max = int(max(all_y) * self.frame_height)
-            face_bbox = (x_min, y_min, x_max, y_max)
-            
-            # Extract eye landmarks and calculate EAR
-            left_eye, right_eye = self.get_mediapipe_eye_landmarks(face_landmarks)
-            if len(left_eye) >= 6 and len(right_eye) >= 6:
-                left_ear = self.eye_aspect_ratio(left_eye)
-                right_ear = self.eye_aspect_ratio(right_eye)
-                ear = (left_ear + right_ear) / 2.0
-                
-                # Check for eye closure using EXACT THRESHOLD from your code
-                if ear < self.eye_ar_threshold:
-                    self.eye_closure_counter += 1
-                    if self.eye_closure_counter >= self.eye_ar_consec_frames:
-                        eye_closed = True
-                else:
-                    self.eye_closure_counter = 0
-            
-            # Extract mouth landmarks and calculate MAR
-            mouth = self.get_mediapipe_mouth_landmarks(face_landmarks)
-            if len(mouth) >= 12:
-                mar = self.mouth_aspect_ratio(mouth)
-                
-                # Check for yawning using EXACT THRESHOLD from your code
-                if mar > self.mouth_ar_threshold:
-                    yawning = True
-            
-            # Calculate head pose
-            yaw, pitch, roll = self.get_head_pose_from_mediapipe(frame, face_landmarks)
-            head_tilt = abs(roll)
-            
+    def build_pipeline(self) -> Pipeline:
+        """This tracker's stage graph (see attention_stages for the shared stages)"""
+        def face_analysis(face_results):
+            return mediapipe_face_analysis(self, face_results)
+
+        return Pipeline([
+            *mediapipe_stages(self),
+            Stage('landmark_math', face_analysis, inputs=('face_results',),
+                  outputs=FACE_OUTPUTS, defaults=FACE_DEFAULTS),
             # Orientation analysis - balanced thresholds for normal use
-            orientation_good = (abs(yaw) < 100.0 and abs(pitch) < 100.0 and head_tilt < self.head_tilt_threshold)
-        
-        # Hand detection
-        hand_landmarks = []
-        hand_near_face = False
-        
-        if hands_results.multi_hand_landmarks:
-            hand_landmarks = hands_results.multi_hand_landmarks
-            if face_bbox:
-                hand_near_face = self.is_hand_near_face(face_bbox, hand_landmarks)
-        
-        # Phone detection
-        phone_near_face = False
-        phone_confidence = 0.0
-        phone_objects = []
-        
-        if self.frame_count % self.detection_frame_skip == 0:
-            if self.detection_thread is None or not self.detection_thread.is_alive():
-                self.detection_thread = threading.Thread(target=self.run_phone_detection_async, args=(frame, face_bbox))
-                self.detection_thread.start()
-        
-        with self.detection_results_lock:
-            phone_objects = self.last_phone_results.copy()
-        
-        if face_bbox and phone_objects:
-            phone_near_face, phone_confidence = self.is_phone_near_face(face_bbox, phone_objects)
-        
-        # Phone detection is independent of hand detection
-        # Only set phone_near_face based on actual phone object overlap with face
-        # (The phone_near_face is already set correctly above by is_phone_near_face function)
-        
-        # AI Helper VLM check (optional, non-interfering)
-        ai_detected_phone = False
-        ai_confidence = 0.0
-        ai_triggered = False
-        
-        if self.ai_helper and (self.frame_count % 25 == 0 or (0.3 <= phone_confidence <= 0.6)):
-            try:
-                # Get hand bounding boxes for AI helper
-                hand_bboxes = []
-                if hand_landmarks:
-                    for hand in hand_landmarks:
-                        # Calculate hand bounding box
-                        hand_x = [lm.x for lm in hand.landmark]
-                        hand_y = [lm.y for lm in hand.landmark]
-                        if hand_x and hand_y:
-                            h_x_min = int(min(hand_x) * self.frame_width)
-                            h_x_max = int(max(hand_x) * self.frame_width)
-                            h_y_min = int(min(hand_y) * self.frame_height)
-                            h_y_max = int(max(hand_y) * self.frame_height)
-                            hand_bboxes.append((h_x_min, h_y_min, h_x_max, h_y_max))
-                
-                # Get phone bounding boxes for AI helper
-                phone_bboxes = []
-                for phone_obj in phone_objects:
-                    if 'bbox' in phone_obj:
-                        phone_bboxes.append(phone_obj['bbox'])
-                
-                # Run AI helper
-                ai_result = self.ai_helper.check_phone_with_vlm(
-                    frame=frame,
-                    face_bbox=face_bbox,
-                    hand_bboxes=hand_bboxes,
-                    phone_bboxes=phone_bboxes,
-                    phone_confidence=phone_confidence
-                )
-                
-                ai_detected_phone = ai_result.get("ai_detected_phone", False)
-                ai_confidence = ai_result.get("ai_confidence", 0.0)
-                ai_triggered = ai_result.get("ai_triggered", False)
-                
-                # Update popup if AI detected phone
-                if ai_detected_phone and ai_triggered:
-                    self.ai_popup_alpha = 255
-                    self.ai_popup_timer = 60  # 2 seconds at 30 FPS
-                    self.ai_popup_message = "📱 You're on your phone"
-                
-            except Exception as e:
-                print(f"AI Helper error: {e}")
-        
-        # Posture analysis
-        posture_stable = True
-        if pose_results.pose_landmarks:
-            try:
-                shoulders = pose_results.pose_landmarks.landmark[11]
-                hips = pose_results.pose_landmarks.landmark[23]
-                posture_stable = (hips.y - shoulders.y) > 0.3
-            except (IndexError, AttributeError):
-                posture_stable = True
-        
-        # Calculate focus score using precise metrics
+            head_pose_stage(self, lambda yaw, pitch, head_tilt: (
+                abs(yaw) < 100.0 and abs(pitch) < 100.0 and head_tilt < self.head_tilt_threshold)),
+            hand_proximity_stage(self),
+            *phone_stages(self, every=self.detection_frame_skip),
+            vlm_stage(self),
+            posture_stage(),
+            Stage('scoring', self.score,
+                  inputs=('face_visible', 'orientation_good', 'eye_closed', 'yawning',
+                          'phone_near_face', 'hand_near_face', 'posture_stable'),
+                  outputs=('focus_score', 'focused')),
+            Stage('status_messages', lambda *flags: self.generate_status_messages(*flags),
+                  inputs=('face_visible', 'orientation_good', 'phone_near_face', 'hand_near_face',
+                          'phone_confidence', 'posture_stable', 'eye_closed', 'yawning',
+                          'yaw', 'pitch', 'head_tilt', 'ear', 'mar'),
+                  outputs=('status_messages',)),
+        ], inputs=('frame', 'frame_index'), name='precise')
+
+    def attach_preview(self):
+        """Leave headless mode: render overlays into self.preview_frame every frame"""
+        if self.headless:
+            self.pipeline.attach(preview_stage(
+                self, ('focused', 'ai_detected_phone', 'ai_triggered', 'focus_score', 'status_messages', 'ear', 'mar')))
+            self.headless = False
+
+    def detach_preview(self):
+        """Back to headless mode: no frame copies or drawing on the frame path"""
+        if not self.headless:
+            self.pipeline.detach(PREVIEW_STAGE)
+            self.headless = True
+            self.preview_frame = None
+
+    def render_preview(self, frame, focused, ai_detected_phone, ai_triggered, focus_score,
+                       status_messages, ear, mar):
+        """Draw the focus ring, AI popup and (when enabled) status panels on a frame copy (preview sink only)"""
+        if ai_detected_phone and ai_triggered:
+            self.ai_popup_alpha = 255
+            self.ai_popup_timer = 60  # 2 seconds at 30 FPS
+            self.ai_popup_message = "📱 You're on your phone"
+
+        if self.show_status_overlay:
+            frame = self.draw_precise_status_overlay(frame, {
+                "status_messages": status_messages,
+                "focus_score": focus_score,
+                "fps": self.fps_counter.windowed_fps(),
+                "ear": ear,
+                "mar": mar
+            })
+
+        # Draw focus ring
+        if focused:
+            cv2.rectangle(frame, (10, 10), (self.process_width - 10, self.process_height - 10), 
+                         (0, 255, 0), 4)
+        else:
+            cv2.rectangle(frame, (10, 10), (self.process_width - 10, self.process_height - 10), 
+                         (0, 0, 255), 4)
+
+        # Draw AI popup if active
+        if self.ai_popup_alpha > 0 and self.ai_popup_timer > 0:
+            self._draw_ai_popup(frame)
+            self.ai_popup_timer -= 1
+            if self.ai_popup_timer <= 0:
+                self.ai_popup_alpha = 0
+        return frame
+
+    def score(self, face_visible, orientation_good, eye_closed, yawning,
+              phone_near_face, hand_near_face, posture_stable):
+        """Calculate focus score using precise metrics"""
         focus_components = {
             "face_visibility": 1.0 if face_visible else 0.0,
             "orientation": 1.0 if orientation_good else 0.0,
@@ -529,46 +459,49 @@ class PreciseAttentionTracker:
             "posture": 0.1
         }
         
-        focus_score = sum(weights[component] * score for component, score in focus_components.items())
+        focus_score = weighted_score(focus_components, weights)
         
         # Overall focus determination
         focused = (focus_score > 0.7 and not phone_near_face and face_visible and 
                   orientation_good and not eye_closed and not yawning)
-        
-        # Generate status messages
-        status_messages = self.generate_status_messages(
-            face_visible, orientation_good, phone_near_face, hand_near_face,
-            phone_confidence, posture_stable, eye_closed, yawning, yaw, pitch, head_tilt, ear, mar
-        )
-        
-        # Add FPS
-        fps = self.fps_counter.get_fps()
-        
-        return {
-            "focused": focused,
-            "focus_score": focus_score,
-            "face_visible": face_visible,
-            "orientation_good": orientation_good,
-            "yaw": yaw,
-            "pitch": pitch,
-            "roll": roll,
-            "head_tilt": head_tilt,
-            "eye_closed": eye_closed,
-            "yawning": yawning,
-            "ear": ear,
-            "mar": mar,
-            "phone_near_face": phone_near_face,
-            "hand_near_face": hand_near_face,
-            "phone_confidence": phone_confidence,
-            "posture_stable": posture_stable,
-            "status_messages": status_messages,
-            "phone_objects": phone_objects,
-            "fps": fps,
+        return focus_score, focused
+
+    def process_frame(self, frame: np.ndarray) -> AttentionMetrics:
+        """Process a single frame with precise EAR/MAR calculations"""
+        self.frame_count += 1
+        start = time.perf_counter()
+        if self.quality is not None:
+            frame = self.quality.prepare(frame)
+        self.process_height, self.process_width = frame.shape[:2]
+        result = self.pipeline.run(frame=frame, frame_index=self.frame_count)
+        if self.quality is not None:
+            self.quality.observe(time.perf_counter() - start)
+        
+        return AttentionMetrics(
+            focused=result['focused'],
+            focus_score=result['focus_score'],
+            face_visible=result['face_visible'],
+            orientation_good=result['orientation_good'],
+            yaw=result['yaw'],
+            pitch=result['pitch'],
+            roll=result['roll'],
+            head_tilt=result['head_tilt'],
+            eye_closed=result['eye_closed'],
+            yawning=result['yawning'],
+            ear=result['ear'],
+            mar=result['mar'],
+            phone_near_face=result['phone_near_face'],
+            hand_near_face=result['hand_near_face'],
+            phone_confidence=result['phone_confidence'],
+            posture_stable=result['posture_stable'],
+            status_messages=result['status_messages'],
+            phone_objects=list(result['phone_objects']),
+            fps=self.fps_counter.get_fps(),
             # AI Helper results (non-interfering)
-            "ai_detected_phone": ai_detected_phone,
-            "ai_confidence": ai_confidence,
-            "ai_triggered": ai_triggered
-        }
+            ai_detected_phone=result['ai_detected_phone'],
+            ai_confidence=result['ai_confidence'],
+            ai_triggered=result['ai_triggered']
+        )
 
     def generate_status_messages(self, face_visible: bool, orientation_good: bool,
                                 phone_near_face: bool, hand_near_face: bool,
@@ -671,86 +604,39 @@ class PreciseAttentionTracker:
             "overall": {"text": overall_status, "color": overall_color}
         }
 
+    def _overlay_layout(self, width: int, height: int) -> Dict[str, OverlayPanel]:
+        """Static chrome of the status and metrics panels for one frame size"""
+        # Main status panel - back to better UI
+        status = OverlayPanel(width - 400 - 20, 20, 400, 320, border_thickness=2)
+        status.add_text("PRECISE ATTENTION TRACKER", (10, 25), 0.6, (255, 255, 255), 2)
+        for i, (_, label, _) in enumerate(STATUS_ITEMS):
+            status.add_text(label, (10, 50 + i * 35), 0.4, (180, 180, 180))
+
+        # Metrics panel
+        metrics = OverlayPanel(width - 200 - 20, height - 120 - 20, 200, 120)
+        metrics.add_text("PRECISE METRICS", (10, 20), 0.5, (180, 180, 180))
+        return {"status": status, "metrics": metrics}
+
     def draw_precise_status_overlay(self, frame, metrics):
-        """Draw precise status overlay with detailed metrics"""
+        """Draw precise status overlay with detailed metrics (cached chrome, text redrawn on change)"""
         status_messages = metrics.get("status_messages", {})
+        panels = self.overlay.panels(frame)
         
-        # Main status panel - back to better UI
-        panel_width = 400
-        panel_height = 320
-        panel_x = self.frame_width - panel_width - 20
-        panel_y = 20
-        
-        # Background
-        cv2.rectangle(frame, (panel_x, panel_y), 
-                     (panel_x + panel_width, panel_y + panel_height), 
-                     (20, 20, 20), -1)
-        cv2.rectangle(frame, (panel_x, panel_y), 
-                     (panel_x + panel_width, panel_y + panel_height), 
-                     (60, 60, 60), 2)
-        
-        # Title
-        cv2.putText(frame, "PRECISE ATTENTION TRACKER", (panel_x + 10, panel_y + 25),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        
-        # Status items
-        y_start = panel_y + 50
-        status_items = [
-            ("FACE", status_messages.get("face", {}).get("text", "No face detected")),
-            ("ORIENTATION", status_messages.get("orientation", {}).get("text", "Looking forward")),
-            ("EYE", status_messages.get("eye", {}).get("text", "Eyes open")),
-            ("MOUTH", status_messages.get("mouth", {}).get("text", "Normal")),
-            ("INTERACTION", status_messages.get("interaction", {}).get("text", "No interaction")),
-            ("POSTURE", status_messages.get("posture", {}).get("text", "Good posture")),
-            ("OVERALL", status_messages.get("overall", {}).get("text", "Focused"))
-        ]
-        
-        for i, (label, text) in enumerate(status_items):
-            y_pos = y_start + (i * 35)
-            
-            # Label
-            cv2.putText(frame, label, (panel_x + 10, y_pos),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (180, 180, 180), 1)
-            
-            # Status text with color
-            color = (0, 255, 0) if "✓" in text or "✅" in text else (0, 0, 255) if "✗" in text or "❌" in text else (0, 165, 255)
-            cv2.putText(frame, text, (panel_x + 10, y_pos + 20),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-        
-        # Metrics panel
-        metrics_width = 200
-        metrics_height = 120
-        metrics_x = self.frame_width - metrics_width - 20
-        metrics_y = self.frame_height - metrics_height - 20
-        
-        # Metrics background
-        cv2.rectangle(frame, (metrics_x, metrics_y), 
-                     (metrics_x + metrics_width, metrics_y + metrics_height), 
-                     (20, 20, 20), -1)
-        cv2.rectangle(frame, (metrics_x, metrics_y), 
-                     (metrics_x + metrics_width, metrics_y + metrics_height), 
-                     (60, 60, 60), 1)
-        
-        # Metrics title
-        cv2.putText(frame, "PRECISE METRICS", (metrics_x + 10, metrics_y + 20),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (180, 180, 180), 1)
+        for i, (key, label, default) in enumerate(STATUS_ITEMS):
+            text = status_messages.get(key, {}).get("text", default)
+            panels["status"].set_text(label, text, (10, 50 + i * 35 + 20), 0.5, status_text_color(text))
         
         # Score, FPS, EAR, MAR
-        score_text = f"Score: {metrics.get('focus_score', 0.0):.2f}"
-        fps_text = f"FPS: {metrics.get('fps', 0.0):.1f}"
-        ear_text = f"EAR: {metrics.get('ear', 0.0):.3f}"
-        mar_text = f"MAR: {metrics.get('mar', 0.0):.3f}"
-        
-        cv2.putText(frame, score_text, (metrics_x + 10, metrics_y + 40),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        cv2.putText(frame, fps_text, (metrics_x + 10, metrics_y + 60),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        cv2.putText(frame, ear_text, (metrics_x + 10, metrics_y + 80),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        cv2.putText(frame, mar_text, (metrics_x + 10, metrics_y + 100),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        values = (
+            ("score", f"Score: {metrics.get('focus_score', 0.0):.2f}"),
+            ("fps", f"FPS: {metrics.get('fps', 0.0):.1f}"),
+            ("ear", f"EAR: {metrics.get('ear', 0.0):.3f}"),
+            ("mar", f"MAR: {metrics.get('mar', 0.0):.3f}")
+        )
+        for i, (slot, text) in enumerate(values):
+            panels["metrics"].set_text(slot, text, (10, 40 + i * 20), 0.5, (255, 255, 255))
         
-        return frame
+        return self.overlay.draw(frame)
 
     def draw_phone_detections(self, frame, phone_objects):
         """Draw phone detection boxes"""
@@ -769,42 +655,11 @@ class PreciseAttentionTracker:
         return frame
 
     def _draw_ai_popup(self, frame: np.ndarray):
-        """Draw AI popup message with fade effect"""
+        """Draw AI popup message with fade effect (blended over the banner only)"""
         if self.ai_popup_alpha <= 0:
             return
         
-        # Calculate position (top-center)
-        text = self.ai_popup_message
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        font_scale = 0.7
-        thickness = 2
-        
-        # Get text size
-        (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
-        
-        # Calculate position
-        x = (self.frame_width - text_width) // 2
-        y = 40
-        
-        # Draw background rectangle with rounded corners
-        padding = 10
-        rect_x1 = x - padding
-        rect_y1 = y - text_height - padding
-        rect_x2 = x + text_width + padding
-        rect_y2 = y + baseline + padding
-        
-        # Create overlay for alpha blending
-        overlay = frame.copy()
-        
-        # Draw rounded rectangle background
-        cv2.rectangle(overlay, (rect_x1, rect_y1), (rect_x2, rect_y2), (0, 0, 255), -1)
-        
-        # Draw text
-        cv2.putText(overlay, text, (x, y), font, font_scale, (255, 255, 255), thickness)
-        
-        # Blend with alpha
-        alpha = self.ai_popup_alpha / 255.0
-        cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+        self.popup.draw(frame, self.ai_popup_message, self.ai_popup_alpha / 255.0, y=40)
         
         # Fade out
         self.ai_popup_alpha = max(0, self.ai_popup_alpha - 20)
@@ -814,7 +669,8 @@ class PreciseAttentionTracker:
         print("Starting Precise Attention Tracker...")
         print("MediaPipe + Precise EAR/MAR Math + Phone Detection")
         print("Exact Eye Aspect Ratio and Mouth Aspect Ratio Calculations")
-        print("Press 'q' to quit, 's' to save screenshot")
+        print("Press 'q' to quit, 's' to save screenshot, 'o' to toggle the status panels")
+        self.attach_preview()
         
         while True:
             ret, frame = self.cap.read()
@@ -825,27 +681,9 @@ class PreciseAttentionTracker:
             # Flip frame horizontally for mirror effect
             frame = cv2.flip(frame, 1)
             
-            # Process frame
+            # Process frame (the preview sink renders the overlays)
             metrics = self.process_frame(frame)
-            
-            # Draw overlays (hidden as per user request)
-            # frame = self.draw_precise_status_overlay(frame, metrics)
-            # frame = self.draw_phone_detections(frame, metrics.get("phone_objects", []))
-            
-            # Draw focus ring
-            if metrics.get("focused", False):
-                cv2.rectangle(frame, (10, 10), (self.frame_width - 10, self.frame_height - 10), 
-                             (0, 255, 0), 4)
-            else:
-                cv2.rectangle(frame, (10, 10), (self.frame_width - 10, self.frame_height - 10), 
-                             (0, 0, 255), 4)
-            
-            # Draw AI popup if active
-            if self.ai_popup_alpha > 0 and self.ai_popup_timer > 0:
-                self._draw_ai_popup(frame)
-                self.ai_popup_timer -= 1
-                if self.ai_popup_timer <= 0:
-                    self.ai_popup_alpha = 0
+            frame = self.preview_frame
             
             # Display frame
             cv2.imshow('Precise Attention Tracker', frame)
@@ -884,16 +722,26 @@ class PreciseAttentionTracker:
                 filename = f"precise_attention_screenshot_{timestamp}.png"
                 cv2.imwrite(filename, frame)
                 print(f"Screenshot saved as {filename}")
+            elif key == ord('o'):
+                self.show_status_overlay = not self.show_status_overlay
         
         self.cap.release()
         cv2.destroyAllWindows()
         print("Precise Attention Tracker stopped")
 
 def main():
+    import sys
+    
+    # Optional source: camera index, video file, image directory or "synthetic[:frames]"
+    source = open_source(sys.argv[1], 640, 480, realtime=True) if len(sys.argv) > 1 else None
+    # Optional target FPS: adapt quality to hold it (e.g. "0 15" on a slow laptop)
+    target_fps = float(sys.argv[2]) if len(sys.argv) > 2 else None
     tracker = PreciseAttentionTracker(
         camera_index=0, 
         frame_width=640, 
-        frame_height=480
+        frame_height=480,
+        source=source,
+        target_fps=target_fps
     )
     tracker.run()
 
@@ -0,0 +1,172 @@
+"""
+Annotated preview streaming with encode-once semantics.
+
+A stream publishes its rendered preview frames here only while someone is
+watching. Viewers are grouped into classes (thumbnail, mobile, desktop), each
+with its own size, frame rate and byte budget. A frame is JPEG-encoded at most
+once per class, on demand, and that payload is shared by every viewer of the
+class. With no viewers nothing is rendered or encoded. Each class adapts its
+JPEG quality (and, at the quality floor, its scale) to stay within its budget.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from frame_sync import FrameSequence
+from frame_timing import RollingWindow
+
+BOUNDARY = 'frame'
+MIN_QUALITY = 30
+MIN_SCALE = 0.25
+
+
+class ViewerClass:
+    """
+    Encoding profile shared by one kind of viewer.
+
+    Args:
+        name: Profile name used in the API
+        max_width: Widest frame sent (frames are never upscaled)
+        max_fps: Most frames per second sent to each viewer
+        quality: Starting and highest JPEG quality
+        kbps: Byte budget per viewer in kilobits per second
+    """
+
+    def __init__(self, name: str, max_width: int, max_fps: float, quality: int, kbps: float):
+        self.name = name
+        self.max_width = max_width
+        self.max_fps = max_fps
+        self.max_quality = quality
+        self.frame_budget = kbps * 1000 / 8 / max_fps
+
+        # Adapted as frames are encoded
+        self.quality = quality
+        self.scale = 1.0
+        self.lock = threading.Lock()
+        self.encoded: Tuple[int, bytes] = (0, b'')
+        self.encodes = 0
+        self.encode_seconds = RollingWindow(100)
+        self.frame_bytes = RollingWindow(100)
+
+    def adapt(self, size: int):
+        """Step quality, then scale, toward the per-frame byte budget"""
+        if size > self.frame_budget * 1.15:
+            if self.quality > MIN_QUALITY:
+                self.quality = max(MIN_QUALITY, self.quality - 5)
+            elif self.scale > MIN_SCALE:
+                self.scale = max(MIN_SCALE, self.scale * 0.8)
+        elif size < self.frame_budget * 0.7:
+            if self.scale < 1.0:
+                self.scale = min(1.0, self.scale / 0.8)
+            elif self.quality < self.max_quality:
+                self.quality = min(self.max_quality, self.quality + 5)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_width': self.max_width,
+            'max_fps': self.max_fps,
+            'quality': self.quality,
+            'scale': round(self.scale, 3),
+            'encodes': self.encodes,
+            'mean_encode_ms': self.encode_seconds.mean * 1000.0,
+            'mean_frame_kb': self.frame_bytes.mean / 1000.0
+        }
+
+
+def default_viewer_classes() -> Dict[str, ViewerClass]:
+    return {
+        'thumbnail': ViewerClass('thumbnail', max_width=320, max_fps=5, quality=60, kbps=250),
+        'mobile': ViewerClass('mobile', max_width=640, max_fps=10, quality=70, kbps=1500),
+        'desktop': ViewerClass('desktop', max_width=1280, max_fps=15, quality=80, kbps=6000),
+    }
+
+
+def viewer_class_for(user_agent: Optional[str]) -> str:
+    """Default profile for a client that didn't ask for one"""
+    return 'mobile' if user_agent and 'Mobi' in user_agent else 'desktop'
+
+
+class PreviewBroadcaster:
+    """
+    Latest preview frame of one stream and its per-class JPEG encodings.
+
+    The producer calls publish() for every rendered frame while `watched` is
+    true; viewers call encoded() for the newest frame in their class.
+    """
+
+    def __init__(self):
+        self.classes = default_viewer_classes()
+        self.sequence = FrameSequence()
+        self.viewers: Dict[str, int] = {name: 0 for name in self.classes}
+        # (sequence, frame) replaced as one tuple, so a frame is never paired with another's sequence
+        self._latest: Tuple[int, Optional[np.ndarray]] = (0, None)
+        self._lock = threading.Lock()
+
+    @property
+    def watched(self) -> bool:
+        return any(self.viewers.values())
+
+    def add_viewer(self, name: str) -> ViewerClass:
+        """Register a viewer of a class (KeyError for unknown classes)"""
+        viewer_class = self.classes[name]
+        with self._lock:
+            self.viewers[name] += 1
+        return viewer_class
+
+    def remove_viewer(self, name: str):
+        with self._lock:
+            self.viewers[name] = max(0, self.viewers[name] - 1)
+            if not self.watched:
+                self._latest = (self._latest[0], None)
+
+    def publish(self, frame: np.ndarray):
+        """Offer a new rendered frame (kept by reference; the producer must not reuse it)"""
+        with self._lock:
+            if not self.watched:
+                return
+            # Stored before the sequence advances, so a woken viewer always finds it
+            self._latest = (self.sequence.value + 1, frame)
+            self.sequence.advance()
+
+    def encoded(self, viewer_class: ViewerClass) -> Tuple[int, bytes]:
+        """(sequence, JPEG) of the newest frame for a class; encodes it if no viewer has yet"""
+        with viewer_class.lock:
+            with self._lock:
+                seq, frame = self._latest
+            if frame is None or viewer_class.encoded[0] == seq:
+                return viewer_class.encoded
+
+            start = time.perf_counter()
+            height, width = frame.shape[:2]
+            scale = min(1.0, viewer_class.max_width / width) * viewer_class.scale
+            if scale < 1.0:
+                frame = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                                   interpolation=cv2.INTER_AREA)
+            ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, viewer_class.quality])
+            if not ok:
+                return viewer_class.encoded
+
+            payload = jpeg.tobytes()
+            viewer_class.encoded = (seq, payload)
+            viewer_class.encodes += 1
+            viewer_class.encode_seconds.add(time.perf_counter() - start)
+            viewer_class.frame_bytes.add(len(payload))
+            viewer_class.adapt(len(payload))
+            return viewer_class.encoded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'viewers': dict(self.viewers),
+            'frames': self.sequence.value,
+            'classes': {name: viewer_class.stats() for name, viewer_class in self.classes.items()}
+        }
+
+
+def mjpeg_part(jpeg: bytes) -> bytes:
+    """One multipart/x-mixed-replace part"""
+    return (f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+            .encode('ascii') + jpeg + b"\r\n")
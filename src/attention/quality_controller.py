@@ -0,0 +1,210 @@
+"""
+Closed-loop quality control for the attention trackers.
+
+A QualityController watches how long process_frame takes (and, optionally,
+the process CPU use) and steps the tracker through a ladder of quality
+levels: processing resolution, refined face landmarks, phone detection,
+pose and VLM cadence, and the phone search ROI around the face. It steps
+down as soon as a window of frames runs over budget and back up one level
+at a time once there is sustained headroom. Every transition is logged.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from attention_stages import create_face_mesh
+from frame_timing import RollingWindow
+
+
+class QualityLevel:
+    """
+    One rung of the quality ladder, relative to the tracker's own settings.
+
+    Args:
+        name: Level name for logs and status
+        scale: Processing resolution as a fraction of the capture size
+        refine_landmarks: Keep the iris-refined face mesh (no metric uses the iris points)
+        detection_factor: Multiplier for the phone detection cadence
+        pose_every: Run pose estimation every N frames
+        vlm_factor: Multiplier for the VLM check cadence
+        roi_scale: Multiplier for the phone search margin around the face
+    """
+
+    def __init__(self, name: str, scale: float, refine_landmarks: bool, detection_factor: int,
+                 pose_every: int, vlm_factor: int, roi_scale: float):
+        self.name = name
+        self.scale = scale
+        self.refine_landmarks = refine_landmarks
+        self.detection_factor = detection_factor
+        self.pose_every = pose_every
+        self.vlm_factor = vlm_factor
+        self.roi_scale = roi_scale
+
+
+QUALITY_LADDER = (
+    QualityLevel('full', 1.0, True, 1, 1, 1, 1.0),
+    QualityLevel('balanced', 1.0, False, 2, 2, 2, 0.8),
+    QualityLevel('reduced', 0.75, False, 3, 3, 4, 0.7),
+    QualityLevel('low', 0.5, False, 5, 5, 8, 0.6),
+    QualityLevel('minimal', 0.5, False, 8, 10, 16, 0.5),
+)
+
+
+class QualityController:
+    """
+    Holds a tracker at a target frame rate by trading quality for speed.
+
+    Args:
+        tracker: PreciseAttentionTracker or AdvancedAttentionTracker
+        target_fps: Frame rate to hold; process_frame gets 1 / target_fps seconds
+        cpu_budget: Share of all CPU cores the process may use (0-1), or None to ignore CPU
+        window: Frames per evaluation
+        headroom: Step up only while usage stays below this share of the budgets
+        up_windows: Evaluations in a row with headroom before stepping up
+        ladder: Quality levels, best first
+    """
+
+    def __init__(self, tracker, target_fps: float = 15.0, cpu_budget: Optional[float] = None,
+                 window: int = 30, headroom: float = 0.6, up_windows: int = 3,
+                 ladder: Sequence[QualityLevel] = QUALITY_LADDER):
+        self.tracker = tracker
+        self.target_fps = target_fps
+        self.frame_budget = 1.0 / max(target_fps, 0.1)
+        self.cpu_budget = cpu_budget
+        self.window = max(1, window)
+        self.headroom = headroom
+        self.up_windows = max(1, up_windows)
+        self.ladder = tuple(ladder)
+
+        # The tracker's own settings are the top of the ladder
+        self.base_detection_every = tracker.detection_frame_skip
+        self.base_vlm_every = getattr(tracker, 'vlm_every', None)
+        self.base_margin = getattr(tracker.phone_detector, 'search_margin', None)
+        self.refine_landmarks = True
+
+        self.level = 0
+        self.frame_seconds = RollingWindow(self.window)
+        self.cpu_share = 0.0
+        self.transitions: deque = deque(maxlen=50)
+        self._frames = 0
+        self._good_windows = 0
+        # Windows of headroom needed to step up; doubled when a step up doesn't hold
+        self._up_required = self.up_windows
+        self._stepped_up_at: Optional[int] = None
+        self._cpu_mark = (time.process_time(), time.perf_counter())
+        self._cores = os.cpu_count() or 1
+
+    @property
+    def current(self) -> QualityLevel:
+        return self.ladder[self.level]
+
+    def prepare(self, frame: np.ndarray) -> np.ndarray:
+        """Scale a captured frame to the current processing resolution"""
+        # The tracker's frame_width/frame_height stay the capture size; its processing
+        # size is taken from the returned frame
+        scale = self.current.scale
+        if scale >= 1.0:
+            return frame
+        height, width = frame.shape[:2]
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def observe(self, seconds: float):
+        """Record one frame's processing time; re-evaluates the level every `window` frames"""
+        self.frame_seconds.add(seconds)
+        self._frames += 1
+        if self._frames % self.window == 0:
+            self._evaluate()
+
+    def _evaluate(self):
+        cpu, wall = time.process_time(), time.perf_counter()
+        last_cpu, last_wall = self._cpu_mark
+        self._cpu_mark = (cpu, wall)
+        if wall > last_wall:
+            self.cpu_share = (cpu - last_cpu) / (wall - last_wall) / self._cores
+
+        latency = self.frame_seconds.mean
+        cpu_over = self.cpu_budget is not None and self.cpu_share > self.cpu_budget
+        if latency > self.frame_budget or cpu_over:
+            self._good_windows = 0
+            if self._stepped_up_at is not None and self._frames - self._stepped_up_at <= self.window * 2:
+                self._up_required = min(self._up_required * 2, 32)
+            self._stepped_up_at = None
+            if self.level < len(self.ladder) - 1:
+                reason = (f"cpu {self.cpu_share:.0%} > {self.cpu_budget:.0%}" if cpu_over else
+                          f"frame {latency * 1000:.1f} ms > {self.frame_budget * 1000:.1f} ms")
+                self.set_level(self.level + 1, reason)
+            return
+
+        cpu_ok = self.cpu_budget is None or self.cpu_share < self.cpu_budget * self.headroom
+        if latency < self.frame_budget * self.headroom and cpu_ok:
+            self._good_windows += 1
+            if self._good_windows >= self._up_required and self.level > 0:
+                self.set_level(self.level - 1, f"frame {latency * 1000:.1f} ms, cpu {self.cpu_share:.0%}")
+                self._stepped_up_at = self._frames
+        else:
+            self._good_windows = 0
+
+    def set_level(self, level: int, reason: str = 'manual'):
+        """Move to a ladder level and apply its settings to the tracker"""
+        level = min(max(level, 0), len(self.ladder) - 1)
+        previous = self.level
+        self.level = level
+        self._apply(self.ladder[level])
+        if self.ladder[level].scale != self.ladder[previous].scale:
+            # Held and in-flight phone boxes are in the old resolution's pixels
+            self.tracker.pipeline.reset('phone_detection')
+        self._good_windows = 0
+        self.frame_seconds = RollingWindow(self.window)
+
+        if level != previous:
+            arrow = "⬇️" if level > previous else "⬆️"
+            print(f"{arrow} Quality {self.ladder[previous].name} -> {self.current.name} ({reason})")
+            self.transitions.append({
+                'time': time.time(),
+                'from': self.ladder[previous].name,
+                'to': self.current.name,
+                'reason': reason
+            })
+
+    def _apply(self, level: QualityLevel):
+        tracker = self.tracker
+        pipeline = tracker.pipeline
+
+        tracker.detection_frame_skip = self.base_detection_every * level.detection_factor
+        pipeline.configure('phone_detection', every=tracker.detection_frame_skip)
+        pipeline.configure('pose', every=level.pose_every)
+        if self.base_vlm_every is not None:
+            tracker.vlm_every = self.base_vlm_every * level.vlm_factor
+        if self.base_margin is not None:
+            tracker.phone_detector.search_margin = int(self.base_margin * level.roi_scale)
+
+        if level.refine_landmarks != self.refine_landmarks:
+            # Swapped between frames; the face_mesh stage looks the model up on every call
+            old, tracker.face_mesh = tracker.face_mesh, create_face_mesh(tracker, level.refine_landmarks)
+            self.refine_landmarks = level.refine_landmarks
+            old.close()
+
+    def status(self) -> Dict[str, Any]:
+        level = self.current
+        return {
+            'level': level.name,
+            'index': self.level,
+            'target_fps': self.target_fps,
+            'cpu_budget': self.cpu_budget,
+            'frame_ms': self.frame_seconds.mean * 1000.0,
+            'cpu_share': self.cpu_share,
+            'resolution': [self.tracker.process_width, self.tracker.process_height],
+            'capture_resolution': [self.tracker.frame_width, self.tracker.frame_height],
+            'refine_landmarks': self.refine_landmarks,
+            'detection_every': self.tracker.detection_frame_skip,
+            'pose_every': level.pose_every,
+            'vlm_every': getattr(self.tracker, 'vlm_every', None),
+            'search_margin': getattr(self.tracker.phone_detector, 'search_margin', None),
+            'transitions': list(self.transitions)
+        }
@@ -17,6 +17,8 @@ from datetime import datetime
 from tracker import FocusTracker
 from focus_logic import FocusEvaluator
 from visualizer import FocusVisualizer
+from broadcast_hub import BroadcastHub
+from frame_timing import FPSCounter
 
 class FocusDataServer:
     """
@@ -24,7 +26,7 @@ class FocusDataServer:
     """
     
     def __init__(self, host: str = "localhost", port: int = 8765, 
-                 camera_index: int = 0):
+                 camera_index: int = 0, client_queue_size: int = 8):
         """
         Initialize the focus data server.
         
@@ -32,6 +34,7 @@ class FocusDataServer:
             host: Server host address
             port: Server port
             camera_index: Camera device index
+            client_queue_size: Messages buffered per client before the oldest is dropped
         """
         self.host = host
         self.port = port
@@ -40,6 +43,10 @@ class FocusDataServer:
         # Connected clients
         self.clients: Set[websockets.WebSocketServerProtocol] = set()
         
+        # Fan-out hub owned by the server's event loop (set in start_server)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.hub = BroadcastHub(max_queue=client_queue_size)
+        
         # Focus tracking components
         self.tracker = FocusTracker()
         self.evaluator = FocusEvaluator()
@@ -67,6 +74,7 @@ class FocusDataServer:
             path: Connection path
         """
         self.clients.add(websocket)
+        self.hub.register(websocket)
         print(f"Client connected: {websocket.remote_address}")
         
         # Send initial data
@@ -80,7 +88,8 @@ class FocusDataServer:
         except websockets.exceptions.ConnectionClosed:
             pass
         finally:
-            self.clients.remove(websocket)
+            self.clients.discard(websocket)
+            await self.hub.unregister(websocket)
             print(f"Client disconnected: {websocket.remote_address}")
     
     async def handle_client_message(self, websocket: websockets.WebSocketServerProtocol, message: str):
@@ -105,6 +114,8 @@ class FocusDataServer:
                     "type": "status",
                     "streaming": self.streaming,
                     "clients_connected": len(self.clients),
+                    "clients": self.hub.client_stats(),
+                    "evictions": self.hub.evictions,
                     "camera_active": self.cap is not None and self.cap.isOpened(),
                     "timestamp": time.time()
                 }
@@ -211,12 +222,9 @@ class FocusDataServer:
                 # Store latest data
                 self.latest_focus_data = focus_metrics
                 
-                # Broadcast to all connected clients
-                if self.clients:
-                    asyncio.run_coroutine_threadsafe(
-                        self._broadcast_to_clients(focus_metrics), 
-                        asyncio.get_event_loop()
-                    )
+                # Serialize here (off the loop), then hand off to the hub on the server's loop
+                if self.hub.has_clients():
+                    self.hub.publish_threadsafe(json.dumps(focus_metrics))
                 
                 # Control frame rate
                 time.sleep(1.0 / 30.0)  # Target 30 FPS
@@ -227,30 +235,14 @@ class FocusDataServer:
         
         self.streaming = False
     
-    async def _broadcast_to_clients(self, data: Dict[str, Any]):
-        """Broadcast data to all connected clients."""
-        if not self.clients:
-            return
-        
-        message = json.dumps(data)
-        disconnected_clients = set()
-        
-        for client in self.clients:
-            try:
-                await client.send(message)
-            except websockets.exceptions.ConnectionClosed:
-                disconnected_clients.add(client)
-            except Exception as e:
-                print(f"Error sending to client {client.remote_address}: {e}")
-                disconnected_clients.add(client)
-        
-        # Remove disconnected clients
-        self.clients -= disconnected_clients
-    
     async def start_server(self):
         """Start the WebSocket server."""
         print(f"Starting WebSocket server on {self.host}:{self.port}")
         
+        # The stream thread hands results to the hub through this loop
+        self.loop = asyncio.get_running_loop()
+        self.hub.attach_loop(self.loop)
+        
         async with websockets.serve(
             self.register_client, 
             self.host, 
@@ -267,6 +259,7 @@ class FocusDataServer:
             except KeyboardInterrupt:
                 print("\nShutting down server...")
                 await self.stop_streaming()
+                await self.hub.close()
     
     def cleanup(self):
         """Clean up resources."""
@@ -278,30 +271,6 @@ class FocusDataServer:
         if self.tracker:
             self.tracker.release()
 
-class FPSCounter:
-    """Simple FPS counter for performance monitoring."""
-    
-    def __init__(self, window_size: int = 30):
-        self.window_size = window_size
-        self.frame_times = []
-        self.last_time = time.time()
-    
-    def get_fps(self) -> float:
-        """Get current FPS."""
-        current_time = time.time()
-        frame_time = current_time - self.last_time
-        self.last_time = current_time
-        
-        self.frame_times.append(frame_time)
-        if len(self.frame_times) > self.window_size:
-            self.frame_times.pop(0)
-        
-        if self.frame_times:
-            avg_frame_time = sum(self.frame_times) / len(self.frame_times)
-            return 1.0 / avg_frame_time if avg_frame_time > 0 else 0.0
-        
-        return 0.0
-
 def main():
     """Main entry point for the WebSocket server."""
     import argparse
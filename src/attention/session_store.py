@@ -0,0 +1,367 @@
+"""
+SQLite (WAL) persistence for study session history.
+Frames are folded into 1 second, 1 minute and per-phase rollups by a writer
+thread in batched transactions. Raw per-frame metrics are not stored here -
+the session's binary metrics log (metrics_log.py) is the only per-frame
+store, so each frame is written to disk once.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from metrics_log import metrics_flags, FLAG_FOCUSED, FLAG_PHONE_NEAR_FACE, FLAG_AI_DETECTED_PHONE
+
+_PHONE_FLAGS = FLAG_PHONE_NEAR_FACE | FLAG_AI_DETECTED_PHONE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    session_type TEXT NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL,
+    rounds_completed INTEGER DEFAULT 0,
+    total_focus_time REAL DEFAULT 0,
+    total_break_time REAL DEFAULT 0,
+    phone_detections INTEGER DEFAULT 0,
+    focus_score_avg REAL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_start ON sessions (start_time);
+
+CREATE TABLE IF NOT EXISTS rollup_1s (
+    session_id TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    focus_sum REAL NOT NULL,
+    focus_min REAL NOT NULL,
+    focus_max REAL NOT NULL,
+    focused_frames INTEGER NOT NULL,
+    phone_frames INTEGER NOT NULL,
+    PRIMARY KEY (session_id, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_1m (
+    session_id TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    focus_sum REAL NOT NULL,
+    focus_min REAL NOT NULL,
+    focus_max REAL NOT NULL,
+    focused_frames INTEGER NOT NULL,
+    phone_frames INTEGER NOT NULL,
+    PRIMARY KEY (session_id, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_phase (
+    session_id TEXT NOT NULL,
+    phase_index INTEGER NOT NULL,
+    phase TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    frames INTEGER NOT NULL,
+    focus_sum REAL NOT NULL,
+    focus_min REAL NOT NULL,
+    focus_max REAL NOT NULL,
+    focused_frames INTEGER NOT NULL,
+    phone_frames INTEGER NOT NULL,
+    PRIMARY KEY (session_id, phase_index)
+) WITHOUT ROWID;
+"""
+
+_ROLLUP_UPSERT = """
+INSERT INTO {table} (session_id, bucket, frames, focus_sum, focus_min, focus_max, focused_frames, phone_frames)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (session_id, bucket) DO UPDATE SET
+    frames = frames + excluded.frames,
+    focus_sum = focus_sum + excluded.focus_sum,
+    focus_min = MIN(focus_min, excluded.focus_min),
+    focus_max = MAX(focus_max, excluded.focus_max),
+    focused_frames = focused_frames + excluded.focused_frames,
+    phone_frames = phone_frames + excluded.phone_frames
+"""
+
+_PHASE_UPSERT = """
+INSERT INTO rollup_phase (session_id, phase_index, phase, start_ts, end_ts, frames, focus_sum,
+                          focus_min, focus_max, focused_frames, phone_frames)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (session_id, phase_index) DO UPDATE SET
+    start_ts = MIN(start_ts, excluded.start_ts),
+    end_ts = MAX(end_ts, excluded.end_ts),
+    frames = frames + excluded.frames,
+    focus_sum = focus_sum + excluded.focus_sum,
+    focus_min = MIN(focus_min, excluded.focus_min),
+    focus_max = MAX(focus_max, excluded.focus_max),
+    focused_frames = focused_frames + excluded.focused_frames,
+    phone_frames = phone_frames + excluded.phone_frames
+"""
+
+_ROLLUP_TABLES = {'1s': ('rollup_1s', 1), '1m': ('rollup_1m', 60)}
+
+
+def _accumulate(buckets: Dict[Any, List[Any]], key, focus: float, flags: int):
+    """Fold one frame into an in-memory partial aggregate"""
+    agg = buckets.get(key)
+    focused = 1 if flags & FLAG_FOCUSED else 0
+    phone = 1 if flags & _PHONE_FLAGS else 0
+    if agg is None:
+        buckets[key] = [1, focus, focus, focus, focused, phone]
+    else:
+        agg[0] += 1
+        agg[1] += focus
+        if focus < agg[2]:
+            agg[2] = focus
+        if focus > agg[3]:
+            agg[3] = focus
+        agg[4] += focused
+        agg[5] += phone
+
+
+def _rollup_row(row: sqlite3.Row) -> Dict[str, Any]:
+    frames = row['frames']
+    return {
+        'frames': frames,
+        'focus_avg': row['focus_sum'] / frames if frames else 0.0,
+        'focus_min': row['focus_min'],
+        'focus_max': row['focus_max'],
+        'focused_ratio': row['focused_frames'] / frames if frames else 0.0,
+        'phone_frames': row['phone_frames']
+    }
+
+
+class SessionStore:
+    """
+    Session history database.
+    All writes go through one writer thread; reads use short-lived connections
+    and run concurrently with writes thanks to WAL mode.
+    """
+
+    def __init__(self, db_path: str = "study_sessions.db", batch_size: int = 500,
+                 flush_interval: float = 1.0):
+        """
+        Args:
+            db_path: SQLite database file
+            batch_size: Maximum writes committed per transaction
+            flush_interval: Maximum seconds a frame waits before being committed
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.frames_written = 0
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.close()
+
+        self._queue: "queue.Queue[Optional[Tuple[str, Tuple[Any, ...]]]]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10.0, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---- Writes (queued, applied by the writer thread) ----
+
+    def start_session(self, session_id: str, session_type: str, start_time: float):
+        """Record a new session"""
+        self._put('start', (session_id, session_type, start_time))
+
+    def record_frame(self, session_id: str, ts: float, phase_index: int, phase: str, metrics):
+        """Queue one frame of process_frame metrics for the rollups"""
+        self._put('frame', (
+            session_id, ts, phase_index, phase,
+            float(metrics.get('focus_score', 0.0)),
+            metrics_flags(metrics)
+        ))
+
+    def end_session(self, session_id: str, end_time: float, session_data: Dict[str, Any]):
+        """Record final session totals"""
+        self._put('end', (
+            end_time,
+            session_data.get('rounds_completed', 0),
+            session_data.get('total_focus_time', 0),
+            session_data.get('total_break_time', 0),
+            session_data.get('phone_detections', 0),
+            session_data.get('focus_score_avg', 0.0),
+            session_id
+        ))
+
+    def _put(self, kind: str, params: Tuple[Any, ...]):
+        if not self._closed:
+            self._queue.put((kind, params))
+
+    def _run(self):
+        """Writer loop - one transaction per batch"""
+        conn = self._connect()
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            try:
+                with conn:
+                    self._apply(conn, batch)
+            except Exception as e:
+                print(f"Error writing session history: {e}")
+
+            for kind, params in batch:
+                if kind == 'flush':
+                    params[0].set()
+        conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, batch: List[Tuple[str, Tuple[Any, ...]]]):
+        """Apply a batch of writes, folding its frames into the rollups"""
+        frames = 0
+        per_second: Dict[Any, List[Any]] = {}
+        per_minute: Dict[Any, List[Any]] = {}
+        per_phase: Dict[Any, List[Any]] = {}
+        phase_info: Dict[Any, List[Any]] = {}
+
+        def flush_frames():
+            nonlocal frames
+            if not frames:
+                return
+            conn.executemany(_ROLLUP_UPSERT.format(table='rollup_1s'),
+                             [key + tuple(agg) for key, agg in per_second.items()])
+            conn.executemany(_ROLLUP_UPSERT.format(table='rollup_1m'),
+                             [key + tuple(agg) for key, agg in per_minute.items()])
+            conn.executemany(_PHASE_UPSERT, [
+                key + tuple(phase_info[key]) + tuple(agg) for key, agg in per_phase.items()
+            ])
+            self.frames_written += frames
+            frames = 0
+            per_second.clear()
+            per_minute.clear()
+            per_phase.clear()
+            phase_info.clear()
+
+        for kind, params in batch:
+            if kind == 'frame':
+                session_id, ts, phase_index, phase, focus, flags = params
+                frames += 1
+                _accumulate(per_second, (session_id, int(ts)), focus, flags)
+                _accumulate(per_minute, (session_id, int(ts) // 60 * 60), focus, flags)
+                _accumulate(per_phase, (session_id, phase_index), focus, flags)
+                info = phase_info.get((session_id, phase_index))
+                if info is None:
+                    phase_info[(session_id, phase_index)] = [phase, ts, ts]
+                else:
+                    info[1] = min(info[1], ts)
+                    info[2] = max(info[2], ts)
+            else:
+                # Keep session rows ordered with respect to their frames
+                flush_frames()
+                if kind == 'start':
+                    conn.execute("INSERT OR REPLACE INTO sessions (session_id, session_type, start_time) "
+                                 "VALUES (?, ?, ?)", params)
+                elif kind == 'end':
+                    conn.execute("UPDATE sessions SET end_time = ?, rounds_completed = ?, total_focus_time = ?, "
+                                 "total_break_time = ?, phone_detections = ?, focus_score_avg = ? "
+                                 "WHERE session_id = ?", params)
+        flush_frames()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far has been committed"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._put('flush', (done,))
+        return done.wait(timeout)
+
+    def close(self):
+        """Commit queued writes and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    # ---- Reads (served from rollups) ----
+
+    def list_sessions(self, limit: int = 50, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Most recent sessions, newest first"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM sessions WHERE start_time >= ? ORDER BY start_time DESC LIMIT ?",
+                (since or 0.0, limit)).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """One session with its per-phase rollups"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            session = dict(row)
+            session['phases'] = [
+                dict(_rollup_row(phase), phase_index=phase['phase_index'], phase=phase['phase'],
+                     start_ts=phase['start_ts'], end_ts=phase['end_ts'])
+                for phase in conn.execute("SELECT * FROM rollup_phase WHERE session_id = ? ORDER BY phase_index",
+                                          (session_id,))
+            ]
+            return session
+        finally:
+            conn.close()
+
+    def session_rollup(self, session_id: str, resolution: str = '1m',
+                       start_ts: Optional[float] = None,
+                       end_ts: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Time-bucketed focus aggregates ('1s' or '1m')"""
+        if resolution not in _ROLLUP_TABLES:
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+        table, _ = _ROLLUP_TABLES[resolution]
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT * FROM {table} WHERE session_id = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+                (session_id, int(start_ts) if start_ts is not None else 0,
+                 int(end_ts) + 1 if end_ts is not None else 2 ** 62)).fetchall()
+            return [dict(_rollup_row(row), ts=row['bucket']) for row in rows]
+        finally:
+            conn.close()
+
+    def history(self, days: int = 7) -> Dict[str, Any]:
+        """Per-day totals for the dashboard"""
+        since = time.time() - days * 86400
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT date(start_time, 'unixepoch', 'localtime') AS day, "
+                "COUNT(*) AS sessions, SUM(total_focus_time) AS focus_time, "
+                "SUM(total_break_time) AS break_time, SUM(phone_detections) AS phone_detections, "
+                "AVG(focus_score_avg) AS focus_score_avg "
+                "FROM sessions WHERE start_time >= ? GROUP BY day ORDER BY day", (since,)).fetchall()
+            by_type = conn.execute(
+                "SELECT session_type, COUNT(*) AS sessions, SUM(total_focus_time) AS focus_time "
+                "FROM sessions WHERE start_time >= ? GROUP BY session_type", (since,)).fetchall()
+            return {
+                'days': [dict(row) for row in rows],
+                'by_type': [dict(row) for row in by_type]
+            }
+        finally:
+            conn.close()
@@ -0,0 +1,273 @@
+"""
+Shared-memory frame transport between a capture process and a tracker process.
+
+Frames are written into fixed slots of one multiprocessing.shared_memory block.
+Each slot carries a sequence number and a state (free / writing / ready /
+reading); a cross-process condition guards the slot table, never the pixel
+copy. The consumer always takes the newest ready frame as a NumPy view into
+shared memory - no pickling and no copy - and hands the slot back when it
+reads the next frame. SharedFrameSource exposes the ring through the usual
+FrameSource interface, so a tracker reads it with `tracker.cap.read()`.
+"""
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from frame_source import FrameSource
+
+SLOT_FREE = 0
+SLOT_WRITING = 1
+SLOT_READY = 2
+SLOT_READING = 3
+
+# Header fields (int64): last written sequence, closed flag, frames written, frames dropped
+_HEADER_FIELDS = 4
+_ALIGN = 64
+
+
+def _aligned(size: int) -> int:
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class SharedFrameRing:
+    """
+    Ring of frame slots in shared memory for one producer and one consumer.
+
+    The producer overwrites the oldest unread frame when the consumer falls
+    behind (live video wants the newest frame, not a backlog). The creating
+    process owns the block and must call unlink(); other processes receive the
+    ring by pickling it (e.g. as a Process argument) and attach by name.
+
+    Args:
+        shape: Frame shape, e.g. (720, 1280, 3)
+        slots: Number of frame slots (at least 3: one being written, one being
+            read and one ready)
+        dtype: Pixel type
+    """
+
+    def __init__(self, shape: Tuple[int, ...], slots: int = 4, dtype=np.uint8):
+        if slots < 3:
+            raise ValueError("A frame ring needs at least 3 slots")
+        self.shape = tuple(int(n) for n in shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        self._cond = multiprocessing.get_context('spawn').Condition()
+        self._owner = True
+        self._shm = shared_memory.SharedMemory(create=True, size=self._block_size())
+        self._map()
+        self._header[:] = 0
+        self._meta[:] = 0
+        self._times[:] = 0.0
+
+    def _block_size(self) -> int:
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        return (_aligned(_HEADER_FIELDS * 8) + _aligned(self.slots * 2 * 8) +
+                _aligned(self.slots * 8) + self.slots * _aligned(frame_bytes))
+
+    def _map(self):
+        buf = self._shm.buf
+        offset = 0
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += _aligned(_HEADER_FIELDS * 8)
+        # Per slot: sequence number and state
+        self._meta = np.ndarray((self.slots, 2), dtype=np.int64, buffer=buf, offset=offset)
+        offset += _aligned(self.slots * 2 * 8)
+        self._times = np.ndarray((self.slots,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += _aligned(self.slots * 8)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._frames = [
+            np.ndarray(self.shape, dtype=self.dtype, buffer=buf, offset=offset + i * _aligned(frame_bytes))
+            for i in range(self.slots)
+        ]
+
+    # ---- Pickling (attach by name in other processes) ----
+
+    def __getstate__(self):
+        return {'name': self._shm.name, 'shape': self.shape, 'slots': self.slots,
+                'dtype': self.dtype.str, 'cond': self._cond}
+
+    def __setstate__(self, state):
+        self.shape = state['shape']
+        self.slots = state['slots']
+        self.dtype = np.dtype(state['dtype'])
+        self._cond = state['cond']
+        self._owner = False
+        self._shm = shared_memory.SharedMemory(name=state['name'])
+        self._map()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._header[1])
+
+    # ---- Producer ----
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """Copy a frame into a free slot and publish it; returns its sequence number"""
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} doesn't match the ring's {self.shape}")
+
+        with self._cond:
+            slot = self._claim_slot()
+            self._meta[slot, 1] = SLOT_WRITING
+
+        # The pixel copy runs outside the lock; the consumer never touches a writing slot
+        np.copyto(self._frames[slot], frame)
+
+        with self._cond:
+            seq = int(self._header[0]) + 1
+            self._meta[slot] = (seq, SLOT_READY)
+            self._times[slot] = time.time() if timestamp is None else timestamp
+            self._header[0] = seq
+            self._header[2] += 1
+            self._cond.notify_all()
+        return seq
+
+    def _claim_slot(self) -> int:
+        """Oldest free slot, else the oldest unread frame (which is dropped)"""
+        states = self._meta[:, 1]
+        free = [i for i in range(self.slots) if states[i] == SLOT_FREE]
+        if free:
+            return min(free, key=lambda i: self._meta[i, 0])
+        ready = [i for i in range(self.slots) if states[i] == SLOT_READY]
+        if not ready:
+            raise RuntimeError("No frame slot available (more than one reader or writer?)")
+        self._header[3] += 1
+        return min(ready, key=lambda i: self._meta[i, 0])
+
+    def close(self):
+        """Signal end of stream; a waiting consumer returns no frame"""
+        with self._cond:
+            self._header[1] = 1
+            self._cond.notify_all()
+
+    # ---- Consumer ----
+
+    def acquire(self, timeout: Optional[float] = None, after: int = 0) -> Tuple[int, Optional[np.ndarray], float]:
+        """
+        Wait for the newest ready frame newer than `after` and lock its slot.
+        Returns (sequence, view, capture time); (0, None, 0.0) on timeout or close.
+        The view stays valid until release(sequence).
+        """
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: self._header[1] or self._newest_ready(after) is not None, timeout)
+            slot = self._newest_ready(after) if ready else None
+            if slot is None:
+                return 0, None, 0.0
+
+            # Older unread frames are stale once a newer one is taken
+            for i in range(self.slots):
+                if i != slot and self._meta[i, 1] == SLOT_READY and self._meta[i, 0] < self._meta[slot, 0]:
+                    self._meta[i, 1] = SLOT_FREE
+                    self._header[3] += 1
+            self._meta[slot, 1] = SLOT_READING
+            return int(self._meta[slot, 0]), self._frames[slot], float(self._times[slot])
+
+    def _newest_ready(self, after: int) -> Optional[int]:
+        newest = None
+        for i in range(self.slots):
+            if self._meta[i, 1] == SLOT_READY and self._meta[i, 0] > after and (
+                    newest is None or self._meta[i, 0] > self._meta[newest, 0]):
+                newest = i
+        return newest
+
+    def release(self, seq: int):
+        """Hand a frame's slot back to the producer"""
+        with self._cond:
+            for i in range(self.slots):
+                if self._meta[i, 0] == seq and self._meta[i, 1] == SLOT_READING:
+                    self._meta[i, 1] = SLOT_FREE
+                    break
+
+    def reset_readers(self):
+        """Free slots held by a consumer that died without releasing them"""
+        with self._cond:
+            for i in range(self.slots):
+                if self._meta[i, 1] == SLOT_READING:
+                    self._meta[i, 1] = SLOT_FREE
+
+    # ---- Lifetime ----
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'shape': list(self.shape),
+            'slots': self.slots,
+            'sequence': int(self._header[0]),
+            'written': int(self._header[2]),
+            'dropped': int(self._header[3]),
+            'closed': self.closed
+        }
+
+    def detach(self):
+        """Unmap the block in this process (views handed out become invalid)"""
+        if self._shm is None:
+            return
+        self._header = self._meta = self._times = None
+        self._frames = []
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+
+class SharedFrameSource(FrameSource):
+    """
+    Consumer end of a SharedFrameRing with the FrameSource interface.
+
+    read() returns a view into shared memory that stays valid until the next
+    read() or release(); copy it (cv2.flip already does) to keep it longer.
+    Pipeline background stages get their own copy of the frame.
+
+    Args:
+        ring: The frame ring (usually received pickled from the capture process)
+        timeout: Seconds read() waits for a new frame before failing
+    """
+
+    def __init__(self, ring: SharedFrameRing, timeout: float = 1.0):
+        super().__init__(realtime=False)
+        self.ring = ring
+        self.timeout = timeout
+        self.capture_time = 0.0
+        self._held = 0
+        self._last = 0
+
+    def _read_frame(self):
+        if self._held:
+            self.ring.release(self._held)
+            self._held = 0
+        seq, frame, capture_time = self.ring.acquire(self.timeout, after=self._last)
+        if frame is None:
+            return False, None
+        self._held = self._last = seq
+        self.capture_time = capture_time
+        return True, frame
+
+    def isOpened(self) -> bool:
+        return self.ring._shm is not None and not self.ring.closed
+
+    def release(self):
+        if self.ring._shm is None:
+            return
+        if self._held:
+            self.ring.release(self._held)
+            self._held = 0
+        self.ring.detach()
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.ring.shape[1])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.ring.shape[0])
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return -1.0
+        return super().get(prop)
@@ -11,21 +11,7 @@ from typing import Dict, Any
 from tracker import FocusTracker
 from focus_logic import FocusEvaluator
 from visualizer import FocusVisualizer
-# FPSCounter will be defined inline
-
-class FPSCounter:
-    """Simple FPS counter"""
-    def __init__(self):
-        self.frame_count = 0
-        self.start_time = time.time()
-    
-    def get_fps(self):
-        self.frame_count += 1
-        elapsed = time.time() - self.start_time
-        if elapsed > 0:
-            return self.frame_count / elapsed
-        return 0.0
-
+from frame_timing import FPSCounter
 
 class SimpleEnhancedAttentionTracker:
     """
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Memory soak test for long study sessions.
+
+Replays a source (looped) through a tracker for the number of frames a
+session of the given length would produce at the given frame rate, samples
+RSS (and optionally tracemalloc by subsystem) along the way, and fails when
+memory grows more than the budget after warmup.
+
+Usage:
+    python soak_test.py synthetic --tracker precise --session-minutes 120 --budget-mb 64
+    python soak_test.py clips/desk.mp4 --session-minutes 30 --tracemalloc -o soak.json
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import sys
+import time
+from typing import Dict, Any
+
+from benchmark import TRACKERS
+from frame_source import open_source
+from memory_telemetry import MemoryTelemetry
+
+
+def soak(tracker_name: str, source_spec: str, session_minutes: float, fps: float,
+         frame_width: int, frame_height: int, warmup_frames: int, sample_every: int,
+         trace_allocations: bool = False, ai_helper: bool = False) -> Dict[str, Any]:
+    """Replay one simulated session and return the memory report"""
+    module_name, class_name = TRACKERS[tracker_name]
+    tracker_class = getattr(importlib.import_module(module_name), class_name)
+
+    source = open_source(source_spec, frame_width, frame_height, realtime=False, loop=True)
+    tracker = tracker_class(frame_width=frame_width, frame_height=frame_height, source=source)
+    if not ai_helper and hasattr(tracker, 'ai_helper'):
+        tracker.ai_helper = None
+
+    telemetry = MemoryTelemetry(history=100000)
+    if getattr(tracker, 'ai_helper', None) is not None and hasattr(tracker.ai_helper, 'cache'):
+        telemetry.register_probe('ai_helper_cache', lambda: len(tracker.ai_helper.cache))
+
+    total_frames = int(session_minutes * 60 * fps)
+    timeline = []
+    frames = 0
+    start = time.perf_counter()
+    print(f"🧪 Soaking {tracker_name} on {source} for {total_frames} frames "
+          f"({session_minutes:.0f} min at {fps:.0f} fps)")
+
+    try:
+        while frames < total_frames:
+            ret, frame = source.read()
+            if not ret:
+                print("❌ Source stopped producing frames")
+                break
+            tracker.process_frame(frame)
+            frames += 1
+
+            if frames == warmup_frames:
+                gc.collect()
+                if trace_allocations:
+                    telemetry.set_tracing(True)
+                telemetry.reset_baseline()
+
+            if frames >= warmup_frames and (frames - warmup_frames) % sample_every == 0:
+                session_seconds = frames / fps
+                rss = telemetry.sample(now=session_seconds)
+                timeline.append({'session_seconds': session_seconds, 'rss_mb': rss})
+                print(f"  {session_seconds / 60:6.1f} min  RSS {rss:7.1f} MB  "
+                      f"({frames / (time.perf_counter() - start):.0f} fps)")
+    finally:
+        source.release()
+
+    gc.collect()
+    telemetry.sample(now=frames / fps)
+    report = telemetry.status(detailed=trace_allocations)
+    telemetry.set_tracing(False)
+    report.update({
+        'tracker': tracker_name,
+        'source': source_spec,
+        'frames': frames,
+        'session_minutes': frames / fps / 60,
+        'wall_seconds': time.perf_counter() - start,
+        'timeline': timeline
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory soak test for long sessions')
+    parser.add_argument('source', help='Video file, image directory, camera index or synthetic')
+    parser.add_argument('--tracker', choices=sorted(TRACKERS), default='precise')
+    parser.add_argument('--session-minutes', type=float, default=120.0)
+    parser.add_argument('--fps', type=float, default=30.0, help='Frame rate of the simulated session')
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--warmup-frames', type=int, default=900,
+                        help='Frames before the memory baseline is taken')
+    parser.add_argument('--sample-every', type=int, default=1800, help='Frames between RSS samples')
+    parser.add_argument('--budget-mb', type=float, default=64.0,
+                        help='Maximum RSS growth after warmup')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Attribute growth to subsystems (slows the replay down)')
+    parser.add_argument('--ai-helper', action='store_true', help='Keep the VLM helper enabled')
+    parser.add_argument('-o', '--output', help='Save the report as JSON')
+    args = parser.parse_args()
+
+    report = soak(args.tracker, args.source, args.session_minutes, args.fps, args.width,
+                  args.height, args.warmup_frames, max(1, args.sample_every),
+                  trace_allocations=args.tracemalloc, ai_helper=args.ai_helper)
+    report['budget_mb'] = args.budget_mb
+    report['passed'] = report['growth_mb'] <= args.budget_mb
+
+    print(f"\n📈 RSS {report['baseline_rss_mb']:.1f} -> {report['rss_mb']:.1f} MB "
+          f"(growth {report['growth_mb']:+.1f} MB, budget {args.budget_mb:.0f} MB)")
+    if report['growth_mb_per_hour'] is not None:
+        print(f"   Trend: {report['growth_mb_per_hour']:+.1f} MB per session hour")
+    for name, value in report['probes'].items():
+        print(f"   {name}: {value}")
+    for name, stats in list(report.get('subsystems', {}).items())[:10]:
+        print(f"   {name:30s} {stats['size_mb']:8.2f} MB  ({stats['growth_mb']:+.2f} MB)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved report to {args.output}")
+
+    if report['passed']:
+        print("✅ Memory growth within budget")
+        sys.exit(0)
+    print("❌ Memory growth exceeded budget")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
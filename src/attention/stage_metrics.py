@@ -0,0 +1,233 @@
+"""
+Lightweight per-stage timers for process_frame.
+Stage durations feed log-linear (HDR-style) histograms: a cumulative one for
+Prometheus histogram buckets and a rolling window for recent quantiles.
+Timing can be switched on and off at runtime; when off, each stage boundary
+costs a single no-op method call.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Log-linear buckets over microseconds: values below 2**SUB_BITS get exact buckets,
+# above that every power of two is split into 2**SUB_BITS sub-buckets (~6% precision).
+SUB_BITS = 4
+SUB_BUCKETS = 1 << SUB_BITS
+MAX_MICROS = 60 * 1000 * 1000
+NUM_BUCKETS = SUB_BUCKETS + (MAX_MICROS.bit_length() - SUB_BITS) * SUB_BUCKETS
+
+# Prometheus `le` buckets (seconds)
+EXPORT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _bucket_index(micros: int) -> int:
+    if micros < SUB_BUCKETS:
+        return max(micros, 0)
+    if micros > MAX_MICROS:
+        micros = MAX_MICROS
+    shift = micros.bit_length() - SUB_BITS - 1
+    return SUB_BUCKETS + shift * SUB_BUCKETS + ((micros >> shift) - SUB_BUCKETS)
+
+
+def _bucket_upper(index: int) -> int:
+    """Exclusive upper bound of a bucket in microseconds"""
+    if index < SUB_BUCKETS:
+        return index + 1
+    shift, sub = divmod(index - SUB_BUCKETS, SUB_BUCKETS)
+    return (SUB_BUCKETS + sub + 1) << shift
+
+
+class RollingHistogram:
+    """
+    Log-linear latency histogram with a cumulative total and a rolling window.
+    record() is O(1). Every tracker thread and pipeline executor thread in the
+    process records into the same histograms, so updates and reads hold a
+    per-histogram lock.
+    """
+
+    def __init__(self, window_seconds: float = 60.0, slices: int = 6):
+        self.slice_seconds = window_seconds / slices
+        self.slices = slices
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.sum = 0.0
+        self._slice_counts = [[0] * NUM_BUCKETS for _ in range(slices)]
+        self._slice_ids = [-1] * slices
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, now: float):
+        index = _bucket_index(int(seconds * 1000000))
+        slice_id = int(now / self.slice_seconds)
+        slot = slice_id % self.slices
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+            if self._slice_ids[slot] != slice_id:
+                # Slot is being reused for a new time slice
+                self._slice_counts[slot] = [0] * NUM_BUCKETS
+                self._slice_ids[slot] = slice_id
+            self._slice_counts[slot][index] += 1
+
+    def window_counts(self, now: float) -> List[int]:
+        """Bucket counts over the rolling window"""
+        current = int(now / self.slice_seconds)
+        merged = [0] * NUM_BUCKETS
+        with self._lock:
+            for slot in range(self.slices):
+                if current - self._slice_ids[slot] < self.slices:
+                    for i, value in enumerate(self._slice_counts[slot]):
+                        if value:
+                            merged[i] += value
+        return merged
+
+    def quantiles(self, now: float, quantiles=QUANTILES) -> Dict[float, Optional[float]]:
+        """Rolling-window quantile estimates in seconds (bucket midpoints)"""
+        counts = self.window_counts(now)
+        total = sum(counts)
+        result: Dict[float, Optional[float]] = {}
+        for q in quantiles:
+            if not total:
+                result[q] = None
+                continue
+            rank = q * total
+            seen = 0
+            for i, value in enumerate(counts):
+                seen += value
+                if value and seen >= rank:
+                    lower = _bucket_upper(i - 1) if i else 0
+                    result[q] = (lower + _bucket_upper(i)) / 2000000.0
+                    break
+        return result
+
+    def cumulative_buckets(self) -> List[int]:
+        """Cumulative counts for EXPORT_BUCKETS (each bucket assigned by its upper bound)"""
+        return self.export()[0]
+
+    def export(self) -> Tuple[List[int], int, float]:
+        """Cumulative EXPORT_BUCKETS counts, total count and sum, read together"""
+        with self._lock:
+            counts = list(self.counts)
+            count, total = self.count, self.sum
+        result = []
+        running = 0
+        i = 0
+        for edge in EXPORT_BUCKETS:
+            edge_micros = edge * 1000000
+            while i < NUM_BUCKETS and _bucket_upper(i) <= edge_micros:
+                running += counts[i]
+                i += 1
+            result.append(running)
+        return result, count, total
+
+
+class _FrameTiming:
+    """Lap timer for one process_frame call"""
+
+    __slots__ = ('_timers', '_start', '_last')
+
+    def __init__(self, timers: "StageTimers"):
+        self._timers = timers
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        """Attribute the time since the previous lap to `stage`"""
+        now = time.perf_counter()
+        self._timers.record(stage, now - self._last)
+        self._last = now
+
+    def end(self):
+        """Record the whole frame"""
+        self._timers.record('process_frame', time.perf_counter() - self._start)
+
+
+class _NullFrameTiming:
+    __slots__ = ()
+
+    def lap(self, stage: str):
+        pass
+
+    def end(self):
+        pass
+
+
+_NULL_FRAME = _NullFrameTiming()
+
+
+class StageTimers:
+    """Registry of per-stage histograms shared by every tracker in the process"""
+
+    def __init__(self, enabled: bool = True, window_seconds: float = 60.0):
+        self.enabled = enabled
+        self.window_seconds = window_seconds
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self._lock = threading.Lock()
+
+    def begin(self):
+        """Start timing a frame (returns a no-op timer when disabled)"""
+        if not self.enabled:
+            return _NULL_FRAME
+        return _FrameTiming(self)
+
+    def record(self, stage: str, seconds: float):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, RollingHistogram(self.window_seconds))
+        histogram.record(seconds, time.monotonic())
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Rolling quantiles (ms) per stage for JSON status endpoints"""
+        now = time.monotonic()
+        result = {}
+        for stage, histogram in list(self.histograms.items()):
+            quantiles = histogram.quantiles(now)
+            result[stage] = {
+                f'p{int(q * 100)}_ms': (value * 1000.0 if value is not None else None)
+                for q, value in quantiles.items()
+            }
+            result[stage]['count'] = histogram.count
+        return result
+
+    def prometheus_text(self, prefix: str = 'attention') -> str:
+        """Prometheus text exposition (format 0.0.4)"""
+        now = time.monotonic()
+        name = f'{prefix}_stage_duration_seconds'
+        lines = [
+            f'# HELP {prefix}_stage_timing_enabled Whether per-stage timing is enabled',
+            f'# TYPE {prefix}_stage_timing_enabled gauge',
+            f'{prefix}_stage_timing_enabled {1 if self.enabled else 0}',
+            f'# HELP {name} Time spent in each process_frame stage',
+            f'# TYPE {name} histogram',
+        ]
+        histograms = sorted(self.histograms.items())
+        for stage, histogram in histograms:
+            buckets, total_count, total_sum = histogram.export()
+            for edge, count in zip(EXPORT_BUCKETS, buckets):
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{edge}"}} {count}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {total_count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total_sum:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {total_count}')
+
+        window = f'{prefix}_stage_duration_window_seconds'
+        lines.append(f'# HELP {window} Stage duration quantiles over the last {self.window_seconds:.0f}s')
+        lines.append(f'# TYPE {window} gauge')
+        for stage, histogram in histograms:
+            for q, value in histogram.quantiles(now).items():
+                if value is not None:
+                    lines.append(f'{window}{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide timers used by the trackers
+stage_timers = StageTimers()
@@ -0,0 +1,725 @@
+"""
+Multi-stream tracking for one server process.
+Each stream (camera, video file, ...) has its own tracker, capture thread and
+result slot (frame sequence, snapshot, wire encoder). A shared scheduler caps
+how many frames are processed at once and, when streams compete, hands the
+next slot to the stream that has used the least processing time.
+
+In worker-process mode each stream's tracker runs in its own process instead,
+so the Python parts of process_frame don't contend for one GIL. Frames reach
+the worker through a shared-memory ring, results come back over a pipe and
+crashed workers are restarted without reopening the camera.
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, Optional, Union
+
+import cv2
+
+from attention_metrics import FrameSnapshot
+from frame_source import FrameSource, open_source
+from frame_sync import FrameSequence
+from preview_stream import PreviewBroadcaster
+from shared_frames import SharedFrameRing, SharedFrameSource
+from wire_format import AttentionWireEncoder
+
+# Consecutive failed reads (0.1 s apart) before a stream is stopped
+MAX_FAILED_READS = 50
+
+# Worker processes: seconds allowed for a worker to open its source and load its
+# models, crashes in a row before a stream is given up, and the restart backoff cap
+WORKER_START_TIMEOUT = 120.0
+MAX_WORKER_RESTARTS = 5
+MAX_RESTART_DELAY = 30.0
+# Frames between frame-timing reports from a worker
+WORKER_TIMING_EVERY = 30
+# Shared-memory frame slots between the capture thread and a worker
+FRAME_RING_SLOTS = 4
+
+INITIAL_DATA = {
+    'attention_score': 0.85,
+    'eye_ar': 0.25,
+    'mouth_ar': 0.12,
+    'head_tilt': 5.2,
+    'phone_detected': False,
+    'fps': 30,
+    'timestamp': 0.0,
+    'focus_status': 'focused',
+    'session_active': False
+}
+
+
+class FairScheduler:
+    """
+    Divides the processing budget between streams.
+
+    At most `slots` frames are processed at once. Waiting streams are served
+    in order of weighted processing time used (start-time fair queuing), so a
+    slow or busy stream can't starve the others.
+
+    Args:
+        slots: Concurrent process_frame calls (default: CPU cores - 1, at least 1)
+    """
+
+    def __init__(self, slots: Optional[int] = None):
+        self.slots = max(1, slots if slots is not None else (os.cpu_count() or 2) - 1)
+        self._cond = threading.Condition()
+        self._busy = 0
+        self._virtual: Dict[str, float] = {}
+        self._weights: Dict[str, float] = {}
+        self._used: Dict[str, float] = {}
+        self._waits: Dict[str, float] = {}
+        self._waiting: Dict[str, float] = {}
+
+    def register(self, stream_id: str, weight: float = 1.0):
+        with self._cond:
+            # New streams start level with the least-served stream instead of with zero,
+            # so they can't claim a burst of slots for time they were not running
+            self._virtual[stream_id] = min(self._virtual.values(), default=0.0)
+            self._weights[stream_id] = max(weight, 0.01)
+            self._used.setdefault(stream_id, 0.0)
+            self._waits.setdefault(stream_id, 0.0)
+
+    def unregister(self, stream_id: str):
+        with self._cond:
+            for table in (self._virtual, self._weights, self._used, self._waits, self._waiting):
+                table.pop(stream_id, None)
+            self._cond.notify_all()
+
+    def _next(self) -> Optional[str]:
+        if not self._waiting:
+            return None
+        return min(self._waiting, key=lambda stream_id: (self._waiting[stream_id], stream_id))
+
+    def acquire(self, stream_id: str, timeout: Optional[float] = None) -> bool:
+        """Wait for a processing slot; False on timeout"""
+        start = time.perf_counter()
+        with self._cond:
+            self._waiting[stream_id] = self._virtual.get(stream_id, 0.0)
+            granted = self._cond.wait_for(
+                lambda: self._busy < self.slots and self._next() == stream_id, timeout)
+            self._waiting.pop(stream_id, None)
+            if granted:
+                self._busy += 1
+                self._waits[stream_id] = self._waits.get(stream_id, 0.0) + time.perf_counter() - start
+            # The next waiter in line may now be able to take a free slot
+            self._cond.notify_all()
+            return granted
+
+    def release(self, stream_id: str, seconds: float):
+        """Return the slot and charge the processing time to the stream"""
+        with self._cond:
+            self._busy -= 1
+            if stream_id in self._virtual:
+                self._virtual[stream_id] += seconds / self._weights[stream_id]
+                self._used[stream_id] += seconds
+            self._cond.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            total = sum(self._used.values())
+            return {
+                'slots': self.slots,
+                'busy': self._busy,
+                'waiting': len(self._waiting),
+                'streams': {
+                    stream_id: {
+                        'weight': self._weights[stream_id],
+                        'processing_seconds': self._used[stream_id],
+                        'wait_seconds': self._waits[stream_id],
+                        'share': self._used[stream_id] / total if total > 0 else 0.0
+                    }
+                    for stream_id in self._weights
+                }
+            }
+
+
+class TrackerStream:
+    """
+    One tracked video stream and its latest result.
+
+    Args:
+        stream_id: Key used in the API
+        scheduler: Shared processing scheduler
+        tracker_factory: Builds a tracker from (source, frame_width, frame_height)
+        profiler: Optional LoopProfiler attached to this stream's loop
+    """
+
+    # Annotated preview frames are rendered in this process (not in worker mode)
+    supports_preview = True
+
+    def __init__(self, stream_id: str, scheduler: FairScheduler,
+                 tracker_factory: Callable[[FrameSource, int, int], Any], profiler=None):
+        self.stream_id = stream_id
+        self.scheduler = scheduler
+        self.tracker_factory = tracker_factory
+        self.profiler = profiler
+
+        self.tracker = None
+        self.source_spec: Optional[str] = None
+        self.frame_width = 640
+        self.frame_height = 480
+        self.target_fps = 30.0
+        self.mirror = True
+        self.active = False
+        self.error: Optional[str] = None
+        self.frames = 0
+        self._thread: Optional[threading.Thread] = None
+
+        # Result slot: replaced (never mutated) once per frame
+        self.sequence = FrameSequence()
+        self.wire_encoder = AttentionWireEncoder(keyframe_interval=30)
+        self.snapshot = FrameSnapshot(0, dict(INITIAL_DATA, timestamp=time.time()))
+
+        # Rendered only while someone is watching the preview
+        self.preview = PreviewBroadcaster()
+
+    def start(self, source: Union[str, FrameSource] = '0', frame_width: int = 640, frame_height: int = 480,
+              target_fps: float = 30.0, weight: float = 1.0, mirror: bool = True):
+        """Open the source, build the tracker and start the capture thread"""
+        if self.active:
+            raise ValueError(f"Stream {self.stream_id} is already running")
+
+        frame_source = open_source(source, frame_width, frame_height, realtime=True)
+        if not frame_source.isOpened():
+            raise IOError(f"Cannot open frame source: {source}")
+        self.tracker = self.tracker_factory(frame_source, frame_width, frame_height)
+        self.source_spec = str(source)
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.target_fps = max(target_fps, 1.0)
+        self.mirror = mirror
+        self.error = None
+        self.scheduler.register(self.stream_id, weight)
+
+        self.active = True
+        self._thread = threading.Thread(target=self._run, name=f"stream-{self.stream_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the capture thread and release the source"""
+        self.active = False
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        self.scheduler.unregister(self.stream_id)
+        tracker, self.tracker = self.tracker, None
+        if tracker is not None:
+            try:
+                tracker.cap.release()
+                pipeline = getattr(tracker, 'pipeline', None)
+                if pipeline is not None:
+                    pipeline.close()
+            except Exception as e:
+                print(f"Error releasing stream {self.stream_id}: {e}")
+
+    def _run(self):
+        frame_interval = 1.0 / self.target_fps
+        failed_reads = 0
+        while self.active and self.tracker is not None:
+            if self.profiler is not None:
+                self.profiler.checkpoint()
+            tracker = self.tracker
+            loop_start = time.perf_counter()
+            try:
+                ret, frame = tracker.cap.read()
+                if not ret:
+                    failed_reads += 1
+                    if failed_reads >= MAX_FAILED_READS or not tracker.cap.isOpened():
+                        # Finished video file, unplugged camera or closed frame ring
+                        self.error = 'Source stopped producing frames'
+                        print(f"❌ Stream {self.stream_id}: source stopped producing frames")
+                        self.stop()
+                        break
+                    time.sleep(0.1)
+                    continue
+                failed_reads = 0
+                capture_time = time.perf_counter()
+
+                if self.mirror:
+                    frame = cv2.flip(frame, 1)
+
+                if not self.scheduler.acquire(self.stream_id, timeout=1.0):
+                    continue
+                self._sync_preview(tracker)
+                process_start = time.perf_counter()
+                try:
+                    metrics = tracker.process_frame(frame)
+                finally:
+                    self.scheduler.release(self.stream_id, time.perf_counter() - process_start)
+                tracker.fps_counter.record_latency(capture_time)
+                if not getattr(tracker, 'headless', True):
+                    self.preview.publish(tracker.preview_frame)
+
+                data = metrics.to_api_data(tracker.frame_width, tracker.frame_height, self.active, time.time())
+                data['stream_id'] = self.stream_id
+                # Wall-clock capture/send time, for sources that know it (remote clients, frame rings)
+                source_time = getattr(tracker.cap, 'capture_time', None)
+                if source_time:
+                    data['capture_time'] = source_time
+                self.frames += 1
+                self._publish(data)
+
+                # Pace to the stream's target frame rate
+                remaining = frame_interval - (time.perf_counter() - loop_start)
+                if remaining > 0:
+                    time.sleep(remaining)
+
+            except Exception as e:
+                self.error = str(e)
+                print(f"Error in stream {self.stream_id}: {e}")
+                time.sleep(0.1)
+
+    def _sync_preview(self, tracker):
+        """Attach the tracker's preview sink while the stream has viewers, detach it otherwise"""
+        headless = getattr(tracker, 'headless', None)
+        if headless is None:
+            return
+        watched = self.preview.watched
+        if watched and headless:
+            tracker.attach_preview()
+        elif not watched and not headless:
+            tracker.detach_preview()
+
+    def _publish(self, data: Dict[str, Any]):
+        # Publish the new frame before advancing, so woken pollers see it
+        seq = self.sequence.value + 1
+        self.wire_encoder.publish(seq, data)
+        self.snapshot = FrameSnapshot(seq, data)
+        self.sequence.advance()
+
+    @property
+    def camera_active(self) -> bool:
+        tracker = self.tracker
+        return tracker is not None and tracker.cap is not None and tracker.cap.isOpened()
+
+    def frame_timing(self) -> Optional[Dict[str, Any]]:
+        tracker = self.tracker
+        return tracker.fps_counter.stats() if tracker is not None else None
+
+    def quality_status(self) -> Optional[Dict[str, Any]]:
+        quality = getattr(self.tracker, 'quality', None)
+        return quality.status() if quality is not None else None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'stream_id': self.stream_id,
+            'active': self.active,
+            'source': self.source_spec,
+            'camera_active': self.camera_active,
+            'target_fps': self.target_fps,
+            'frames': self.frames,
+            'sequence': self.snapshot.sequence,
+            'frame_timing': self.frame_timing(),
+            'preview': self.preview.stats() if self.supports_preview else None,
+            'quality': self.quality_status(),
+            'error': self.error
+        }
+
+
+def load_tracker_class(spec: str):
+    """Resolve a 'module:Class' tracker spec"""
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f"Tracker spec must look like 'module:Class', got {spec!r}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class _PipeStream(TrackerStream):
+    """TrackerStream inside a worker process; frames are sent to the parent instead of kept"""
+
+    def __init__(self, stream_id: str, tracker_factory, conn):
+        super().__init__(stream_id, FairScheduler(1), tracker_factory)
+        self.conn = conn
+        self.started = threading.Event()
+        self._send_lock = threading.Lock()
+
+    def send(self, message):
+        with self._send_lock:
+            self.conn.send(message)
+
+    def _publish(self, data: Dict[str, Any]):
+        # The parent expects 'started' before any frame
+        self.started.wait()
+        if self.frames % WORKER_TIMING_EVERY == 0:
+            timing, quality = self.frame_timing(), self.quality_status()
+        else:
+            timing = quality = None
+        self.send(('frame', data, timing, quality, self.camera_active))
+
+
+def _worker_main(stream_id: str, tracker_spec: str, tracker_kwargs: Dict[str, Any], source: FrameSource,
+                 frame_width: int, frame_height: int, target_fps: float, mirror: bool, conn):
+    """Entry point of a stream worker process"""
+    stream = None
+    try:
+        tracker_class = load_tracker_class(tracker_spec)
+        stream = _PipeStream(stream_id, lambda frame_source, width, height: tracker_class(
+            frame_width=width, frame_height=height, source=frame_source, **tracker_kwargs), conn)
+        stream.start(source, frame_width, frame_height, target_fps, mirror=mirror)
+    except Exception as e:
+        conn.send(('ended', f"Failed to start: {e}"))
+        return
+    stream.send(('started',))
+    stream.started.set()
+
+    # Run until the parent says stop, goes away, or the source ends
+    try:
+        while stream.active:
+            if conn.poll(0.5) and conn.recv()[0] == 'stop':
+                break
+    except (EOFError, OSError):
+        pass
+    stream.stop()
+    try:
+        stream.send(('ended', stream.error))
+    except (EOFError, OSError):
+        pass
+
+
+class ProcessTrackerStream(TrackerStream):
+    """
+    Tracked stream whose tracker runs in a separate worker process.
+
+    The source is read in this process and frames are handed to the worker
+    through a SharedFrameRing. A supervisor thread publishes the worker's
+    results into this stream's result slot and restarts the worker (with
+    exponential backoff) when it crashes.
+
+    Args:
+        stream_id: Key used in the API
+        tracker_spec: Tracker class to build in the worker, as 'module:Class'
+        tracker_kwargs: Extra constructor arguments for the tracker (e.g. target_fps, cpu_budget)
+    """
+
+    supports_preview = False
+
+    def __init__(self, stream_id: str, tracker_spec: str, tracker_kwargs: Optional[Dict[str, Any]] = None):
+        super().__init__(stream_id, FairScheduler(1), tracker_factory=None)
+        self.tracker_spec = tracker_spec
+        self.tracker_kwargs = dict(tracker_kwargs or {})
+        self.weight = 1.0
+        self.restarts = 0
+        self._process = None
+        self._conn = None
+        self._capture: Optional[FrameSource] = None
+        self._ring: Optional[SharedFrameRing] = None
+        self._capture_thread: Optional[threading.Thread] = None
+        self._capturing = False
+        self._timing: Optional[Dict[str, Any]] = None
+        self._quality: Optional[Dict[str, Any]] = None
+        self._camera_active = False
+        self._context = multiprocessing.get_context('spawn')
+
+    def start(self, source: Union[str, FrameSource] = '0', frame_width: int = 640, frame_height: int = 480,
+              target_fps: float = 30.0, weight: float = 1.0, mirror: bool = True):
+        """Open the source, launch the worker and wait until its tracker is ready"""
+        if self.active:
+            raise ValueError(f"Stream {self.stream_id} is already running")
+
+        self.source_spec = str(source)
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.target_fps = max(target_fps, 1.0)
+        self.weight = weight
+        self.mirror = mirror
+        self.error = None
+        self.restarts = 0
+        self._start_capture(source)
+        try:
+            self._spawn()
+        except Exception:
+            self._stop_capture()
+            raise
+
+        self.active = True
+        self._thread = threading.Thread(target=self._supervise, name=f"stream-{self.stream_id}", daemon=True)
+        self._thread.start()
+
+    def _start_capture(self, source: Union[str, FrameSource]):
+        """Open the source and start copying its frames into a new shared ring"""
+        frame_source = open_source(source, self.frame_width, self.frame_height, realtime=True)
+        if not frame_source.isOpened():
+            raise IOError(f"Cannot open frame source: {source}")
+        # The ring is sized from the first frame (cameras may ignore the requested size)
+        ret, frame = frame_source.read()
+        if not ret:
+            frame_source.release()
+            raise IOError(f"No frames from source: {source}")
+
+        self._capture = frame_source
+        self._ring = SharedFrameRing(frame.shape, slots=FRAME_RING_SLOTS, dtype=frame.dtype)
+        self._ring.write(frame)
+        self._capturing = True
+        self._capture_thread = threading.Thread(target=self._capture_loop,
+                                                name=f"capture-{self.stream_id}", daemon=True)
+        self._capture_thread.start()
+
+    def _capture_loop(self):
+        ring = self._ring
+        height, width = ring.shape[:2]
+        failed_reads = 0
+        while self._capturing:
+            ret, frame = self._capture.read()
+            if not ret:
+                failed_reads += 1
+                if failed_reads >= MAX_FAILED_READS or not self._capture.isOpened():
+                    break
+                time.sleep(0.1)
+                continue
+            failed_reads = 0
+            if frame.shape != ring.shape:
+                frame = cv2.resize(frame, (width, height))
+            ring.write(frame, getattr(self._capture, 'capture_time', None))
+        # Workers see the end of the stream and finish cleanly
+        ring.close()
+
+    def _stop_capture(self):
+        self._capturing = False
+        thread, self._capture_thread = self._capture_thread, None
+        if thread is not None:
+            thread.join(timeout=2.0)
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+        ring, self._ring = self._ring, None
+        if ring is not None:
+            ring.close()
+            ring.detach()
+
+    def _spawn(self):
+        """Start a worker process; raises IOError if it fails to come up"""
+        # Slots held by a crashed worker would otherwise never be reused
+        self._ring.reset_readers()
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.stream_id, self.tracker_spec, self.tracker_kwargs, SharedFrameSource(self._ring),
+                  self.frame_width, self.frame_height, self.target_fps, self.mirror, child_conn),
+            name=f"stream-{self.stream_id}", daemon=True)
+        process.start()
+        child_conn.close()
+
+        message = None
+        try:
+            if parent_conn.poll(WORKER_START_TIMEOUT):
+                message = parent_conn.recv()
+        except (EOFError, OSError):
+            pass
+        if message is None or message[0] != 'started':
+            self._reap(process, parent_conn)
+            detail = message[1] if message is not None else f"exit code {process.exitcode}"
+            raise IOError(f"Stream worker for {self.stream_id} failed to start: {detail}")
+
+        self._process = process
+        self._conn = parent_conn
+        print(f"✅ Stream {self.stream_id} worker running (pid {process.pid})")
+
+    @staticmethod
+    def _reap(process, conn, timeout: float = 3.0):
+        conn.close()
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join(1.0)
+
+    def _supervise(self):
+        failures = 0
+        while self.active:
+            conn, process = self._conn, self._process
+            try:
+                if not conn.poll(1.0):
+                    if not process.is_alive():
+                        raise EOFError
+                    continue
+                message = conn.recv()
+            except (EOFError, OSError):
+                if not self.active:
+                    break
+                # Worker crashed: restart it unless it keeps crashing
+                failures += 1
+                self._camera_active = False
+                self._reap(process, conn, timeout=0.5)
+                self.error = f"Worker exited with code {process.exitcode}"
+                if failures > MAX_WORKER_RESTARTS:
+                    print(f"❌ Stream {self.stream_id}: worker crashed {failures} times in a row, giving up")
+                    self.active = False
+                    break
+                delay = min(2.0 ** (failures - 1), MAX_RESTART_DELAY)
+                print(f"⚠️ Stream {self.stream_id}: {self.error}, restarting in {delay:.0f}s")
+                time.sleep(delay)
+                if not self.active:
+                    break
+                try:
+                    self._spawn()
+                    self.restarts += 1
+                    if not self.active:
+                        # Stopped while the replacement was starting
+                        self._reap(self._process, self._conn)
+                        break
+                except IOError as e:
+                    self.error = str(e)
+                    print(f"❌ {e}")
+                    # Keep polling the dead worker so the next iteration counts another failure
+                continue
+
+            kind = message[0]
+            if kind == 'frame':
+                _, data, timing, quality, camera_active = message
+                failures = 0
+                self._camera_active = camera_active
+                if timing is not None:
+                    self._timing = timing
+                    self._quality = quality
+                self.frames += 1
+                self._publish(data)
+            elif kind == 'ended':
+                # Clean exit (source finished or the worker was told to stop)
+                self.error = message[1] or self.error
+                self.active = False
+                break
+
+        # Ended on its own (not through stop()): release the worker, source and ring
+        if self._thread is threading.current_thread():
+            self.stop()
+
+    def stop(self):
+        """Stop the worker and its supervisor"""
+        self.active = False
+        conn, process = self._conn, self._process
+        if conn is not None:
+            try:
+                conn.send(('stop',))
+            except (EOFError, OSError):
+                pass
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        if process is not None:
+            self._reap(process, conn)
+        self._process = None
+        self._conn = None
+        self._camera_active = False
+        self._stop_capture()
+
+    @property
+    def camera_active(self) -> bool:
+        return self.active and self._camera_active
+
+    def frame_timing(self) -> Optional[Dict[str, Any]]:
+        return self._timing
+
+    def quality_status(self) -> Optional[Dict[str, Any]]:
+        return self._quality
+
+    def status(self) -> Dict[str, Any]:
+        status = super().status()
+        process = self._process
+        status.update({
+            'worker_pid': process.pid if process is not None else None,
+            'restarts': self.restarts,
+            'frame_ring': self._ring.stats() if self._ring is not None else None,
+            'weight': self.weight
+        })
+        return status
+
+
+class StreamManager:
+    """
+    Registry of tracker streams keyed by stream ID.
+
+    Args:
+        tracker_factory: Builds a tracker from (source, frame_width, frame_height)
+        scheduler: Shared scheduler (default: one slot per spare CPU core)
+        max_streams: Upper bound on running streams
+        process_tracker: Run every stream in a worker process that builds this
+            tracker class ('module:Class') instead of in a thread
+        process_tracker_kwargs: Extra constructor arguments for the worker's tracker
+            (must be picklable, e.g. target_fps and cpu_budget)
+    """
+
+    def __init__(self, tracker_factory: Optional[Callable[[FrameSource, int, int], Any]],
+                 scheduler: Optional[FairScheduler] = None, max_streams: int = 8,
+                 process_tracker: Optional[str] = None,
+                 process_tracker_kwargs: Optional[Dict[str, Any]] = None):
+        if process_tracker is None and tracker_factory is None:
+            raise ValueError("Either tracker_factory or process_tracker is required")
+        if process_tracker is not None:
+            load_tracker_class(process_tracker)
+        self.tracker_factory = tracker_factory
+        self.process_tracker = process_tracker
+        self.process_tracker_kwargs = dict(process_tracker_kwargs or {})
+        self.scheduler = scheduler or FairScheduler()
+        self.max_streams = max_streams
+        self.streams: Dict[str, TrackerStream] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        """Bind long-poll waiters of current and future streams to the server's event loop"""
+        with self._lock:
+            self._loop = loop
+            for stream in self.streams.values():
+                stream.sequence.attach_loop(loop)
+
+    def stream(self, stream_id: str, profiler=None) -> TrackerStream:
+        """Get a stream, creating an idle one if needed"""
+        with self._lock:
+            stream = self.streams.get(stream_id)
+            if stream is None:
+                if self.process_tracker is not None:
+                    stream = ProcessTrackerStream(stream_id, self.process_tracker, self.process_tracker_kwargs)
+                else:
+                    stream = TrackerStream(stream_id, self.scheduler, self.tracker_factory, profiler)
+                if self._loop is not None:
+                    stream.sequence.attach_loop(self._loop)
+                self.streams[stream_id] = stream
+            return stream
+
+    def get(self, stream_id: str) -> Optional[TrackerStream]:
+        return self.streams.get(stream_id)
+
+    def start_stream(self, stream_id: str, source: Union[str, FrameSource] = '0', frame_width: int = 640,
+                     frame_height: int = 480, target_fps: float = 30.0, weight: float = 1.0,
+                     profiler=None, mirror: bool = True) -> TrackerStream:
+        """Start a stream (ValueError if it is running or the stream limit is reached)"""
+        if sum(1 for s in self.streams.values() if s.active) >= self.max_streams:
+            raise ValueError(f"Stream limit reached ({self.max_streams})")
+        stream = self.stream(stream_id, profiler)
+        stream.start(source, frame_width, frame_height, target_fps, weight, mirror=mirror)
+        return stream
+
+    def stop_stream(self, stream_id: str) -> bool:
+        stream = self.streams.get(stream_id)
+        if stream is None or not stream.active:
+            return False
+        stream.stop()
+        return True
+
+    def remove_stream(self, stream_id: str) -> bool:
+        with self._lock:
+            stream = self.streams.pop(stream_id, None)
+        if stream is None:
+            return False
+        if stream.active:
+            stream.stop()
+        return True
+
+    def stop_all(self):
+        for stream in list(self.streams.values()):
+            if stream.active:
+                stream.stop()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'streams': {stream_id: stream.status() for stream_id, stream in list(self.streams.items())},
+            'active': sum(1 for s in self.streams.values() if s.active),
+            'max_streams': self.max_streams,
+            'mode': 'process' if self.process_tracker is not None else 'thread',
+            'scheduler': self.scheduler.status()
+        }
@@ -0,0 +1,167 @@
+"""
+Constant-memory streaming statistics for per-frame attention metrics.
+Every update is O(1) - no per-frame history is kept.
+"""
+
+import math
+from typing import Dict, Any, Optional, Tuple
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate using the P-square algorithm (Jain & Chlamtac).
+    Keeps five markers regardless of how many values are observed.
+    """
+
+    def __init__(self, quantile: float):
+        """
+        Args:
+            quantile: Target quantile in (0, 1), e.g. 0.9 for p90
+        """
+        if not 0.0 < quantile < 1.0:
+            raise ValueError(f"Quantile must be between 0 and 1: {quantile}")
+        self.quantile = quantile
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1.0, 1.0 + 2 * quantile, 1.0 + 4 * quantile, 3.0 + 2 * quantile, 5.0]
+        self._increments = (0.0, quantile / 2, quantile, (1.0 + quantile) / 2, 1.0)
+
+    def add(self, value: float):
+        """Observe one value"""
+        self.count += 1
+        heights = self._heights
+
+        # Exact until the five markers are filled
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Find the cell containing the value, extending the extremes if needed
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+
+        positions = self._positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Adjust the three middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self._desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or \
+               (d <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, step: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    @property
+    def value(self) -> Optional[float]:
+        """Current quantile estimate (None before any values)"""
+        if not self.count:
+            return None
+        if self.count <= 5:
+            # Nearest-rank on the exact sample
+            heights = self._heights
+            return heights[min(len(heights) - 1, int(round(self.quantile * (len(heights) - 1))))]
+        return self._heights[2]
+
+
+class StreamingStats:
+    """
+    Running count, mean, variance (Welford), min, max, exponentially-decayed mean
+    and p50/p90 estimates for one metric.
+    """
+
+    def __init__(self, ewma_alpha: float = 0.05, quantiles: Tuple[float, ...] = (0.5, 0.9)):
+        """
+        Args:
+            ewma_alpha: Weight of the newest value in the decayed mean
+            quantiles: Quantiles to estimate
+        """
+        self.ewma_alpha = ewma_alpha
+        self._quantile_targets = quantiles
+        self.reset()
+
+    def reset(self):
+        """Clear all accumulated values"""
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.ewma: Optional[float] = None
+        self.quantiles = {q: P2Quantile(q) for q in self._quantile_targets}
+
+    def add(self, value: float):
+        """Observe one value in O(1)"""
+        value = float(value)
+        self.count += 1
+
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            self.ewma += self.ewma_alpha * (value - self.ewma)
+
+        for estimator in self.quantiles.values():
+            estimator.add(value)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate for one of the configured quantiles"""
+        return self.quantiles[q].value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary for status APIs"""
+        summary = {
+            'count': self.count,
+            'mean': self.mean,
+            'stddev': self.stddev,
+            'min': self.min,
+            'max': self.max,
+            'ewma': self.ewma,
+        }
+        for q, estimator in self.quantiles.items():
+            summary[f'p{int(round(q * 100))}'] = estimator.value
+        return summary
@@ -1,9 +1,18 @@
 import time
 import json
+import os
+import secrets
 import threading
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Callable
 from precise_attention_tracker import PreciseAttentionTracker
+from streaming_stats import StreamingStats
+from metrics_log import MetricsLogWriter, MetricsLogReader, RECORD_FIELDS
+from session_store import SessionStore
+from timeline import downsample, TimelineCache, METHODS
+
+# Session history and metrics logs live here unless STUDY_DATA_DIR says otherwise
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "study_data")
 
 class StudySessionBackend:
     """
@@ -11,7 +20,23 @@ class StudySessionBackend:
     Integrates with existing Study Spark UI.
     """
     
-    def __init__(self):
+    def __init__(self, data_dir: Optional[str] = None, log_dir: Optional[str] = None,
+                 db_path: Optional[str] = None):
+        """
+        Args:
+            data_dir: Directory for session data (default: $STUDY_DATA_DIR or study_data/ next to this module)
+            log_dir: Directory for per-session metrics logs (default: <data_dir>/session_logs)
+            db_path: SQLite database for session history (default: <data_dir>/study_sessions.db)
+        """
+        self.data_dir = os.path.abspath(data_dir or os.environ.get("STUDY_DATA_DIR") or DEFAULT_DATA_DIR)
+        self.log_dir = os.path.abspath(log_dir or os.path.join(self.data_dir, "session_logs"))
+        self.db_path = os.path.abspath(db_path or os.path.join(self.data_dir, "study_sessions.db"))
+        self.session_id = None
+        self.metrics_log = None
+        self._store = None
+        self._store_lock = threading.Lock()
+        self.timeline_cache = TimelineCache()
+        self.phase_index = 0
         self.current_session = None
         self.session_timer = None
         self.attention_tracker = None
@@ -27,6 +52,31 @@ class StudySessionBackend:
             "focus_score_avg": 0.0,
             "is_active": False
         }
+        # Live focus score aggregates for the whole session (constant memory)
+        self.focus_stats = StreamingStats()
+    
+    @property
+    def store(self) -> SessionStore:
+        """Session history database, opened on first use"""
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                    self._store = SessionStore(self.db_path)
+        return self._store
+    
+    def close(self):
+        """Flush the metrics log and session history (call on shutdown)"""
+        if self.metrics_log:
+            self.metrics_log.close()
+            self.metrics_log = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+    
+    def metrics_log_path(self, session_id: str) -> str:
+        """Path of the per-frame metrics log for a session"""
+        return os.path.join(self.log_dir, f"{session_id}.ssml")
         
     def start_pomodoro_session(self, rounds: int = 4) -> Dict[str, Any]:
         """Start Pomodoro session: 25 min focus, 5 min break, longer break every 4 rounds"""
@@ -79,10 +129,12 @@ class StudySessionBackend:
             return {"error": "Session already active", "status": "error"}
         
         # Initialize session
+        start_time = datetime.now()
         self.current_session = config
+        self.session_id = self._new_session_id(config["type"], start_time)
         self.session_data.update({
             "session_type": config["type"],
-            "start_time": datetime.now(),
+            "start_time": start_time,
             "current_phase": "focus",
             "rounds_completed": 0,
             "total_focus_time": 0,
@@ -91,6 +143,12 @@ class StudySessionBackend:
             "focus_score_avg": 0.0,
             "is_active": True
         })
+        self.focus_stats.reset()
+        self.phase_index = 0
+        self.store.start_session(self.session_id, config["type"], start_time.timestamp())
+        
+        # Per-frame metrics are appended to disk in the background
+        self.metrics_log = MetricsLogWriter(self.metrics_log_path(self.session_id), start_time.timestamp())
         
         # Start attention tracker with 1280x720 resolution
         self.attention_tracker = PreciseAttentionTracker(frame_width=1280, frame_height=720)
@@ -100,11 +158,19 @@ class StudySessionBackend:
         
         return {
             "status": "started",
+            "session_id": self.session_id,
             "session_type": config["type"],
             "duration": config["focus_duration"],
             "phase": "focus"
         }
     
+    def _new_session_id(self, session_type: str, start_time: datetime) -> str:
+        """Start time plus a random suffix, so sessions started in the same second stay apart"""
+        while True:
+            session_id = f"{session_type}_{start_time:%Y%m%d_%H%M%S}_{secrets.token_hex(3)}"
+            if not os.path.exists(self.metrics_log_path(session_id)):
+                return session_id
+    
     def _start_session_timer(self):
         """Start the session timer thread"""
         self.session_timer = threading.Thread(target=self._run_session_timer)
@@ -135,6 +201,7 @@ class StudySessionBackend:
         """Run focus phase with attention tracking"""
         print(f"🎯 FOCUS PHASE: {duration_seconds//60} minutes")
         start_time = time.time()
+        self.phase_index += 1
         
         # Start attention tracker
         if self.attention_tracker:
@@ -156,6 +223,7 @@ class StudySessionBackend:
     def _run_break_phase(self, duration_seconds: int):
         """Run break phase"""
         print(f"☕ BREAK PHASE: {duration_seconds//60} minutes")
+        self.phase_index += 1
         
         # Stop attention tracker during break
         if self.attention_tracker:
@@ -180,7 +248,6 @@ class StudySessionBackend:
             return
         
         start_time = time.time()
-        focus_scores = []
         phone_detections = 0
         
         print(f"📊 Starting attention tracking for {duration_seconds//60} minutes...")
@@ -191,18 +258,23 @@ class StudySessionBackend:
                 # Get attention metrics
                 metrics = self.attention_tracker.process_frame(self.attention_tracker.cap.read()[1])
                 
+                # Raw metrics go to the binary log only; SQLite gets the frame as rollups
+                now = time.time()
+                if self.metrics_log:
+                    self.metrics_log.append(now, metrics)
+                self.store.record_frame(self.session_id, now, self.phase_index,
+                                        self.session_data["current_phase"], metrics)
+                
                 # Track focus score
-                focus_score = metrics.get("focus_score", 0.0)
-                focus_scores.append(focus_score)
+                self.focus_stats.add(metrics.get("focus_score", 0.0))
+                self.session_data["focus_score_avg"] = self.focus_stats.mean
                 
                 # Track phone detections
                 if metrics.get("phone_near_face", False) or metrics.get("ai_detected_phone", False):
                     phone_detections += 1
+                    self.session_data["phone_detections"] += 1
                     print("📱 Phone detected!")
                 
-                # Update session data
-                self.session_data["phone_detections"] += phone_detections
-                
                 # Small delay to prevent overwhelming the system
                 time.sleep(0.1)
                 
@@ -210,10 +282,6 @@ class StudySessionBackend:
                 print(f"Attention tracking error: {e}")
                 break
         
-        # Calculate average focus score
-        if focus_scores:
-            self.session_data["focus_score_avg"] = sum(focus_scores) / len(focus_scores)
-        
         print(f"📈 Session stats - Focus avg: {self.session_data['focus_score_avg']:.2f}, Phone detections: {phone_detections}")
     
     def _should_continue_session(self) -> bool:
@@ -267,11 +335,23 @@ class StudySessionBackend:
             self.attention_tracker.cap.release()
             self.attention_tracker = None
         
+        # Flush the metrics log
+        if self.metrics_log:
+            self.metrics_log.close()
+            self.metrics_log = None
+        
+        # Persist final totals to the session history; committed before returning so
+        # /api/sessions shows the finished session right away
+        self.store.end_session(self.session_id, self.session_data["end_time"].timestamp(), self.session_data)
+        if not self.store.flush():
+            print(f"⚠️ Session history for {self.session_id} not committed yet")
+        
         # Calculate session summary
         session_summary = self._get_session_summary()
         
         return {
             "status": "completed",
+            "session_id": self.session_id,
             "session_type": self.session_data["session_type"],
             "summary": session_summary
         }
@@ -290,6 +370,7 @@ class StudySessionBackend:
             "rounds_completed": self.session_data["rounds_completed"],
             "phone_detections": self.session_data["phone_detections"],
             "average_focus_score": self.session_data["focus_score_avg"],
+            "focus_score_stats": self.focus_stats.to_dict(),
             "focus_percentage": (self.session_data["total_focus_time"] / total_duration * 100) if total_duration > 0 else 0
         }
     
@@ -297,12 +378,65 @@ class StudySessionBackend:
         """Get current session status"""
         return {
             "is_active": self.session_data["is_active"],
+            "session_id": self.session_id,
             "session_type": self.session_data["session_type"],
             "current_phase": self.session_data["current_phase"],
             "rounds_completed": self.session_data["rounds_completed"],
             "phone_detections": self.session_data["phone_detections"],
-            "focus_score_avg": self.session_data["focus_score_avg"]
+            "focus_score_avg": self.session_data["focus_score_avg"],
+            "focus_score_stats": self.focus_stats.to_dict()
+        }
+
+    def get_session_history(self, days: int = 7, limit: int = 50) -> Dict[str, Any]:
+        """Get past sessions and per-day totals (served from rollups)"""
+        return {
+            "sessions": self.store.list_sessions(limit=limit, since=time.time() - days * 86400),
+            "daily": self.store.history(days)
         }
+    
+    def get_session_details(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get one past session with per-phase and per-minute focus aggregates"""
+        session = self.store.get_session(session_id)
+        if session is not None:
+            session["minutes"] = self.store.session_rollup(session_id, "1m")
+        return session
+
+    def get_timeline(self, session_id: str, points: int = 500, method: str = "lttb",
+                     field: str = "focus_score") -> Optional[Dict[str, Any]]:
+        """Get a session's metric timeline downsampled to at most `points` points"""
+        if method not in METHODS:
+            raise ValueError(f"Unknown downsampling method: {method}")
+        if field not in RECORD_FIELDS or field in ("timestamp", "flags"):
+            raise ValueError(f"Unknown timeline field: {field}")
+        
+        path = self.metrics_log_path(session_id)
+        if not os.path.exists(path):
+            return None
+        
+        # A session's log only stops changing once its writer is closed
+        complete = session_id != self.session_id or self.metrics_log is None
+        key = (session_id, points, method, field)
+        if complete:
+            cached = self.timeline_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        with MetricsLogReader(path) as reader:
+            ts, values = downsample(reader.column("timestamp"), reader.column(field), points, method)
+            timeline = {
+                "session_id": session_id,
+                "field": field,
+                "method": method,
+                "complete": complete,
+                "frames": len(reader),
+                "start_time": reader.start_time,
+                "ts": ts.tolist(),
+                "values": values.tolist()
+            }
+        
+        if complete:
+            self.timeline_cache.put(key, timeline)
+        return timeline
 
 # Example usage and API endpoints
 def create_study_session_api():
@@ -333,6 +467,9 @@ def create_study_session_api():
     def get_status():
         return session_backend.get_session_status()
     
+    def get_history(days=7):
+        return session_backend.get_session_history(days)
+    
     return {
         "start_pomodoro": start_pomodoro,
         "start_52_17": start_52_17,
@@ -341,7 +478,8 @@ def create_study_session_api():
         "pause_session": pause_session,
         "resume_session": resume_session,
         "end_session": end_session,
-        "get_status": get_status
+        "get_status": get_status,
+        "get_history": get_history
     }
 
 if __name__ == "__main__":
@@ -383,3 +521,4 @@ if __name__ == "__main__":
     # End session
     result = session_backend.end_session()
     print(f"Session ended: {result}")
+    session_backend.close()
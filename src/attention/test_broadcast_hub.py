@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test WebSocket fan-out, drop-oldest queues and slow-client backpressure
+"""
+
+import asyncio
+
+from broadcast_hub import BroadcastHub, ClientChannel
+
+
+class FakeWebSocket:
+    """Records sent messages; an unset gate blocks every send"""
+
+    def __init__(self, name, blocked=False):
+        self.remote_address = name
+        self.sent = []
+        self.closed = None
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def send(self, message):
+        await self.gate.wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000, reason=''):
+        self.closed = code
+
+
+def test_offer_drops_oldest():
+    async def run():
+        channel = ClientChannel(FakeWebSocket('a'), max_queue=2)
+        for seq in range(1, 4):
+            channel.offer((seq, 0.0, seq))
+        return channel.dropped, [channel.queue.get_nowait()[0] for _ in range(2)]
+
+    dropped, queued = asyncio.run(run())
+    assert dropped == 1 and queued == [2, 3]
+
+
+def test_every_client_receives_messages():
+    async def run():
+        hub = BroadcastHub(max_queue=8)
+        clients = [FakeWebSocket('a'), FakeWebSocket('b')]
+        for websocket in clients:
+            hub.register(websocket)
+        hub.publish('one')
+        hub.publish(lambda websocket: f'two:{websocket.remote_address}')
+        hub.publish(lambda websocket: None)  # Nothing to send to anyone
+        await asyncio.sleep(0.05)
+        await hub.close()
+        return clients
+
+    a, b = asyncio.run(run())
+    assert a.sent == ['one', 'two:a'] and b.sent == ['one', 'two:b']
+
+
+def test_slow_client_does_not_delay_others():
+    async def run():
+        hub = BroadcastHub(max_queue=4, degraded_rate_hz=0.001, evict_after_seconds=0)
+        slow, fast = FakeWebSocket('slow', blocked=True), FakeWebSocket('fast')
+        hub.register(slow)
+        hub.register(fast)
+        for i in range(10):
+            hub.publish(i)
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.05)
+        stats = {s['remote_address']: s for s in hub.client_stats()}
+        await hub.close()
+        return fast.sent, stats
+
+    sent, stats = asyncio.run(run())
+    assert sent == list(range(10))
+    assert stats['slow']['degraded'] and stats['slow']['skipped'] > 0
+    assert stats['slow']['sequence_lag'] > 0 and stats['fast']['sequence_lag'] == 0
+
+
+def test_persistently_slow_client_is_evicted():
+    async def run():
+        hub = BroadcastHub(max_queue=2, high_water_mark=1, degraded_rate_hz=0, evict_after_seconds=0.01)
+        slow = FakeWebSocket('slow', blocked=True)
+        hub.register(slow)
+        # One message stuck in send, then the queue stays above the mark
+        for i in range(5):
+            hub.publish(i)
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.01)
+        return hub, slow
+
+    hub, slow = asyncio.run(run())
+    assert not hub.has_clients() and hub.evictions == 1
+    assert slow.closed == 1013
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing broadcast hub")
+    tests = [test_offer_drops_oldest, test_every_client_receives_messages,
+             test_slow_client_does_not_delay_others, test_persistently_slow_client_is_evicted]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All broadcast hub tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
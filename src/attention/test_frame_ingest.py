@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test remote frame decoding and the newest-frame-only push source
+"""
+
+import struct
+
+import cv2
+import numpy as np
+
+from frame_ingest import (FrameBufferPool, PushFrameSource, HEADER, MAGIC, VERSION,
+                          KIND_BGR, KIND_JPEG, KIND_RGBA, MAX_FRAME_WIDTH, MAX_FRAME_HEIGHT,
+                          MAX_SOURCE_WIDTH, clamp_frame_size, decode_frame_message,
+                          encode_frame_message, jpeg_size)
+
+
+def _frame(width=64, height=48):
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[:, :, 0] = 200  # Blue, so channel order mistakes show up
+    frame[:, :, 2] = 30
+    return frame
+
+
+def _expect_error(payload, width=64, height=48):
+    try:
+        decode_frame_message(payload, width, height, FrameBufferPool())
+    except ValueError as e:
+        return str(e)
+    raise AssertionError("message accepted")
+
+
+def test_jpeg_paths():
+    pool = FrameBufferPool()
+    message = encode_frame_message(_frame(), KIND_JPEG, quality=95, client_time=12.5)
+    frame, client_time = decode_frame_message(message, 64, 48, pool)
+    assert frame.shape == (48, 64, 3) and client_time == 12.5
+    assert abs(int(frame[..., 0].mean()) - 200) < 5 and abs(int(frame[..., 2].mean()) - 30) < 5
+
+    # Bare JPEG, scaled to the tracker size
+    bare = message[HEADER.size:]
+    assert jpeg_size(bare) == (64, 48)
+    frame, client_time = decode_frame_message(bare, 32, 24, pool)
+    assert frame.shape == (24, 32, 3) and client_time is None
+
+
+def test_raw_paths():
+    pool = FrameBufferPool()
+    source = _frame()
+    frame, _ = decode_frame_message(encode_frame_message(source, KIND_BGR), 64, 48, pool)
+    assert np.array_equal(frame, source)
+
+    frame, _ = decode_frame_message(encode_frame_message(source, KIND_RGBA), 64, 48, pool)
+    assert np.array_equal(frame, source)
+
+    frame, _ = decode_frame_message(encode_frame_message(source, KIND_RGBA), 32, 24, pool)
+    assert frame.shape == (24, 32, 3) and int(frame[..., 0].mean()) == 200
+
+
+def test_bad_messages():
+    source = _frame()
+    bgr = encode_frame_message(source, KIND_BGR)
+    assert 'too short' in _expect_error(b'AF\x01')
+    assert 'Not a frame message' in _expect_error(b'XY' + bgr[2:])
+    assert 'bytes' in _expect_error(bgr[:-1])
+    assert 'Unknown frame kind' in _expect_error(HEADER.pack(MAGIC, VERSION, 9, 64, 48, 0.0) + source.tobytes())
+    assert 'Invalid frame size' in _expect_error(HEADER.pack(MAGIC, VERSION, KIND_BGR, 0, 0, 0.0))
+    assert 'Invalid JPEG' in _expect_error(HEADER.pack(MAGIC, VERSION, KIND_JPEG, 64, 48, 0.0) + b'not a jpeg')
+    assert 'Invalid JPEG' in _expect_error(b'\xff\xd8\xff\xd9')
+
+
+def test_oversize_frames_rejected_before_decode():
+    # Raw: the header alone is enough to refuse
+    header = HEADER.pack(MAGIC, VERSION, KIND_RGBA, MAX_SOURCE_WIDTH + 1, 100, 0.0)
+    assert 'too large' in _expect_error(header + b'\x00' * 16)
+
+    # JPEG: a tiny file whose frame header claims 60000x60000 (the message header can't hide it)
+    jpeg = bytearray(encode_frame_message(_frame(), KIND_JPEG)[HEADER.size:])
+    sof = next(i for i in range(2, len(jpeg) - 1) if jpeg[i] == 0xFF and jpeg[i + 1] in (0xC0, 0xC2))
+    struct.pack_into('>HH', jpeg, sof + 5, 60000, 60000)
+    assert jpeg_size(jpeg) == (60000, 60000)
+    assert 'too large' in _expect_error(bytes(jpeg))
+    small_header = HEADER.pack(MAGIC, VERSION, KIND_JPEG, 64, 48, 0.0)
+    assert 'too large' in _expect_error(small_header + bytes(jpeg))
+
+
+def test_clamp_frame_size():
+    assert clamp_frame_size(640, 480) == (640, 480)
+    assert clamp_frame_size(100000, 100000) == (MAX_FRAME_WIDTH, MAX_FRAME_HEIGHT)
+    assert clamp_frame_size(-5, 0) == (16, 16)
+
+
+def test_push_source_keeps_newest_frame():
+    pool = FrameBufferPool()
+    source = PushFrameSource(8, 8, pool=pool, timeout=0.05)
+    frames = [np.full((8, 8, 3), value, dtype=np.uint8) for value in (1, 2, 3)]
+    for i, frame in enumerate(frames):
+        source.push(frame, capture_time=float(i))
+    ok, frame = source.read()
+    assert ok and frame is frames[2] and source.capture_time == 2.0
+    assert source.stats() == {'received': 3, 'processed': 1, 'dropped': 2}
+    # Dropped frames went back to the pool, the current one follows on the next read
+    assert pool.stats()['idle'] == 2
+
+    ok, frame = source.read()
+    assert not ok and frame is None
+    assert pool.stats()['idle'] == 3
+
+    source.close()
+    assert not source.isOpened()
+    assert source.read() == (False, None)
+
+
+def test_pool_reuses_buffers():
+    pool = FrameBufferPool(max_per_shape=1)
+    first = pool.acquire((4, 4, 3))
+    pool.release(first)
+    pool.release(np.empty((4, 4, 3), dtype=np.uint8))  # Over the limit: dropped
+    assert pool.acquire((4, 4, 3)) is first
+    pool.release(first[:2])  # Views are never pooled
+    assert pool.stats() == {'allocated': 1, 'reused': 1, 'idle': 0}
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing frame ingestion")
+    tests = [test_jpeg_paths, test_raw_paths, test_bad_messages, test_oversize_frames_rejected_before_decode,
+             test_clamp_frame_size, test_push_source_keeps_newest_frame, test_pool_reuses_buffers]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All frame ingestion tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
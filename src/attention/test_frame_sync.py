@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test frame sequence tracking, ETags and long-poll waits
+"""
+
+import asyncio
+import threading
+import time
+
+from frame_sync import FrameSequence, etag_for, etag_matches, parse_etag
+
+
+def test_etag_round_trip():
+    assert parse_etag(etag_for(42)) == 42
+    assert parse_etag('W/' + etag_for(7)) == 7
+    assert parse_etag(f'"other", {etag_for(3)}') == 3
+    assert parse_etag('"0-5"') is None
+    assert parse_etag(None) is None and parse_etag('') is None
+
+
+def test_etag_matches():
+    assert etag_matches(etag_for(9), 9)
+    assert not etag_matches(etag_for(9), 10)
+    assert etag_matches('*', 1)
+    assert not etag_matches(None, 1)
+
+
+def test_blocking_wait_wakes_on_advance():
+    sequence = FrameSequence()
+    threading.Timer(0.05, sequence.advance).start()
+    start = time.perf_counter()
+    assert sequence.wait_newer(0, timeout=2.0) == 1
+    assert time.perf_counter() - start < 1.0
+
+
+def test_blocking_wait_times_out():
+    sequence = FrameSequence()
+    sequence.advance()
+    start = time.perf_counter()
+    assert sequence.wait_newer(1, timeout=0.05) == 1
+    assert time.perf_counter() - start < 1.0
+    # Already newer: returns at once
+    assert sequence.wait_newer(0, timeout=5.0) == 1
+
+
+def test_async_wait_wakes_from_thread():
+    async def run():
+        sequence = FrameSequence()
+        sequence.attach_loop(asyncio.get_running_loop())
+        threading.Timer(0.05, sequence.advance).start()
+        start = time.perf_counter()
+        seq = await sequence.wait_newer_async(0, timeout=2.0)
+        return seq, time.perf_counter() - start, sequence._async_waiters
+
+    seq, elapsed, waiters = asyncio.run(run())
+    assert seq == 1 and elapsed < 1.0 and waiters == 0
+
+
+def test_async_wait_times_out():
+    async def run():
+        sequence = FrameSequence()
+        return await sequence.wait_newer_async(0, timeout=0.05)
+
+    assert asyncio.run(run()) == 0
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing frame sync")
+    tests = [test_etag_round_trip, test_etag_matches, test_blocking_wait_wakes_on_advance,
+             test_blocking_wait_times_out, test_async_wait_wakes_from_thread, test_async_wait_times_out]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All frame sync tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test the append-only binary metrics log
+"""
+
+import os
+import tempfile
+
+from metrics_log import (MetricsLogReader, MetricsLogWriter, FILE_HEADER, RECORD,
+                         FLAG_FOCUSED, FLAG_YAWNING, decode_flags, metrics_flags)
+
+
+def _write(path, start, count):
+    writer = MetricsLogWriter(path, start_time=start, flush_interval=0.05)
+    for i in range(count):
+        writer.append(start + i, {'focus_score': i / 10, 'ear': 0.3, 'focused': i % 2 == 0, 'yawning': i == 1})
+    writer.close()
+    return writer
+
+
+def test_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'logs', 'session.ssml')
+        writer = _write(path, 100.0, 5)
+        assert writer.records_written == 5
+        with MetricsLogReader(path) as reader:
+            assert len(reader) == 5 and reader.start_time == 100.0
+            timestamp, focus, ear = reader.record(-1)[:3]
+            assert timestamp == 104.0 and abs(focus - 0.4) < 1e-6 and abs(ear - 0.3) < 1e-6
+            flags = [record[-1] for record in reader.records(0, 2)]
+            assert flags == [FLAG_FOCUSED, FLAG_YAWNING]
+            focus_column = [round(float(v), 3) for v in reader.column('focus_score')]
+            assert focus_column == [0.0, 0.1, 0.2, 0.3, 0.4]
+            assert reader.time_range(101.0, 103.0) == (1, 3)
+            assert reader.time_range(200.0, 300.0) == (5, 5)
+
+
+def test_append_resumes_and_drops_torn_record():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session.ssml')
+        _write(path, 0.0, 3)
+        with open(path, 'ab') as f:
+            f.write(b'\x00' * (RECORD.size // 2))  # Crash mid-record
+        _write(path, 10.0, 2)
+        assert os.path.getsize(path) == FILE_HEADER.size + 5 * RECORD.size
+        with MetricsLogReader(path) as reader:
+            assert reader.start_time == 0.0
+            assert [record[0] for record in reader.records()] == [0.0, 1.0, 2.0, 10.0, 11.0]
+
+
+def test_empty_and_invalid_logs():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'empty.ssml')
+        MetricsLogWriter(path, start_time=1.0).close()
+        with MetricsLogReader(path) as reader:
+            assert len(reader) == 0 and list(reader.records()) == []
+
+        bogus = os.path.join(directory, 'bogus.ssml')
+        with open(bogus, 'wb') as f:
+            f.write(b'\x00' * FILE_HEADER.size)
+        try:
+            MetricsLogReader(bogus)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("invalid log accepted")
+
+
+def test_flags_round_trip():
+    metrics = {'focused': True, 'ai_detected_phone': True, 'eye_closed': False}
+    decoded = decode_flags(metrics_flags(metrics))
+    assert decoded['focused'] and decoded['ai_detected_phone']
+    assert not decoded['eye_closed'] and not decoded['yawning']
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing metrics log")
+    tests = [test_round_trip, test_append_resumes_and_drops_torn_record,
+             test_empty_and_invalid_logs, test_flags_round_trip]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All metrics log tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test cross-thread micro-batching
+"""
+
+import threading
+import time
+
+from micro_batch import MicroBatcher
+
+
+def test_results_match_items():
+    """Concurrent callers are batched and each gets its own result"""
+    sizes = []
+
+    def double(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch=8, max_delay_ms=50)
+    results = {}
+    barrier = threading.Barrier(6)
+
+    def call(i):
+        barrier.wait()
+        results[i] = batcher.submit(i, caller=i)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+    assert results == {i: i * 2 for i in range(6)}
+    assert sum(sizes) == 6 and max(sizes) > 1
+
+
+def test_lone_caller_not_delayed():
+    batcher = MicroBatcher(lambda items: items, max_batch=8, max_delay_ms=500)
+    batcher.submit(1, caller='a')
+    start = time.perf_counter()
+    assert batcher.submit(2, caller='a') == 2
+    assert time.perf_counter() - start < 0.25
+    batcher.stop()
+
+
+def test_timed_out_item_is_withdrawn():
+    """An item whose caller gave up is never run and stops counting as active"""
+    release = threading.Event()
+    seen = []
+
+    def slow(items):
+        seen.extend(items)
+        release.wait(2.0)
+        return items
+
+    batcher = MicroBatcher(slow, max_batch=1, max_delay_ms=0)
+    first = threading.Thread(target=batcher.submit, args=('first',), kwargs={'caller': 'a'})
+    first.start()
+    while not seen:
+        time.sleep(0.005)
+
+    try:
+        batcher.submit('stale', caller='b', timeout=0.05)
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("submit did not time out")
+    assert batcher.stats()['queued'] == 0
+    assert 'b' not in batcher._callers
+
+    release.set()
+    first.join()
+    assert batcher.submit('next', caller='c', timeout=1.0) == 'next'
+    assert 'stale' not in seen
+    assert batcher.stats()['timeouts'] == 1
+    batcher.stop()
+
+
+def test_errors_reach_every_caller():
+    def fail(items):
+        raise RuntimeError("detector failed")
+
+    batcher = MicroBatcher(fail, max_batch=4, max_delay_ms=1)
+    try:
+        batcher.submit('x')
+    except RuntimeError as e:
+        assert "detector failed" in str(e)
+    else:
+        raise AssertionError("error not raised")
+    batcher.stop()
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing micro-batching")
+    tests = [test_results_match_items, test_lone_caller_not_delayed,
+             test_timed_out_item_is_withdrawn, test_errors_reach_every_caller]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All micro-batching tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
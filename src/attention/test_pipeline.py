@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test the stage-graph pipeline engine and the shared-memory frame ring
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from attention_stages import face_box_stage, face_orientation_stage, hand_proximity_stage, phone_stages
+from pipeline import Pipeline, Stage
+from shared_frames import SharedFrameRing, SharedFrameSource
+from stage_metrics import StageTimers
+
+
+def _pipeline(stages, **kwargs):
+    return Pipeline(stages, timers=StageTimers(), **kwargs)
+
+
+def test_dependency_order():
+    calls = []
+    stages = [
+        Stage('score', lambda a, b: calls.append('score') or a + b, inputs=('a', 'b'), outputs=('score',)),
+        Stage('b', lambda a: calls.append('b') or a * 10, inputs=('a',), outputs=('b',)),
+        Stage('a', lambda frame: calls.append('a') or frame + 1, inputs=('frame',), outputs=('a',)),
+    ]
+    context = _pipeline(stages).run(frame=1)
+    assert calls == ['a', 'b', 'score'] and context['score'] == 22
+
+
+def test_graph_errors():
+    for stages in ([Stage('x', lambda y: y, inputs=('y',), outputs=('z',))],
+                   [Stage('x', lambda f: f, inputs=('frame',), outputs=('z',)),
+                    Stage('y', lambda f: f, inputs=('frame',), outputs=('z',))]):
+        try:
+            _pipeline(stages)
+        except ValueError:
+            continue
+        raise AssertionError("invalid graph accepted")
+
+
+def test_cadence_and_when():
+    runs = []
+    pipeline = _pipeline([
+        Stage('slow', lambda frame: runs.append(frame) or frame, inputs=('frame',), outputs=('slow',), every=3),
+        Stage('gated', lambda frame: 'ran', inputs=('frame',), outputs=('gated',),
+              when=lambda context: context['frame'] % 2 == 0, defaults={'gated': 'skipped'}),
+    ])
+    results = [pipeline.run(frame=i) for i in range(1, 7)]
+    assert runs == [1, 3, 6]
+    assert [r['slow'] for r in results] == [1, 1, 3, 3, 3, 6]
+    assert [r['gated'] for r in results] == ['skipped', 'ran'] * 3
+
+
+def test_attach_detach():
+    pipeline = _pipeline([Stage('a', lambda frame: frame, inputs=('frame',), outputs=('a',))])
+    sink = []
+    pipeline.attach(Stage('sink', sink.append, inputs=('a',)))
+    pipeline.run(frame=5)
+    pipeline.detach('sink')
+    pipeline.run(frame=6)
+    assert sink == [5]
+    try:
+        pipeline.detach('missing')
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("unknown stage detached")
+
+
+def test_background_stage_gets_own_frame():
+    """A background run keeps reading its frame after the caller reuses the buffer"""
+    started, finish = threading.Event(), threading.Event()
+    seen = []
+
+    def detect(frame):
+        started.set()
+        finish.wait(2.0)
+        seen.append(int(frame.max()))
+        return ['phone']
+
+    pipeline = _pipeline([Stage('detect', detect, inputs=('frame',), outputs=('objects',),
+                                background=True, defaults={'objects': []})])
+    buffer = np.full((4, 4, 3), 7, dtype=np.uint8)
+    assert pipeline.run(frame=buffer)['objects'] == []
+    started.wait(2.0)
+    buffer[:] = 99
+    finish.set()
+    deadline = time.time() + 2.0
+    while not seen and time.time() < deadline:
+        time.sleep(0.01)
+    assert seen == [7]
+    assert pipeline.run(frame=buffer)['objects'] == ['phone']
+    pipeline.close()
+
+
+def test_ring_slot_reuse_with_background_stage():
+    """Ring slots are recycled on the next read; a background stage still sees its frame"""
+    ring = SharedFrameRing((8, 8, 3), slots=3)
+    source = SharedFrameSource(ring, timeout=1.0)
+    release = threading.Event()
+    seen = []
+
+    def detect(frame):
+        release.wait(2.0)
+        seen.append(int(frame[0, 0, 0]))
+
+    pipeline = _pipeline([Stage('detect', detect, inputs=('frame',), background=True)])
+    frame = None
+    try:
+        ring.write(np.full((8, 8, 3), 1, dtype=np.uint8))
+        ok, frame = source.read()
+        assert ok
+        pipeline.run(frame=frame)
+        # Overwrite every slot while the detector is still running
+        for value in (2, 3, 4, 5):
+            ring.write(np.full((8, 8, 3), value, dtype=np.uint8))
+            source.read()
+        release.set()
+        deadline = time.time() + 2.0
+        while not seen and time.time() < deadline:
+            time.sleep(0.01)
+        assert seen == [1]
+    finally:
+        pipeline.close()
+        ring.close()
+        # Views into the block must be gone before it is unmapped
+        del frame
+        source.release()
+
+
+def _landmarks(*points):
+    return SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y) for x, y in points])
+
+
+def test_landmark_tracker_stages():
+    """The face box / orientation / phone configuration the YOLO and detector trackers build on"""
+    phone = {'bbox': (500, 400, 600, 470), 'confidence': 0.8, 'class_name': 'cell phone'}
+    tracker = SimpleNamespace(
+        frame_width=200, frame_height=100, yaw_threshold=0.25, pitch_threshold=0.35,
+        calculate_face_orientation=lambda face_landmarks: (0.5, 0.0),
+        is_hand_near_face=lambda face_bbox, hands: True,
+        is_phone_near_face=lambda face_bbox, phone_objects: (False, 0.0))
+    pipeline = _pipeline([
+        Stage('models', lambda frame: (
+            SimpleNamespace(multi_face_landmarks=[_landmarks((0.25, 0.2), (0.75, 0.6))]),
+            SimpleNamespace(multi_hand_landmarks=[_landmarks((0.5, 0.5))])),
+              inputs=('frame',), outputs=('face_results', 'hands_results')),
+        face_box_stage(tracker),
+        face_orientation_stage(tracker),
+        hand_proximity_stage(tracker),
+        *phone_stages(tracker, every=1, detect=lambda frame, face_bbox: [phone],
+                      hand_confirms=lambda obj: 'phone' in obj['class_name']),
+    ], inputs=('frame', 'frame_index'))
+    try:
+        deadline = time.time() + 5.0
+        context = pipeline.run(frame=np.zeros((4, 4, 3), np.uint8), frame_index=1)
+        assert context['face_bbox'] == (50, 20, 150, 60) and context['face_visible']
+        assert context['yaw'] == 0.5 and not context['orientation_good']
+        while not context['phone_objects'] and time.time() < deadline:
+            time.sleep(0.01)
+            context = pipeline.run(frame=np.zeros((4, 4, 3), np.uint8), frame_index=2)
+        # No face overlap, but a hand at the face plus a detected phone counts
+        assert context['hand_near_face']
+        assert context['phone_near_face'] and context['phone_confidence'] == 0.8
+    finally:
+        pipeline.close()
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing pipeline engine")
+    tests = [test_dependency_order, test_graph_errors, test_cadence_and_when, test_attach_detach,
+             test_background_stage_gets_own_frame, test_ring_slot_reuse_with_background_stage,
+             test_landmark_tracker_stages]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All pipeline tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
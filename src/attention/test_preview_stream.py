@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test encode-once preview broadcasting
+"""
+
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from preview_stream import PreviewBroadcaster, ViewerClass, MIN_QUALITY
+
+
+def _frame(value, width=64, height=48):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def _decoded_value(jpeg):
+    return int(round(cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_GRAYSCALE).mean()))
+
+
+def test_unwatched_frames_are_dropped():
+    preview = PreviewBroadcaster()
+    preview.publish(_frame(10))
+    assert preview.sequence.value == 0
+    viewer_class = preview.add_viewer('desktop')
+    assert preview.encoded(viewer_class) == (0, b'')
+
+
+def test_encoded_once_per_class():
+    preview = PreviewBroadcaster()
+    desktop = preview.add_viewer('desktop')
+    preview.add_viewer('desktop')
+    thumbnail = preview.add_viewer('thumbnail')
+    preview.publish(_frame(100, 1280, 720))
+
+    first = preview.encoded(desktop)
+    assert preview.encoded(desktop) is first
+    assert first[0] == 1 and desktop.encodes == 1
+
+    seq, jpeg = preview.encoded(thumbnail)
+    assert seq == 1 and thumbnail.encodes == 1
+    width = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR).shape[1]
+    assert width <= thumbnail.max_width
+
+
+def test_sequence_matches_frame():
+    """The JPEG cached under a sequence is always that sequence's frame"""
+    preview = PreviewBroadcaster()
+    viewer_class = preview.add_viewer('thumbnail')
+    stop = threading.Event()
+
+    def produce():
+        while not stop.is_set():
+            seq = preview.sequence.value + 1
+            preview.publish(_frame(seq * 10 % 250))
+
+    # Switch threads as often as possible to expose unsynchronized reads
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    producer = threading.Thread(target=produce)
+    producer.start()
+    mismatches = checked = 0
+    deadline = time.time() + 0.5
+    try:
+        while time.time() < deadline:
+            seq, jpeg = preview.encoded(viewer_class)
+            if jpeg:
+                checked += 1
+                if abs(_decoded_value(jpeg) - seq * 10 % 250) > 2:
+                    mismatches += 1
+    finally:
+        stop.set()
+        producer.join()
+        sys.setswitchinterval(switch_interval)
+    assert checked > 0 and mismatches == 0, (checked, mismatches)
+
+
+def test_quality_adapts_to_budget():
+    viewer_class = ViewerClass('tiny', max_width=320, max_fps=10, quality=80, kbps=8)
+    for _ in range(20):
+        viewer_class.adapt(int(viewer_class.frame_budget * 4))
+    assert viewer_class.quality == MIN_QUALITY and viewer_class.scale < 1.0
+    for _ in range(40):
+        viewer_class.adapt(0)
+    assert viewer_class.quality == 80 and viewer_class.scale == 1.0
+
+
+def test_last_viewer_leaving_drops_frame():
+    preview = PreviewBroadcaster()
+    preview.add_viewer('mobile')
+    preview.publish(_frame(50))
+    preview.remove_viewer('mobile')
+    assert not preview.watched
+    viewer_class = preview.add_viewer('mobile')
+    assert preview.encoded(viewer_class) == (0, b'')
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing preview streaming")
+    tests = [test_unwatched_frames_are_dropped, test_encoded_once_per_class, test_sequence_matches_frame,
+             test_quality_adapts_to_budget, test_last_viewer_leaving_drops_frame]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All preview tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test the adaptive quality controller
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from pipeline import Pipeline, Stage
+from quality_controller import QualityController, QualityLevel
+from stage_metrics import StageTimers
+
+# Same shape as QUALITY_LADDER, but keeps the face mesh so no model is rebuilt
+LADDER = (
+    QualityLevel('full', 1.0, True, 1, 1, 1, 1.0),
+    QualityLevel('balanced', 1.0, True, 2, 2, 2, 0.8),
+    QualityLevel('low', 0.5, True, 4, 4, 4, 0.5),
+)
+
+
+class FakeDetector:
+    search_margin = 200
+
+
+class FakeTracker:
+    """Just the attributes the controller tunes"""
+
+    def __init__(self, detect=None):
+        self.frame_width, self.frame_height = 640, 480
+        self.process_width, self.process_height = 640, 480
+        self.detection_frame_skip = 3
+        self.vlm_every = 25
+        self.phone_detector = FakeDetector()
+        self.pipeline = Pipeline([
+            Stage('phone_detection', detect or (lambda frame: [{'bbox': (0, 0, 10, 10)}]),
+                  inputs=('frame',), outputs=('phone_objects',), background=True,
+                  defaults={'phone_objects': []}),
+            Stage('pose', lambda frame: True, inputs=('frame',), outputs=('posture_stable',)),
+        ], timers=StageTimers())
+
+
+def _controller(tracker, **kwargs):
+    return QualityController(tracker, target_fps=10, window=5, up_windows=2, ladder=LADDER, **kwargs)
+
+
+def test_steps_down_and_back_up():
+    tracker = FakeTracker()
+    controller = _controller(tracker)
+    for _ in range(5):
+        controller.observe(0.2)
+    assert controller.current.name == 'balanced'
+    assert tracker.detection_frame_skip == 6 and tracker.vlm_every == 50
+    assert tracker.phone_detector.search_margin == 160
+    assert tracker.pipeline.stage('pose').every == 2
+
+    for _ in range(10):
+        controller.observe(0.01)
+    assert controller.current.name == 'full'
+    assert tracker.detection_frame_skip == 3 and tracker.phone_detector.search_margin == 200
+    assert [t['to'] for t in controller.transitions] == ['balanced', 'full']
+
+
+def test_failed_step_up_needs_more_headroom():
+    controller = _controller(FakeTracker())
+    controller.set_level(1)
+    for _ in range(10):
+        controller.observe(0.01)
+    assert controller.level == 0
+    for _ in range(5):
+        controller.observe(0.2)
+    assert controller.level == 1 and controller._up_required == 4
+
+
+def test_prepare_keeps_capture_size():
+    tracker = FakeTracker()
+    controller = _controller(tracker)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    assert controller.prepare(frame) is frame
+    controller.set_level(2)
+    assert controller.prepare(frame).shape == (240, 320, 3)
+    assert (tracker.frame_width, tracker.frame_height) == (640, 480)
+
+
+def test_scale_change_drops_phone_boxes():
+    """Held and in-flight detections from the old resolution are discarded"""
+    started, release = threading.Event(), threading.Event()
+
+    def detect(frame):
+        started.set()
+        release.wait(2.0)
+        return [{'bbox': (100, 100, 200, 200)}]
+
+    tracker = FakeTracker(detect)
+    controller = _controller(tracker)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    tracker.pipeline.run(frame=frame)
+    started.wait(2.0)
+
+    controller.set_level(2)
+    release.set()
+    stage = tracker.pipeline.stage('phone_detection')
+    deadline = time.time() + 2.0
+    while stage.runs == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert stage.runs == 1
+    assert tracker.pipeline.run(frame=frame)['phone_objects'] == []
+    tracker.pipeline.close()
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing quality controller")
+    tests = [test_steps_down_and_back_up, test_failed_step_up_needs_more_headroom,
+             test_prepare_keeps_capture_size, test_scale_change_drops_phone_boxes]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All quality controller tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
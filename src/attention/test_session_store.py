@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite session history store and its rollups
+"""
+
+import os
+import tempfile
+
+from session_store import SessionStore
+
+
+def _store(directory):
+    return SessionStore(os.path.join(directory, 'sessions.db'), flush_interval=0.05)
+
+
+def test_rollups_after_flush():
+    """Frames fold into 1s, 1m and per-phase rollups once flushed"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = _store(directory)
+        store.start_session('s1', 'pomodoro', 1000.0)
+        for i in range(120):
+            store.record_frame('s1', 1000.0 + i * 0.5, 1, 'focus',
+                               {'focus_score': 0.8 if i % 2 else 0.4, 'focused': bool(i % 2)})
+        store.record_frame('s1', 1061.0, 2, 'break', {'focus_score': 0.0, 'phone_near_face': True})
+        assert store.flush()
+
+        seconds = store.session_rollup('s1', '1s')
+        assert sum(bucket['frames'] for bucket in seconds) == 121
+        assert seconds[0]['ts'] == 1000 and seconds[0]['frames'] == 2
+
+        phases = store.get_session('s1')['phases']
+        assert [phase['phase'] for phase in phases] == ['focus', 'break']
+        assert phases[0]['frames'] == 120
+        assert abs(phases[0]['focus_avg'] - 0.6) < 1e-6
+        assert phases[0]['focused_ratio'] == 0.5
+        assert phases[1]['phone_frames'] == 1
+        store.close()
+
+
+def test_end_session_visible_after_flush():
+    with tempfile.TemporaryDirectory() as directory:
+        store = _store(directory)
+        store.start_session('s2', 'deep_work', 2000.0)
+        store.end_session('s2', 2600.0, {'rounds_completed': 1, 'total_focus_time': 600.0,
+                                         'phone_detections': 3, 'focus_score_avg': 0.7})
+        assert store.flush()
+        session = store.list_sessions(since=0)[0]
+        assert session['end_time'] == 2600.0 and session['phone_detections'] == 3
+        store.close()
+
+
+def test_close_commits_queued_writes():
+    """Writes queued before close() are on disk when it returns"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = _store(directory)
+        store.start_session('s3', 'pomodoro', 3000.0)
+        for i in range(50):
+            store.record_frame('s3', 3000.0 + i, 1, 'focus', {'focus_score': 1.0, 'focused': True})
+        store.close()
+
+        reopened = _store(directory)
+        assert reopened.get_session('s3')['phases'][0]['frames'] == 50
+        reopened.close()
+
+
+def test_backend_opens_store_lazily():
+    """Constructing the backend touches no files; close() flushes what was written"""
+    from study_session_backend import StudySessionBackend
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = StudySessionBackend(data_dir=directory)
+        assert os.listdir(directory) == []
+        backend.store.start_session('s4', 'pomodoro', 4000.0)
+        backend.close()
+        assert os.path.exists(backend.db_path)
+
+
+def test_session_ids_unique_within_a_second():
+    from datetime import datetime
+    from study_session_backend import StudySessionBackend
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = StudySessionBackend(data_dir=directory)
+        start = datetime(2024, 5, 1, 9, 30, 15)
+        ids = {backend._new_session_id('pomodoro', start) for _ in range(50)}
+        assert len(ids) == 50
+        assert all(session_id.startswith('pomodoro_20240501_093015_') for session_id in ids)
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing session store")
+    tests = [test_rollups_after_flush, test_end_session_visible_after_flush,
+             test_close_commits_queued_writes, test_backend_opens_store_lazily,
+             test_session_ids_unique_within_a_second]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All session store tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test the shared-memory frame ring and its FrameSource end
+"""
+
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from shared_frames import SharedFrameRing, SharedFrameSource, SLOT_FREE, SLOT_READING
+
+SHAPE = (8, 8, 3)
+
+
+def _frame(value):
+    return np.full(SHAPE, value, dtype=np.uint8)
+
+
+def _read_in_child(source, conn):
+    """Spawned consumer: report whether a frame arrived and its pixel value"""
+    ok, frame = source.read()
+    conn.send((ok, int(frame[0, 0, 0]) if ok else None))
+    del frame
+    source.release()
+
+
+def test_newest_frame_wins_and_release_frees_slot():
+    ring = SharedFrameRing(SHAPE, slots=3)
+    try:
+        for value in (1, 2, 3):
+            ring.write(_frame(value), timestamp=float(value))
+        seq, view, capture_time = ring.acquire(timeout=0.1)
+        assert (seq, int(view[0, 0, 0]), capture_time) == (3, 3, 3.0)
+        # The two older unread frames were skipped and their slots freed
+        assert ring.stats()['dropped'] == 2
+        assert sorted(ring._meta[:, 1]) == [SLOT_FREE, SLOT_FREE, SLOT_READING]
+
+        # Nothing newer than what was taken
+        assert ring.acquire(timeout=0.05, after=seq)[1] is None
+        ring.release(seq)
+        assert list(ring._meta[:, 1]) == [SLOT_FREE] * 3
+        del view
+    finally:
+        ring.detach()
+
+
+def test_writer_never_overwrites_slot_being_read():
+    ring = SharedFrameRing(SHAPE, slots=3)
+    try:
+        held_seq = ring.write(_frame(1))
+        seq, held, _ = ring.acquire(timeout=0.1)
+        assert seq == held_seq
+        # Consumer is slow: the producer laps the ring several times
+        for value in range(2, 9):
+            ring.write(_frame(value))
+        assert int(held.min()) == 1 and int(held.max()) == 1
+        stats = ring.stats()
+        assert stats['written'] == 8 and stats['sequence'] == 8 and stats['dropped'] == 5
+
+        ring.release(seq)
+        seq, view, _ = ring.acquire(timeout=0.1, after=seq)
+        assert seq == 8 and int(view[0, 0, 0]) == 8
+        del held, view
+    finally:
+        ring.detach()
+
+
+def test_reset_readers_frees_dead_consumer_slots():
+    ring = SharedFrameRing(SHAPE, slots=3)
+    try:
+        ring.write(_frame(1))
+        seq, view, _ = ring.acquire(timeout=0.1)
+        del view
+        ring.reset_readers()
+        assert list(ring._meta[:, 1]) == [SLOT_FREE] * 3
+        ring.release(seq)  # Late release of a freed slot is harmless
+    finally:
+        ring.detach()
+
+
+def test_close_wakes_waiting_reader():
+    ring = SharedFrameRing(SHAPE, slots=3)
+    source = SharedFrameSource(ring, timeout=5.0)
+    assert source.isOpened()
+    threading.Timer(0.05, ring.close).start()
+    start = time.perf_counter()
+    assert source.read() == (False, None)
+    assert time.perf_counter() - start < 2.0
+    assert ring.closed and not source.isOpened()
+    source.release()
+
+
+def test_source_releases_previous_frame_on_read():
+    ring = SharedFrameRing(SHAPE, slots=3)
+    source = SharedFrameSource(ring, timeout=0.1)
+    ring.write(_frame(1))
+    ok, frame = source.read()
+    assert ok and int(frame[0, 0, 0]) == 1
+    assert source.frame_size == (8, 8)
+    ring.write(_frame(2))
+    ok, frame = source.read()
+    assert ok and int(frame[0, 0, 0]) == 2
+    assert list(ring._meta[:, 1]).count(SLOT_READING) == 1
+    # No new frame: read fails instead of returning the same one again
+    assert source.read() == (False, None)
+    del frame
+    source.release()
+
+
+def test_detach_unlinks_block():
+    ring = SharedFrameRing(SHAPE, slots=3)
+    name = ring.name
+    ring.detach()
+    ring.detach()  # Idempotent
+    try:
+        shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("shared memory block still exists")
+
+
+def test_invalid_rings_and_frames():
+    try:
+        SharedFrameRing(SHAPE, slots=2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ring with too few slots accepted")
+    ring = SharedFrameRing(SHAPE, slots=3)
+    try:
+        ring.write(np.zeros((4, 4, 3), dtype=np.uint8))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("frame of the wrong shape accepted")
+    finally:
+        ring.detach()
+
+
+def test_frames_cross_process():
+    ring = SharedFrameRing(SHAPE, slots=3)
+    context = multiprocessing.get_context('spawn')
+    parent_conn, child_conn = context.Pipe()
+    try:
+        process = context.Process(target=_read_in_child, args=(SharedFrameSource(ring, timeout=10.0), child_conn))
+        process.start()
+        ring.write(_frame(42))
+        assert parent_conn.poll(30.0)
+        assert parent_conn.recv() == (True, 42)
+        process.join(10.0)
+        assert process.exitcode == 0
+    finally:
+        ring.close()
+        ring.detach()
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing shared frame ring")
+    tests = [test_newest_frame_wins_and_release_frees_slot, test_writer_never_overwrites_slot_being_read,
+             test_reset_readers_frees_dead_consumer_slots, test_close_wakes_waiting_reader,
+             test_source_releases_previous_frame_on_read, test_detach_unlinks_block,
+             test_invalid_rings_and_frames, test_frames_cross_process]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All shared frame ring tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
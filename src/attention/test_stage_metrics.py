@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test per-stage latency histograms
+"""
+
+import sys
+import threading
+
+from stage_metrics import EXPORT_BUCKETS, RollingHistogram, StageTimers
+
+
+def test_quantiles_and_buckets():
+    histogram = RollingHistogram(window_seconds=60.0)
+    for _ in range(90):
+        histogram.record(0.002, now=10.0)
+    for _ in range(10):
+        histogram.record(0.2, now=10.0)
+    quantiles = histogram.quantiles(now=10.0)
+    assert abs(quantiles[0.5] - 0.002) < 0.0002
+    assert abs(quantiles[0.99] - 0.2) < 0.02
+    buckets, count, total = histogram.export()
+    assert buckets[EXPORT_BUCKETS.index(0.0025)] == 90 and buckets[-1] == count == 100
+    assert abs(total - (90 * 0.002 + 10 * 0.2)) < 1e-9
+
+
+def test_window_forgets_old_slices():
+    histogram = RollingHistogram(window_seconds=60.0, slices=6)
+    histogram.record(0.001, now=0.0)
+    assert histogram.quantiles(now=30.0)[0.5] is not None
+    assert histogram.quantiles(now=120.0)[0.5] is None
+    assert histogram.count == 1
+
+
+def test_concurrent_records_stay_consistent():
+    """Tracker and executor threads share one histogram; no update may be lost"""
+    timers = StageTimers()
+    threads, per_thread = 8, 5000
+
+    def record():
+        for i in range(per_thread):
+            timers.record('face_mesh', 0.001 * (i % 7 + 1))
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target=record) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    histogram = timers.histograms['face_mesh']
+    buckets, count, _ = histogram.export()
+    assert count == threads * per_thread, count
+    assert sum(histogram.counts) == count and buckets[-1] == count
+    assert timers.summary()['face_mesh']['count'] == count
+
+
+def test_prometheus_text():
+    timers = StageTimers()
+    timers.record('pose', 0.004)
+    text = timers.prometheus_text()
+    assert 'attention_stage_duration_seconds_bucket{stage="pose",le="0.005"} 1' in text
+    assert 'attention_stage_duration_seconds_count{stage="pose"} 1' in text
+    assert timers.begin() is not None
+    timers.set_enabled(False)
+    timing = timers.begin()
+    timing.lap('pose')
+    timing.end()
+    assert timers.histograms['pose'].count == 1
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing stage metrics")
+    tests = [test_quantiles_and_buckets, test_window_forgets_old_slices,
+             test_concurrent_records_stay_consistent, test_prometheus_text]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All stage metrics tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test the fair multi-stream scheduler and client source validation
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from frame_source import client_source, parse_url_allowlist
+from stream_manager import FairScheduler
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+def test_free_slots_reach_every_waiter():
+    """Slots freed together go to all queued streams, not just the first in line"""
+    scheduler = FairScheduler(slots=4)
+    holders = [f'holder{i}' for i in range(4)]
+    waiters = [f'waiter{i}' for i in range(4)]
+    for stream_id in holders + waiters:
+        scheduler.register(stream_id)
+    # waiter0 has used the least time, so it is first in line
+    for i, stream_id in enumerate(waiters):
+        assert scheduler.acquire(stream_id, timeout=1.0)
+        scheduler.release(stream_id, float(i))
+    for stream_id in holders:
+        assert scheduler.acquire(stream_id, timeout=1.0)
+
+    results = {}
+
+    def wait(stream_id):
+        start = time.perf_counter()
+        results[stream_id] = (scheduler.acquire(stream_id, timeout=2.0), time.perf_counter() - start)
+
+    # Queue the last in line first, so it is woken first and goes back to sleep
+    threads = []
+    for count, stream_id in enumerate(reversed(waiters), start=1):
+        thread = threading.Thread(target=wait, args=(stream_id,))
+        thread.start()
+        threads.append(thread)
+        _wait_until(lambda: scheduler.status()['waiting'] == count)
+
+    release_time = time.perf_counter()
+    with scheduler._cond:
+        for stream_id in holders:
+            scheduler.release(stream_id, 0.0)
+    for thread in threads:
+        thread.join()
+
+    assert all(granted for granted, _ in results.values()), results
+    assert time.perf_counter() - release_time < 1.0
+    assert scheduler.status()['busy'] == 4
+
+
+def test_least_served_stream_goes_first():
+    scheduler = FairScheduler(slots=1)
+    for stream_id in ('busy', 'idle', 'holder'):
+        scheduler.register(stream_id)
+    scheduler.acquire('busy')
+    scheduler.release('busy', 5.0)
+    scheduler.acquire('holder')
+
+    order = []
+
+    def run(stream_id):
+        if scheduler.acquire(stream_id, timeout=2.0):
+            order.append(stream_id)
+            scheduler.release(stream_id, 0.01)
+
+    threads = [threading.Thread(target=run, args=(stream_id,)) for stream_id in ('busy', 'idle')]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: scheduler.status()['waiting'] == 2)
+    scheduler.release('holder', 0.0)
+    for thread in threads:
+        thread.join()
+    assert order == ['idle', 'busy']
+
+
+def test_acquire_times_out():
+    scheduler = FairScheduler(slots=1)
+    scheduler.register('a')
+    scheduler.register('b')
+    assert scheduler.acquire('a')
+    assert not scheduler.acquire('b', timeout=0.05)
+    assert scheduler.status()['waiting'] == 0
+
+
+def test_client_source_allow_list():
+    assert client_source('0') == '0'
+    assert client_source('synthetic:100') == 'synthetic:100'
+    with tempfile.TemporaryDirectory() as media_dir:
+        clip = os.path.join(media_dir, 'clip.mp4')
+        open(clip, 'wb').close()
+        assert client_source('clip.mp4', media_dir) == os.path.realpath(clip)
+        for spec in ('../etc/passwd', '/etc/passwd', 'file:///etc/passwd', 'missing.mp4'):
+            try:
+                client_source(spec, media_dir)
+            except ValueError:
+                continue
+            raise AssertionError(f"{spec} was accepted")
+    try:
+        client_source('clip.mp4')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("file source accepted without a media directory")
+
+
+def test_url_sources_need_allowlist():
+    url = 'rtsp://camera.local/live/desk'
+    allowlist = parse_url_allowlist(' camera.local , https://cdn.example.com/live/ ')
+    assert allowlist == ('camera.local', 'https://cdn.example.com/live/')
+    assert client_source(url, url_allowlist=allowlist) == url
+    assert client_source('rtsp://user:pw@Camera.local:554/x', url_allowlist=allowlist)
+    assert client_source('https://cdn.example.com/live/a.m3u8', url_allowlist=allowlist)
+    rejected = (
+        (url, ()),  # Disabled by default
+        ('http://169.254.169.254/latest/meta-data', allowlist),
+        ('rtsp://camera.local.evil.com/live', allowlist),
+        ('http://cdn.example.com/live/a.m3u8', allowlist),  # Scheme differs from the prefix
+        ('https://cdn.example.com.evil.com/live/a', allowlist),
+        ('https://cdn.example.com/private/a', allowlist),
+        ('ftp://camera.local/x', allowlist),
+    )
+    for spec, urls in rejected:
+        try:
+            client_source(spec, url_allowlist=urls)
+        except ValueError:
+            continue
+        raise AssertionError(f"{spec} was accepted")
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing stream scheduler")
+    tests = [test_free_slots_reach_every_waiter, test_least_served_stream_goes_first,
+             test_acquire_times_out, test_client_source_allow_list, test_url_sources_need_allowlist]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All stream scheduler tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test constant-memory streaming statistics
+"""
+
+import random
+import statistics
+
+from streaming_stats import P2Quantile, StreamingStats
+
+
+def test_moments_match_exact():
+    rng = random.Random(1)
+    values = [rng.gauss(0.6, 0.2) for _ in range(200)]
+    stats = StreamingStats()
+    for value in values:
+        stats.add(value)
+    assert stats.count == len(values)
+    assert abs(stats.mean - statistics.mean(values)) < 1e-9
+    assert abs(stats.variance - statistics.variance(values)) < 1e-9
+    assert stats.min == min(values) and stats.max == max(values)
+
+
+def test_quantiles_track_distribution():
+    rng = random.Random(7)
+    values = [rng.uniform(0.0, 1.0) for _ in range(5000)]
+    stats = StreamingStats()
+    for value in values:
+        stats.add(value)
+    ordered = sorted(values)
+    assert abs(stats.quantile(0.5) - ordered[len(ordered) // 2]) < 0.03
+    assert abs(stats.quantile(0.9) - ordered[int(len(ordered) * 0.9)]) < 0.03
+
+
+def test_small_samples_are_exact():
+    estimator = P2Quantile(0.5)
+    assert estimator.value is None
+    for value in (5.0, 1.0, 3.0):
+        estimator.add(value)
+    assert estimator.value == 3.0
+    try:
+        P2Quantile(1.0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("out-of-range quantile accepted")
+
+
+def test_ewma_and_reset():
+    stats = StreamingStats(ewma_alpha=0.5)
+    stats.add(0.0)
+    stats.add(1.0)
+    assert stats.ewma == 0.5
+    summary = stats.to_dict()
+    assert summary['count'] == 2 and summary['p50'] is not None and 'p90' in summary
+    stats.reset()
+    assert stats.count == 0 and stats.ewma is None and stats.to_dict()['p50'] is None
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing streaming stats")
+    tests = [test_moments_match_exact, test_quantiles_track_distribution,
+             test_small_samples_are_exact, test_ewma_and_reset]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All streaming stats tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test timeline downsampling and the session timeline endpoint
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from metrics_log import MetricsLogWriter, MetricsLogReader
+from timeline import lttb, minmax, downsample
+
+
+def _write_log(path, frames):
+    start = time.time()
+    writer = MetricsLogWriter(path, start)
+    for i in range(frames):
+        writer.append(start + i * 0.1, {'focus_score': (i % 10) / 10.0})
+    writer.close()
+
+
+def test_downsample_sizes():
+    """Downsampled series never exceed the requested point count"""
+    x = np.arange(10000, dtype=np.float64)
+    y = np.sin(x / 50.0)
+    for method in ('lttb', 'minmax'):
+        ts, values = downsample(x, y, 500, method)
+        assert len(ts) <= 500 and len(ts) == len(values)
+        assert np.all(np.diff(ts) >= 0)
+
+
+def test_lttb_keeps_endpoints():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.random.default_rng(0).random(1000)
+    ts, values = lttb(x, y, 100)
+    assert ts[0] == 0 and ts[-1] == 999
+    assert values[0] == y[0] and values[-1] == y[-1]
+
+
+def test_minmax_keeps_spikes():
+    """A one-frame dip survives min/max bucketing"""
+    x = np.arange(1000, dtype=np.float64)
+    y = np.ones(1000)
+    y[437] = 0.0
+    _, values = minmax(x, y, 50)
+    assert values.min() == 0.0
+
+
+def test_short_series_detached_from_mmap():
+    """Series shorter than `points` are copied, so the reader can close its map"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'short.ssml')
+        _write_log(path, 120)
+        for method in ('lttb', 'minmax'):
+            with MetricsLogReader(path) as reader:
+                ts, values = downsample(reader.column('timestamp'), reader.column('focus_score'), 500, method)
+            assert len(ts) == 120 and len(values) == 120
+            assert values[3] == np.float32(0.3)
+
+
+def test_short_session_timeline():
+    """get_timeline on a session with fewer frames than points"""
+    from study_session_backend import StudySessionBackend
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = StudySessionBackend(data_dir=directory)
+        _write_log(backend.metrics_log_path('short'), 42)
+        timeline = backend.get_timeline('short', points=500)
+        assert timeline['frames'] == 42
+        assert len(timeline['ts']) == 42 and len(timeline['values']) == 42
+        backend.close()
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing timeline downsampling")
+    tests = [test_downsample_sizes, test_lttb_keeps_endpoints, test_minmax_keeps_spikes,
+             test_short_series_detached_from_mmap, test_short_session_timeline]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All timeline tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
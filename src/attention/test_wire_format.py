@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the keyframe/delta wire format round trip
+"""
+
+from wire_format import AttentionWireEncoder, AttentionWireDecoder, KEYFRAME, DELTA, HEADER, MSGPACK_AVAILABLE
+
+FORMATS = ['struct', 'json'] + (['msgpack'] if MSGPACK_AVAILABLE else [])
+
+SNAPSHOTS = [
+    {'attention_score': 0.75, 'phone_detected': True, 'focus_status': 'focused',
+     'frame_width': 1280, 'status_messages': ['ok'], 'timestamp': 1000.0,
+     'gaze': 'center', 'blink_rate': 12},
+    {'attention_score': 0.5, 'phone_detected': None, 'focus_status': 'focused',
+     'frame_width': 1280, 'status_messages': ['ok'], 'timestamp': 1000.1,
+     'gaze': 'left'},
+    {'attention_score': 0.5, 'phone_detected': False, 'focus_status': 'distracted',
+     'frame_width': 1280, 'timestamp': 1000.2},
+    {'attention_score': 0.25, 'timestamp': 1000.3, 'gaze': 'right'},
+]
+
+
+def _expected(data):
+    """What a decoder should hold: every non-None value (floats compared loosely)"""
+    return {key: value for key, value in data.items() if value is not None}
+
+
+def _assert_matches(state, data):
+    expected = _expected(data)
+    assert set(state) == set(expected), (sorted(state), sorted(expected))
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert abs(state[key] - value) < 1e-3, key
+        else:
+            assert state[key] == value, key
+
+
+def _frame_type(payload, fmt):
+    if fmt == 'struct':
+        return HEADER.unpack_from(payload, 0)[1]
+    import json
+    return json.loads(payload)['t']
+
+
+def test_delta_round_trip_clears_fields():
+    """Fields that become None and extra keys that disappear are removed on the client"""
+    for fmt in FORMATS:
+        encoder = AttentionWireEncoder(keyframe_interval=1000)
+        decoder = AttentionWireDecoder(fmt)
+        for seq, data in enumerate(SNAPSHOTS, start=1):
+            encoder.publish(seq, data)
+            _, payload = encoder.encode(since=decoder.sequence, fmt=fmt)
+            if fmt != 'msgpack':
+                assert _frame_type(payload, fmt) == (KEYFRAME if seq == 1 else DELTA)
+            _assert_matches(decoder.apply(payload), data)
+
+
+def test_delta_against_older_ack():
+    """A delta against an older acknowledged sequence still clears fields"""
+    encoder = AttentionWireEncoder(keyframe_interval=1000)
+    decoder = AttentionWireDecoder('struct')
+    encoder.publish(1, SNAPSHOTS[0])
+    decoder.apply(encoder.encode(fmt='struct')[1])
+    for seq, data in enumerate(SNAPSHOTS[1:], start=2):
+        encoder.publish(seq, data)
+    # Client skipped straight from 1 to 4
+    _assert_matches(decoder.apply(encoder.encode(since=1, fmt='struct')[1]), SNAPSHOTS[-1])
+
+
+def test_up_to_date_client_gets_empty_payload():
+    encoder = AttentionWireEncoder()
+    encoder.publish(7, SNAPSHOTS[0])
+    assert encoder.encode(since=7) == (7, b'')
+
+
+def test_unchanged_fields_not_resent():
+    encoder = AttentionWireEncoder(keyframe_interval=1000)
+    encoder.publish(1, SNAPSHOTS[0])
+    keyframe = encoder.encode(fmt='struct')[1]
+    encoder.publish(2, dict(SNAPSHOTS[0]))
+    delta = encoder.encode(since=1, fmt='struct')[1]
+    assert len(delta) == HEADER.size < len(keyframe)
+
+
+def main():
+    """Run tests"""
+    print("🧪 Testing wire format")
+    tests = [test_delta_round_trip_clears_fields, test_delta_against_older_ack,
+             test_up_to_date_client_gets_empty_payload, test_unchanged_fields_not_resent]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    print("🎉 All wire format tests passed" if not failed else f"❌ {failed} test(s) failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    main()
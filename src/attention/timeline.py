@@ -0,0 +1,112 @@
+"""
+Downsampling of per-frame metric series for charts.
+Output size depends only on the requested point count, not the session length.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def _copy(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    """Series returned as-is, detached from the caller's buffer (it may be a closing mmap)"""
+    return np.array(x, dtype=np.float64), np.array(y, dtype=np.float64)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Keeps the first and last points and, per bucket, the point forming the
+    largest triangle with the previous pick and the next bucket's average.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return _copy(x, y)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+
+    picked = np.empty(points, dtype=np.int64)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs((x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+
+    return x[picked], y[picked]
+
+
+def minmax(x: np.ndarray, y: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Min/max bucketing - keeps each bucket's extremes in time order,
+    so short dips (e.g. a phone pickup) are never averaged away.
+    """
+    n = len(x)
+    buckets = points // 2
+    if points >= n or buckets < 1:
+        return _copy(x, y)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    lo = np.minimum.reduceat(y, starts)
+    hi = np.maximum.reduceat(y, starts)
+
+    picked = np.empty(buckets * 2, dtype=np.int64)
+    for i in range(buckets):
+        start, end = edges[i], edges[i + 1]
+        segment = y[start:end]
+        i_lo = start + int(np.flatnonzero(segment == lo[i])[0])
+        i_hi = start + int(np.flatnonzero(segment == hi[i])[0])
+        picked[2 * i], picked[2 * i + 1] = (i_lo, i_hi) if i_lo <= i_hi else (i_hi, i_lo)
+
+    return x[picked], y[picked]
+
+
+def downsample(x: np.ndarray, y: np.ndarray, points: int,
+               method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample a series to at most `points` points"""
+    if method == 'lttb':
+        return lttb(x, y, points)
+    if method == 'minmax':
+        return minmax(x, y, points)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+class TimelineCache:
+    """LRU cache of downsampled timelines for sessions that can no longer change"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple[Any, ...], timeline: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = timeline
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
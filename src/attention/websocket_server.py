@@ -16,6 +16,9 @@ from datetime import datetime
 import base64
 
 from precise_attention_tracker import PreciseAttentionTracker
+from wire_format import AttentionWireEncoder, MSGPACK_AVAILABLE
+from attention_metrics import FrameSnapshot
+from broadcast_hub import BroadcastHub
 
 class AttentionWebSocketServer:
     """
@@ -23,7 +26,9 @@ class AttentionWebSocketServer:
     """
     
     def __init__(self, host: str = "localhost", port: int = 8765, 
-                 camera_index: int = 0):
+                 camera_index: int = 0, broadcast_hz: float = 10.0,
+                 client_buffer_size: int = 16, high_water_mark: int = 8,
+                 degraded_hz: float = 2.0, evict_after_seconds: float = 10.0):
         """
         Initialize the attention tracking WebSocket server.
         
@@ -31,21 +36,35 @@ class AttentionWebSocketServer:
             host: Server host address
             port: Server port
             camera_index: Camera device index
+            broadcast_hz: Broadcast rate for clients that keep up
+            client_buffer_size: Messages buffered per client before the oldest is dropped
+            high_water_mark: Buffer depth at which a client is downsampled to degraded_hz
+            degraded_hz: Broadcast rate for lagging clients
+            evict_after_seconds: Disconnect clients that stay above the high-water mark this long
         """
         self.host = host
         self.port = port
         self.camera_index = camera_index
+        self.broadcast_interval = 1.0 / broadcast_hz
         
         # Connected clients
         self.clients: Set[websockets.WebSocketServerProtocol] = set()
         
+        # Per-client send buffers with downsampling and slow-consumer eviction
+        self.hub = BroadcastHub(
+            max_queue=client_buffer_size,
+            high_water_mark=high_water_mark,
+            degraded_rate_hz=degraded_hz,
+            evict_after_seconds=evict_after_seconds
+        )
+        
         # Attention tracking
         self.tracker = None
         self.tracking_active = False
         self.tracking_thread = None
         
-        # Data storage
-        self.current_data = {
+        # Data storage - the snapshot is replaced (never mutated) once per frame
+        initial_data = {
             'attention_score': 0,
             'eye_ar': 0,
             'mouth_ar': 0,
@@ -56,14 +75,18 @@ class AttentionWebSocketServer:
             'focus_status': 'unknown',
             'session_active': False
         }
+        self.current_snapshot = FrameSnapshot(0, initial_data)
+        self._broadcast_message = (None, None)  # (sequence, encoded message)
         
-        # Performance tracking
-        self.frame_count = 0
-        self.start_time = time.time()
+        # Compact wire format: client -> {'format', 'ack'}
+        self.frame_sequence = 0
+        self.wire_encoder = AttentionWireEncoder(keyframe_interval=30)
+        self.wire_clients: Dict[Any, Dict[str, Any]] = {}
         
     async def register_client(self, websocket, path):
         """Register a new client connection."""
         self.clients.add(websocket)
+        self.hub.register(websocket)
         print(f"Client connected. Total clients: {len(self.clients)}")
         
         try:
@@ -73,23 +96,33 @@ class AttentionWebSocketServer:
         except websockets.exceptions.ConnectionClosed:
             pass
         finally:
-            self.clients.remove(websocket)
+            self.clients.discard(websocket)
+            self.wire_clients.pop(websocket, None)
+            await self.hub.unregister(websocket)
             print(f"Client disconnected. Total clients: {len(self.clients)}")
     
-    async def broadcast_data(self, data: Dict[str, Any]):
-        """Broadcast data to all connected clients."""
-        if self.clients:
-            message = json.dumps(data)
-            disconnected = set()
-            
-            for client in self.clients:
-                try:
-                    await client.send(message)
-                except websockets.exceptions.ConnectionClosed:
-                    disconnected.add(client)
-            
-            # Remove disconnected clients
-            self.clients -= disconnected
+    def _attention_message(self) -> str:
+        """JSON attention_data message for the current frame, encoded once per sequence."""
+        snapshot = self.current_snapshot
+        seq, message = self._broadcast_message
+        if seq != snapshot.sequence:
+            message = '{"type":"attention_data","data":' + snapshot.json_text + '}'
+            self._broadcast_message = (snapshot.sequence, message)
+        return message
+    
+    def _client_payload(self, websocket):
+        """Payload for one client, resolved when its sender task is ready to send."""
+        wire = self.wire_clients.get(websocket)
+        if wire is not None:
+            # Binary keyframe/delta against the client's last ack
+            _, payload = self.wire_encoder.encode(wire['ack'], wire['format'])
+            return payload
+        return self._attention_message()
+    
+    async def broadcast_data(self, data: Optional[Dict[str, Any]] = None):
+        """Broadcast data (default: the current frame) to all connected clients."""
+        if self.hub.has_clients():
+            self.hub.publish(json.dumps(data) if data is not None else self._client_payload)
     
     def start_tracking(self):
         """Start the attention tracking in a separate thread."""
@@ -124,28 +157,22 @@ class AttentionWebSocketServer:
                 ret, frame = self.tracker.cap.read()
                 if not ret:
                     continue
+                capture_time = time.perf_counter()
                 
-                # Process frame for attention metrics
+                # Process frame for attention metrics (fps is windowed by the tracker's FPSCounter)
                 results = self.tracker.process_frame(frame)
+                self.tracker.fps_counter.record_latency(capture_time)
                 
-                # Update current data
-                self.current_data.update({
-                    'attention_score': results.get('attention_score', 0),
-                    'eye_ar': results.get('eye_ar', 0),
-                    'mouth_ar': results.get('mouth_ar', 0),
-                    'head_tilt': results.get('head_tilt', 0),
-                    'phone_detected': results.get('phone_detected', False),
-                    'fps': results.get('fps', 0),
-                    'timestamp': time.time(),
-                    'focus_status': results.get('focus_status', 'unknown'),
-                    'session_active': self.tracking_active
-                })
+                # Convert the native-typed AttentionMetrics to API format
+                data = results.to_api_data(
+                    self.tracker.frame_width, self.tracker.frame_height,
+                    self.tracking_active, time.time()
+                )
                 
-                # Calculate FPS
-                self.frame_count += 1
-                elapsed = time.time() - self.start_time
-                if elapsed > 0:
-                    self.current_data['fps'] = self.frame_count / elapsed
+                # Publish the new frame to the wire encoder and swap in the snapshot
+                self.frame_sequence += 1
+                self.wire_encoder.publish(self.frame_sequence, data)
+                self.current_snapshot = FrameSnapshot(self.frame_sequence, data)
                 
                 # Small delay to prevent overwhelming the system
                 time.sleep(0.033)  # ~30 FPS
@@ -177,9 +204,37 @@ class AttentionWebSocketServer:
                 }))
             
             elif command == 'get_data':
+                await websocket.send('{"type":"data","data":' + self.current_snapshot.json_text + '}')
+            
+            elif command == 'subscribe_wire':
+                # Switch this client to compact binary keyframe/delta frames
+                wire_format = data.get('format', 'struct')
+                if wire_format not in ('struct', 'msgpack'):
+                    raise ValueError(f"Unsupported wire format: {wire_format}")
+                if wire_format == 'msgpack' and not MSGPACK_AVAILABLE:
+                    raise ValueError("msgpack is not installed on the server")
+                self.wire_clients[websocket] = {'format': wire_format, 'ack': None}
+                await websocket.send(json.dumps({
+                    'type': 'status',
+                    'message': f'Subscribed to {wire_format} wire frames',
+                    'success': True
+                }))
+            
+            elif command == 'ack':
+                # Deltas are computed against the last acknowledged sequence
+                wire = self.wire_clients.get(websocket)
+                if wire is not None:
+                    wire['ack'] = data.get('sequence')
+            
+            elif command == 'get_status':
                 await websocket.send(json.dumps({
-                    'type': 'data',
-                    'data': self.current_data
+                    'type': 'status',
+                    'tracking_active': self.tracking_active,
+                    'clients_connected': len(self.clients),
+                    'frame_sequence': self.frame_sequence,
+                    'broadcast': self.hub.status(),
+                    'frame_timing': self.tracker.fps_counter.stats() if self.tracker else None,
+                    'timestamp': time.time()
                 }))
             
             elif command == 'ping':
@@ -203,16 +258,15 @@ class AttentionWebSocketServer:
         """Periodically broadcast current data to all clients."""
         while True:
             if self.clients and self.tracking_active:
-                await self.broadcast_data({
-                    'type': 'attention_data',
-                    'data': self.current_data
-                })
+                await self.broadcast_data()
             
-            await asyncio.sleep(0.1)  # 10 Hz update rate
+            # Full rate for clients that keep up - lagging clients are downsampled by the hub
+            await asyncio.sleep(self.broadcast_interval)
     
     async def start_server(self):
         """Start the WebSocket server."""
         print(f"Starting WebSocket server on {self.host}:{self.port}")
+        self.hub.attach_loop(asyncio.get_running_loop())
         
         # Start periodic broadcast task
         broadcast_task = asyncio.create_task(self.periodic_broadcast())
@@ -0,0 +1,308 @@
+"""
+Compact wire format for attention payloads.
+Keyframes carry every field, delta frames carry only the fields that changed
+since the client's last acknowledged sequence, plus a mask of fields that were
+cleared (became None). The `extra` object is always sent whole, so keys missing
+from it were removed.
+"""
+
+import json
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Frame types
+KEYFRAME = 0
+DELTA = 1
+
+WIRE_VERSION = 2
+
+# Field schema (order is the wire index - append only, never reorder)
+# f = float32, d = float64, i = int32, b = bool, s = utf-8 string, o = JSON object
+FIELD_SCHEMA = (
+    ('attention_score', 'f'),
+    ('eye_ar', 'f'),
+    ('mouth_ar', 'f'),
+    ('head_tilt', 'f'),
+    ('phone_detected', 'b'),
+    ('fps', 'f'),
+    ('timestamp', 'd'),
+    ('focus_status', 's'),
+    ('session_active', 'b'),
+    ('camera_active', 'b'),
+    ('frame_width', 'i'),
+    ('frame_height', 'i'),
+    ('face_visible', 'b'),
+    ('orientation_good', 'b'),
+    ('yaw', 'f'),
+    ('pitch', 'f'),
+    ('roll', 'f'),
+    ('eye_closed', 'b'),
+    ('yawning', 'b'),
+    ('hand_near_face', 'b'),
+    ('phone_confidence', 'f'),
+    ('posture_stable', 'b'),
+    ('status_messages', 'o'),
+    ('extra', 'o'),  # Any keys not covered by the schema
+)
+
+FIELD_NAMES = tuple(name for name, _ in FIELD_SCHEMA)
+FIELD_INDEX = {name: i for i, name in enumerate(FIELD_NAMES)}
+_EXTRA_INDEX = FIELD_INDEX['extra']
+
+# Header: version, frame type, sequence, base sequence, changed-field mask, cleared-field mask
+HEADER = struct.Struct('<BBIILL')
+
+_SCALAR_STRUCTS = {
+    'f': struct.Struct('<f'),
+    'd': struct.Struct('<d'),
+    'i': struct.Struct('<i'),
+    'b': struct.Struct('<?'),
+}
+_LENGTH = struct.Struct('<I')
+
+FORMATS = ('struct', 'msgpack', 'json')
+
+CONTENT_TYPES = {
+    'struct': 'application/octet-stream',
+    'msgpack': 'application/x-msgpack',
+    'json': 'application/json',
+}
+
+
+def _normalize(data: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Flatten a data dict into a schema-ordered tuple of wire values"""
+    values = []
+    for name, kind in FIELD_SCHEMA[:_EXTRA_INDEX]:
+        value = data.get(name)
+        if value is None:
+            values.append(None)
+        elif kind == 'f':
+            # Round-trip through float32 so unchanged values compare equal
+            values.append(_SCALAR_STRUCTS['f'].unpack(_SCALAR_STRUCTS['f'].pack(float(value)))[0])
+        elif kind == 'd':
+            values.append(float(value))
+        elif kind == 'i':
+            values.append(int(value))
+        elif kind == 'b':
+            values.append(bool(value))
+        elif kind == 's':
+            values.append(str(value))
+        else:
+            values.append(json.dumps(value, sort_keys=True, separators=(',', ':')))
+
+    extra = {key: value for key, value in data.items() if key not in FIELD_INDEX}
+    values.append(json.dumps(extra, sort_keys=True, separators=(',', ':')) if extra else None)
+    return tuple(values)
+
+
+def _pack_struct(frame_type: int, seq: int, base_seq: int, mask: int, cleared: int,
+                 values: Tuple[Any, ...]) -> bytes:
+    """Pack a frame as fixed-layout binary"""
+    parts = [HEADER.pack(WIRE_VERSION, frame_type, seq, base_seq, mask, cleared)]
+    for i, (_, kind) in enumerate(FIELD_SCHEMA):
+        if not mask & (1 << i):
+            continue
+        value = values[i]
+        if kind in _SCALAR_STRUCTS:
+            parts.append(_SCALAR_STRUCTS[kind].pack(value))
+        else:
+            encoded = value.encode('utf-8')
+            parts.append(_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+    return b''.join(parts)
+
+
+def _pack_mapping(frame_type: int, seq: int, base_seq: int, mask: int, cleared: int,
+                  values: Tuple[Any, ...]) -> Dict[str, Any]:
+    """Build the compact mapping used by the msgpack and json encodings"""
+    fields = {}
+    for i, (_, kind) in enumerate(FIELD_SCHEMA):
+        if mask & (1 << i):
+            value = values[i]
+            fields[i] = json.loads(value) if kind == 'o' else value
+    return {'v': WIRE_VERSION, 't': frame_type, 's': seq, 'b': base_seq, 'f': fields, 'c': cleared}
+
+
+class AttentionWireEncoder:
+    """
+    Encodes successive attention snapshots as keyframes and delta frames.
+    Encoded frames are cached so many clients at the same sequence share one encode.
+    """
+
+    def __init__(self, keyframe_interval: int = 30, history_size: int = 120,
+                 cache_size: int = 64):
+        """
+        Args:
+            keyframe_interval: Every Nth sequence is always sent as a keyframe
+            history_size: Snapshots kept for computing deltas against old acks
+            cache_size: Encoded frames kept for reuse across clients
+        """
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.history_size = max(1, history_size)
+        self.cache_size = cache_size
+
+        self.sequence = 0
+        self._history: "OrderedDict[int, Tuple[Any, ...]]" = OrderedDict()
+        self._cache: "OrderedDict[Tuple[int, int, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, seq: int, data: Dict[str, Any]):
+        """Record the snapshot for a new frame sequence"""
+        values = _normalize(data)
+        with self._lock:
+            self.sequence = seq
+            self._history[seq] = values
+            while len(self._history) > self.history_size:
+                self._history.popitem(last=False)
+
+    def encode(self, since: Optional[int] = None, fmt: str = 'struct') -> Tuple[int, bytes]:
+        """
+        Encode the latest snapshot for a client.
+
+        Args:
+            since: Last sequence the client acknowledged (None for a keyframe)
+            fmt: 'struct', 'msgpack' or 'json'
+
+        Returns:
+            (sequence, payload) - payload is empty when the client is up to date
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown wire format: {fmt}")
+        if fmt == 'msgpack' and not MSGPACK_AVAILABLE:
+            raise ValueError("msgpack is not installed")
+
+        with self._lock:
+            seq = self.sequence
+            if seq not in self._history:
+                return seq, b''
+            if since == seq:
+                return seq, b''
+
+            base = since if since in self._history and seq % self.keyframe_interval else None
+            key = (seq, base if base is not None else -1, fmt)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return seq, cached
+
+            values = self._history[seq]
+            mask = cleared = 0
+            if base is None:
+                frame_type, base_seq = KEYFRAME, 0
+                for i, value in enumerate(values):
+                    if value is not None:
+                        mask |= 1 << i
+            else:
+                frame_type, base_seq = DELTA, base
+                previous = self._history[base]
+                for i, value in enumerate(values):
+                    if value == previous[i]:
+                        continue
+                    if value is None:
+                        cleared |= 1 << i
+                    else:
+                        mask |= 1 << i
+
+            if fmt == 'struct':
+                payload = _pack_struct(frame_type, seq, base_seq, mask, cleared, values)
+            elif fmt == 'msgpack':
+                payload = msgpack.packb(_pack_mapping(frame_type, seq, base_seq, mask, cleared, values))
+            else:
+                payload = json.dumps(_pack_mapping(frame_type, seq, base_seq, mask, cleared, values),
+                                     separators=(',', ':')).encode('utf-8')
+
+            self._cache[key] = payload
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return seq, payload
+
+
+class AttentionWireDecoder:
+    """Client-side decoder that rebuilds the full data dict from wire frames"""
+
+    def __init__(self, fmt: str = 'struct', history_size: int = 120):
+        self.fmt = fmt
+        self.history_size = history_size
+        self.sequence: Optional[int] = None
+        self.state: Dict[str, Any] = {}
+        # Per sequence: (state, keys that came from `extra`)
+        self._states: "OrderedDict[int, Tuple[Dict[str, Any], frozenset]]" = OrderedDict()
+
+    def apply(self, payload: bytes) -> Dict[str, Any]:
+        """Apply a keyframe or delta and return the reconstructed data"""
+        if not payload:
+            return self.state
+
+        if self.fmt == 'struct':
+            frame_type, seq, base_seq, fields, cleared = self._unpack_struct(payload)
+        else:
+            message = msgpack.unpackb(payload, strict_map_key=False) if self.fmt == 'msgpack' else json.loads(payload)
+            if message['v'] != WIRE_VERSION:
+                raise ValueError(f"Unsupported wire version: {message['v']}")
+            frame_type, seq, base_seq, cleared = message['t'], message['s'], message['b'], message['c']
+            fields = {int(i): value for i, value in message['f'].items()}
+
+        if frame_type == KEYFRAME:
+            state, extra_keys = {}, frozenset()
+        elif base_seq in self._states:
+            # Deltas are relative to the acknowledged sequence, not the last frame received
+            base_state, extra_keys = self._states[base_seq]
+            state = dict(base_state)
+        else:
+            raise ValueError(f"Delta against unknown sequence {base_seq}")
+
+        for i, name in enumerate(FIELD_NAMES):
+            if cleared & (1 << i):
+                if i == _EXTRA_INDEX:
+                    for key in extra_keys:
+                        state.pop(key, None)
+                    extra_keys = frozenset()
+                else:
+                    state.pop(name, None)
+
+        for i, value in fields.items():
+            if i == _EXTRA_INDEX:
+                # `extra` is sent whole; keys it no longer has were removed
+                for key in extra_keys.difference(value):
+                    state.pop(key, None)
+                state.update(value)
+                extra_keys = frozenset(value)
+            else:
+                state[FIELD_NAMES[i]] = value
+
+        self.sequence = seq
+        self.state = state
+        self._states[seq] = (state, extra_keys)
+        while len(self._states) > self.history_size:
+            self._states.popitem(last=False)
+        return state
+
+    def _unpack_struct(self, payload: bytes):
+        """Unpack a fixed-layout binary frame"""
+        version, frame_type, seq, base_seq, mask, cleared = HEADER.unpack_from(payload, 0)
+        if version != WIRE_VERSION:
+            raise ValueError(f"Unsupported wire version: {version}")
+
+        offset = HEADER.size
+        fields = {}
+        for i, (_, kind) in enumerate(FIELD_SCHEMA):
+            if not mask & (1 << i):
+                continue
+            if kind in _SCALAR_STRUCTS:
+                fields[i] = _SCALAR_STRUCTS[kind].unpack_from(payload, offset)[0]
+                offset += _SCALAR_STRUCTS[kind].size
+            else:
+                (length,) = _LENGTH.unpack_from(payload, offset)
+                offset += _LENGTH.size
+                text = payload[offset:offset + length].decode('utf-8')
+                offset += length
+                fields[i] = text if kind == 's' else json.loads(text)
+        return frame_type, seq, base_seq, fields, cleared
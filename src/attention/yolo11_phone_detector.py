@@ -4,11 +4,14 @@ https://github.com/jasonli5/phone-detector
 This is the EXACT code that works perfectly!
 """
 
+import threading
 import time
 import cv2
 import numpy as np
 from typing import List, Dict, Any, Tuple, Optional
 
+from micro_batch import MicroBatcher
+
 # Try to import ultralytics, fall back gracefully if not available
 try:
     from ultralytics import YOLO
@@ -48,6 +51,60 @@ def get_screen_size():
 
 SCREEN_W, SCREEN_H = get_screen_size()
 
+# Loaded models shared by every detector in the process (one per model path).
+# Inference on a shared model is serialized by its lock.
+_shared_models: Dict[str, Tuple[Any, threading.Lock]] = {}
+_shared_models_lock = threading.Lock()
+
+
+def load_shared_model(model_path: str) -> Tuple[Any, threading.Lock]:
+    """Load a YOLO model once per process and return it with its inference lock"""
+    with _shared_models_lock:
+        if model_path not in _shared_models:
+            _shared_models[model_path] = (YOLO(model_path), threading.Lock())
+        return _shared_models[model_path]
+
+# Cross-session micro-batching of YOLO inference (off until configured)
+_batch_config = {'max_batch': 1, 'max_delay_ms': 10.0}
+_batchers: Dict[str, MicroBatcher] = {}
+
+
+def configure_batching(max_batch: int, max_delay_ms: float = 10.0):
+    """
+    Batch detect_phones calls from every detector sharing a model: frames from
+    different sessions are collected for up to `max_delay_ms` and run through
+    YOLO together. max_batch <= 1 turns batching off.
+    """
+    with _shared_models_lock:
+        _batch_config['max_batch'] = max_batch
+        _batch_config['max_delay_ms'] = max_delay_ms
+        for batcher in _batchers.values():
+            batcher.configure(max_batch, max_delay_ms)
+
+
+def batching_stats() -> List[Dict[str, Any]]:
+    return [batcher.stats() for batcher in list(_batchers.values())]
+
+
+def _shared_batcher(model_path: str) -> Optional[MicroBatcher]:
+    if _batch_config['max_batch'] <= 1:
+        return None
+    with _shared_models_lock:
+        if model_path not in _batchers:
+            _batchers[model_path] = MicroBatcher(
+                lambda frames: _infer_batch(model_path, frames),
+                max_batch=_batch_config['max_batch'],
+                max_delay_ms=_batch_config['max_delay_ms'],
+                name=f"yolo-{model_path}")
+        return _batchers[model_path]
+
+
+def _infer_batch(model_path: str, frames: List[np.ndarray]) -> list:
+    """One YOLO call for frames from several sessions"""
+    model, lock = _shared_models[model_path]
+    with lock:
+        return list(model(frames, verbose=False))
+
 class YOLOv11PhoneDetector:
     """
     EXACT implementation from jasonli5/phone-detector
@@ -65,6 +122,7 @@ class YOLOv11PhoneDetector:
         self.COOLDOWN_SEC = COOLDOWN_SEC
         self.STREAK_REQUIRED = STREAK_REQUIRED
         self.MIN_BOX_AREA_RATIO = MIN_BOX_AREA_RATIO
+        self.search_margin = 200  # Pixels searched around the face (lowered by the quality controller)
         
         # State tracking - EXACT from original
         self.last_trigger = 0
@@ -72,6 +130,7 @@ class YOLOv11PhoneDetector:
         
         # Initialize YOLO model - EXACT from original
         self.model = None
+        self.model_lock = threading.Lock()
         self.id2name = None
         self.wanted_ids = None
         self._load_model()
@@ -91,7 +150,7 @@ class YOLOv11PhoneDetector:
             return
             
         try:
-            self.model = YOLO(self.MODEL_PATH)
+            self.model, self.model_lock = load_shared_model(self.MODEL_PATH)
             self.id2name = self.model.names
             self.wanted_ids = {i for i, n in self.id2name.items() if n in self.TARGET_CLASSES}
             print(f"✅ YOLO model loaded successfully")
@@ -111,8 +170,13 @@ class YOLOv11PhoneDetector:
             H, W = frame.shape[:2]
             frame_area = float(H * W)
             
-            # Run YOLO inference - EXACT from original
-            results = self.model(frame, verbose=False)[0]
+            # Run YOLO inference - EXACT from original (batched with other sessions when enabled)
+            batcher = _shared_batcher(self.MODEL_PATH)
+            if batcher is not None:
+                results = batcher.submit(frame, caller=id(self))
+            else:
+                with self.model_lock:
+                    results = self.model(frame, verbose=False)[0]
             
             detections = []
             
@@ -178,7 +242,7 @@ class YOLOv11PhoneDetector:
         fx1, fy1, fx2, fy2 = face_bbox
         
         # Expand face area for detection
-        margin = 200  # Larger margin for phone detection
+        margin = self.search_margin  # Larger margin for phone detection
         search_x1 = max(0, fx1 - margin)
         search_y1 = max(0, fy1 - margin)
         search_x2 = min(frame.shape[1], fx2 + margin)